@@ -15,54 +15,84 @@
 # You should have received a copy of the GNU General Public License
 # along with mash.  If not, see <http://www.gnu.org/licenses/>
 #
-
 import json
+import logging
+import threading
+
+from collections import deque
 
 from amqpstorm import Connection
 
-from logging.handlers import SocketHandler
+_shippers = {}
+_shippers_lock = threading.Lock()
 
 
-class RabbitMQHandler(SocketHandler):
+class RabbitMQHandler(logging.Handler):
     """
     Log handler for sending messages to RabbitMQ.
+
+    Records are serialized and added to the ring buffer of a shared
+    log shipper which publishes them in a background thread. Emitting
+    a record never blocks on the broker, if the buffer is full the
+    oldest record is dropped.
+
+    Records below the handler level are filtered before they are
+    formatted so each destination can ship a different level.
     """
     def __init__(
         self, host='localhost', port=5672, exchange='logger',
         username='guest', password='guest',
-        routing_key='mash.logger'
+        routing_key='mash.logger', buffer_size=10000,
+        level=logging.NOTSET
     ):
         """
         Initialize the handler instance.
         """
-        super(RabbitMQHandler, self).__init__(host, port)
+        super(RabbitMQHandler, self).__init__(level)
 
+        self.host = host
+        self.port = port
         self.username = username
         self.password = password
         self.exchange = exchange
         self.routing_key = routing_key
+        self.shipper = get_log_shipper(
+            host, port, username, password, buffer_size
+        )
 
-    def makeSocket(self):
+    @property
+    def dropped(self):
         """
-        Create a new instance of RabbitMQ socket connection.
+        Number of records dropped by the shipper of the handler.
         """
-        return RabbitMQSocket(
-            self.host,
-            self.port,
-            self.username,
-            self.password,
-            self.exchange,
-            self.routing_key
-        )
+        return self.shipper.dropped
+
+    def emit(self, record):
+        """
+        Add the serialized record to the shipper buffer.
+        """
+        try:
+            self.shipper.put(
+                self.exchange,
+                self.routing_key,
+                self.serialize(record)
+            )
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        """
+        Publish all buffered records.
+        """
+        self.shipper.flush()
 
-    def makePickle(self, record):
+    def serialize(self, record):
         """
         Format the log message to a json string.
         """
-        rabbit_attrs = ['msg', 'job_id']
+        rabbit_attrs = ['created', 'job_id', 'levelno', 'name']
 
-        data = {}
-        record.msg = self.format(record)
+        data = {'msg': self.format(record)}
 
         for attr in rabbit_attrs:
             if hasattr(record, attr):
@@ -71,50 +101,89 @@ class RabbitMQHandler(SocketHandler):
         return json.dumps(data, sort_keys=True)
 
 
-class RabbitMQSocket(object):
+class LogShipper(object):
     """
-    RabbitMQ socket class.
+    Publish log messages from a bounded ring buffer.
+
+    Messages are published in a daemon thread over one connection.
+    The buffered messages for the same exchange and routing key are
+    published as a single json list per batch.
+
+    If the broker is unavailable the messages are kept and publishing
+    is retried, once the buffer is full the oldest messages are
+    dropped and counted.
+
+    Attributes
+
+    * :attr:`buffer_size`
+      Max number of buffered messages
+
+    * :attr:`batch_size`
+      Max number of messages published in one batch
 
-    Maintains a connection for logging and publishing
-    logs to exchange.
+    * :attr:`flush_interval`
+      Max seconds a message is buffered while the broker is available
+
+    * :attr:`retry_interval`
+      Seconds to wait before publishing again after a failure
+
+    * :attr:`dropped`
+      Number of messages dropped because the buffer was full
     """
     def __init__(
-        self, host, port, username, password, exchange, routing_key
+        self, host, port, username, password, buffer_size=10000,
+        batch_size=100, flush_interval=0.5, retry_interval=5
     ):
-        """
-        Initialize RabbitMQ socket instance.
-        """
         self.host = host
         self.port = port
         self.username = username
         self.password = password
-        self.exchange = exchange
-        self.routing_key = routing_key
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self.dropped = 0
+
         self.connection = None
         self.channel = None
-        self.open()
-        self.declare_exchange()
 
-    def close(self):
+        self._buffer = deque()
+        self._exchanges = set()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def _add(self, messages, first=False):
         """
-        Close socket connection.
+        Add the messages to the buffer and drop the oldest on overflow.
+
+        If first is set the messages are added before the buffered
+        messages.
         """
-        if self.channel and self.channel.is_open:
-            self.channel.close()
+        if first:
+            self._buffer.extendleft(reversed(messages))
+        else:
+            self._buffer.extend(messages)
 
-        if self.connection and self.connection.is_open:
-            self.connection.close()
+        while len(self._buffer) > self.buffer_size:
+            self._buffer.popleft()
+            self.dropped += 1
 
-    def declare_exchange(self):
-        self.channel.exchange.declare(
-            exchange=self.exchange,
-            exchange_type='direct',
-            durable=True
-        )
+    def _get_batch(self):
+        """
+        Remove and return the next batch of buffered messages.
+        """
+        batch = []
+
+        while self._buffer and len(batch) < self.batch_size:
+            batch.append(self._buffer.popleft())
+
+        return batch
 
-    def open(self):
-        """"
-        Create/open connection and declare logging exchange.
+    def _open(self):
+        """
+        Create/open connection and channel if closed.
         """
         if not self.connection or self.connection.is_closed:
             self.connection = Connection(
@@ -124,21 +193,115 @@ class RabbitMQSocket(object):
                 port=self.port,
                 kwargs={'heartbeat': 600}
             )
+            self._exchanges.clear()
 
         if not self.channel or self.channel.is_closed:
             self.channel = self.connection.channel()
+            self._exchanges.clear()
 
-    def sendall(self, msg):
+    def _publish(self, batch):
         """
-        Override socket sendall method to publish message to exchange.
+        Publish the batch with one message per destination.
         """
-        self.open()
-        self.channel.basic.publish(
-            body=msg,
-            routing_key=self.routing_key,
-            exchange=self.exchange,
-            properties={
-                'content_type': 'application/json',
-                'delivery_mode': 2
-            }
-        )
+        destinations = {}
+
+        for exchange, routing_key, body in batch:
+            destinations.setdefault((exchange, routing_key), []).append(body)
+
+        self._open()
+
+        for (exchange, routing_key), bodies in destinations.items():
+            if exchange not in self._exchanges:
+                self.channel.exchange.declare(
+                    exchange=exchange,
+                    exchange_type='direct',
+                    durable=True
+                )
+                self._exchanges.add(exchange)
+
+            self.channel.basic.publish(
+                body='[{0}]'.format(', '.join(bodies)),
+                routing_key=routing_key,
+                exchange=exchange,
+                properties={
+                    'content_type': 'application/json',
+                    'delivery_mode': 2
+                }
+            )
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+
+            if not self.flush():
+                self._wakeup.wait(self.retry_interval)
+
+    def close(self):
+        """
+        Close the connection of the shipper.
+        """
+        if self.channel and self.channel.is_open:
+            self.channel.close()
+
+        if self.connection and self.connection.is_open:
+            self.connection.close()
+
+    def flush(self):
+        """
+        Publish all buffered messages in batches.
+
+        Return False if the broker is unavailable, the messages
+        are kept in the buffer.
+        """
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = self._get_batch()
+
+                if not batch:
+                    break
+
+                try:
+                    self._publish(batch)
+                except Exception:
+                    with self._lock:
+                        self._add(batch, first=True)
+
+                    self.close()
+                    return False
+
+        return True
+
+    def put(self, exchange, routing_key, body):
+        """
+        Buffer the message and start the shipper thread on first use.
+        """
+        with self._lock:
+            self._add([(exchange, routing_key, body)])
+            full = len(self._buffer) >= self.batch_size
+
+            if not self._thread:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    daemon=True
+                )
+                self._thread.start()
+
+        if full:
+            self._wakeup.set()
+
+
+def get_log_shipper(host, port, username, password, buffer_size=10000):
+    """
+    Return the log shipper shared by all handlers for the broker.
+    """
+    key = (host, port, username, password)
+
+    with _shippers_lock:
+        if key not in _shippers:
+            _shippers[key] = LogShipper(
+                host, port, username, password, buffer_size
+            )
+
+        return _shippers[key]
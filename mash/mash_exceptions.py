@@ -179,6 +179,18 @@ class MashListenerServiceException(MashException):
     """
 
 
+class MashJobStoreException(MashException):
+    """
+    Exception raised if an error occurs in a job store.
+    """
+
+
+class MashTracingException(MashException):
+    """
+    Exception raised if an error occurs in job tracing.
+    """
+
+
 class MashCreateException(MashException):
     """
     Base exception for create service.
@@ -201,3 +213,23 @@ class MashTestCleanupException(MashException):
     """
     Exception raised if an error occurs in EC2 test_cleanup service.
     """
+
+
+class MashImageStreamException(MashException):
+    """
+    Exception raised if an image stream fails or stalls.
+    """
+
+
+class MashRequestException(MashException):
+    """
+    Exception raised if a request to a mash API is unsuccessful.
+
+    Attributes
+
+    * :attr:`status_code`
+        HTTP status code of the response
+    """
+    def __init__(self, message, status_code=None):
+        super(MashRequestException, self).__init__(message)
+        self.status_code = status_code
@@ -0,0 +1,199 @@
+# Copyright (c) 2026 SUSE LLC.  All rights reserved.
+#
+# This file is part of mash.
+#
+# mash is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# mash is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with mash.  If not, see <http://www.gnu.org/licenses/>
+#
+
+import threading
+
+from collections import Counter, deque, OrderedDict
+
+
+class AdmissionController(object):
+    """
+    Limit the number of concurrent jobs per cloud, account and region.
+
+    Jobs within the limits are admitted immediately. Other jobs wait
+    in a queue per cloud and are admitted round robin between clouds
+    as running jobs are released, so a backlog for one cloud does not
+    hold up jobs for another.
+
+    Attributes
+
+    * :attr:`limits`
+      Dictionary of cloud name to the max number of concurrent jobs
+      for the cloud, each account and each region. For example
+      {'ec2': {'cloud': 10, 'account': 3, 'region': 5}}
+
+    * :attr:`admit`
+      Callable run with the job id of each admitted job
+
+    * :attr:`park`
+      Optional callable run with each job that has to wait. It runs
+      before the job can be admitted.
+    """
+    scopes = ('cloud', 'account', 'region')
+
+    def __init__(self, limits, admit, park=None):
+        self.limits = limits or {}
+        self.admit = admit
+        self.park = park
+
+        self._running = {}
+        self._counts = Counter()
+        self._waiting = OrderedDict()
+        self._waiting_ids = set()
+        self._lock = threading.Lock()
+
+    def __contains__(self, job_id):
+        with self._lock:
+            return job_id in self._running or job_id in self._waiting_ids
+
+    def _get_keys(self, job):
+        """
+        Return the limited keys the job counts against.
+        """
+        limits = self.limits.get(job.cloud, {})
+        accounts, regions = job.get_accounts_and_regions()
+        names = {
+            'cloud': [job.cloud],
+            'account': accounts,
+            'region': regions
+        }
+
+        keys = []
+        for scope in self.scopes:
+            if limits.get(scope):
+                for name in sorted(names[scope]):
+                    keys.append((job.cloud, scope, name))
+
+        return keys
+
+    def _has_capacity(self, job, keys):
+        """
+        Return True if the job keys are all below their limits.
+        """
+        limits = self.limits.get(job.cloud, {})
+
+        for key in keys:
+            if self._counts[key] >= limits[key[1]]:
+                return False
+
+        return True
+
+    def _start(self, job_id, keys):
+        """
+        Count the job as running against all of its keys.
+        """
+        self._running[job_id] = keys
+        self._counts.update(keys)
+
+    def _admit_waiting(self):
+        """
+        Admit waiting jobs round robin between clouds.
+
+        Within a cloud the first waiting job with capacity is admitted
+        so a job for a busy account does not block other accounts.
+        """
+        admitted = []
+
+        while True:
+            progress = False
+
+            for cloud in list(self._waiting):
+                queue = self._waiting[cloud]
+
+                for job, keys in queue:
+                    if self._has_capacity(job, keys):
+                        queue.remove((job, keys))
+                        self._waiting_ids.discard(job.id)
+                        self._start(job.id, keys)
+                        admitted.append(job.id)
+                        progress = True
+                        break
+
+                if queue:
+                    self._waiting.move_to_end(cloud)
+                else:
+                    del self._waiting[cloud]
+
+            if not progress:
+                return admitted
+
+    def submit(self, job):
+        """
+        Admit the job or queue it until it is within the limits.
+
+        Return True if the job was admitted.
+        """
+        keys = self._get_keys(job)
+
+        with self._lock:
+            if self._has_capacity(job, keys):
+                self._start(job.id, keys)
+                admitted = True
+            else:
+                if self.park:
+                    self.park(job)
+
+                self._waiting.setdefault(job.cloud, deque()).append(
+                    (job, keys)
+                )
+                self._waiting_ids.add(job.id)
+                admitted = False
+
+        if admitted:
+            self.admit(job.id)
+
+        return admitted
+
+    def get_running_count(self):
+        """
+        Return the number of admitted jobs that are not released.
+        """
+        with self._lock:
+            return len(self._running)
+
+    def get_waiting_count(self):
+        """
+        Return the number of jobs waiting for capacity.
+        """
+        with self._lock:
+            return len(self._waiting_ids)
+
+    def release(self, job_id):
+        """
+        Release the limits held by the job and admit waiting jobs.
+
+        A waiting job is removed from the queue.
+        """
+        with self._lock:
+            if job_id in self._waiting_ids:
+                self._waiting_ids.discard(job_id)
+                for cloud, queue in list(self._waiting.items()):
+                    for job, keys in queue:
+                        if job.id == job_id:
+                            queue.remove((job, keys))
+                            break
+
+                    if not queue:
+                        del self._waiting[cloud]
+
+            keys = self._running.pop(job_id, [])
+            self._counts.subtract(keys)
+            admitted = self._admit_waiting()
+
+        for admitted_id in admitted:
+            self.admit(admitted_id)
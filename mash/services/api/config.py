@@ -40,10 +40,22 @@ class Config(object):
     def AMQP_PASS(self):
         return self.config.get_amqp_pass()
 
+    @property
+    def AMQP_POOL_SIZE(self):
+        return self.config.get_amqp_pool_size()
+
+    @property
+    def AMQP_BATCH_CONFIRMS(self):
+        return self.config.get_amqp_batch_confirms()
+
     @property
     def LOG_FILE(self):
         return self.config.get_log_file('api')
 
+    @property
+    def JOB_LOG_DIRECTORY(self):
+        return self.config.get_job_log_directory()
+
     @property
     def CLOUD_DATA(self):
         return self.config.get_cloud_data()
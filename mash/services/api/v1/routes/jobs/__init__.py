@@ -30,7 +30,12 @@ from mash.services.api.v1.schema import (
     validation_error,
     job_list
 )
-from mash.services.api.v1.utils.jobs import delete_job, get_job, get_jobs
+from mash.services.api.v1.utils.jobs import (
+    delete_job,
+    get_job,
+    get_job_log,
+    get_jobs
+)
 from mash.services.database.routes.jobs import job_response, job_data
 
 
@@ -134,3 +139,41 @@ class Job(Resource):
             return make_response(jsonify(job), 200)
         else:
             return make_response(jsonify({'msg': 'Job not found'}), 404)
+
+
+@api.route('/<string:job_id>/log')
+@api.doc(security='apiKey')
+@api.response(401, 'Unauthorized', default_response)
+@api.response(422, 'Not processable', default_response)
+class JobLog(Resource):
+    @api.doc('get_job_log')
+    @api.doc(params={
+        'start': 'Unix time of the first line to read',
+        'end': 'Unix time to read lines until (exclusive)',
+        'service': 'Only read lines logged by the service, '
+                   'for example DownloadService',
+        'level': 'Only read lines with at least the numeric log level',
+        'position': 'Position returned by the previous read, '
+                    'to only read new lines'
+    })
+    @jwt_required()
+    @api.response(200, 'Success')
+    @api.response(404, 'Not found', default_response)
+    def get(self, job_id):
+        """
+        Get the log lines of the job.
+        """
+        log = get_job_log(
+            job_id,
+            get_jwt_identity(),
+            start=request.args.get('start', type=float),
+            end=request.args.get('end', type=float),
+            service=request.args.get('service'),
+            level=request.args.get('level', type=int),
+            position=request.args.get('position', 0, type=int)
+        )
+
+        if log is None:
+            return make_response(jsonify({'msg': 'Job not found'}), 404)
+
+        return make_response(jsonify(log), 200)
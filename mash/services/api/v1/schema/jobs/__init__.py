@@ -309,6 +309,14 @@ base_job_message = {
                            'delete the image and tarball from storage. '
                            'Default is False and the job will fail if the '
                            'image already exists.'
+        },
+        'transfer_priority': {
+            'type': 'string',
+            'enum': ['high', 'normal', 'low'],
+            'example': 'normal',
+            'description': 'Priority class of the image downloads and '
+                           'uploads of the job in the bandwidth of the '
+                           'node. The default class is normal.'
         }
     },
     'additionalProperties': False,
@@ -16,42 +16,208 @@
 # along with mash.  If not, see <http://www.gnu.org/licenses/>
 #
 
+import queue
 import sys
+import threading
 
-from amqpstorm import Connection
+from contextlib import contextmanager, suppress
+
+from amqpstorm import AMQPError, Connection
 from flask import current_app
 
+from mash.mash_exceptions import MashRabbitConnectionException
+from mash.services.publisher import MashPublisher
+
 module = sys.modules[__name__]
 
-connection = None
-channel = None
+pool = None
+publisher = None
+lock = threading.Lock()
+
+
+class ChannelPool(object):
+    """
+    Thread safe pool of AMQP channels in confirm mode.
+
+    Each pooled channel has its own connection so concurrent requests
+    do not serialize on one channel. Channels are health checked on
+    checkout and replaced if the channel or connection was closed.
+    """
+    def __init__(self, host, user, password, size=4, timeout=30):
+        self.host = host
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def connect(self):
+        """
+        Open a new connection to the AMQP broker.
+        """
+        return Connection(
+            self.host,
+            self.user,
+            self.password,
+            kwargs={'heartbeat': 600}
+        )
+
+    def _open(self):
+        """
+        Open a new connection and confirm mode channel.
+        """
+        connection = self.connect()
+        channel = connection.channel()
+        channel.confirm_deliveries()
+        return connection, channel
+
+    @staticmethod
+    def _close(connection, channel):
+        """
+        Close the channel and connection ignoring any AMQP errors.
+        """
+        with suppress(AMQPError):
+            if channel.is_open:
+                channel.close()
+
+        with suppress(AMQPError):
+            if connection.is_open:
+                connection.close()
+
+    def checkout(self):
+        """
+        Return a healthy (connection, channel) pair from the pool.
+
+        A new pair is opened if no idle pair is available. Raises
+        MashRabbitConnectionException if all pairs are in use after
+        the pool timeout.
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise MashRabbitConnectionException(
+                'No AMQP channel available in pool.'
+            )
+
+        try:
+            while True:
+                try:
+                    connection, channel = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._open()
+
+                if connection.is_open and channel.is_open:
+                    return connection, channel
+
+                self._close(connection, channel)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def checkin(self, connection, channel, discard=False):
+        """
+        Return the pair to the pool or close it if discarded.
+        """
+        if discard:
+            self._close(connection, channel)
+        else:
+            self._idle.put((connection, channel))
 
+        self._slots.release()
 
-def connect():
-    module.connection = Connection(
-        current_app.config['AMQP_HOST'],
-        current_app.config['AMQP_USER'],
-        current_app.config['AMQP_PASS'],
-        kwargs={'heartbeat': 600}
-    )
-    module.channel = connection.channel()
-    channel.confirm_deliveries()
+    @contextmanager
+    def channel(self):
+        """
+        Check out a channel for the duration of the context.
+
+        The channel is discarded if an AMQP error occurs.
+        """
+        connection, channel = self.checkout()
+
+        try:
+            yield channel
+        except AMQPError:
+            self.checkin(connection, channel, discard=True)
+            raise
+        except Exception:
+            self.checkin(connection, channel)
+            raise
+        else:
+            self.checkin(connection, channel)
+
+    def close(self):
+        """
+        Close all idle channels and connections.
+        """
+        while True:
+            try:
+                connection, channel = self._idle.get_nowait()
+            except queue.Empty:
+                break
+
+            self._close(connection, channel)
+
+
+def get_pool():
+    """
+    Return the process wide channel pool, creating it on first use.
+    """
+    with lock:
+        if not module.pool:
+            module.pool = ChannelPool(
+                current_app.config['AMQP_HOST'],
+                current_app.config['AMQP_USER'],
+                current_app.config['AMQP_PASS'],
+                size=current_app.config['AMQP_POOL_SIZE']
+            )
+
+    return module.pool
+
+
+def get_publisher():
+    """
+    Return the process wide batching publisher.
+
+    Messages published concurrently from request threads are
+    confirmed together in a single broker transaction.
+    """
+    channel_pool = get_pool()
+
+    with lock:
+        if not module.publisher:
+            module.publisher = MashPublisher(connect=channel_pool.connect)
+
+    return module.publisher
 
 
 def publish(exchange, routing_key, message):
     """
     Publish message to the provided exchange with the routing key.
+
+    If AMQP_BATCH_CONFIRMS is enabled the message is confirmed in a
+    batch with other concurrent messages, otherwise it is confirmed
+    on a pooled channel.
     """
-    if not channel or channel.is_closed:
-        connect()
-
-    channel.basic.publish(
-        body=message,
-        routing_key=routing_key,
-        exchange=exchange,
-        properties={
-            'content_type': 'application/json',
-            'delivery_mode': 2
-        },
-        mandatory=True
-    )
+    if current_app.config['AMQP_BATCH_CONFIRMS']:
+        get_publisher().publish(
+            exchange,
+            routing_key,
+            message,
+            properties={
+                'content_type': 'application/json',
+                'delivery_mode': 2
+            },
+            mandatory=True
+        ).result()
+        return
+
+    with get_pool().channel() as channel:
+        channel.basic.publish(
+            body=message,
+            routing_key=routing_key,
+            exchange=exchange,
+            properties={
+                'content_type': 'application/json',
+                'delivery_mode': 2
+            },
+            mandatory=True
+        )
@@ -17,12 +17,14 @@
 #
 
 import json
+import os
 import uuid
 
 from dateutil import parser
 from flask import current_app
 
 from mash.services.api.v1.utils.amqp import publish
+from mash.services.logger.job_log_store import JobLogReader
 from mash.mash_exceptions import MashJobException
 from mash.utils.mash_utils import normalize_dictionary
 from mash.services.status_levels import RUNNING
@@ -195,6 +197,36 @@ def get_job(job_id, user_id):
     return response.json()
 
 
+def get_job_log(
+    job_id, user_id, start=None, end=None, service=None, level=None,
+    position=0
+):
+    """
+    Read the selected log lines of the job for given user.
+
+    Returns None if the user has no job with the job_id. The result
+    has the log lines and the position to continue from, a read from
+    the position of the previous read returns the new lines only.
+    """
+    if not get_job(job_id, user_id):
+        return None
+
+    reader = JobLogReader(os.path.join(
+        current_app.config['JOB_LOG_DIRECTORY'],
+        ''.join([job_id, '.log'])
+    ))
+    lines = []
+
+    try:
+        for entry in reader.entries(start, end, service, level, position):
+            position = entry[0] + 1
+            lines.append(entry[4])
+    finally:
+        reader.close()
+
+    return {'log': ''.join(lines), 'position': position}
+
+
 def get_jobs(user_id, page=None, per_page=None):
     """
     Retrieve all jobs for user.
@@ -0,0 +1,352 @@
+# Copyright (c) 2026 SUSE LLC.  All rights reserved.
+#
+# This file is part of mash.
+#
+# mash is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# mash is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with mash.  If not, see <http://www.gnu.org/licenses/>
+#
+
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from amqpstorm import AMQPError
+from apscheduler import events
+from pytz import utc
+
+try:
+    import aio_pika
+except ImportError:  # pragma: no cover
+    aio_pika = None
+
+from mash.mash_exceptions import MashListenerServiceException
+
+
+class AsyncMessage(object):
+    """
+    Wrap an aio-pika message for the listener service callbacks.
+
+    The callbacks run in executor threads so the ack is run on the
+    event loop and waits for the result.
+    """
+    def __init__(self, message, loop):
+        self.message = message
+        self.loop = loop
+        self.body = message.body
+        self.properties = {
+            'content_type': message.content_type,
+            'content_encoding': message.content_encoding,
+            'headers': message.headers
+        }
+
+    def ack(self):
+        asyncio.run_coroutine_threadsafe(
+            self.message.ack(), self.loop
+        ).result()
+
+    def nack(self, requeue=True):
+        asyncio.run_coroutine_threadsafe(
+            self.message.nack(requeue=requeue), self.loop
+        ).result()
+
+
+class AsyncPublisher(object):
+    """
+    Publish messages with aio-pika on the event loop of the engine.
+
+    Provides the publish method of MashPublisher so the listener
+    service publishes through it unchanged. The channel confirms
+    every message and unroutable mandatory messages fail.
+
+    Attributes
+
+    * :attr:`engine`
+      The engine running the event loop
+    """
+    def __init__(self, engine):
+        self.engine = engine
+        self.channel = None
+
+    async def open(self, connection):
+        """
+        Open the publisher channel on the connection.
+        """
+        self.channel = await connection.channel(
+            publisher_confirms=True,
+            on_return_raises=True
+        )
+
+    @staticmethod
+    def _get_message(body, properties):
+        """
+        Return the aio-pika message for the amqpstorm style properties.
+        """
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+
+        expiration = properties.get('expiration')
+        if expiration is not None:
+            # Expiration property is in milliseconds
+            expiration = int(expiration) / 1000
+
+        return aio_pika.Message(
+            body,
+            headers=properties.get('headers'),
+            content_type=properties.get('content_type'),
+            content_encoding=properties.get('content_encoding'),
+            delivery_mode=properties.get('delivery_mode'),
+            expiration=expiration,
+            message_id=properties.get('message_id')
+        )
+
+    async def _publish(
+        self, exchange, routing_key, body, properties, mandatory
+    ):
+        """
+        Publish the message and wait for the broker confirm.
+        """
+        try:
+            if exchange:
+                target = await self.channel.get_exchange(
+                    exchange, ensure=False
+                )
+            else:
+                target = self.channel.default_exchange
+
+            await target.publish(
+                self._get_message(body, properties),
+                routing_key,
+                mandatory=mandatory
+            )
+        except Exception as error:
+            raise AMQPError(
+                'Message not delivered: {0}'.format(error)
+            )
+
+        return True
+
+    def publish(
+        self, exchange, routing_key, body, properties=None, mandatory=True
+    ):
+        """
+        Publish a message from any thread and return its future.
+
+        The future result is True once the broker has confirmed the
+        message or the future raises the AMQPError that failed it.
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self._publish(
+                exchange,
+                routing_key,
+                body,
+                dict(properties or {}),
+                mandatory
+            ),
+            self.engine.loop
+        )
+
+    def stop(self):
+        """
+        The channel is closed with the connection of the engine.
+        """
+        pass
+
+
+class AsyncListenerEngine(object):
+    """
+    Run the jobs of a listener service on an asyncio event loop.
+
+    The service queues are consumed and messages are published with
+    the aio-pika client. Jobs that implement the run_job_async
+    coroutine run as tasks on the loop so waiting jobs do not hold a
+    thread. Other jobs are offloaded to a thread pool executor.
+
+    Message callbacks and job results are handled one at a time in
+    a separate executor with the same listener service methods used
+    by the thread engine.
+
+    Attributes
+
+    * :attr:`service`
+      The listener service
+
+    * :attr:`thread_pool_count`
+      Number of threads for jobs with a blocking run_job method
+    """
+    def __init__(self, service, thread_pool_count):
+        if not aio_pika:
+            raise MashListenerServiceException(
+                'The asyncio listener engine requires the aio-pika module.'
+            )
+
+        self.service = service
+        self.thread_pool_count = thread_pool_count
+        self.loop = None
+        self.stopping = None
+        self.stop_requested = False
+        self.tasks = set()
+        self.pending_jobs = []
+        self.publisher = AsyncPublisher(self)
+
+        self.executor = None
+        self.handler_executor = None
+
+    async def _consume(
+        self, connection, prefetch_count, queue, exchange, callback
+    ):
+        """
+        Consume the queue with callback on a new channel.
+        """
+        channel = await connection.channel()
+        await channel.set_qos(prefetch_count=prefetch_count)
+        queue = await channel.declare_queue(
+            self.service._get_queue_name(exchange, queue),
+            durable=True
+        )
+
+        async def on_message(message):
+            await self.loop.run_in_executor(
+                self.handler_executor,
+                callback,
+                AsyncMessage(message, self.loop)
+            )
+
+        consumer_tag = await queue.consume(on_message)
+        return queue, consumer_tag
+
+    async def _run(self):
+        """
+        Consume the service queues until the engine is stopped.
+
+        Running jobs finish before the AMQP connection is closed.
+        """
+        self.loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        self.executor = ThreadPoolExecutor(self.thread_pool_count)
+        self.handler_executor = ThreadPoolExecutor(1)
+
+        if self.stop_requested:
+            self.stopping.set()
+
+        # Jobs admitted before the loop was running
+        for job_id in self.pending_jobs:
+            self._start_job(job_id)
+
+        connection = await aio_pika.connect_robust(
+            host=self.service.amqp_host,
+            login=self.service.amqp_user,
+            password=self.service.amqp_pass
+        )
+        connection.reconnect_callbacks.add(
+            lambda sender: self.service.amqp_reconnects.inc()
+        )
+
+        try:
+            await self.publisher.open(connection)
+
+            consumers = [
+                await self._consume(
+                    connection,
+                    self.service.service_prefetch_count,
+                    self.service.service_queue,
+                    self.service.service_exchange,
+                    self.service._handle_service_message
+                ),
+                await self._consume(
+                    connection,
+                    self.service.listener_prefetch_count,
+                    self.service.listener_queue,
+                    self.service.prev_service,
+                    self.service._handle_listener_message
+                )
+            ]
+
+            await self.stopping.wait()
+
+            for queue, consumer_tag in consumers:
+                await queue.cancel(consumer_tag)
+
+            if self.tasks:
+                await asyncio.gather(*self.tasks, return_exceptions=True)
+        finally:
+            await connection.close()
+            self.executor.shutdown()
+            self.handler_executor.shutdown()
+
+    async def _run_job(self, job_id):
+        """
+        Run the job and process the result like a scheduler event.
+        """
+        job = self.service.jobs[job_id]
+        exception = None
+
+        try:
+            if asyncio.iscoroutinefunction(
+                getattr(job, 'run_job_async', None)
+            ):
+                await job.process_job_async()
+            else:
+                await self.loop.run_in_executor(
+                    self.executor, self.service._start_job, job_id
+                )
+        except Exception as error:
+            exception = error
+
+        event = events.JobExecutionEvent(
+            events.EVENT_JOB_ERROR if exception else events.EVENT_JOB_EXECUTED,
+            job_id,
+            'default',
+            datetime.now(utc),
+            exception=exception
+        )
+        await self.loop.run_in_executor(
+            self.handler_executor, self.service._process_job_result, event
+        )
+
+    def _start_job(self, job_id):
+        """
+        Start a task for the job unless the engine is stopping.
+        """
+        if self.stopping.is_set():
+            # The listener message is requeued when the channel closes.
+            return
+
+        task = self.loop.create_task(self._run_job(job_id))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def run(self):
+        """
+        Run the event loop until the engine is stopped.
+        """
+        asyncio.run(self._run())
+
+    def schedule(self, job_id):
+        """
+        Start the job on the event loop, can be called from any thread.
+        """
+        if not self.loop:
+            self.pending_jobs.append(job_id)
+            return
+
+        self.loop.call_soon_threadsafe(self._start_job, job_id)
+
+    def stop(self):
+        """
+        Stop consuming and return from run once running jobs finish.
+        """
+        self.stop_requested = True
+
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.stopping.set)
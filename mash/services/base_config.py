@@ -114,16 +114,113 @@ class BaseConfig(object):
             dir=log_dir, service=service
         )
 
+    def get_trace_file(self, service):
+        """
+        Return the file the trace spans of the service are exported to.
+
+        :rtype: string
+        """
+        log_dir = self.get_log_directory()
+        return '{dir}{service}_spans.log'.format(
+            dir=log_dir, service=service
+        )
+
+    def get_trace_exporter(self):
+        """
+        Return the exporter type for trace spans, file or none.
+
+        :rtype: string
+        """
+        trace_exporter = self._get_attribute(
+            attribute='trace_exporter'
+        )
+        return trace_exporter or Defaults.get_trace_exporter()
+
+    def get_job_log_directory(self):
+        """
+        Return the directory of the job log files.
+
+        :rtype: string
+        """
+        log_dir = os.path.join(self.get_log_directory(), 'jobs')
+        return os.path.expanduser(os.path.normpath(log_dir))
+
     def get_job_log_file(self, job_id):
         """
         Return log file given the job_id.
 
         :rtype: string
         """
-        log_file = os.path.join(
-            self.get_log_directory(), 'jobs', ''.join([job_id, '.log'])
+        return os.path.join(
+            self.get_job_log_directory(), ''.join([job_id, '.log'])
         )
-        return os.path.expanduser(os.path.normpath(log_file))
+
+    def get_job_log_cache_size(self):
+        """
+        Return the max number of job log files kept open.
+
+        :rtype: int
+        """
+        job_log_cache_size = self._get_attribute(
+            attribute='job_log_cache_size'
+        )
+        return job_log_cache_size or Defaults.get_job_log_cache_size()
+
+    def get_job_log_buffer_size(self):
+        """
+        Return the number of buffered job log lines that triggers a write.
+
+        :rtype: int
+        """
+        job_log_buffer_size = self._get_attribute(
+            attribute='job_log_buffer_size'
+        )
+        return job_log_buffer_size or Defaults.get_job_log_buffer_size()
+
+    def get_job_log_flush_interval(self):
+        """
+        Return the max seconds job log lines are buffered.
+
+        :rtype: int
+        """
+        job_log_flush_interval = self._get_attribute(
+            attribute='job_log_flush_interval'
+        )
+        return job_log_flush_interval or \
+            Defaults.get_job_log_flush_interval()
+
+    def get_job_log_fsync_interval(self):
+        """
+        Return the min seconds between syncs of the job log files.
+
+        With 0 the files are synced after every write.
+
+        :rtype: int
+        """
+        job_log_fsync_interval = self._get_attribute(
+            attribute='job_log_fsync_interval'
+        )
+        return job_log_fsync_interval or \
+            Defaults.get_job_log_fsync_interval()
+
+    def get_job_log_compress_after(self):
+        """
+        Return the seconds without new lines until a job log is compressed.
+
+        By default job logs are not compressed. Compressed logs are
+        replaced by the frame compressed file which can be read with
+        JobLogReader only, so compression is opt-in.
+
+        :rtype: int
+        """
+        job_log_compress_after = self._get_attribute(
+            attribute='job_log_compress_after'
+        )
+
+        if job_log_compress_after is None:
+            return Defaults.get_job_log_compress_after()
+
+        return job_log_compress_after
 
     def get_cloud_data(self):
         """
@@ -200,6 +297,54 @@ class BaseConfig(object):
 
         return amqp_pass or Defaults.get_amqp_pass()
 
+    def get_amqp_pool_size(self):
+        """
+        Return the max number of pooled amqp channels for the API.
+
+        :rtype: int
+        """
+        amqp_pool_size = self._get_attribute(
+            attribute='amqp_pool_size'
+        )
+
+        return amqp_pool_size or Defaults.get_amqp_pool_size()
+
+    def get_amqp_batch_confirms(self):
+        """
+        Return True if API messages are confirmed in batches.
+
+        :rtype: bool
+        """
+        amqp_batch_confirms = self._get_attribute(
+            attribute='amqp_batch_confirms'
+        )
+
+        return amqp_batch_confirms or Defaults.get_amqp_batch_confirms()
+
+    def get_message_format(self):
+        """
+        Return the wire format for messages published by services.
+
+        :rtype: string
+        """
+        message_format = self._get_attribute(
+            attribute='message_format'
+        )
+
+        return message_format or Defaults.get_message_format()
+
+    def get_message_compression(self):
+        """
+        Return the optional compression for published messages.
+
+        :rtype: string
+        """
+        message_compression = self._get_attribute(
+            attribute='message_compression'
+        )
+
+        return message_compression
+
     def get_smtp_host(self):
         """
         Return the smtp hostname.
@@ -277,6 +422,33 @@ class BaseConfig(object):
 
         return notification_subject or Defaults.get_notification_subject()
 
+    def get_notification_queue_size(self):
+        """
+        Return the max number of queued notification emails.
+
+        :rtype: int
+        """
+        notification_queue_size = self._get_attribute(
+            attribute='notification_queue_size'
+        )
+        return notification_queue_size or \
+            Defaults.get_notification_queue_size()
+
+    def get_notification_digest_window(self):
+        """
+        Return the seconds notifications are collected per recipient.
+
+        Notifications for a recipient within the window are sent as
+        one digest email. Digests are disabled by default.
+
+        :rtype: int
+        """
+        notification_digest_window = self._get_attribute(
+            attribute='notification_digest_window'
+        )
+        return notification_digest_window or \
+            Defaults.get_notification_digest_window()
+
     def get_credentials_url(self):
         """
         Return the credentials API URL.
@@ -309,6 +481,18 @@ class BaseConfig(object):
 
         return database_uri
 
+    def get_database_busy_timeout(self):
+        """
+        Return the seconds to wait for a locked SQLite database.
+
+        :rtype: int
+        """
+        database_busy_timeout = self._get_attribute(
+            attribute='database_busy_timeout'
+        )
+        return database_busy_timeout or \
+            Defaults.get_database_busy_timeout()
+
     def get_download_directory(self):
         """
         Return directory name for image download directory:
@@ -326,6 +510,64 @@ class BaseConfig(object):
         return download_directory if download_directory else \
             Defaults.get_download_dir()
 
+    def get_image_cache_directory(self):
+        """
+        Return the directory of the shared image download cache.
+
+        Images are downloaded into each job directory if no cache
+        directory is set.
+
+        :rtype: string
+        """
+        return self._get_attribute(attribute='image_cache_directory')
+
+    def get_bandwidth_limit(self):
+        """
+        Return the max bytes per second of all image transfers on the node.
+
+        Transfers are not throttled if no limit is set.
+
+        :rtype: int
+        """
+        return self._get_attribute(attribute='bandwidth_limit')
+
+    def get_bandwidth_directory(self):
+        """
+        Return the directory the transfers on the node register in.
+
+        :rtype: string
+        """
+        bandwidth_directory = self._get_attribute(
+            attribute='bandwidth_directory'
+        )
+        return bandwidth_directory or Defaults.get_bandwidth_directory()
+
+    def get_bandwidth_cloud_weights(self):
+        """
+        Return the bandwidth weight of the transfers per cloud.
+
+        Downloads use obs or s3 as cloud, clouds without weight have
+        a weight of 1.
+
+        :rtype: dict
+        """
+        cloud_weights = self._get_attribute(
+            attribute='bandwidth_cloud_weights'
+        )
+        return cloud_weights or {}
+
+    def get_bandwidth_priority_weights(self):
+        """
+        Return the bandwidth weight of the transfer priority classes.
+
+        :rtype: dict
+        """
+        priority_weights = self._get_attribute(
+            attribute='bandwidth_priority_weights'
+        )
+        return priority_weights or \
+            Defaults.get_bandwidth_priority_weights()
+
     def get_email_allowlist(self):
         """
         Return the list of allowlisted emails if it's configured.
@@ -370,6 +612,33 @@ class BaseConfig(object):
         )
         return max_oci_wait_seconds or Defaults.get_max_oci_wait_seconds()
 
+    def get_max_ec2_attempts(self):
+        """
+        Return the max number of attempts for EC2 API requests.
+
+        :return: int
+        """
+        max_ec2_attempts = self._get_attribute(attribute='max_ec2_attempts')
+        return max_ec2_attempts or Defaults.get_max_ec2_attempts()
+
+    def get_ec2_api_rate(self):
+        """
+        Return the max EC2 API requests per second per account and region.
+
+        :return: int
+        """
+        ec2_api_rate = self._get_attribute(attribute='ec2_api_rate')
+        return ec2_api_rate or Defaults.get_ec2_api_rate()
+
+    def get_ec2_api_burst(self):
+        """
+        Return the max burst of EC2 API requests per account and region.
+
+        :return: int
+        """
+        ec2_api_burst = self._get_attribute(attribute='ec2_api_burst')
+        return ec2_api_burst or Defaults.get_ec2_api_burst()
+
     def get_oci_upload_process_count(self):
         """
         Return the process count for OCI parallel image uploads..
@@ -403,6 +672,202 @@ class BaseConfig(object):
         )
         return publish_thread_pool_count or Defaults.get_publish_thread_pool_count()
 
+    def get_service_prefetch_count(self):
+        """
+        Return the prefetch count for the listener service job queue.
+
+        :return: int
+        """
+        service_prefetch_count = self._get_attribute(
+            attribute='service_prefetch_count'
+        )
+        return service_prefetch_count or Defaults.get_service_prefetch_count()
+
+    def get_listener_prefetch_count(self):
+        """
+        Return the prefetch count for the listener service message queue.
+
+        If not configured the listener services use their thread pool
+        count so in flight messages follow the number of job workers.
+
+        :return: int
+        """
+        listener_prefetch_count = self._get_attribute(
+            attribute='listener_prefetch_count'
+        )
+        return listener_prefetch_count
+
+    def get_publisher_batch_size(self):
+        """
+        Return the max number of queued messages published in one pass.
+
+        :return: int
+        """
+        publisher_batch_size = self._get_attribute(
+            attribute='publisher_batch_size'
+        )
+        return publisher_batch_size or Defaults.get_publisher_batch_size()
+
+    def get_retry_policy(self, service_name):
+        """
+        Return the retry policy for failed jobs of the listener service.
+
+        The policy has the max_attempts, backoff, max_backoff and
+        retryable_exceptions keys. Jobs are not retried by default.
+
+        :rtype: dict
+        """
+        retry_policies = self._get_attribute(
+            attribute='retry_policies'
+        ) or {}
+        return retry_policies.get(service_name) or {}
+
+    def get_listener_engine(self, service_name):
+        """
+        Return the engine used to run the jobs of the listener service.
+
+        The thread engine (default) runs jobs in a thread pool. The
+        asyncio engine consumes and publishes with aio-pika and runs
+        jobs that implement run_job_async, such as EC2 replicate, on
+        an event loop.
+
+        :rtype: string
+        """
+        listener_engines = self._get_attribute(
+            attribute='listener_engines'
+        ) or {}
+        return listener_engines.get(service_name) or \
+            Defaults.get_listener_engine()
+
+    def get_job_concurrency_limits(self):
+        """
+        Return the max number of concurrent jobs per cloud.
+
+        Limits are set per cloud for all jobs of the cloud (cloud),
+        the jobs of each account (account) and of each region (region).
+
+        :rtype: dict
+        """
+        job_concurrency_limits = self._get_attribute(
+            attribute='job_concurrency_limits'
+        )
+        return job_concurrency_limits or \
+            Defaults.get_job_concurrency_limits()
+
+    def get_shard_count(self, service_name):
+        """
+        Return the number of shards of the listener service.
+
+        Jobs of a service with more than one shard are routed to a
+        shard by job id. Each shard is served by one replica.
+
+        :rtype: int
+        """
+        sharded_services = self._get_attribute(
+            attribute='sharded_services'
+        ) or {}
+        return sharded_services.get(service_name) or \
+            Defaults.get_shard_count()
+
+    def get_shard_id(self):
+        """
+        Return the shard served by this replica of a sharded service.
+
+        The id is between 0 and the shard count of the service.
+
+        :rtype: int
+        """
+        shard_id = self._get_attribute(
+            attribute='shard_id'
+        )
+        return shard_id or Defaults.get_shard_id()
+
+    def get_job_store(self):
+        """
+        Return the type of store for the jobs of a service.
+
+        The file store (default) keeps a json file per job, the sqlite
+        store keeps the jobs in a database in the job directory.
+
+        :rtype: string
+        """
+        job_store = self._get_attribute(
+            attribute='job_store'
+        )
+        return job_store or Defaults.get_job_store()
+
+    def get_status_batch_size(self):
+        """
+        Return the max number of job status updates sent in one request.
+
+        :rtype: int
+        """
+        status_batch_size = self._get_attribute(
+            attribute='status_batch_size'
+        )
+        return status_batch_size or Defaults.get_status_batch_size()
+
+    def get_status_flush_interval(self):
+        """
+        Return the max seconds a job status update is buffered.
+
+        :rtype: int
+        """
+        status_flush_interval = self._get_attribute(
+            attribute='status_flush_interval'
+        )
+        return status_flush_interval or Defaults.get_status_flush_interval()
+
+    def get_metrics_host(self):
+        """
+        Return the address the service metrics endpoints listen on.
+
+        :rtype: string
+        """
+        metrics_host = self._get_attribute(
+            attribute='metrics_host'
+        )
+        return metrics_host or Defaults.get_metrics_host()
+
+    def get_metrics_port(self, service_name):
+        """
+        Return the port of the metrics endpoint for the service.
+
+        The endpoint is disabled if no port is set for the service.
+
+        :rtype: int
+        """
+        metrics_ports = self._get_attribute(
+            attribute='metrics_ports'
+        ) or {}
+        return metrics_ports.get(service_name)
+
+    def get_log_buffer_size(self):
+        """
+        Return the max number of log records buffered for RabbitMQ.
+
+        :rtype: int
+        """
+        log_buffer_size = self._get_attribute(
+            attribute='log_buffer_size'
+        )
+        return log_buffer_size or Defaults.get_log_buffer_size()
+
+    def get_log_ship_level(self, service_name):
+        """
+        Return the min level of the logs shipped to RabbitMQ.
+
+        Levels are set per service, all levels are shipped for a
+        service without a level.
+
+        :rtype: string
+        """
+        log_ship_levels = self._get_attribute(
+            attribute='log_ship_levels'
+        ) or {}
+        return log_ship_levels.get(service_name) or \
+            Defaults.get_log_ship_level()
+
     def get_auth_methods(self):
         """
         Return the list of allowed authentication methods.
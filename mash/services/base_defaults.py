@@ -33,6 +33,10 @@ class Defaults(object):
     def get_base_job_directory(self):
         return '/var/lib/mash/'
 
+    @classmethod
+    def get_bandwidth_directory(self):
+        return '/var/lib/mash/bandwidth/'
+
     @classmethod
     def get_job_directory(self, service_name):
         return '{0}_jobs/'.format(service_name)
@@ -65,6 +69,18 @@ class Defaults(object):
     def get_amqp_pass():
         return 'guest'
 
+    @staticmethod
+    def get_message_format():
+        return 'json'
+
+    @staticmethod
+    def get_amqp_pool_size():
+        return 4
+
+    @staticmethod
+    def get_amqp_batch_confirms():
+        return False
+
     @classmethod
     def get_azure_max_retry_attempts(self):
         return 5
@@ -89,6 +105,14 @@ class Defaults(object):
     def get_notification_subject():
         return '[MASH] Job Status Update'
 
+    @staticmethod
+    def get_notification_queue_size():
+        return 1000
+
+    @staticmethod
+    def get_notification_digest_window():
+        return 0
+
     @staticmethod
     def get_credentials_url():
         return 'http://localhost:8080/'
@@ -113,6 +137,22 @@ class Defaults(object):
     def get_oci_upload_process_count():
         return 3
 
+    @staticmethod
+    def get_max_ec2_attempts():
+        return 10
+
+    @staticmethod
+    def get_ec2_api_rate():
+        return 20
+
+    @staticmethod
+    def get_ec2_api_burst():
+        return 40
+
+    @staticmethod
+    def get_bandwidth_priority_weights():
+        return {'high': 4, 'normal': 2, 'low': 1}
+
     @staticmethod
     def get_base_thread_pool_count():
         return 10
@@ -121,6 +161,94 @@ class Defaults(object):
     def get_publish_thread_pool_count():
         return 50
 
+    @staticmethod
+    def get_service_prefetch_count():
+        return 10
+
+    @staticmethod
+    def get_publisher_batch_size():
+        return 100
+
+    @staticmethod
+    def get_retry_backoff():
+        return 30
+
+    @staticmethod
+    def get_retry_max_backoff():
+        return 900
+
+    @staticmethod
+    def get_retryable_exceptions():
+        return ['ConnectionError', 'TimeoutError']
+
+    @staticmethod
+    def get_listener_engine():
+        return 'thread'
+
+    @staticmethod
+    def get_job_concurrency_limits():
+        return {}
+
+    @staticmethod
+    def get_shard_count():
+        return 1
+
+    @staticmethod
+    def get_shard_id():
+        return 0
+
+    @staticmethod
+    def get_job_store():
+        return 'file'
+
+    @staticmethod
+    def get_database_busy_timeout():
+        return 30
+
+    @staticmethod
+    def get_status_batch_size():
+        return 100
+
+    @staticmethod
+    def get_status_flush_interval():
+        return 1
+
+    @staticmethod
+    def get_job_log_cache_size():
+        return 128
+
+    @staticmethod
+    def get_job_log_buffer_size():
+        return 500
+
+    @staticmethod
+    def get_job_log_flush_interval():
+        return 1
+
+    @staticmethod
+    def get_job_log_fsync_interval():
+        return 0
+
+    @staticmethod
+    def get_job_log_compress_after():
+        return 0
+
+    @staticmethod
+    def get_trace_exporter():
+        return 'file'
+
+    @staticmethod
+    def get_log_buffer_size():
+        return 10000
+
+    @staticmethod
+    def get_log_ship_level():
+        return 'DEBUG'
+
+    @staticmethod
+    def get_metrics_host():
+        return '0.0.0.0'
+
     @staticmethod
     def get_auth_methods():
         return ['password']
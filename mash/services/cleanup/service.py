@@ -24,6 +24,7 @@ from apscheduler.schedulers.background import BlockingScheduler
 from pytz import utc
 
 from mash.services.mash_service import MashService
+from mash.utils.image_cache import get_image_cache
 from mash.utils.mash_utils import setup_logfile
 
 
@@ -65,9 +66,20 @@ class CleanupService(MashService):
         now = time.time()
         cutoff = now - max_image_age * 86400
 
+        cache_dir = self.config.get_image_cache_directory()
+
         with os.scandir(download_dir) as scanner:
             for entry in scanner:
+                if cache_dir and entry.path == os.path.normpath(cache_dir):
+                    continue
+
                 if entry.is_dir(follow_symlinks=False):
                     if entry.stat().st_mtime < cutoff:
                         self.log.info('Purging {}'.format(entry.name))
                         shutil.rmtree(entry.path)
+
+        if cache_dir:
+            # Cached images are evicted once no job directory uses them
+            image_cache = get_image_cache(cache_dir)
+            for key in image_cache.purge(download_dir, cutoff):
+                self.log.info('Evicting cached image {}'.format(key))
@@ -20,6 +20,7 @@ import logging
 
 from flask import Flask
 from flask.logging import default_handler
+from sqlalchemy import event
 
 from mash.utils.mash_utils import setup_logfile, setup_rabbitmq_log_handler
 from mash.log.filter import BaseServiceFilter
@@ -34,6 +35,24 @@ def register_extensions(app):
     db.init_app(app)
     migrate.init_app(app, db)
 
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        with app.app_context():
+            event.listen(db.engine, 'connect', set_sqlite_pragma)
+
+
+def set_sqlite_pragma(dbapi_connection, connection_record):
+    """
+    Use WAL mode for new SQLite connections.
+
+    Readers do not block the writer in WAL mode and commits only
+    sync the WAL to disk, so bursts of writes do not serialize on
+    the database file lock.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.close()
+
 
 def create_app(config_object):
     """
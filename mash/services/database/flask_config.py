@@ -49,6 +49,18 @@ class Config(object):
     def SQLALCHEMY_DATABASE_URI(self):
         return self.config.get_database_uri()
 
+    @property
+    def SQLALCHEMY_ENGINE_OPTIONS(self):
+        if self.SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+            # Wait for the database lock instead of failing at once.
+            return {
+                'connect_args': {
+                    'timeout': self.config.get_database_busy_timeout()
+                }
+            }
+
+        return {}
+
     @property
     def CREDENTIALS_URL(self):
         return self.config.get_credentials_url()
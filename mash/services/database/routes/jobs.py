@@ -23,6 +23,7 @@ from flask_restx import marshal, fields, Model
 
 from mash.services.database.utils.jobs import (
     save_job_status,
+    save_job_statuses,
     get_job_by_user,
     get_jobs,
     delete_job_for_user,
@@ -76,6 +77,38 @@ def update_job_status():
     return make_response(jsonify({'msg': 'Job status updated'}), 200)
 
 
+@blueprint.route('/bulk', methods=['PUT'])
+def update_job_statuses():
+    try:
+        data = json.loads(request.data.decode())
+    except ValueError:
+        data = None
+
+    if not isinstance(data, list) or \
+            not all(isinstance(job_doc, dict) for job_doc in data):
+        msg = 'Job statuses must be a list of job status documents.'
+        current_app.logger.warning(msg)
+        return make_response(jsonify({'msg': msg}), 400)
+
+    try:
+        errors = save_job_statuses(data)
+    except Exception as error:
+        msg = 'Unable to update job statuses: {0}'.format(error)
+        current_app.logger.warning(msg)
+        return make_response(jsonify({'msg': msg}), 500)
+
+    for job_id, error in errors.items():
+        current_app.logger.warning(
+            'Unable to update job status: {0}'.format(error),
+            extra={'job_id': job_id}
+        )
+
+    return make_response(
+        jsonify({'msg': 'Job statuses updated', 'errors': errors}),
+        200
+    )
+
+
 @blueprint.route('/', methods=['POST'])
 def create_job():
     data = json.loads(request.data.decode())
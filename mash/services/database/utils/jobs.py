@@ -88,13 +88,10 @@ def delete_job_for_user(job_id, user_id):
         return 0
 
 
-def save_job_status(job_doc):
+def _apply_job_status(job, job_doc):
     """
-    Update job in database with new status.
-
-    The status is updated when each service finishes.
+    Update the job attributes with the status from a service.
     """
-    job = get_job(job_doc.pop('id'))
     job.prev_service = job_doc.pop('prev_service')
 
     status = job_doc.pop('status')
@@ -117,9 +114,102 @@ def save_job_status(job_doc):
     job.errors = job_doc.pop('errors', [])
     job.data = job_doc
 
+
+def save_job_status(job_doc):
+    """
+    Update job in database with new status.
+
+    The status is updated when each service finishes.
+    """
+    job = get_job(job_doc.pop('id'))
+    _apply_job_status(job, job_doc)
+
     try:
         db.session.add(job)
         db.session.commit()
     except Exception:
         db.session.rollback()
         raise
+
+
+def _save_job_updates(updates, errors):
+    """
+    Apply the status updates per job id and commit them.
+
+    Jobs that do not exist are added to errors.
+    """
+    jobs = {
+        job.job_id: job
+        for job in Job.query.filter(Job.job_id.in_(list(updates))).all()
+    }
+
+    for job_id, job_docs in updates.items():
+        if job_id not in jobs:
+            errors[job_id] = 'Job does not exist.'
+            continue
+
+        for job_doc in job_docs:
+            _apply_job_status(jobs[job_id], dict(job_doc))
+
+    try:
+        db.session.add_all(jobs.values())
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def save_job_statuses(job_docs):
+    """
+    Update jobs in database with a batch of status updates.
+
+    The affected jobs are loaded with one query, the updates are
+    applied in order and committed in one transaction. Updates for
+    jobs that do not exist and invalid updates are skipped.
+
+    If the batch fails the jobs are saved one at a time so only the
+    updates of the failing jobs are skipped. The error is raised if
+    no job can be saved.
+
+    Return a dictionary of job id to the error for each job with
+    a skipped update.
+    """
+    updates = {}
+    errors = {}
+
+    for job_doc in job_docs:
+        job_id = str(job_doc.pop('id', None))
+
+        missing_keys = [
+            key for key in ('prev_service', 'status', 'current_service')
+            if key not in job_doc
+        ]
+
+        if missing_keys:
+            errors[job_id] = 'Job status is missing: {0}.'.format(
+                ', '.join(missing_keys)
+            )
+            continue
+
+        updates.setdefault(job_id, []).append(job_doc)
+
+    try:
+        _save_job_updates(updates, errors)
+    except Exception as error:
+        if len(updates) < 2:
+            raise
+
+        failed = 0
+        for job_id, job_docs in updates.items():
+            try:
+                _save_job_updates({job_id: job_docs}, errors)
+            except Exception as job_error:
+                errors[job_id] = 'Unable to update job status: {0}'.format(
+                    job_error
+                )
+                failed += 1
+
+        if failed == len(updates):
+            raise error
+
+    return errors
@@ -26,7 +26,7 @@ from mash.mash_exceptions import MashDeprecateException
 from mash.services.mash_job import MashJob
 from mash.services.status_levels import SUCCESS
 from mash.utils.ec2 import (
-    get_session,
+    get_client,
     get_image
 )
 
@@ -71,16 +71,19 @@ class EC2MPDeprecateJob(MashJob):
         for account, region in self.deprecate_regions.items():
             credential = self.credentials[account]
 
-            session = get_session(
+            mp_client = get_client(
+                'marketplace-catalog',
                 credential['access_key_id'],
                 credential['secret_access_key'],
                 region
             )
-            mp_client = session.client('marketplace-catalog')
-            old_image = get_image(
-                session.client('ec2'),
-                self.old_cloud_image_name
+            ec2_client = get_client(
+                'ec2',
+                credential['access_key_id'],
+                credential['secret_access_key'],
+                region
             )
+            old_image = get_image(ec2_client, self.old_cloud_image_name)
             delivery_option_id = get_image_delivery_option_id(
                 mp_client,
                 self.entity_id,
@@ -0,0 +1,339 @@
+# Copyright (c) 2026 SUSE LLC.  All rights reserved.
+#
+# This file is part of mash.
+#
+# mash is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# mash is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with mash.  If not, see <http://www.gnu.org/licenses/>
+#
+
+import fnmatch
+import threading
+import time
+
+from obs_img_utils.exceptions import OBSImageConditionsException
+from obs_img_utils.rpm import compare_rpm_labels
+
+
+def _combine_version(version, release):
+    return '.'.join(filter(None, [version, release])) or 'unknown'
+
+
+def _check_version(condition, version, release):
+    """
+    Return True if the version and release meet the condition.
+
+    Versions are compared like OBSImageUtil does, a condition without
+    a version or release only compares the part it has.
+    """
+    if 'version' not in condition and 'release' not in condition:
+        return True
+
+    if 'version' not in condition:
+        version = expected_version = '0'
+    else:
+        expected_version = condition['version']
+
+    if 'release' not in condition:
+        release = expected_release = '0'
+    else:
+        expected_release = condition['release']
+
+    result = compare_rpm_labels(
+        (0, _combine_version(version, release), '0'),
+        (0, _combine_version(expected_version, expected_release), '0')
+    )
+    operator = condition.get('condition', '>=')
+
+    if operator in ('>=', '<=', '==') and result == 0:
+        return True
+    elif operator in ('<=', '<') and result < 0:
+        return True
+    elif operator in ('>=', '>') and result > 0:
+        return True
+
+    return False
+
+
+def check_build_conditions(build, downloader):
+    """
+    Check the conditions of the downloader against a polled build.
+
+    The build is the package index, image version and image release
+    of the polled OBSImageUtil. The status of each condition is set
+    and OBSImageConditionsException is raised if the conditions,
+    license or package filters of the downloader are not met.
+    """
+    packages = build['packages']
+
+    for condition in downloader.conditions:
+        if 'package_name' in condition:
+            package = packages.get(condition['package_name'])
+            condition['status'] = bool(package) and _check_version(
+                condition, package.version, package.release
+            )
+        else:
+            condition['status'] = _check_version(
+                condition, build['image_version'], build['image_release']
+            )
+
+    if not all(condition['status'] for condition in downloader.conditions):
+        raise OBSImageConditionsException('Image conditions not met')
+
+    for package in packages.values():
+        if package.license in downloader.filter_licenses:
+            raise OBSImageConditionsException(
+                'Package(s) found in the image that match '
+                'dis-allowed licenses.'
+            )
+
+    for package_name in downloader.filter_packages:
+        if fnmatch.filter(packages, package_name):
+            raise OBSImageConditionsException(
+                'Package(s) matching {0} found in image.'.format(
+                    package_name
+                )
+            )
+
+
+class BuildWatcher(object):
+    """
+    Watch OBS builds for the download jobs waiting on conditions.
+
+    Jobs are grouped by download URL, image, arch and profile and each
+    group polls the latest build once per interval. The package index
+    and image version of the build are read once from the public
+    OBSImageUtil properties and the conditions of every job of the
+    group are checked against them. All jobs whose conditions are met
+    are released at once.
+
+    The jobs are released from the watcher thread, never from the
+    thread of the job which is watched.
+
+    Attributes
+
+    * :attr:`poll_interval`
+      Seconds between two polls of a build
+
+    * :attr:`log`
+      Logger of the download service
+    """
+    def __init__(self, poll_interval=150, log=None):
+        self.poll_interval = poll_interval
+        self.log = log
+
+        self._watches = {}
+        self._released = []
+        self._stopping = False
+        self._thread = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def _call(self, callback, error, base_file_name=None):
+        """
+        Run the callback of a released job.
+
+        A failing callback does not stop the release of other jobs.
+        """
+        try:
+            callback(error, base_file_name)
+        except Exception as issue:
+            if self.log:
+                self.log.error(
+                    'Build watcher failed: {0}'.format(issue)
+                )
+
+    def _check_conditions(self, build, downloader):
+        """
+        Check the conditions of the downloader against the build data.
+
+        Returns the error if the conditions are not met.
+        """
+        try:
+            check_build_conditions(build, downloader)
+        except Exception as issue:
+            return issue
+
+        return None
+
+    def _get_due_keys(self):
+        """
+        Return the keys to poll now and the time of the next poll.
+        """
+        now = time.time()
+        next_poll = now + self.poll_interval
+
+        with self._lock:
+            keys = []
+            for key, watch in self._watches.items():
+                if watch['next_poll'] <= now:
+                    keys.append(key)
+                else:
+                    next_poll = min(next_poll, watch['next_poll'])
+
+        return keys, next_poll
+
+    def _poll(self, key):
+        """
+        Poll the latest build and release the jobs it satisfies.
+
+        Jobs are released with the error of the last check once their
+        wait time has passed.
+        """
+        with self._lock:
+            watch = self._watches.get(key)
+
+            if not watch:
+                return
+
+            watch['next_poll'] = time.time() + self.poll_interval
+            jobs = list(watch['jobs'].items())
+
+        poller = jobs[0][1][0]
+        build = None
+        error = None
+
+        try:
+            poller.reset_base_file_name()
+            build = {
+                'base_file_name': poller.base_file_name,
+                'image_version': poller.image_version,
+                'image_release': poller.image_release,
+                'packages': poller.packages
+            }
+        except Exception as issue:
+            error = issue
+
+            if self.log:
+                self.log.warning(
+                    'Polling build of {0} failed: {1}'.format(key[1], issue)
+                )
+
+        released = []
+        for job_id, (downloader, callback, deadline) in jobs:
+            job_error = error or self._check_conditions(build, downloader)
+
+            if not job_error or time.time() >= deadline:
+                released.append((job_id, callback, job_error))
+
+        with self._lock:
+            if build:
+                watch['build'] = build
+
+            for job_id, callback, job_error in released:
+                watch['jobs'].pop(job_id, None)
+
+            if not watch['jobs'] and self._watches.get(key) is watch:
+                del self._watches[key]
+
+        base_file_name = build['base_file_name'] if build else None
+        for job_id, callback, job_error in released:
+            self._call(callback, job_error, base_file_name)
+
+    def _release(self):
+        """
+        Release the jobs which met their conditions on watch.
+        """
+        with self._lock:
+            released, self._released = self._released, []
+
+        for job_id, callback, base_file_name in released:
+            self._call(callback, None, base_file_name)
+
+    def _run(self):
+        while not self._stopping:
+            self._release()
+            keys, next_poll = self._get_due_keys()
+
+            for key in keys:
+                try:
+                    self._poll(key)
+                except Exception as issue:
+                    if self.log:
+                        self.log.error(
+                            'Build watcher failed: {0}'.format(issue)
+                        )
+
+            if not keys:
+                self._wakeup.wait(max(0, next_poll - time.time()))
+                self._wakeup.clear()
+
+    def unwatch(self, job_id):
+        """
+        Stop watching the build for the job.
+        """
+        with self._lock:
+            self._released = [
+                release for release in self._released
+                if release[0] != job_id
+            ]
+
+            for key, watch in list(self._watches.items()):
+                watch['jobs'].pop(job_id, None)
+
+                if not watch['jobs']:
+                    del self._watches[key]
+
+    def watch(self, key, job_id, downloader, callback, wait_time):
+        """
+        Wait for the conditions of the job to be met by a build.
+
+        The key identifies the build, jobs with the same key share
+        the polls. The callback is called with None and the base file
+        name of the checked build once the conditions of the downloader
+        are met or with the error of the last check after wait_time
+        seconds.
+
+        A job joining a group is checked against the last polled build
+        right away and released by the watcher thread if it meets the
+        conditions. The callback is not called from the thread of the
+        caller which may still run the job.
+        """
+        with self._lock:
+            watch = self._watches.get(key)
+            build = watch.get('build') if watch else None
+
+        if build and not self._check_conditions(build, downloader):
+            with self._lock:
+                self._released.append(
+                    (job_id, callback, build['base_file_name'])
+                )
+
+            self._wakeup.set()
+            return
+
+        with self._lock:
+            watch = self._watches.setdefault(
+                key, {'jobs': {}, 'next_poll': time.time()}
+            )
+            watch['jobs'][job_id] = (
+                downloader, callback, time.time() + wait_time
+            )
+
+        self._wakeup.set()
+
+    def start(self):
+        """
+        Start polling the watched builds in the background.
+        """
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background thread.
+        """
+        self._stopping = True
+        self._wakeup.set()
+
+        if self._thread:
+            self._thread.join()
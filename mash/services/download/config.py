@@ -17,6 +17,7 @@
 #
 
 from mash.services.base_config import BaseConfig
+from mash.utils.image_digest import DEFAULT_PART_SIZE
 
 
 class DownloadConfig(BaseConfig):
@@ -75,3 +76,72 @@ class DownloadConfig(BaseConfig):
             {}
         )
         return additional_prefixed_files
+
+    def get_download_segments(self):
+        """
+        Provides the number of segments OBS images are downloaded in.
+
+        Segments are downloaded concurrently with HTTP range requests.
+        """
+        download_info = self.get_download_data()
+        return download_info.get('segments', 4)
+
+    def get_download_metalink(self):
+        """
+        Provides whether mirrors are read from the metalink of the image.
+
+        When enabled the segments of an OBS image are downloaded from
+        the mirrors listed in the metalink of the image.
+        """
+        download_info = self.get_download_data()
+        return download_info.get('metalink', False)
+
+    def get_download_max_workers(self):
+        """
+        Provides the max number of download jobs running concurrently.
+
+        All download jobs share one pool of worker threads, jobs which
+        are due while all workers are busy wait for a free worker.
+        Before the pool was shared every job ran in its own scheduler
+        without a limit, raise max_workers to run more jobs at once.
+        """
+        download_info = self.get_download_data()
+        return download_info.get('max_workers', 4)
+
+    def get_download_poll_interval(self):
+        """
+        Provides the seconds between polls of a build by jobs waiting
+        for image conditions.
+        """
+        download_info = self.get_download_data()
+        return download_info.get('poll_interval', 150)
+
+    def get_download_digest_part_size(self):
+        """
+        Provides the part size of the MD5 part digests of the images.
+
+        The part digests give the ETag of an S3 multipart upload with
+        the same part size, 0 disables them.
+        """
+        download_info = self.get_download_data()
+        return download_info.get('digest_part_size', DEFAULT_PART_SIZE)
+
+    def get_download_stream(self):
+        """
+        Provides whether OBS images are streamed to the upload service.
+
+        When enabled a streaming result is published as the download
+        starts and the upload reads the image while it is written.
+        """
+        download_info = self.get_download_data()
+        return download_info.get('stream', False)
+
+    def get_download_s3_resume(self):
+        """
+        Provides whether S3 images are downloaded in resumable parts.
+
+        When enabled a partial download left by a restart of the service
+        is continued, otherwise the image is downloaded again.
+        """
+        download_info = self.get_download_data()
+        return download_info.get('s3_resume', True)
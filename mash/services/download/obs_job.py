@@ -18,16 +18,30 @@
 
 import os
 import logging
+import time
 
 from datetime import datetime
+from functools import partial
 from pytz import utc
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.events import EVENT_JOB_SUBMITTED
 
 from obs_img_utils.api import OBSImageUtil
+from obs_img_utils.exceptions import OBSImageConditionsException
+from obs_img_utils.utils import (
+    checksum_extensions,
+    get_checksum_from_file,
+    signature_extensions
+)
 
 # project
 from mash.mash_exceptions import MashImageDownloadException
+from mash.services.download.segmented_download import (
+    SegmentedDownload,
+    get_metalink_urls
+)
+from mash.services.status_levels import STREAMING
+from mash.utils.bandwidth import bandwidth_allocator
+from mash.utils.image_cache import get_cache_key, get_image_cache
+from mash.utils.image_stream import ImageStreamWriter
 
 
 class OBSDownloadJob(object):
@@ -87,6 +101,35 @@ class OBSDownloadJob(object):
 
     * :attr:`disallow_packages`
       A list of packages to disallow in the image.
+
+    * :attr:`image_cache`
+      The shared image cache, None if images are not cached.
+
+    * :attr:`download_segments`
+      Max number of segments the image is downloaded in concurrently.
+
+    * :attr:`download_metalink`
+      Download the segments from the mirrors of the image metalink.
+
+    * :attr:`build_watcher`
+      Shared watcher the job waits on for its conditions, if set.
+
+    * :attr:`digest_part_size`
+      Part size of the MD5 part digests of the image, 0 to skip them.
+
+    * :attr:`image_digests`
+      The SHA-256 and MD5 digests of the downloaded image.
+
+    * :attr:`download_stream`
+      Publish a streaming result before the image is downloaded so
+      the upload can read the image while it is written.
+
+    * :attr:`transfer_priority`
+      Priority class of the job in the bandwidth allocation.
+
+    * :attr:`skip_checksum_validation`
+      Skip the checksum validation of the downloaded image. Images
+      without a checksum are not cached.
     """
     def __init__(self, job_config, config):
         self.job_config = job_config
@@ -114,6 +157,25 @@ class OBSDownloadJob(object):
         self.conditions_wait_time = job_config.get('conditions_wait_time', 900)
         self.disallow_licenses = job_config.get('disallow_licenses', None)
         self.disallow_packages = job_config.get('disallow_packages', None)
+        self.transfer_priority = job_config.get('transfer_priority', None)
+        self.skip_checksum_validation = job_config.get(
+            'skip_checksum_validation', False
+        )
+
+        self.image_cache = None
+        cache_directory = config.get_image_cache_directory()
+        if cache_directory:
+            self.image_cache = get_image_cache(cache_directory)
+
+        self.download_segments = config.get_download_segments()
+        self.download_metalink = config.get_download_metalink()
+        self.digest_part_size = config.get_download_digest_part_size()
+        self.image_digests = {}
+        self.download_stream = config.get_download_stream()
+
+        self.build_watcher = None
+        self.conditions_met = False
+        self.conditions_build = None
 
         self.image_metadata_name = None
         self.scheduler = None
@@ -121,6 +183,8 @@ class OBSDownloadJob(object):
         self.job_deleted = False
 
         self.result_callback = None
+        self.start_callback = None
+        self.stream_callback = None
         self.log_callback = None
         self.job_status = 'prepared'
         self.progress_log = {}
@@ -136,7 +200,8 @@ class OBSDownloadJob(object):
             'target_directory': self.download_directory,
             'conditions_wait_time': self.conditions_wait_time,
             'log_callback': self.log_callback,
-            'report_callback': self.progress_callback
+            'report_callback': self.progress_callback,
+            'skip_checksum_validation': self.skip_checksum_validation
         }
 
         if self.profile:
@@ -154,15 +219,16 @@ class OBSDownloadJob(object):
             **kwargs
         )
 
-    def start_watchdog(self, isotime=None):
+    def start_watchdog(self, scheduler, isotime=None):
         """
-        Start a background job which triggers the update
+        Add a background job to the scheduler which triggers the update
         of the image build data and image fetched from the obs project.
 
         The job is started at a given data/time which must
         be the result of a isoformat() call. If no data/time is
         specified the job runs immediately.
 
+        :param object scheduler: scheduler shared by the download jobs
         :param string isotime: data and time by isoformat()
         """
         job_time = None
@@ -170,16 +236,12 @@ class OBSDownloadJob(object):
         if isotime:
             job_time = datetime.strptime(isotime[:19], '%Y-%m-%dT%H:%M:%S')
 
-        self.scheduler = BackgroundScheduler(timezone=utc)
-
+        self.scheduler = scheduler
         self.job = self.scheduler.add_job(
             self._update_image_status, 'date',
-            run_date=job_time, timezone=utc
+            run_date=job_time, timezone=utc,
+            id=self.job_id, replace_existing=True
         )
-        self.scheduler.add_listener(
-            self._job_submit_event, EVENT_JOB_SUBMITTED
-        )
-        self.scheduler.start()
 
     def stop_watchdog(self):
         """
@@ -187,18 +249,48 @@ class OBSDownloadJob(object):
 
         Current image status is retained
         """
+        if self.build_watcher:
+            self.build_watcher.unwatch(self.job_id)
+
         try:
             self.job.remove()
             self.job_deleted = True
         except Exception:
             pass
 
+    def set_build_watcher(self, build_watcher):
+        self.build_watcher = build_watcher
+
     def set_result_handler(self, function):
         self.result_callback = function
 
+    def set_start_handler(self, function):
+        self.start_callback = function
+
+    def set_stream_handler(self, function):
+        self.stream_callback = function
+
     def call_result_handler(self):
         self._result_callback()
 
+    def _stream_result_callback(self, image_file):
+        """
+        Publish the image file the upload can stream while downloading.
+        """
+        self.stream_callback(
+            self.job_id, {
+                'download_result': {
+                    'id': self.job_id,
+                    'image_file': image_file,
+                    'status': STREAMING,
+                    'errors': [],
+                    'notification_email': self.notification_email,
+                    'last_service': self.last_service,
+                    'build_time': self.downloader.build_time,
+                }
+            }
+        )
+
     def _result_callback(self):
         if self.result_callback:
             self.result_callback(
@@ -213,6 +305,7 @@ class OBSDownloadJob(object):
                         'last_service': self.last_service,
                         'build_time':
                             self.downloader.build_time,
+                        'image_digests': self.image_digests,
                     }
                 }
             )
@@ -238,6 +331,12 @@ class OBSDownloadJob(object):
         }
         self.log_callback.info('Job running')
 
+        if self._watch_conditions():
+            return
+
+        if self.start_callback:
+            self.start_callback(self.job_id)
+
         try:
             # Force parse of metadata file to get build time
             self.downloader.packages
@@ -279,7 +378,7 @@ class OBSDownloadJob(object):
                 # with metadata files downloads
                 pass
 
-            image_source = self.downloader.get_image()
+            image_source = self._get_image()
             self.log_callback.info(
                 'Downloaded: {0}'.format(image_source)
             )
@@ -291,22 +390,217 @@ class OBSDownloadJob(object):
             self._result_callback()
             self.log_callback.info('Job done')
         except Exception as issue:
-            msg = '{0}: {1}'.format(type(issue).__name__, issue)
-
-            self.job_status = 'failed'
-            self.errors.append(msg)
-            self.log_callback.error(msg)
-
-            if self.downloader.conditions:
-                for condition in self.downloader.conditions:
-                    if not condition.get('status'):
-                        self.errors.append(
-                            'Condition failed: {condition}'.format(
-                                condition=condition
-                            )
+            self._job_failed(issue)
+
+    def _job_failed(self, issue):
+        msg = '{0}: {1}'.format(type(issue).__name__, issue)
+
+        self.job_status = 'failed'
+        self.errors.append(msg)
+        self.log_callback.error(msg)
+
+        if self.downloader.conditions:
+            for condition in self.downloader.conditions:
+                if not condition.get('status'):
+                    self.errors.append(
+                        'Condition failed: {condition}'.format(
+                            condition=condition
                         )
+                    )
 
-            self._result_callback()
+        self._result_callback()
+
+    def _watch_conditions(self):
+        """
+        Wait on the build watcher until the job conditions are met.
+
+        Returns True if the job was handed to the build watcher, the
+        job is scheduled again once the conditions are met.
+        """
+        if not self.build_watcher or self.conditions_met \
+                or not self.downloader.has_conditions:
+            return False
+
+        self.build_watcher.watch(
+            (self.download_url, self.image_name, self.arch, self.profile),
+            self.job_id,
+            self.downloader,
+            self._conditions_checked,
+            self.conditions_wait_time
+        )
+        self.log_callback.info('Waiting for image conditions')
+        return True
+
+    def _conditions_checked(self, error=None, base_file_name=None):
+        if error:
+            self._job_failed(error)
+            return
+
+        self.conditions_met = True
+        self.conditions_build = base_file_name
+        self.log_callback.info('Image conditions met')
+
+        # The run which started watching may not have returned yet
+        self.job = self.scheduler.add_job(
+            self._update_image_status,
+            id=self.job_id,
+            replace_existing=True,
+            max_instances=2
+        )
+
+    def _download_image(self, checksum):
+        """
+        Download the image in segments with HTTP range requests.
+
+        A partial download of the image left by a restart of the
+        service is continued.
+
+        In streaming mode a streaming result is published before the
+        download starts and the progress is written to the stream
+        state of the image.
+        """
+        image_name = ''.join([
+            self.downloader.base_file_name,
+            self.downloader.image_ext
+        ])
+        url = '/'.join([self.download_url.rstrip('/'), image_name])
+
+        mirrors = None
+        if self.download_metalink:
+            mirrors = get_metalink_urls(url)
+
+        image_file = os.path.join(self.download_directory, image_name)
+        stream_writer = None
+
+        if self.download_stream and self.stream_callback:
+            stream_writer = ImageStreamWriter(image_file)
+            stream_writer.start()
+            self._stream_result_callback(image_file)
+
+        transfer = bandwidth_allocator.register('obs', self.transfer_priority)
+        download = SegmentedDownload(
+            url,
+            image_file,
+            segments=self.download_segments,
+            mirrors=mirrors,
+            checksum=checksum,
+            report_callback=self.progress_callback,
+            part_size=self.digest_part_size,
+            stream_callback=stream_writer.update if stream_writer else None,
+            bandwidth=transfer,
+            log_callback=self.log_callback
+        )
+
+        try:
+            with transfer:
+                image_source = download.fetch()
+        except Exception as error:
+            if stream_writer:
+                stream_writer.fail(error)
+            raise
+
+        self.image_digests = download.digests
+
+        if stream_writer:
+            stream_writer.finish(self.image_digests)
+
+        return image_source
+
+    def _wait_on_image_conditions(self):
+        """
+        Wait until the latest build meets the job conditions.
+
+        The build is polled again until the conditions wait time has
+        passed, the error of the last check is raised after that.
+        """
+        end = time.time() + self.conditions_wait_time
+
+        while True:
+            try:
+                self.downloader.check_all_conditions()
+                return
+            except OBSImageConditionsException as error:
+                if time.time() >= end:
+                    raise
+
+                wait = min(150, self.conditions_wait_time)
+                self.log_callback.warning(
+                    '{0}, retrying in {1} seconds...'.format(error, wait)
+                )
+                self.downloader.reset_base_file_name()
+                time.sleep(wait)
+
+    def _get_image_checksum(self):
+        """
+        Fetch the checksum and signature files of the latest build.
+
+        Returns the expected SHA-256 checksum of the image.
+        """
+        downloader = self.downloader
+        checksum_file = downloader.remote.fetch_to_dir(
+            downloader.base_file_name,
+            downloader.base_regex,
+            downloader.target_directory,
+            checksum_extensions
+        )
+        downloader.remote.fetch_to_dir(
+            downloader.base_file_name,
+            downloader.base_regex,
+            downloader.target_directory,
+            signature_extensions
+        )
+
+        if not checksum_file:
+            raise MashImageDownloadException(
+                'No checksum found that matches image {0} at {1}'.format(
+                    downloader.base_file_name,
+                    self.download_url
+                )
+            )
+
+        return get_checksum_from_file(checksum_file)
+
+    def _get_image(self):
+        """
+        Download the image or link it from the image cache.
+
+        Images are cached by download URL, image name and the checksum
+        of the build which meets the job conditions. The image digests
+        are stored with the cached image.
+        """
+        self.image_digests = {}
+
+        # Conditions of the build released by the build watcher are
+        # already checked.
+        if self.downloader.has_conditions and \
+                self.downloader.base_file_name != self.conditions_build:
+            self._wait_on_image_conditions()
+
+        if self.skip_checksum_validation:
+            checksum = None
+        else:
+            checksum = self._get_image_checksum()
+
+        download = partial(self._download_image, checksum)
+
+        if self.image_cache and checksum:
+            key = get_cache_key(self.download_url, self.image_name, checksum)
+            image_source = self.image_cache.fetch(
+                key,
+                self.job_id,
+                self.download_directory,
+                download,
+                metadata=lambda: {'image_digests': self.image_digests}
+            )
+            self.image_digests = self.image_cache.get_metadata(key).get(
+                'image_digests', {}
+            )
+        else:
+            image_source = download()
+
+        self.downloader.image_source = image_source
+        self.downloader.image_checksum = checksum
+        return image_source
 
     def progress_callback(self, block_num, read_size, total_size, done=False):
         """
@@ -22,17 +22,19 @@ import os
 
 from datetime import datetime
 from pytz import utc
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.events import EVENT_JOB_SUBMITTED
 # project
 from mash.utils.ec2 import (
     get_session,
-    download_file_from_s3_bucket
+    download_file_from_s3_bucket,
+    get_s3_object_etag
 )
 from mash.mash_exceptions import (
     MashJobException,
     MashImageDownloadException
 )
+from mash.utils.bandwidth import bandwidth_allocator
+from mash.utils.image_cache import get_cache_key, get_image_cache
+from mash.utils.image_digest import ImageDigest
 from mash.utils.mash_utils import handle_request
 
 
@@ -77,6 +79,21 @@ class S3BucketDownloadJob(object):
     * :attr:`download_directory`
       Target download directory name where the files will be downloaded/stored.
       Defaults to: '/var/lib/mash/images/{job_id}'.
+
+    * :attr:`image_cache`
+      The shared image cache, None if images are not cached.
+
+    * :attr:`digest_part_size`
+      Part size of the MD5 part digests of the image, 0 to skip them.
+
+    * :attr:`image_digests`
+      The SHA-256 and MD5 digests of the downloaded image.
+
+    * :attr:`transfer_priority`
+      Priority class of the job in the bandwidth allocation.
+
+    * :attr:`s3_resume`
+      Download the image in resumable parts.
     """
 
     def __init__(self, job_config, config):
@@ -104,15 +121,26 @@ class S3BucketDownloadJob(object):
 
         self.arch = job_config.get('cloud_architecture', 'x86_64')
         self.notification_email = job_config.get('notification_email', None)
+        self.transfer_priority = job_config.get('transfer_priority', None)
         self.credentials_url = config.get_credentials_url()
 
         self.log_callback = None
+        self.start_callback = None
         self.job_status = 'prepared'
         self.progress_log = {}
         self.errors = []
         self.scheduler = None
         self.job_deleted = False
 
+        self.image_cache = None
+        cache_directory = config.get_image_cache_directory()
+        if cache_directory:
+            self.image_cache = get_image_cache(cache_directory)
+
+        self.digest_part_size = config.get_download_digest_part_size()
+        self.s3_resume = config.get_download_s3_resume()
+        self.image_digests = {}
+
         self.download_credentials = self._request_credentials(
             self.download_account,
             'ec2'
@@ -122,6 +150,9 @@ class S3BucketDownloadJob(object):
     def set_result_handler(self, function):
         self.result_callback = function
 
+    def set_start_handler(self, function):
+        self.start_callback = function
+
     def call_result_handler(self):
         self._result_callback()
 
@@ -131,14 +162,16 @@ class S3BucketDownloadJob(object):
             {'job_id': self.job_id}
         )
 
-    def start_watchdog(self, isotime=None):
+    def start_watchdog(self, scheduler, isotime=None):
         """
-        Start a background job which fetches the image from the S3 bucket.
+        Add a background job to the scheduler which fetches the image
+        from the S3 bucket.
 
         The job is started at a given data/time which must
         be the result of a isoformat() call. If no date/time is
         specified the job runs immediately.
 
+        :param object scheduler: scheduler shared by the download jobs
         :param string isotime: date and time by isoformat()
         """
         job_time = None
@@ -146,18 +179,15 @@ class S3BucketDownloadJob(object):
         if isotime:
             job_time = datetime.strptime(isotime[:19], '%Y-%m-%dT%H:%M:%S')
 
-        self.scheduler = BackgroundScheduler(timezone=utc)
-
+        self.scheduler = scheduler
         self.job = self.scheduler.add_job(
             self._download_image_file,
             'date',
             run_date=job_time,
-            timezone='utc'
-        )
-        self.scheduler.add_listener(
-            self._job_submit_event, EVENT_JOB_SUBMITTED
+            timezone=utc,
+            id=self.job_id,
+            replace_existing=True
         )
-        self.scheduler.start()
 
     def stop_watchdog(self):
         """
@@ -178,6 +208,9 @@ class S3BucketDownloadJob(object):
         """ Download the image file to the destination directory"""
         self.log_callback.info('Job running')
 
+        if self.start_callback:
+            self.start_callback(self.job_id)
+
         try:
 
             boto3_session = get_session(
@@ -201,12 +234,49 @@ class S3BucketDownloadJob(object):
             else:
                 full_object_key = self.image_name
 
-            download_file_from_s3_bucket(
-                boto3_session,
-                bucket_name,
-                full_object_key,
-                destination_file
-            )
+            def download():
+                digest = ImageDigest(self.digest_part_size)
+                transfer = bandwidth_allocator.register(
+                    's3',
+                    self.transfer_priority
+                )
+
+                with transfer:
+                    download_file_from_s3_bucket(
+                        boto3_session,
+                        bucket_name,
+                        full_object_key,
+                        destination_file,
+                        resume=self.s3_resume,
+                        digest=digest,
+                        bandwidth=transfer
+                    )
+                self.image_digests = digest.get_digests()
+                return destination_file
+
+            self.image_digests = {}
+
+            if self.image_cache:
+                # Images are cached by the ETag of the S3 object
+                etag = get_s3_object_etag(
+                    boto3_session,
+                    bucket_name,
+                    full_object_key
+                )
+                key = get_cache_key(self.download_url, self.image_name, etag)
+                destination_file = self.image_cache.fetch(
+                    key,
+                    self.job_id,
+                    self.download_directory,
+                    download,
+                    metadata=lambda: {'image_digests': self.image_digests}
+                )
+                self.image_digests = self.image_cache.get_metadata(
+                    key
+                ).get('image_digests', {})
+            else:
+                download()
+
             self.log_callback.info(
                 'Downloaded: {0} from {1} S3 bucket to {2}'.format(
                     full_object_key,
@@ -243,6 +313,7 @@ class S3BucketDownloadJob(object):
                         'last_service': self.last_service,
                         'build_time':
                             self._get_build_time(self.image_name),
+                        'image_digests': self.image_digests,
                     }
                 }
             )
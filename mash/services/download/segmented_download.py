@@ -0,0 +1,494 @@
+# Copyright (c) 2026 SUSE LLC.  All rights reserved.
+#
+# This file is part of mash.
+#
+# mash is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# mash is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with mash.  If not, see <http://www.gnu.org/licenses/>
+#
+
+import os
+import requests
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree import ElementTree
+
+from mash.mash_exceptions import MashImageDownloadException
+from mash.utils.mash_utils import (
+    get_download_manifest,
+    persist_download_manifest,
+    remove_download_manifest
+)
+from mash.utils.image_digest import ImageDigest
+
+CHUNK_SIZE = 1024 * 1024
+METALINK_NAMESPACE = '{urn:ietf:params:xml:ns:metalink}'
+
+
+def get_metalink_urls(url, timeout=60):
+    """
+    Return the mirror URLs of the file ordered by priority.
+
+    The mirrors are read from the metalink of the file, an empty list
+    is returned if the server provides no metalink.
+    """
+    try:
+        response = requests.get(url + '.meta4', timeout=timeout)
+        response.raise_for_status()
+        metalink = ElementTree.fromstring(response.content)
+    except (requests.RequestException, ElementTree.ParseError):
+        return []
+
+    mirrors = []
+    for element in metalink.iter(METALINK_NAMESPACE + 'url'):
+        priority = int(element.get('priority', 999999))
+        mirrors.append((priority, len(mirrors), element.text.strip()))
+
+    return [mirror_url for priority, index, mirror_url in sorted(mirrors)]
+
+
+class SegmentedDownload(object):
+    """
+    Download a file in segments over several HTTP connections.
+
+    Each segment is fetched with a range request, segments are spread
+    over the mirrors round robin. The file is hashed in order while
+    the segments are written so the checksum is verified as soon as
+    the last byte arrives. The SHA-256 and MD5 digests of the file
+    are provided in digests once the download finished.
+
+    The progress of the segments is kept in a manifest next to the
+    file. A partial download of the same file version, by ETag or
+    Last-Modified and size, is continued from the written offsets and
+    the written bytes are hashed again from disk.
+
+    The file is downloaded as a single stream if the server does not
+    support range requests.
+
+    Failed attempts are retried with an exponential backoff and
+    continue the partial download of the previous attempt.
+
+    Attributes
+
+    * :attr:`url`
+      URL of the file
+
+    * :attr:`target_file`
+      Path the file is downloaded to
+
+    * :attr:`segments`
+      Max number of segments downloaded concurrently
+
+    * :attr:`mirrors`
+      URLs of mirrors of the file, defaults to the file URL
+
+    * :attr:`checksum`
+      Expected SHA-256 hex digest of the file
+
+    * :attr:`report_callback`
+      Called with (block_num, read_size, total_size) as data arrives
+      and with done set once the download finished
+
+    * :attr:`min_segment_size`
+      Min number of bytes per segment
+
+    * :attr:`save_interval`
+      Min seconds between two saves of the progress manifest
+
+    * :attr:`part_size`
+      Bytes per part of the MD5 part digests, None to skip them
+
+    * :attr:`stream_callback`
+      Called with (available, total_size) as the bytes from the start
+      of the file are written
+
+    * :attr:`bandwidth`
+      Bandwidth transfer the downloaded bytes are throttled on
+
+    * :attr:`attempts`
+      Max number of attempts to download the file
+
+    * :attr:`retry_delay`
+      Seconds before the first retry, doubled for each retry
+
+    * :attr:`log_callback`
+      Logger the retries are logged to
+    """
+    def __init__(
+        self,
+        url,
+        target_file,
+        segments=4,
+        mirrors=None,
+        checksum=None,
+        report_callback=None,
+        min_segment_size=8 * 1024 * 1024,
+        timeout=60,
+        save_interval=1,
+        part_size=None,
+        stream_callback=None,
+        bandwidth=None,
+        attempts=4,
+        retry_delay=3,
+        log_callback=None
+    ):
+        self.url = url
+        self.target_file = target_file
+        self.segments = segments
+        self.mirrors = mirrors
+        self.checksum = checksum
+        self.report_callback = report_callback
+        self.min_segment_size = min_segment_size
+        self.timeout = timeout
+        self.save_interval = save_interval
+        self.part_size = part_size
+        self.stream_callback = stream_callback
+        self.bandwidth = bandwidth
+        self.attempts = attempts
+        self.retry_delay = retry_delay
+        self.log_callback = log_callback
+        self.digests = None
+
+        self._downloaded = 0
+        self._segments = []
+        self._written = []
+        self._validator = None
+        self._saved = 0
+        self._fd = None
+        self._failed = False
+        self._condition = threading.Condition()
+        self._save_lock = threading.Lock()
+
+    def _add_progress(self, size, total_size):
+        with self._condition:
+            self._downloaded += size
+
+            if self.report_callback and total_size:
+                self.report_callback(1, self._downloaded, total_size)
+
+    def _get_file_info(self):
+        """
+        Return the size and validator of the file and if range requests
+        are supported.
+        """
+        response = requests.head(
+            self.url, allow_redirects=True, timeout=self.timeout
+        )
+        response.raise_for_status()
+
+        size = int(response.headers.get('Content-Length', 0))
+        ranges = response.headers.get('Accept-Ranges') == 'bytes'
+        validator = response.headers.get('ETag') or \
+            response.headers.get('Last-Modified')
+        return size, ranges, validator
+
+    def _get_segments(self, size):
+        """
+        Return the (start, end) offsets of the segments of the file.
+        """
+        count = max(1, min(self.segments, size // self.min_segment_size))
+        segment_size = -(-size // count)
+
+        return [
+            (start, min(start + segment_size, size))
+            for start in range(0, size, segment_size)
+        ]
+
+    def _download_segment(self, index, url, start, end, size):
+        """
+        Write the rest of the segment to its offset in the target file.
+
+        Returns False if the download was aborted or the server
+        ignored the range request.
+        """
+        position = self._written[index]
+
+        if position == end:
+            return True
+
+        headers = {'Range': 'bytes={0}-{1}'.format(position, end - 1)}
+        if self._validator and url == self.url:
+            # Mirrors have their own validators, the checksum verifies
+            # the bytes they serve.
+            headers['If-Range'] = self._validator
+
+        with requests.get(
+            url, headers=headers, stream=True, timeout=self.timeout
+        ) as response:
+            response.raise_for_status()
+
+            if response.status_code != 206:
+                return False
+
+            for chunk in self._iter_content(response):
+                if self._failed:
+                    return False
+
+                chunk = chunk[:end - position]
+                written = 0
+                while written < len(chunk):
+                    written += os.pwrite(
+                        self._fd, chunk[written:], position + written
+                    )
+
+                position += len(chunk)
+
+                with self._condition:
+                    self._written[index] = position
+                    self._condition.notify_all()
+
+                self._add_progress(len(chunk), size)
+                self._save_progress(size)
+
+                if position == end:
+                    break
+
+        if position != end:
+            raise MashImageDownloadException(
+                'Incomplete segment {0}-{1} from {2}'.format(start, end, url)
+            )
+
+        return True
+
+    def _download_segments(self, size, validator):
+        """
+        Download the segments concurrently and hash the file in order.
+
+        Returns None if the segments could not be downloaded with
+        range requests.
+        """
+        manifest = None
+        if validator:
+            manifest = get_download_manifest(
+                self.target_file, validator, size
+            )
+
+        if manifest:
+            segments = [tuple(segment) for segment in manifest['segments']]
+            self._written = manifest['written']
+            self._downloaded = sum(
+                written - start
+                for (start, end), written in zip(segments, self._written)
+            )
+        else:
+            segments = self._get_segments(size)
+            self._written = [start for start, end in segments]
+
+            with open(self.target_file, 'wb') as target:
+                target.truncate(size)
+
+        self._segments = segments
+        self._validator = validator
+        self._failed = False
+        self._save_progress(size, force=True)
+
+        urls = self.mirrors or [self.url]
+        self._fd = os.open(self.target_file, os.O_WRONLY)
+
+        try:
+            with ThreadPoolExecutor(len(segments)) as executor:
+                futures = [
+                    executor.submit(
+                        self._download_segment,
+                        index,
+                        urls[index % len(urls)],
+                        start,
+                        end,
+                        size
+                    )
+                    for index, (start, end) in enumerate(segments)
+                ]
+
+                for future in futures:
+                    future.add_done_callback(self._segment_done)
+
+                image_hash = self._hash_segments(segments)
+                results = [future.result() for future in futures]
+        finally:
+            self._save_progress(size, force=True)
+            os.close(self._fd)
+            self._fd = None
+
+        if not all(results):
+            remove_download_manifest(self.target_file)
+            return None
+
+        return image_hash
+
+    def _download_stream(self):
+        """
+        Download and hash the file as a single stream.
+        """
+        image_hash = ImageDigest(self.part_size)
+
+        with requests.get(
+            self.url, stream=True, timeout=self.timeout
+        ) as response:
+            response.raise_for_status()
+            size = int(response.headers.get('Content-Length', 0))
+
+            with open(self.target_file, 'wb') as target:
+                for chunk in self._iter_content(response):
+                    target.write(chunk)
+                    image_hash.update(chunk)
+                    self._add_progress(len(chunk), size)
+
+                    if self.stream_callback:
+                        target.flush()
+                        self.stream_callback(image_hash.size, size)
+
+        return image_hash
+
+    def _iter_content(self, response):
+        """
+        Yield the chunks of the response within the bandwidth share.
+        """
+        for chunk in response.iter_content(CHUNK_SIZE):
+            if self.bandwidth:
+                self.bandwidth.throttle(len(chunk))
+
+            yield chunk
+
+    def _hash_segments(self, segments):
+        """
+        Hash the written bytes of the file in order.
+
+        Returns None if a segment failed.
+        """
+        image_hash = ImageDigest(self.part_size)
+
+        # Unbuffered so no read ahead of unwritten bytes is cached
+        with open(self.target_file, 'rb', buffering=0) as target:
+            for index, (start, end) in enumerate(segments):
+                position = start
+
+                while position < end:
+                    with self._condition:
+                        while self._written[index] == position \
+                                and not self._failed:
+                            self._condition.wait()
+
+                        if self._failed:
+                            return None
+
+                        available = self._written[index]
+
+                    target.seek(position)
+                    while position < available:
+                        data = target.read(
+                            min(CHUNK_SIZE, available - position)
+                        )
+                        image_hash.update(data)
+                        position += len(data)
+
+                    if self.stream_callback:
+                        self.stream_callback(position, segments[-1][1])
+
+        return image_hash
+
+    def _save_progress(self, size, force=False):
+        """
+        Persist the written offsets of the segments.
+
+        The written bytes are synced to disk before the manifest so
+        the manifest never covers bytes that are lost in a crash.
+        """
+        if not self._save_lock.acquire(blocking=force):
+            return
+
+        try:
+            if not force and time.time() - self._saved < self.save_interval:
+                return
+
+            self._saved = time.time()
+
+            with self._condition:
+                written = list(self._written)
+
+            if self._fd is not None:
+                os.fsync(self._fd)
+
+            persist_download_manifest(self.target_file, {
+                'url': self.url,
+                'validator': self._validator,
+                'size': size,
+                'segments': self._segments,
+                'written': written
+            })
+        finally:
+            self._save_lock.release()
+
+    def _segment_done(self, future):
+        if future.exception() or not future.result():
+            with self._condition:
+                self._failed = True
+                self._condition.notify_all()
+
+    def _download(self):
+        """
+        Download the file once and verify the checksum.
+        """
+        size, ranges, validator = self._get_file_info()
+        image_hash = None
+        self._downloaded = 0
+
+        if ranges and size:
+            image_hash = self._download_segments(size, validator)
+
+        if image_hash is None:
+            self._downloaded = 0
+            image_hash = self._download_stream()
+
+        remove_download_manifest(self.target_file)
+        self.digests = image_hash.get_digests()
+
+        if self.checksum and image_hash.hexdigest() != self.checksum:
+            raise MashImageDownloadException(
+                'Image checksum does not match expected value'
+            )
+
+    def fetch(self):
+        """
+        Download the file and verify the checksum.
+
+        Returns the path of the downloaded file.
+        """
+        delay = self.retry_delay
+
+        try:
+            for attempt in range(1, self.attempts + 1):
+                try:
+                    self._download()
+                    break
+                except (
+                    requests.RequestException,
+                    OSError,
+                    MashImageDownloadException
+                ) as error:
+                    if attempt == self.attempts:
+                        raise
+
+                    if self.log_callback:
+                        self.log_callback.warning(
+                            'Download of {0} failed, retrying in {1} '
+                            'seconds: {2}'.format(self.url, delay, error)
+                        )
+
+                    time.sleep(delay)
+                    delay *= 2
+        finally:
+            if self.report_callback:
+                self.report_callback(0, 0, 0, True)
+
+        return self.target_file
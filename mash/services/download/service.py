@@ -17,15 +17,23 @@
 #
 import atexit
 import os
+import time
 import dateutil.parser
 
+from apscheduler.events import EVENT_JOB_SUBMITTED
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.schedulers.background import BackgroundScheduler
+from pytz import utc
+
 # project
 from mash.services.mash_service import MashService
 from mash.services.job_factory import BaseJobFactory
+from mash.services.job_store import get_job_store
+from mash.services.download.build_watcher import BuildWatcher
 from mash.services.download.obs_job import OBSDownloadJob
 from mash.services.download.s3bucket_job import S3BucketDownloadJob
-from mash.utils.json_format import JsonFormat
-from mash.utils.mash_utils import persist_json, restart_jobs, setup_logfile
+from mash.utils.bandwidth import bandwidth_allocator
+from mash.utils.mash_utils import setup_logfile
 
 
 class DownloadService(MashService):
@@ -57,6 +65,7 @@ class DownloadService(MashService):
         self.download_directory = self.config.get_download_directory()
 
         self.jobs = {}
+        self.job_traces = {}
 
         # setup service job directory
         self.job_directory = self.config.get_job_directory(
@@ -65,13 +74,47 @@ class DownloadService(MashService):
         os.makedirs(
             self.job_directory, exist_ok=True
         )
+        self.job_store = get_job_store(
+            self.config.get_job_store(), self.job_directory
+        )
 
         self.bind_queue(
             self.service_exchange, self.job_document_key, self.service_queue
         )
 
+        # All jobs share one scheduler, jobs run on a bounded pool of
+        # worker threads once their start time is reached.
+        executors = {
+            'default': ThreadPoolExecutor(
+                self.config.get_download_max_workers()
+            )
+        }
+        self.scheduler = BackgroundScheduler(
+            executors=executors,
+            job_defaults={'misfire_grace_time': None},
+            timezone=utc
+        )
+        self.scheduler.add_listener(self._job_submitted, EVENT_JOB_SUBMITTED)
+        self.scheduler.start()
+
+        # OBS jobs waiting on conditions share the polls of their build
+        self.build_watcher = BuildWatcher(
+            poll_interval=self.config.get_download_poll_interval(),
+            log=self.log
+        )
+        self.build_watcher.start()
+
+        # Downloads share the bandwidth budget of the node with uploads
+        bandwidth_allocator.configure(
+            limit=self.config.get_bandwidth_limit(),
+            directory=self.config.get_bandwidth_directory(),
+            cloud_weights=self.config.get_bandwidth_cloud_weights(),
+            priority_weights=self.config.get_bandwidth_priority_weights()
+        )
+
         # read and launch open jobs
-        restart_jobs(self.job_directory, self._start_job)
+        for job_config in self.job_store.iter_jobs():
+            self._start_job(job_config)
 
         # consume on service queue
         atexit.register(lambda: os._exit(0))
@@ -88,16 +131,58 @@ class DownloadService(MashService):
         except Exception:
             raise
         finally:
+            self.build_watcher.stop()
+            self.scheduler.shutdown(wait=False)
             self.close_connection()
+            self.job_store.close()
 
     def _send_job_result_for_upload(self, job_id, trigger_info):
+        traceparent, started = self.job_traces.pop(job_id, (None, None))
+        attributes = {'job_id': job_id}
+
+        if started:
+            self.tracer.record_span(
+                'run_job', traceparent, started, time.time(),
+                attributes=attributes
+            )
+
+        span = self.tracer.start_span(
+            'publish', traceparent, attributes=attributes
+        )
+        for result in trigger_info.values():
+            result['traceparent'] = span.traceparent
+
         self._publish(
             self.service_exchange,
-            self.listener_msg_key,
-            JsonFormat.json_message(trigger_info)
+            self.get_shard_routing_key(
+                self._get_next_service(), self.listener_msg_key, job_id
+            ),
+            trigger_info,
+            job_id=job_id,
+            traceparent=span.traceparent
         )
+        span.end()
         self._delete_job(job_id)
 
+    def _send_stream_result_for_upload(self, job_id, trigger_info):
+        """
+        Publish the streaming result of a job that is still running.
+        """
+        traceparent, started = self.job_traces.get(job_id, (None, None))
+
+        for result in trigger_info.values():
+            result['traceparent'] = traceparent
+
+        self._publish(
+            self.service_exchange,
+            self.get_shard_routing_key(
+                self._get_next_service(), self.listener_msg_key, job_id
+            ),
+            trigger_info,
+            job_id=job_id,
+            traceparent=traceparent
+        )
+
     def _send_control_response(self, result, job_id=None):
         message = result['message']
 
@@ -112,7 +197,7 @@ class DownloadService(MashService):
 
     def _process_message(self, message):
         try:
-            job_data = JsonFormat.json_loads(format(message.body))
+            job_data = self.decode_message(message)
         except Exception as e:
             return self._send_control_response(
                 {
@@ -123,17 +208,24 @@ class DownloadService(MashService):
                 }
             )
         if message.method['routing_key'] == 'job_document':
-            self._handle_jobs(job_data)
+            traceparent, sent_at = self.get_trace_context(message)
+            self._handle_jobs(job_data, traceparent)
 
         message.ack()
 
-    def _handle_jobs(self, job_data):
+    def _handle_jobs(self, job_data, traceparent=None):
         """
         handle download job document for the OBS type
         """
         job_id = None
         if 'download_job' in job_data:
             job_id = job_data['download_job'].get('id', None)
+
+            if traceparent:
+                job_data['download_job'].setdefault(
+                    'traceparent', traceparent
+                )
+
             result = self._add_job(job_data)
         else:
             result = {
@@ -171,12 +263,7 @@ class DownloadService(MashService):
         }
         """
         data = data['download_job']
-        data['job_file'] = '{0}job-{1}.json'.format(
-            self.job_directory, data['id']
-        )
-        persist_json(
-            data['job_file'], data
-        )
+        self.job_store.add(data)
         return self._start_job(data)
 
     def _delete_job(self, job_id):
@@ -195,9 +282,9 @@ class DownloadService(MashService):
             }
         else:
             job_worker = self.jobs[job_id]
-            # delete job file
+            # delete job from job store
             try:
-                os.remove(job_worker.job_file)
+                self.job_store.delete(job_id)
             except Exception as e:
                 return {
                     'ok': False,
@@ -216,23 +303,43 @@ class DownloadService(MashService):
                     'message': 'Job Deleted'
                 }
 
+    def _job_submitted(self, event):
+        job_worker = self.jobs.get(event.job_id)
+
+        if job_worker:
+            job_worker._job_submit_event(event)
+
+    def _trace_job_start(self, job_id):
+        """
+        Keep the start time of the download once the job runs it.
+        """
+        traceparent, started = self.job_traces.get(job_id, (None, None))
+        self.job_traces[job_id] = (traceparent, time.time())
+
     def _start_job(self, job):
         job_id = job['id']
-        time = job['utctime']
+        start_time = job['utctime']
 
-        if time == 'now':
-            time = None
+        if start_time == 'now':
+            start_time = None
         else:
-            time = dateutil.parser.parse(job['utctime']).isoformat()
+            start_time = dateutil.parser.parse(job['utctime']).isoformat()
 
         if 'download_type' not in job:
             job['download_type'] = 'OBS'
 
         job_worker = self.job_factory.create_job(job, self.config)
         job_worker.set_result_handler(self._send_job_result_for_upload)
+        job_worker.set_start_handler(self._trace_job_start)
         job_worker.set_log_handler(self.log)
-        job_worker.start_watchdog(isotime=time)
+
+        if job['download_type'] == 'OBS':
+            job_worker.set_build_watcher(self.build_watcher)
+            job_worker.set_stream_handler(self._send_stream_result_for_upload)
+
         self.jobs[job_id] = job_worker
+        self.job_traces[job_id] = (job.get('traceparent'), None)
+        job_worker.start_watchdog(self.scheduler, isotime=start_time)
         return {
             'ok': True,
             'message': 'Job started'
@@ -0,0 +1,264 @@
+# Copyright (c) 2026 SUSE LLC.  All rights reserved.
+#
+# This file is part of mash.
+#
+# mash is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# mash is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with mash.  If not, see <http://www.gnu.org/licenses/>
+#
+
+import glob
+import json
+import os
+import queue
+import sqlite3
+import threading
+
+from concurrent.futures import Future
+
+from mash.mash_exceptions import MashJobStoreException
+from mash.utils.mash_utils import load_json, persist_json, remove_file
+
+
+class FileJobStore(object):
+    """
+    Store each job config in a json file in the job directory.
+
+    Attributes
+
+    * :attr:`job_directory`
+      Directory of the job files
+    """
+    def __init__(self, job_directory):
+        self.job_directory = job_directory
+
+    def _get_job_file(self, job_id):
+        return os.path.join(self.job_directory, 'job-{0}.json'.format(job_id))
+
+    def add(self, job_config):
+        """
+        Persist a new job config and set the job_file key.
+        """
+        job_config['job_file'] = self._get_job_file(job_config['id'])
+        persist_json(job_config['job_file'], job_config)
+
+    def close(self):
+        pass
+
+    def delete(self, job_id):
+        remove_file(self._get_job_file(job_id))
+
+    def get(self, job_id):
+        return load_json(self._get_job_file(job_id))
+
+    def iter_jobs(self):
+        """
+        Yield the config of every stored job.
+        """
+        pattern = os.path.join(self.job_directory, 'job-*.json')
+
+        for job_file in sorted(glob.glob(pattern)):
+            yield load_json(job_file)
+
+    def update(self, job_id, job_config):
+        persist_json(self._get_job_file(job_id), job_config)
+
+
+class SQLiteJobStore(object):
+    """
+    Store the job configs in an SQLite database in WAL mode.
+
+    Writes from all threads are queued and committed by a writer
+    thread, writes queued while a commit is in progress are committed
+    together in the next transaction. Each write returns once its
+    transaction is durable.
+
+    Job files of the file store in the job directory are imported
+    when the store is opened.
+
+    Attributes
+
+    * :attr:`job_directory`
+      Directory of the job database
+
+    * :attr:`batch_size`
+      Max number of writes committed in one transaction
+    """
+    def __init__(self, job_directory, batch_size=100):
+        self.job_directory = job_directory
+        self.batch_size = batch_size
+        self.path = os.path.join(job_directory, 'jobs.db')
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+
+        self._connection = self._connect()
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS jobs '
+            '(id TEXT PRIMARY KEY, config TEXT NOT NULL)'
+        )
+        self._connection.commit()
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+        self._import_job_files()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=FULL')
+        connection.execute('PRAGMA busy_timeout=5000')
+        return connection
+
+    def _get_batch(self):
+        """
+        Block for the next write and drain any others already queued.
+
+        Returns None once the store has been closed.
+        """
+        request = self._queue.get()
+
+        if request is None:
+            return None
+
+        batch = [request]
+        while len(batch) < self.batch_size:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if request is None:
+                # Commit what is queued then stop on the next pass.
+                self._queue.put(None)
+                break
+
+            batch.append(request)
+
+        return batch
+
+    def _import_job_files(self):
+        """
+        Move the job files of a file store into the database.
+        """
+        file_store = FileJobStore(self.job_directory)
+        pattern = os.path.join(self.job_directory, 'job-*.json')
+
+        for job_file in sorted(glob.glob(pattern)):
+            job_config = load_json(job_file)
+            job_config['job_file'] = self.path
+            self.update(job_config['id'], job_config)
+            file_store.delete(job_config['id'])
+
+    def _run(self):
+        """
+        Commit queued writes in batches until closed.
+        """
+        connection = self._connect()
+
+        while True:
+            batch = self._get_batch()
+
+            if batch is None:
+                break
+
+            try:
+                with connection:
+                    for statement, parameters, future in batch:
+                        connection.execute(statement, parameters)
+            except sqlite3.Error as error:
+                for statement, parameters, future in batch:
+                    future.set_exception(MashJobStoreException(
+                        'Job store write failed: {0}'.format(error)
+                    ))
+            else:
+                for statement, parameters, future in batch:
+                    future.set_result(True)
+
+        connection.close()
+
+    def _write(self, statement, parameters):
+        """
+        Queue the write and wait until it is committed.
+        """
+        future = Future()
+        self._queue.put((statement, parameters, future))
+        return future.result()
+
+    def add(self, job_config):
+        """
+        Persist a new job config and set the job_file key.
+        """
+        job_config['job_file'] = self.path
+        self.update(job_config['id'], job_config)
+
+    def close(self):
+        """
+        Commit queued writes and close the database.
+        """
+        self._queue.put(None)
+        self._thread.join()
+        self._connection.close()
+
+    def delete(self, job_id):
+        self._write('DELETE FROM jobs WHERE id = ?', (job_id,))
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT config FROM jobs WHERE id = ?', (job_id,)
+            ).fetchone()
+
+        if not row:
+            raise MashJobStoreException(
+                'Job {0} does not exist in job store.'.format(job_id)
+            )
+
+        return json.loads(row[0])
+
+    def iter_jobs(self):
+        """
+        Yield the config of every stored job in insertion order.
+
+        Jobs are streamed from a separate connection so the store can
+        be written while the jobs are restarted.
+        """
+        connection = self._connect()
+
+        try:
+            for row in connection.execute(
+                'SELECT config FROM jobs ORDER BY rowid'
+            ):
+                yield json.loads(row[0])
+        finally:
+            connection.close()
+
+    def update(self, job_id, job_config):
+        self._write(
+            'INSERT OR REPLACE INTO jobs (id, config) VALUES (?, ?)',
+            (job_id, json.dumps(job_config))
+        )
+
+
+def get_job_store(store_type, job_directory):
+    """
+    Return the job store of the given type for the job directory.
+    """
+    if store_type == 'file':
+        return FileJobStore(job_directory)
+    elif store_type == 'sqlite':
+        return SQLiteJobStore(job_directory)
+
+    raise MashJobStoreException(
+        'Unsupported job store: {0}'.format(store_type)
+    )
@@ -18,7 +18,6 @@
 
 from mash.mash_exceptions import MashJobCreatorException
 from mash.services.jobcreator.base_job import BaseJob
-from mash.utils.json_format import JsonFormat
 
 
 class AliyunJob(BaseJob):
@@ -66,7 +65,7 @@ class AliyunJob(BaseJob):
             deprecate_message['deprecate_job']['old_cloud_image_name'] = \
                 self.old_cloud_image_name
 
-        return JsonFormat.json_message(deprecate_message)
+        return deprecate_message
 
     def get_publish_message(self):
         """
@@ -83,7 +82,7 @@ class AliyunJob(BaseJob):
         }
         publish_message['publish_job'].update(self.base_message)
 
-        return JsonFormat.json_message(publish_message)
+        return publish_message
 
     def get_replicate_message(self):
         """
@@ -99,7 +98,7 @@ class AliyunJob(BaseJob):
         }
         replicate_message['replicate_job'].update(self.base_message)
 
-        return JsonFormat.json_message(replicate_message)
+        return replicate_message
 
     def get_test_message(self):
         """
@@ -129,7 +128,7 @@ class AliyunJob(BaseJob):
 
         test_message['test_job'].update(self.base_message)
 
-        return JsonFormat.json_message(test_message)
+        return test_message
 
     def get_upload_message(self):
         """
@@ -151,7 +150,7 @@ class AliyunJob(BaseJob):
         }
         upload_message['upload_job'].update(self.base_message)
 
-        return JsonFormat.json_message(upload_message)
+        return upload_message
 
     def get_create_message(self):
         """
@@ -174,7 +173,7 @@ class AliyunJob(BaseJob):
         if self.disk_size:
             create_message['create_job']['disk_size'] = self.disk_size
 
-        return JsonFormat.json_message(create_message)
+        return create_message
 
     def get_test_preparation_message(self):
         """
@@ -188,7 +187,7 @@ class AliyunJob(BaseJob):
         test_preparation_message['test_preparation_job'].update(
             self.base_message
         )
-        return JsonFormat.json_message(test_preparation_message)
+        return test_preparation_message
 
     def get_test_cleanup_message(self):
         """
@@ -200,4 +199,4 @@ class AliyunJob(BaseJob):
             }
         }
         test_cleanup_message['test_cleanup_job'].update(self.base_message)
-        return JsonFormat.json_message(test_cleanup_message)
+        return test_cleanup_message
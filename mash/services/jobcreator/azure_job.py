@@ -18,7 +18,6 @@
 
 from mash.mash_exceptions import MashJobCreatorException
 from mash.services.jobcreator.base_job import BaseJob
-from mash.utils.json_format import JsonFormat
 
 
 class AzureJob(BaseJob):
@@ -62,7 +61,7 @@ class AzureJob(BaseJob):
         }
         deprecate_message['deprecate_job'].update(self.base_message)
 
-        return JsonFormat.json_message(deprecate_message)
+        return deprecate_message
 
     def get_publish_message(self):
         """
@@ -100,7 +99,7 @@ class AzureJob(BaseJob):
 
         publish_message['publish_job'].update(self.base_message)
 
-        return JsonFormat.json_message(publish_message)
+        return publish_message
 
     def get_replicate_message(self):
         """
@@ -113,7 +112,7 @@ class AzureJob(BaseJob):
         }
         replicate_message['replicate_job'].update(self.base_message)
 
-        return JsonFormat.json_message(replicate_message)
+        return replicate_message
 
     def get_test_message(self):
         """
@@ -159,7 +158,7 @@ class AzureJob(BaseJob):
 
         test_message['test_job'].update(self.base_message)
 
-        return JsonFormat.json_message(test_message)
+        return test_message
 
     def get_upload_message(self):
         """
@@ -188,7 +187,7 @@ class AzureJob(BaseJob):
 
         upload_message['upload_job'].update(self.base_message)
 
-        return JsonFormat.json_message(upload_message)
+        return upload_message
 
     def get_create_message(self):
         """
@@ -216,7 +215,7 @@ class AzureJob(BaseJob):
 
         create_message['create_job'].update(self.base_message)
 
-        return JsonFormat.json_message(create_message)
+        return create_message
 
     def get_test_preparation_message(self):
         """
@@ -230,7 +229,7 @@ class AzureJob(BaseJob):
         test_preparation_message['test_preparation_job'].update(
             self.base_message
         )
-        return JsonFormat.json_message(test_preparation_message)
+        return test_preparation_message
 
     def get_test_cleanup_message(self):
         """
@@ -242,4 +241,4 @@ class AzureJob(BaseJob):
             }
         }
         test_cleanup_message['test_cleanup_job'].update(self.base_message)
-        return JsonFormat.json_message(test_cleanup_message)
+        return test_cleanup_message
@@ -17,7 +17,6 @@
 #
 
 from mash.mash_exceptions import MashJobCreatorException
-from mash.utils.json_format import JsonFormat
 
 
 class BaseJob(object):
@@ -71,6 +70,7 @@ class BaseJob(object):
         self.force_replace_image = kwargs.get('force_replace_image')
         self.download_type = kwargs.get('download_type', 'OBS')
         self.download_account = kwargs.get('download_account', 'default')
+        self.transfer_priority = kwargs.get('transfer_priority')
         self.kwargs = kwargs
 
         if self.raw_image_upload_type and self.last_service == 'upload':
@@ -86,6 +86,9 @@ class BaseJob(object):
         if self.notify:
             self.base_message['notification_email'] = self.notification_email
 
+        if self.transfer_priority:
+            self.base_message['transfer_priority'] = self.transfer_priority
+
         self.post_init()
 
     def get_deprecate_message(self):
@@ -143,7 +146,7 @@ class BaseJob(object):
             download_message['download_job']['download_account'] = \
                 self.download_account
 
-        return JsonFormat.json_message(download_message)
+        return download_message
 
     def get_publish_message(self):
         """
@@ -216,7 +219,7 @@ class BaseJob(object):
         }
         raw_image_upload_message['raw_image_upload_job'].update(self.base_message)
 
-        return JsonFormat.json_message(raw_image_upload_message)
+        return raw_image_upload_message
 
     def post_init(self):
         """
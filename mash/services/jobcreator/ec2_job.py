@@ -17,7 +17,6 @@
 #
 
 from mash.services.jobcreator.base_job import BaseJob
-from mash.utils.json_format import JsonFormat
 
 
 class EC2Job(BaseJob):
@@ -93,7 +92,7 @@ class EC2Job(BaseJob):
                 self.old_cloud_image_name
 
         deprecate_message['deprecate_job'].update(self.base_message)
-        return JsonFormat.json_message(deprecate_message)
+        return deprecate_message
 
     def get_mp_deprecate_regions(self):
         """
@@ -152,7 +151,7 @@ class EC2Job(BaseJob):
             }
 
         publish_message['publish_job'].update(self.base_message)
-        return JsonFormat.json_message(publish_message)
+        return publish_message
 
     def get_mp_publish_regions(self):
         """
@@ -185,7 +184,7 @@ class EC2Job(BaseJob):
         }
         replicate_message['replicate_job'].update(self.base_message)
 
-        return JsonFormat.json_message(replicate_message)
+        return replicate_message
 
     def get_replicate_source_regions(self):
         """
@@ -246,7 +245,7 @@ class EC2Job(BaseJob):
 
         test_message['test_job'].update(self.base_message)
 
-        return JsonFormat.json_message(test_message)
+        return test_message
 
     def get_test_regions(self):
         """
@@ -302,7 +301,7 @@ class EC2Job(BaseJob):
         if self.imds_version:
             create_message['create_job']['imds_version'] = self.imds_version
 
-        return JsonFormat.json_message(create_message)
+        return create_message
 
     def get_create_regions(self):
         """
@@ -338,7 +337,7 @@ class EC2Job(BaseJob):
         }
         upload_message['upload_job'].update(self.base_message)
 
-        return JsonFormat.json_message(upload_message)
+        return upload_message
 
     def get_test_preparation_message(self):
         """
@@ -361,7 +360,7 @@ class EC2Job(BaseJob):
             self.base_message
         )
 
-        return JsonFormat.json_message(test_preparation_message)
+        return test_preparation_message
 
     def get_test_preparation_regions(self):
         """
@@ -396,4 +395,4 @@ class EC2Job(BaseJob):
         }
         test_cleanup_message['test_cleanup_job'].update(self.base_message)
 
-        return JsonFormat.json_message(test_cleanup_message)
+        return test_cleanup_message
@@ -16,15 +16,18 @@
 # along with mash.  If not, see <http://www.gnu.org/licenses/>
 #
 
-import json
+import os
 
 from mash.services.mash_service import MashService
 from mash.services.jobcreator import create_job
+from mash.services.jobcreator.status_writer import StatusWriter
 from mash.services.status_levels import SUCCESS
 from mash.utils.json_format import JsonFormat
 from mash.utils.mash_utils import setup_logfile
-from mash.utils.mash_utils import handle_request
-from mash.utils.email_notification import EmailNotification
+from mash.utils.email_notification import (
+    EmailNotification,
+    NotificationQueue
+)
 
 
 class JobCreatorService(MashService):
@@ -48,20 +51,38 @@ class JobCreatorService(MashService):
         self.services = self.config.get_service_names()
         self.database_api_url = self.config.get_database_api_url()
 
+        # Job status updates are sent to the database API in batches.
+        job_directory = self.config.get_job_directory(self.service_exchange)
+        os.makedirs(job_directory, exist_ok=True)
+        self.status_writer = StatusWriter(
+            self.database_api_url,
+            os.path.join(job_directory, 'status_updates.json'),
+            batch_size=self.config.get_status_batch_size(),
+            flush_interval=self.config.get_status_flush_interval(),
+            log=self.log
+        )
+        self.status_writer.start()
+
         self.bind_queue(
             self.service_exchange, self.job_document_key, self.service_queue
         )
         self._bind_result_queues()
 
-        # notification settings
-        self.notification_class = EmailNotification(
-            self.config.get_smtp_host(),
-            self.config.get_smtp_port(),
-            self.config.get_smtp_user(),
-            self.config.get_smtp_pass(),
-            self.config.get_smtp_ssl(),
+        # notification settings, emails are sent from a worker thread
+        self.notification_class = NotificationQueue(
+            EmailNotification(
+                self.config.get_smtp_host(),
+                self.config.get_smtp_port(),
+                self.config.get_smtp_user(),
+                self.config.get_smtp_pass(),
+                self.config.get_smtp_ssl(),
+                log_callback=self.log
+            ),
+            queue_size=self.config.get_notification_queue_size(),
+            digest_window=self.config.get_notification_digest_window(),
             log_callback=self.log
         )
+        self.notification_class.start()
 
         self.start()
 
@@ -78,7 +99,7 @@ class JobCreatorService(MashService):
         Handle new job messages.
         """
         try:
-            job_doc = json.loads(message.body)
+            job_doc = self.decode_message(message)
             self.send_job(job_doc)
         except Exception as error:
             self.log.error(
@@ -94,7 +115,7 @@ class JobCreatorService(MashService):
         job_doc = None
 
         try:
-            job_doc = json.loads(message.body)
+            job_doc = self.decode_message(message)
         except Exception as error:
             self.log.error(
                 'Invalid message received: {0}.'.format(error)
@@ -128,7 +149,7 @@ class JobCreatorService(MashService):
 
     def _process_job_status(self, service, job_doc):
         """
-        Send job status to DB service.
+        Queue job status update for DB service.
 
         Include info on prev and next service which DB service
         does not know about.
@@ -136,17 +157,10 @@ class JobCreatorService(MashService):
         job_doc['current_service'] = self._get_next_service(service)
         job_doc['prev_service'] = service
         last_service = job_doc.pop('last_service')
+        job_doc.pop('traceparent', None)
         notification_email = job_doc.pop('notification_email')
 
-        try:
-            handle_request(
-                self.database_api_url,
-                'jobs/',
-                'put',
-                job_data=job_doc
-            )
-        except Exception as error:
-            self.log.error('Job status update failed: {}'.format(error))
+        self.status_writer.add(job_doc)
 
         if notification_email and (last_service == service):
             self.send_notification(
@@ -158,15 +172,31 @@ class JobCreatorService(MashService):
                 job_doc['errors']
             )
 
-    def publish_job_doc(self, service, job_doc):
+    def publish_job_doc(
+        self, service, job_doc, job_id=None, traceparent=None
+    ):
         """
         Publish the job_doc message to the given service exchange.
+
+        The message is routed to the shard of the service owning the
+        job. Return the delivery future for the message.
         """
-        self._publish(service, self.job_document_key, job_doc)
+        return self._publish_async(
+            service,
+            self.get_shard_routing_key(
+                service, self.job_document_key, job_id
+            ),
+            job_doc,
+            job_id=job_id,
+            traceparent=traceparent
+        )
 
     def send_job(self, job_doc):
         """
         Create instance of job and send to all services to initiate job.
+
+        Starts the trace of the job, the trace context is sent with
+        the job documents.
         """
         job = create_job(job_doc)
 
@@ -175,51 +205,75 @@ class JobCreatorService(MashService):
             extra={'job_id': job.id}
         )
 
+        # The trace of the job starts with sending the job documents,
+        # services record their spans as children of this span.
+        span = self.tracer.start_span(
+            'send_job', None, attributes={'job_id': job.id}
+        )
+        traceparent = span.traceparent
+
+        deliveries = []
         for service in self.services:
             if service == 'deprecate':
-                self.publish_job_doc(
-                    'deprecate', job.get_deprecate_message()
-                )
+                deliveries.append(self.publish_job_doc(
+                    'deprecate', job.get_deprecate_message(), job.id,
+                    traceparent
+                ))
             elif service == 'create':
-                self.publish_job_doc(
-                    'create', job.get_create_message()
-                )
+                deliveries.append(self.publish_job_doc(
+                    'create', job.get_create_message(), job.id,
+                    traceparent
+                ))
             elif service == 'download':
-                self.publish_job_doc(
-                    'download', job.get_download_message()
-                )
+                deliveries.append(self.publish_job_doc(
+                    'download', job.get_download_message(), job.id,
+                    traceparent
+                ))
             elif service == 'publish':
-                self.publish_job_doc(
-                    'publish', job.get_publish_message()
-                )
+                deliveries.append(self.publish_job_doc(
+                    'publish', job.get_publish_message(), job.id,
+                    traceparent
+                ))
             elif service == 'replicate':
-                self.publish_job_doc(
-                    'replicate', job.get_replicate_message()
-                )
+                deliveries.append(self.publish_job_doc(
+                    'replicate', job.get_replicate_message(), job.id,
+                    traceparent
+                ))
             elif service == 'test_preparation':
-                self.publish_job_doc(
-                    'test_preparation', job.get_test_preparation_message()
-                )
+                deliveries.append(self.publish_job_doc(
+                    'test_preparation', job.get_test_preparation_message(), job.id,
+                    traceparent
+                ))
             elif service == 'test':
-                self.publish_job_doc(
-                    'test', job.get_test_message()
-                )
+                deliveries.append(self.publish_job_doc(
+                    'test', job.get_test_message(), job.id,
+                    traceparent
+                ))
             elif service == 'test_cleanup':
-                self.publish_job_doc(
-                    'test_cleanup', job.get_test_cleanup_message()
-                )
+                deliveries.append(self.publish_job_doc(
+                    'test_cleanup', job.get_test_cleanup_message(), job.id,
+                    traceparent
+                ))
             elif service == 'upload':
-                self.publish_job_doc(
-                    'upload', job.get_upload_message()
-                )
+                deliveries.append(self.publish_job_doc(
+                    'upload', job.get_upload_message(), job.id,
+                    traceparent
+                ))
             elif service == 'raw_image_upload':
-                self.publish_job_doc(
-                    'raw_image_upload', job.get_raw_image_upload_message()
-                )
+                deliveries.append(self.publish_job_doc(
+                    'raw_image_upload', job.get_raw_image_upload_message(), job.id,
+                    traceparent
+                ))
 
             if service == job.last_service:
                 break
 
+        # Job documents are confirmed as one batch by the publisher.
+        for delivery in deliveries:
+            delivery.result()
+
+        span.end()
+
     def _create_notification_content(
         self,
         job_id,
@@ -309,7 +363,10 @@ class JobCreatorService(MashService):
         """
         Stop job creator service.
 
-        Stop consuming queues and close pika connections.
+        Stop consuming queues, flush job status updates, send queued
+        notifications and close pika connections.
         """
         self.channel.stop_consuming()
+        self.status_writer.stop()
+        self.notification_class.stop()
         self.close_connection()
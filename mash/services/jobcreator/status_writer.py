@@ -0,0 +1,299 @@
+# Copyright (c) 2026 SUSE LLC.  All rights reserved.
+#
+# This file is part of mash.
+#
+# mash is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# mash is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with mash.  If not, see <http://www.gnu.org/licenses/>
+#
+
+import os
+import threading
+
+from collections import OrderedDict
+
+from mash.mash_exceptions import MashRequestException
+from mash.utils.mash_utils import (
+    handle_request,
+    load_json,
+    persist_json,
+    remove_file
+)
+
+
+class StatusWriter(object):
+    """
+    Write-behind buffer for job status updates to the database API.
+
+    Updates are buffered per job and sent in batches to the bulk
+    job status endpoint from a background thread. The updates of a
+    job are always sent in the order they were added.
+
+    If the database API is unavailable the buffered updates are
+    persisted in the spill file and sent once the API is available
+    again, including after a restart of the service. Flushes are
+    retried with an exponential backoff.
+
+    A batch the API rejects, with a client error or with a server
+    error max_attempts times in a row, is split in halves which are
+    sent on their own until only the rejected updates are dropped.
+
+    Attributes
+
+    * :attr:`database_api_url`
+      URL of the database API
+
+    * :attr:`spill_file`
+      File the buffered updates are persisted in if a flush fails
+
+    * :attr:`batch_size`
+      Max number of updates sent in one request
+
+    * :attr:`flush_interval`
+      Max seconds an update is buffered before it is sent
+
+    * :attr:`max_attempts`
+      Max number of attempts to send a batch failing with a server error
+
+    * :attr:`max_backoff`
+      Max seconds between two flushes while the API is unavailable
+    """
+    def __init__(
+        self,
+        database_api_url,
+        spill_file,
+        batch_size=100,
+        flush_interval=1,
+        log=None,
+        max_attempts=5,
+        max_backoff=60
+    ):
+        self.database_api_url = database_api_url
+        self.spill_file = spill_file
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.log = log
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+
+        self._pending = OrderedDict()
+        self._count = 0
+        self._failures = 0
+        self._attempts = 0
+        self._spilled = False
+        self._stopping = False
+        self._thread = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+        self._load_spill_file()
+
+    def _add_pending(self, updates, first=False):
+        """
+        Add the updates to the buffer.
+
+        If first is set the updates are sent before the buffered
+        updates of their job.
+        """
+        for job_doc in reversed(updates) if first else updates:
+            job_updates = self._pending.setdefault(job_doc['id'], [])
+
+            if first:
+                job_updates.insert(0, job_doc)
+                self._pending.move_to_end(job_doc['id'], last=False)
+            else:
+                job_updates.append(job_doc)
+
+            self._count += 1
+
+    def _get_batch(self):
+        """
+        Remove and return the next batch of buffered updates.
+
+        The updates of a job are not split between batches so a
+        batch can exceed the batch size for a single job.
+        """
+        batch = []
+
+        while self._pending and len(batch) < self.batch_size:
+            job_id, job_updates = self._pending.popitem(last=False)
+            batch.extend(job_updates)
+
+        self._count -= len(batch)
+        return batch
+
+    def _load_spill_file(self):
+        """
+        Buffer the updates persisted by a previous flush failure.
+        """
+        if os.path.isfile(self.spill_file):
+            self._add_pending(load_json(self.spill_file))
+            self._spilled = True
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self._get_wait())
+            self._wakeup.clear()
+            self.flush()
+
+    def _get_wait(self):
+        """
+        Return the seconds until the next flush, backing off while the
+        API is unavailable.
+        """
+        if not self._failures:
+            return self.flush_interval
+
+        return min(
+            self.flush_interval * 2 ** self._failures,
+            self.max_backoff
+        )
+
+    def _send(self, batch, split=False):
+        """
+        Send the batch and log the updates the API failed to save.
+
+        Raises if the API is unavailable or if the batch failed with a
+        server error less than max_attempts times in a row. Rejected
+        batches are split, the halves of a split batch are not retried.
+        """
+        try:
+            response = handle_request(
+                self.database_api_url,
+                'jobs/bulk',
+                'put',
+                job_data=batch
+            )
+        except MashRequestException as error:
+            if error.status_code in (502, 503, 504):
+                # API unavailable behind a proxy
+                raise
+
+            if error.status_code >= 500 and not split:
+                self._attempts += 1
+
+                if self._attempts < self.max_attempts:
+                    raise
+
+            self._attempts = 0
+            self._reject(batch, error)
+            return
+
+        self._attempts = 0
+        errors = response.json().get('errors') or {}
+        for job_id, error in errors.items():
+            if self.log:
+                self.log.warning(
+                    'Job status update failed: {0}'.format(error),
+                    extra={'job_id': job_id}
+                )
+
+    def _reject(self, batch, error):
+        """
+        Send the halves of a rejected batch, a single update is dropped.
+        """
+        if len(batch) > 1:
+            middle = len(batch) // 2
+            self._send(batch[:middle], split=True)
+            self._send(batch[middle:], split=True)
+        elif self.log:
+            self.log.error(
+                'Job status update rejected: {0}'.format(error),
+                extra={'job_id': batch[0]['id']}
+            )
+
+    def _spill(self):
+        """
+        Persist the buffered updates in the spill file.
+        """
+        with self._lock:
+            updates = [
+                job_doc
+                for job_updates in self._pending.values()
+                for job_doc in job_updates
+            ]
+
+        if updates:
+            persist_json(self.spill_file, updates)
+            self._spilled = True
+        elif self._spilled:
+            remove_file(self.spill_file)
+            self._spilled = False
+
+    def add(self, job_doc):
+        """
+        Buffer the status update for the job.
+        """
+        with self._lock:
+            self._add_pending([job_doc])
+            full = self._count >= self.batch_size
+
+        if full and not self._failures:
+            self._wakeup.set()
+
+    def flush(self):
+        """
+        Send all buffered updates in batches.
+
+        Return False if the database API is unavailable, the updates
+        are kept in the buffer and persisted in the spill file.
+        """
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = self._get_batch()
+
+                if not batch:
+                    break
+
+                try:
+                    self._send(batch)
+                except Exception as error:
+                    with self._lock:
+                        self._add_pending(batch, first=True)
+
+                    self._spill()
+                    self._failures += 1
+
+                    if self.log:
+                        self.log.warning(
+                            'Job status update failed, {0} updates '
+                            'pending: {1}'.format(self._count, error)
+                        )
+                    return False
+
+                self._failures = 0
+
+            if self._spilled:
+                self._spill()
+
+        return True
+
+    def start(self):
+        """
+        Start flushing buffered updates in the background.
+        """
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background thread and flush the buffered updates.
+        """
+        self._stopping = True
+        self._wakeup.set()
+
+        if self._thread:
+            self._thread.join()
+
+        self.flush()
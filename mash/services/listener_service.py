@@ -16,9 +16,10 @@
 # along with mash.  If not, see <http://www.gnu.org/licenses/>
 #
 
-import json
+import base64
 import os
 import signal
+import time
 
 from amqpstorm import AMQPError
 
@@ -30,15 +31,51 @@ from apscheduler.executors.pool import ThreadPoolExecutor
 from pytz import utc
 
 from mash.mash_exceptions import MashListenerServiceException
+from mash.services.admission_controller import AdmissionController
+from mash.services.async_listener_engine import AsyncListenerEngine
+from mash.services.job_store import get_job_store
 from mash.services.mash_service import MashService
-from mash.services.status_levels import EXCEPTION, SUCCESS
-from mash.utils.json_format import JsonFormat
-from mash.utils.mash_utils import (
-    remove_file,
-    persist_json,
-    restart_jobs,
-    setup_logfile
-)
+from mash.services.retry_policy import RetryPolicy
+from mash.services.status_levels import EXCEPTION, STREAMING, SUCCESS
+from mash.utils.bandwidth import bandwidth_allocator
+from mash.utils.rate_governor import rate_governor
+from mash.utils.mash_utils import setup_logfile
+
+# Listener messages of jobs that are not queued are delivered again
+# after the delay in case the job document is still on the way.
+UNKNOWN_JOB_DELAY = 60
+UNKNOWN_JOB_ATTEMPTS = 5
+UNKNOWN_JOB_HEADER = 'unknown_job_attempts'
+
+# Messages that never found their job are kept for inspection.
+DEAD_LETTER_TTL = 7 * 24 * 3600
+
+
+class ParkedMessage(object):
+    """
+    Listener message of a job waiting for admission.
+
+    The message is persisted with the job so the AMQP message can be
+    acked while the job waits.
+
+    Attributes
+
+    * :attr:`body`
+      The message body
+
+    * :attr:`properties`
+      Dictionary of the message properties
+
+    * :attr:`ack_callback`
+      Callable run when the message is acked
+    """
+    def __init__(self, body, properties, ack_callback):
+        self.body = body
+        self.properties = properties
+        self.ack_callback = ack_callback
+
+    def ack(self):
+        self.ack_callback()
 
 
 class ListenerService(MashService):
@@ -53,14 +90,40 @@ class ListenerService(MashService):
         self.listener_msg_key = 'listener_msg'
 
         self.jobs = {}
+        self.job_traces = {}
 
         # setup service job directory
         self.job_directory = self.config.get_job_directory(
             self.service_exchange
         )
+
+        # Each replica of a sharded service serves one shard. It
+        # consumes the queues and owns the job files of the shard, a
+        # replica started for the shard takes over both.
+        self.shard_count = self.config.get_shard_count(self.service_exchange)
+        self.sharded = self.shard_count > 1
+
+        if self.sharded:
+            self.shard_id = self.config.get_shard_id()
+
+            if not 0 <= self.shard_id < self.shard_count:
+                raise MashListenerServiceException(
+                    'Shard id {0} is not a shard of the {1} shards of '
+                    'the service.'.format(self.shard_id, self.shard_count)
+                )
+
+            self.listener_queue = 'listener.{0}'.format(self.shard_id)
+            self.service_queue = 'service.{0}'.format(self.shard_id)
+            self.job_directory = os.path.join(
+                self.job_directory, 'shard.{0}'.format(self.shard_id), ''
+            )
+
         os.makedirs(
             self.job_directory, exist_ok=True
         )
+        self.job_store = get_job_store(
+            self.config.get_job_store(), self.job_directory
+        )
 
         self.prev_service = self._get_previous_service()
 
@@ -79,17 +142,46 @@ class ListenerService(MashService):
         )
         self.log.addHandler(logfile_handler)
 
-        self.bind_queue(
-            self.service_exchange, self.job_document_key, self.service_queue
-        )
-        self.bind_queue(
-            self.prev_service, self.listener_msg_key, self.listener_queue
+        self.retry_policy = RetryPolicy(
+            **self.config.get_retry_policy(self.service_exchange)
         )
 
+        self._bind_queues()
+
         thread_pool_count = self.custom_args.get(
             'thread_pool_count',
             self.config.get_base_thread_pool_count()
         )
+
+        # Bound unacknowledged messages per queue. Listener messages of
+        # admitted jobs are not acked until the job finishes so by
+        # default the window follows the number of scheduler threads.
+        # Jobs waiting for admission are parked and do not hold it.
+        self.service_prefetch_count = self.custom_args.get(
+            'service_prefetch_count',
+            self.config.get_service_prefetch_count()
+        )
+        self.listener_prefetch_count = self.custom_args.get(
+            'listener_prefetch_count',
+            self.config.get_listener_prefetch_count() or thread_pool_count
+        )
+
+        engine = self.custom_args.get(
+            'engine',
+            self.config.get_listener_engine(self.service_exchange)
+        )
+
+        if engine == 'asyncio':
+            self.async_engine = AsyncListenerEngine(self, thread_pool_count)
+            # Messages are published on the event loop of the engine
+            self.publisher = self.async_engine.publisher
+        elif engine == 'thread':
+            self.async_engine = None
+        else:
+            raise MashListenerServiceException(
+                'Unsupported listener engine: {0}'.format(engine)
+            )
+
         executors = {
             'default': ThreadPoolExecutor(thread_pool_count)
         }
@@ -103,17 +195,46 @@ class ListenerService(MashService):
             events.EVENT_JOB_MISSED
         )
 
+        # EC2 API requests of all jobs share one rate governor.
+        rate_governor.configure(
+            rate=self.config.get_ec2_api_rate(),
+            burst=self.config.get_ec2_api_burst(),
+            max_attempts=self.config.get_max_ec2_attempts()
+        )
+
+        # Image transfers share the bandwidth budget of the node.
+        bandwidth_allocator.configure(
+            limit=self.config.get_bandwidth_limit(),
+            directory=self.config.get_bandwidth_directory(),
+            cloud_weights=self.config.get_bandwidth_cloud_weights(),
+            priority_weights=self.config.get_bandwidth_priority_weights()
+        )
+
+        # Jobs are only added to the scheduler while within the
+        # concurrency limits for their cloud, accounts and regions.
+        self.admission = AdmissionController(
+            self.config.get_job_concurrency_limits(),
+            self._admit_job,
+            self._park_job
+        )
+        self._setup_job_metrics(thread_pool_count)
+
         signal.signal(signal.SIGINT, self.stop)
         signal.signal(signal.SIGTERM, self.stop)
 
-        restart_jobs(self.job_directory, self._add_job)
+        for job_config in self.job_store.iter_jobs():
+            self._add_job(job_config)
+
+            if 'listener_msg' in job_config:
+                self._restore_parked_job(job_config)
+
         self.start()
 
     def _add_job(self, job_config):
         """
         Create job using job factory if job id does not already exist.
 
-        Job config is persisted to disk if not already done.
+        Job config is persisted in the job store if not already done.
         """
         job_id = job_config['id']
 
@@ -127,14 +248,10 @@ class ListenerService(MashService):
             else:
                 self.jobs[job.id] = job
                 job.log_callback = self.log
+                self.jobs_received.inc()
 
                 if 'job_file' not in job_config:
-                    job_config['job_file'] = '{0}job-{1}.json'.format(
-                        self.job_directory, job_id
-                    )
-                    persist_json(
-                        job_config['job_file'], job_config
-                    )
+                    self.job_store.add(job_config)
                     job.job_file = job_config['job_file']
 
                 self.log.info(
@@ -147,6 +264,91 @@ class ListenerService(MashService):
                 extra={'job_id': job_id}
             )
 
+    def _admit_job(self, job_id):
+        """
+        Add the admitted job to the background scheduler.
+
+        With the asyncio engine the job is started on the event loop.
+        """
+        self.job_start_times[job_id] = time.monotonic()
+        self._set_trace_time(job_id, 'admitted')
+
+        if self.async_engine:
+            self.async_engine.schedule(job_id)
+            return
+
+        try:
+            self.scheduler.add_job(
+                self._start_job,
+                args=(job_id,),
+                id=job_id,
+                max_instances=1,
+                misfire_grace_time=None,
+                coalesce=True
+            )
+        except ConflictingIdError:
+            self.log.warning(
+                'Job already running. Received multiple '
+                'listener messages.',
+                extra={'job_id': job_id}
+            )
+
+    def _bind_queues(self):
+        """
+        Bind the service and listener queues.
+
+        The queues of a sharded service replica are bound with the
+        routing keys of the shard. Producers route both messages of a
+        job to the shard by job id, see get_shard_routing_key.
+        """
+        job_document_key = self.job_document_key
+        listener_msg_key = self.listener_msg_key
+
+        if self.sharded:
+            job_document_key = '{0}.{1}'.format(
+                job_document_key, self.shard_id
+            )
+            listener_msg_key = '{0}.{1}'.format(
+                listener_msg_key, self.shard_id
+            )
+
+        self.bind_queue(
+            self.service_exchange, job_document_key, self.service_queue
+        )
+        self.bind_queue(
+            self.prev_service, listener_msg_key, self.listener_queue
+        )
+
+        listener_queue = self._get_queue_name(
+            self.prev_service, self.listener_queue
+        )
+        self.channel.queue.declare(
+            queue=self._get_unknown_job_queue('unknown'),
+            durable=True,
+            arguments={
+                'x-message-ttl': UNKNOWN_JOB_DELAY * 1000,
+                'x-dead-letter-exchange': '',
+                'x-dead-letter-routing-key': listener_queue
+            }
+        )
+        self.channel.queue.declare(
+            queue=self._get_unknown_job_queue('dead'),
+            durable=True,
+            arguments={'x-message-ttl': DEAD_LETTER_TTL * 1000}
+        )
+
+        # Delay queues for retries dead letter the listener message
+        # back to the listener queue once the message expires.
+        for attempt in range(1, self.retry_policy.max_attempts + 1):
+            self.channel.queue.declare(
+                queue=self._get_retry_queue(attempt),
+                durable=True,
+                arguments={
+                    'x-dead-letter-exchange': '',
+                    'x-dead-letter-routing-key': listener_queue
+                }
+            )
+
     def _cleanup_job(self, job_id):
         """
         Job failed upstream.
@@ -157,13 +359,18 @@ class ListenerService(MashService):
 
         self.log.warning('Failed upstream.', extra=job.get_job_id())
         self._delete_job(job.id)
+        self._publish_job_status(job)
 
-        message = self._get_status_message(job)
-        self._publish_message(message, job.id)
+    def _close(self):
+        """
+        Close AMQP connection and the job store.
+        """
+        self.close_connection()
+        self.job_store.close()
 
     def _delete_job(self, job_id):
         """
-        Remove job from file store and delete from listener queue.
+        Remove job from job store and delete from listener queue.
 
         Also attempt to remove any running instances of the job.
         """
@@ -175,7 +382,7 @@ class ListenerService(MashService):
             )
 
             del self.jobs[job_id]
-            remove_file(job.job_file)
+            self.job_store.delete(job_id)
         else:
             self.log.warning(
                 'Job deletion failed, job is not queued.',
@@ -198,25 +405,109 @@ class ListenerService(MashService):
 
         return services[index]
 
-    def _get_status_message(self, job):
+    def _defer_listener_message(self, message, job_id):
         """
-        Build and return json message.
+        Deliver the listener message of a job that is not queued again.
 
-        Message contains completion status to post to next service exchange.
+        The job document may still be on the way, the message is
+        delivered again after UNKNOWN_JOB_DELAY seconds. After
+        UNKNOWN_JOB_ATTEMPTS deliveries the message is moved to the
+        dead letter queue of the listener queue.
         """
-        key = '{0}_result'.format(self.service_exchange)
-        return JsonFormat.json_message(
-            {
-                key: job.get_status_message()
-            }
+        properties = {
+            key: value for key, value in message.properties.items()
+            if value is not None
+        }
+        headers = dict(properties.get('headers') or {})
+        headers[UNKNOWN_JOB_HEADER] = headers.get(UNKNOWN_JOB_HEADER, 0) + 1
+        properties['headers'] = headers
+        properties['delivery_mode'] = 2
+
+        if headers[UNKNOWN_JOB_HEADER] > UNKNOWN_JOB_ATTEMPTS:
+            queue = self._get_unknown_job_queue('dead')
+            self.log.warning(
+                'Job not queued, moving listener message to {0}.'.format(
+                    queue
+                ),
+                extra={'job_id': job_id}
+            )
+        else:
+            queue = self._get_unknown_job_queue('unknown')
+
+        try:
+            self.publisher.publish(
+                '',
+                queue,
+                message.body,
+                properties=properties,
+                mandatory=True
+            ).result()
+        except AMQPError as error:
+            self.log.warning(
+                'Listener message not deferred: {0}'.format(error),
+                extra={'job_id': job_id}
+            )
+            message.nack(requeue=True)
+        else:
+            message.ack()
+
+    def _drop_parked_message(self, job_id):
+        """
+        Remove the parked listener message from the stored job.
+        """
+        if job_id not in self.jobs:
+            # Job is finished and deleted from the store
+            return
+
+        job_config = self.job_store.get(job_id)
+        job_config.pop('listener_msg', None)
+        self.job_store.update(job_id, job_config)
+
+    def _get_retry_queue(self, attempt):
+        """
+        Return the name of the delay queue for the retry attempt.
+
+        Example test.listener.retry.1
+        """
+        return self._get_queue_name(
+            self.prev_service,
+            '{0}.retry.{1}'.format(self.listener_queue, attempt)
         )
 
+    def _get_unknown_job_queue(self, name):
+        """
+        Return the queue for listener messages of unknown jobs.
+
+        Example test.listener.unknown
+        """
+        return self._get_queue_name(
+            self.prev_service,
+            '{0}.{1}'.format(self.listener_queue, name)
+        )
+
+    def _get_status_message(self, job, traceparent=None):
+        """
+        Build and return status message.
+
+        Message contains completion status to post to next service exchange
+        and the trace context if set.
+        """
+        key = '{0}_result'.format(self.service_exchange)
+        status_message = dict(job.get_status_message())
+
+        if traceparent:
+            status_message['traceparent'] = traceparent
+
+        return {
+            key: status_message
+        }
+
     def _handle_listener_message(self, message):
         """
         Callback for listener messages.
         """
         listener_msg = self._get_listener_msg(
-            message.body,
+            message,
             '{0}_result'.format(self.prev_service)
         )
 
@@ -225,12 +516,29 @@ class ListenerService(MashService):
             status = listener_msg['status']
             job_id = listener_msg['id']
 
-        if job_id and job_id in self.jobs:
+        if job_id and job_id not in self.jobs:
+            # The job document may not be consumed yet
+            self._defer_listener_message(message, job_id)
+            return
+
+        if job_id:
             job = self.jobs[listener_msg['id']]
+
+            if status == STREAMING and not job.stream_image:
+                # Job waits for the result of the complete image
+                message.ack()
+                return
+            elif job.streaming and status != STREAMING:
+                # Streaming job reads the result from the image stream
+                message.ack()
+                return
+
             job.listener_msg = message
             job.set_status_message(listener_msg)
+            job.streaming = status == STREAMING
+            self._trace_queue_wait(job, message)
 
-            if status == SUCCESS:
+            if status in (SUCCESS, STREAMING):
                 self._schedule_job(job.id)
                 return  # Don't ack message until job finishes
             else:
@@ -244,13 +552,51 @@ class ListenerService(MashService):
         """
         job_key = '{0}_job'.format(self.service_exchange)
         try:
-            job_desc = json.loads(message.body)
-            self._add_job(job_desc[job_key])
+            job_desc = self.decode_message(message)
+            job_config = job_desc[job_key]
+
+            traceparent, sent_at = self.get_trace_context(message)
+            if traceparent:
+                job_config.setdefault('traceparent', traceparent)
+
+            self._add_job(job_config)
         except Exception as e:
             self.log.error('Error adding job: {0}.'.format(e))
 
         message.ack()
 
+    def _park_job(self, job):
+        """
+        Persist the listener message of a job waiting for admission.
+
+        The AMQP message is acked once the job waits so waiting jobs
+        do not hold the prefetch window of the listener queue.
+        """
+        if isinstance(job.listener_msg, ParkedMessage):
+            return
+
+        body = job.listener_msg.body
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+
+        properties = {
+            key: value for key, value in job.listener_msg.properties.items()
+            if value is not None
+        }
+
+        job_config = self.job_store.get(job.id)
+        job_config['listener_msg'] = {
+            'body': base64.b64encode(body).decode(),
+            'properties': properties
+        }
+        self.job_store.update(job.id, job_config)
+
+        job.listener_msg = ParkedMessage(
+            body,
+            properties,
+            lambda: self._drop_parked_message(job.id)
+        )
+
     def _process_job_result(self, event):
         """
         Callback when job background process finishes.
@@ -261,8 +607,26 @@ class ListenerService(MashService):
         job = self.jobs[job_id]
         metadata = job.get_job_id()
 
+        self.admission.release(job_id)
+
+        start = self.job_start_times.pop(job_id, None)
+        if start is not None:
+            self.job_duration.observe(
+                time.monotonic() - start, cloud=job.cloud
+            )
+
+        retry = bool(event.exception) and \
+            self._retry_job(job, event.exception)
+        self._trace_job_run(job, event.exception, retry)
+
+        if retry:
+            return
+
         self._delete_job(job_id)
 
+        if event.exception or job.status != SUCCESS:
+            self.job_failures.inc(cloud=job.cloud)
+
         if event.exception:
             job.status = EXCEPTION
             msg = 'Exception in {0}: {1}'.format(
@@ -289,8 +653,7 @@ class ListenerService(MashService):
                 extra=metadata
             )
 
-        message = self._get_status_message(job)
-        self._publish_message(message, job.id)
+        self._publish_job_status(job)
         job.listener_msg.ack()
 
     def _process_job_missed(self, event):
@@ -310,54 +673,269 @@ class ListenerService(MashService):
             extra=metadata
         )
 
-    def _publish_message(self, message, job_id):
+    def _publish_job_status(self, job):
+        """
+        Publish the job status to the next service in a publish span.
+        """
+        span = self.tracer.start_span(
+            'publish', job.traceparent, attributes=job.get_job_id()
+        )
+        message = self._get_status_message(job, span.traceparent)
+        self._publish_message(message, job.id, span.traceparent)
+        span.end()
+
+    def _publish_message(self, message, job_id, traceparent=None):
         """
         Publish message to next service exchange.
         """
         try:
-            self.publish_job_result(self.service_exchange, message)
+            self.publish_job_result(
+                self.service_exchange, message, job_id, traceparent
+            )
         except AMQPError:
             self.log.warning(
                 'Message not received: {0}'.format(message),
                 extra={'job_id': job_id}
             )
 
-    def _schedule_job(self, job_id):
+    def _retry_job(self, job, exception):
         """
-        Schedule new job in background scheduler for job based on id.
+        Retry the job after a backoff delay if the exception is retryable.
+
+        The listener message is published to the delay queue for the
+        attempt and the retry count is persisted in the job store.
+        Return True if the job will be retried.
         """
+        metadata = job.get_job_id()
+
+        if job.retry_count >= self.retry_policy.max_attempts or \
+                not self.retry_policy.is_retryable(exception):
+            return False
+
+        job.retry_count += 1
+        delay = self.retry_policy.get_delay(job.retry_count)
+
+        job_config = self.job_store.get(job.id)
+        job_config['retry_count'] = job.retry_count
+        self.job_store.update(job.id, job_config)
+
+        properties = {
+            key: value for key, value in job.listener_msg.properties.items()
+            if value is not None
+        }
+        properties['delivery_mode'] = 2
+        properties['expiration'] = str(int(delay * 1000))
+
         try:
-            self.scheduler.add_job(
-                self._start_job,
-                args=(job_id,),
-                id=job_id,
-                max_instances=1,
-                misfire_grace_time=None,
-                coalesce=True
+            self.publisher.publish(
+                '',
+                self._get_retry_queue(job.retry_count),
+                job.listener_msg.body,
+                properties=properties,
+                mandatory=True
+            ).result()
+        except AMQPError as error:
+            self.log.warning(
+                'Job retry failed: {0}'.format(error),
+                extra=metadata
             )
-        except ConflictingIdError:
+            return False
+
+        self.log.warning(
+            'Exception in {0}: {1}. Retry {2} of {3} in {4:.0f} '
+            'seconds.'.format(
+                self.service_exchange,
+                exception,
+                job.retry_count,
+                self.retry_policy.max_attempts,
+                delay
+            ),
+            extra=metadata
+        )
+        job.listener_msg.ack()
+        self.job_retries.inc(cloud=job.cloud)
+        return True
+
+    def _restore_parked_job(self, job_config):
+        """
+        Handle the parked listener message of a stored job again.
+        """
+        job_id = job_config['id']
+        parked_msg = job_config['listener_msg']
+        message = ParkedMessage(
+            base64.b64decode(parked_msg['body']),
+            parked_msg['properties'],
+            lambda: self._drop_parked_message(job_id)
+        )
+
+        if job_id in self.jobs:
+            self._handle_listener_message(message)
+
+    def _schedule_job(self, job_id):
+        """
+        Schedule new job in background scheduler for job based on id.
+
+        The job waits in the admission queue if the concurrency limits
+        for its cloud, accounts or regions are reached. The listener
+        message of a waiting job is parked with the job and acked.
+        """
+        job = self.jobs[job_id]
+        message = job.listener_msg
+
+        if job_id in self.admission:
             self.log.warning(
                 'Job already running. Received multiple '
                 'listener messages.',
                 extra={'job_id': job_id}
             )
+        elif not self.admission.submit(job):
+            if message is not job.listener_msg:
+                message.ack()
+
+            self.log.info(
+                'Job waiting for concurrency limits.',
+                extra=job.get_job_id()
+            )
+
+    def _set_trace_time(self, job_id, name):
+        if job_id in self.job_traces:
+            self.job_traces[job_id][name] = time.time()
+
+    def _setup_job_metrics(self, thread_pool_count):
+        """
+        Create the job metrics of the listener service.
+        """
+        self.job_start_times = {}
+
+        self.jobs_received = self.metrics.counter(
+            'mash_jobs_received_total',
+            'Number of jobs received by the service.'
+        )
+        self.metrics.gauge(
+            'mash_jobs_in_flight',
+            'Number of admitted jobs that have not finished.'
+        ).set_function(self.admission.get_running_count)
+        self.metrics.gauge(
+            'mash_jobs_waiting',
+            'Number of jobs waiting for concurrency limits.'
+        ).set_function(self.admission.get_waiting_count)
+        self.metrics.gauge(
+            'mash_jobs',
+            'Number of jobs owned by the service.'
+        ).set_function(lambda: len(self.jobs))
+        self.job_duration = self.metrics.histogram(
+            'mash_job_duration_seconds',
+            'Time from job admission until the job finished.',
+            ['cloud']
+        )
+        self.job_failures = self.metrics.counter(
+            'mash_job_failures_total',
+            'Number of failed jobs.',
+            ['cloud']
+        )
+        self.job_retries = self.metrics.counter(
+            'mash_job_retries_total',
+            'Number of retried job executions.',
+            ['cloud']
+        )
+        self.metrics.gauge(
+            'mash_thread_pool_size',
+            'Number of threads for running jobs.'
+        ).set(thread_pool_count)
+        self.busy_threads = self.metrics.gauge(
+            'mash_thread_pool_busy_threads',
+            'Number of threads running a job.'
+        )
 
     def _start_job(self, job_id):
         """
         Process job based on job id.
         """
         job = self.jobs[job_id]
-        job.process_job()
+        self._set_trace_time(job_id, 'started')
+        self.busy_threads.inc()
+
+        try:
+            job.process_job()
+        finally:
+            self.busy_threads.dec()
+
+    def _trace_job_run(self, job, exception, retry):
+        """
+        Record the admission wait, scheduler wait and run_job spans.
+
+        Jobs run as coroutines are not queued in the scheduler and
+        start once admitted.
+        """
+        end = time.time()
+        times = self.job_traces.pop(job.id, None)
+
+        if not times or 'admitted' not in times:
+            return
+
+        started = times.get('started', times['admitted'])
+        attributes = job.get_job_id()
+
+        self.tracer.record_span(
+            'admission_wait',
+            job.traceparent,
+            times['received'],
+            times['admitted'],
+            attributes=attributes
+        )
+        self.tracer.record_span(
+            'scheduler_wait',
+            job.traceparent,
+            times['admitted'],
+            started,
+            attributes=attributes
+        )
+
+        run_attributes = dict(attributes)
+        run_attributes['status'] = EXCEPTION if exception else job.status
+        run_attributes['retry'] = retry
+        if exception:
+            run_attributes['error'] = str(exception)
+
+        self.tracer.record_span(
+            'run_job',
+            job.traceparent,
+            started,
+            end,
+            attributes=run_attributes
+        )
+
+    def _trace_queue_wait(self, job, message):
+        """
+        Record the time the listener message waited in the queue.
+
+        The span links the publish span of the previous service.
+        """
+        received = time.time()
+        traceparent, sent_at = self.get_trace_context(message)
+        self.job_traces[job.id] = {'received': received}
+
+        if sent_at:
+            attributes = job.get_job_id()
+            attributes['previous_span'] = traceparent
+
+            self.tracer.record_span(
+                'queue_wait',
+                job.traceparent,
+                min(float(sent_at), received),
+                received,
+                attributes=attributes
+            )
 
     def _get_listener_msg(self, message, key):
-        """Load json and attempt to get message by key."""
+        """Decode message and attempt to get message by key."""
         try:
-            listener_msg = json.loads(message)[key]
+            listener_msg = self.decode_message(message)[key]
         except Exception:
             self.log.error(
                 'Invalid listener message: {0}, '
                 'missing key: {1}'.format(
-                    message,
+                    message.body,
                     key
                 )
             )
@@ -365,30 +943,62 @@ class ListenerService(MashService):
 
         return listener_msg
 
-    def publish_job_result(self, exchange, message):
+    def publish_job_result(
+        self, exchange, message, job_id=None, traceparent=None
+    ):
         """
         Publish the result message to the listener queue on given exchange.
+
+        The message is routed to the shard of the next service owning
+        the job.
         """
-        self._publish(exchange, self.listener_msg_key, message)
+        self._publish(
+            exchange,
+            self.get_shard_routing_key(
+                self._get_next_service(), self.listener_msg_key, job_id
+            ),
+            message,
+            job_id=job_id,
+            traceparent=traceparent
+        )
 
     def start(self):
         """
         Start listener service.
+
+        The service and listener queues are consumed on separate
+        channels, each with its own prefetch window.
         """
+        if self.async_engine:
+            try:
+                self.async_engine.run()
+            finally:
+                self._close()
+            return
+
         self.scheduler.start()
+
+        service_channel = self.open_consumer_channel(
+            self.service_prefetch_count
+        )
+        listener_channel = self.open_consumer_channel(
+            self.listener_prefetch_count
+        )
         self.consume_queue(
             self._handle_service_message,
             self.service_queue,
-            self.service_exchange
+            self.service_exchange,
+            channel=service_channel
         )
         self.consume_queue(
             self._handle_listener_message,
             self.listener_queue,
-            self.prev_service
+            self.prev_service,
+            channel=listener_channel
         )
 
         try:
-            self.channel.start_consuming()
+            self.consume_channels([service_channel, listener_channel])
         except Exception:
             self.stop()
             raise
@@ -399,6 +1009,9 @@ class ListenerService(MashService):
 
         Shutdown scheduler and wait for running jobs to finish.
         Close AMQP connection.
+
+        The asyncio engine is stopped and start closes the connection
+        once running jobs finish.
         """
         if signum:
             self.log.info(
@@ -410,5 +1023,8 @@ class ListenerService(MashService):
                 'shutting down gracefully.'
             )
 
-        self.scheduler.shutdown()
-        self.close_connection()
+        if self.async_engine:
+            self.async_engine.stop()
+        else:
+            self.scheduler.shutdown()
+            self._close()
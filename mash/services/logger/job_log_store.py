@@ -0,0 +1,420 @@
+# Copyright (c) 2026 SUSE LLC.  All rights reserved.
+#
+# This file is part of mash.
+#
+# mash is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# mash is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with mash.  If not, see <http://www.gnu.org/licenses/>
+#
+
+import bisect
+import os
+import struct
+import time
+import zlib
+
+# timestamp, log offset, line length, level, service
+INDEX_ENTRY = struct.Struct('<dQIH32s')
+
+# uncompressed offset, compressed offset, compressed length
+FRAME_ENTRY = struct.Struct('<QQI')
+
+DEFAULT_FRAME_SIZE = 1024 * 1024
+
+
+def get_index_file(log_file):
+    return log_file + '.idx'
+
+
+def get_frames_file(log_file):
+    return log_file + '.frames'
+
+
+def get_compressed_file(log_file):
+    return log_file + '.zf'
+
+
+class JobLog(object):
+    """
+    Append-only job log file with a sidecar index.
+
+    The index has a fixed size entry per log line with the timestamp,
+    byte offset, length, level and service of the line. Lines of an
+    existing log without index entries are covered by a single entry
+    without level and service.
+
+    Services log the lines of a job independently, so lines can
+    arrive out of time order. The index is kept in time order, a line
+    logged before the last indexed line gets the timestamp of that
+    line. An unindexed entry gets the timestamp of the line before it.
+
+    A compressed job log is decompressed when it is opened to append
+    new lines.
+
+    Attributes
+
+    * :attr:`log_file`
+      Path of the job log file
+    """
+    def __init__(self, log_file):
+        self.log_file = log_file
+        self.index_file = get_index_file(log_file)
+
+        if os.path.exists(get_compressed_file(log_file)):
+            decompress_job_log(log_file)
+
+        self._log = open(log_file, 'ab')
+        self._index = open(self.index_file, 'ab')
+        self._offset = self._log.seek(0, os.SEEK_END)
+        self._timestamp = 0
+        self._recover()
+
+    def _recover(self):
+        """
+        Index the lines written after the last index entry.
+
+        A partial index entry of an interrupted write is removed.
+        """
+        size = self._index.seek(0, os.SEEK_END)
+        indexed = 0
+
+        if size % INDEX_ENTRY.size:
+            size -= size % INDEX_ENTRY.size
+            self._index.truncate(size)
+
+        if size:
+            with open(self.index_file, 'rb') as index:
+                index.seek(size - INDEX_ENTRY.size)
+                entry = INDEX_ENTRY.unpack(index.read(INDEX_ENTRY.size))
+                self._timestamp = entry[0]
+                indexed = entry[1] + entry[2]
+
+        if indexed < self._offset:
+            self._index.write(INDEX_ENTRY.pack(
+                self._timestamp, indexed, self._offset - indexed, 0, b''
+            ))
+            self._index.flush()
+
+    def close(self):
+        try:
+            self._log.close()
+        finally:
+            self._index.close()
+
+    def fileno(self):
+        return self._log.fileno()
+
+    def sync(self):
+        """
+        Sync the log and index to disk.
+        """
+        os.fsync(self._log.fileno())
+        os.fsync(self._index.fileno())
+
+    def write(self, entries):
+        """
+        Append the (line, timestamp, level, service) entries.
+
+        The lines are written before their index entries so an index
+        entry always refers to written data.
+        """
+        data = []
+        index = []
+
+        for line, timestamp, level, service in entries:
+            raw = line.encode('utf-8')
+            self._timestamp = max(self._timestamp, timestamp or 0)
+            index.append(INDEX_ENTRY.pack(
+                self._timestamp,
+                self._offset,
+                len(raw),
+                level or 0,
+                (service or '').encode('utf-8')[:32]
+            ))
+            data.append(raw)
+            self._offset += len(raw)
+
+        self._log.write(b''.join(data))
+        self._log.flush()
+        self._index.write(b''.join(index))
+        self._index.flush()
+
+
+class JobLogReader(object):
+    """
+    Read ranges of an indexed job log.
+
+    Lines can be selected by time range and filtered by service and
+    minimum level. Only the selected lines are read from the log, for
+    a compressed log only the frames containing them are decompressed.
+
+    The index is searched by timestamp, JobLog keeps the entries in
+    time order.
+
+    Attributes
+
+    * :attr:`log_file`
+      Path of the job log file
+    """
+    def __init__(self, log_file):
+        self.log_file = log_file
+        self.index_file = get_index_file(log_file)
+        self._frames = None
+        self._frame = (None, None)
+        self._file = None
+
+    def _get_entry(self, index, position):
+        index.seek(position * INDEX_ENTRY.size)
+        timestamp, offset, length, level, service = INDEX_ENTRY.unpack(
+            index.read(INDEX_ENTRY.size)
+        )
+        return (
+            timestamp,
+            offset,
+            length,
+            level,
+            service.rstrip(b'\0').decode('utf-8')
+        )
+
+    def _get_entry_count(self):
+        try:
+            return os.path.getsize(self.index_file) // INDEX_ENTRY.size
+        except FileNotFoundError:
+            return 0
+
+    def _find(self, index, count, timestamp):
+        """
+        Return the position of the first entry logged at or after
+        the timestamp.
+        """
+        low, high = 0, count
+
+        while low < high:
+            middle = (low + high) // 2
+            if self._get_entry(index, middle)[0] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+    def _load_frames(self):
+        """
+        Return the frame table if the log is compressed.
+        """
+        if self._frames is None:
+            frames_file = get_frames_file(self.log_file)
+
+            if not os.path.exists(frames_file):
+                return None
+
+            with open(frames_file, 'rb') as frames:
+                self._frames = [
+                    FRAME_ENTRY.unpack(entry)
+                    for entry in iter(
+                        lambda: frames.read(FRAME_ENTRY.size), b''
+                    )
+                ]
+
+        return self._frames
+
+    def _read_compressed(self, frames, offset, length):
+        """
+        Read the data range from the frames of the compressed log.
+        """
+        starts = [frame[0] for frame in frames]
+        position = bisect.bisect_right(starts, offset) - 1
+        data = []
+
+        while length > 0 and position < len(frames):
+            start, compressed_offset, compressed_length = frames[position]
+
+            if self._frame[0] != position:
+                log = self._open(get_compressed_file(self.log_file))
+                log.seek(compressed_offset)
+                self._frame = (
+                    position,
+                    zlib.decompress(log.read(compressed_length))
+                )
+
+            frame = self._frame[1]
+            chunk = frame[offset - start:offset - start + length]
+            data.append(chunk)
+            offset += len(chunk)
+            length -= len(chunk)
+            position += 1
+
+        return b''.join(data)
+
+    def _open(self, path):
+        """
+        Return the open data file, the file is kept open between reads.
+        """
+        if self._file is None or self._file.name != path:
+            self.close()
+            self._file = open(path, 'rb')
+
+        return self._file
+
+    def _read_data(self, offset, length):
+        frames = self._load_frames()
+
+        if frames is not None:
+            return self._read_compressed(frames, offset, length)
+
+        log = self._open(self.log_file)
+        log.seek(offset)
+        return log.read(length)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def entries(
+        self, start=None, end=None, service=None, level=None, position=0
+    ):
+        """
+        Yield the selected (position, timestamp, level, service, line)
+        entries.
+
+        Start and end are timestamps, end is exclusive. Lines of
+        the unindexed part of a log are selected by the timestamp of
+        the line before them and are not filtered by service or level.
+        Position is the index entry to start from, it is used to
+        continue a previous read.
+        """
+        count = self._get_entry_count()
+
+        if not count:
+            return
+
+        with open(self.index_file, 'rb') as index:
+            if start:
+                position = max(position, self._find(index, count, start))
+
+            for position in range(position, count):
+                entry = self._get_entry(index, position)
+                timestamp, offset, length, entry_level, entry_service = entry
+                indexed = bool(entry_level or entry_service)
+
+                if end and timestamp >= end:
+                    break
+
+                if indexed and service and entry_service != service:
+                    continue
+
+                if indexed and level and entry_level < level:
+                    continue
+
+                line = self._read_data(offset, length).decode(
+                    'utf-8', errors='replace'
+                )
+                yield position, timestamp, entry_level, entry_service, line
+
+    def read(self, start=None, end=None, service=None, level=None):
+        """
+        Return the selected lines as a string.
+        """
+        return ''.join(
+            entry[4] for entry in self.entries(start, end, service, level)
+        )
+
+    def follow(
+        self, start=None, service=None, level=None, poll_interval=1,
+        stop=None
+    ):
+        """
+        Yield the selected lines and new lines as they are written.
+
+        Follows the log until the stop callable returns True.
+        """
+        position = 0
+
+        while not (stop and stop()):
+            for entry in self.entries(start, None, service, level, position):
+                position = entry[0] + 1
+                yield entry[4]
+
+            time.sleep(poll_interval)
+
+
+def compress_job_log(log_file, frame_size=DEFAULT_FRAME_SIZE):
+    """
+    Compress the job log in independently compressed frames.
+
+    Frames end at line boundaries and hold at least frame_size bytes
+    unless at the end of the log. The index is kept and the frame
+    table maps the uncompressed offsets to the frames.
+    """
+    compressed_file = get_compressed_file(log_file)
+    frames_file = get_frames_file(log_file)
+    frames = []
+    compressed_offset = 0
+    start = 0
+
+    with open(log_file, 'rb') as log, \
+            open(compressed_file + '.tmp', 'wb') as compressed:
+        while True:
+            data = log.read(frame_size)
+
+            if not data:
+                break
+
+            data += log.readline()
+            frame = zlib.compress(data)
+            compressed.write(frame)
+
+            frames.append(FRAME_ENTRY.pack(
+                start, compressed_offset, len(frame)
+            ))
+            start += len(data)
+            compressed_offset += len(frame)
+
+        compressed.flush()
+        os.fsync(compressed.fileno())
+
+    with open(frames_file + '.tmp', 'wb') as frame_table:
+        frame_table.write(b''.join(frames))
+        frame_table.flush()
+        os.fsync(frame_table.fileno())
+
+    os.replace(compressed_file + '.tmp', compressed_file)
+    os.replace(frames_file + '.tmp', frames_file)
+    os.remove(log_file)
+
+
+def decompress_job_log(log_file):
+    """
+    Restore the plain job log from the compressed frames.
+    """
+    compressed_file = get_compressed_file(log_file)
+    frames_file = get_frames_file(log_file)
+
+    with open(frames_file, 'rb') as frame_table:
+        frames = frame_table.read()
+
+    with open(compressed_file, 'rb') as compressed, \
+            open(log_file + '.tmp', 'wb') as log:
+        for offset in range(0, len(frames), FRAME_ENTRY.size):
+            start, compressed_offset, length = FRAME_ENTRY.unpack(
+                frames[offset:offset + FRAME_ENTRY.size]
+            )
+            compressed.seek(compressed_offset)
+            log.write(zlib.decompress(compressed.read(length)))
+
+        log.flush()
+        os.fsync(log.fileno())
+
+    os.replace(log_file + '.tmp', log_file)
+    os.remove(frames_file)
+    os.remove(compressed_file)
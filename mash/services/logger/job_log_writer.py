@@ -0,0 +1,329 @@
+# Copyright (c) 2026 SUSE LLC.  All rights reserved.
+#
+# This file is part of mash.
+#
+# mash is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# mash is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with mash.  If not, see <http://www.gnu.org/licenses/>
+#
+
+import threading
+import time
+
+from collections import OrderedDict
+
+from mash.services.logger.job_log_store import JobLog, compress_job_log
+
+
+class JobLogWriter(object):
+    """
+    Buffered writer for the job log files.
+
+    Log lines are buffered per file and written in batches from a
+    background thread to the indexed job logs. The most recently used
+    log files are kept open and the least recently used file is
+    closed once the cache is full.
+
+    Messages added with the log lines are acknowledged after the
+    batch containing them has been written. If a file can not be
+    written its lines are kept and written again with the next flush,
+    the messages with lines for the file are not acknowledged until
+    then. Written files are synced
+    to disk before the acknowledgement if the fsync interval is 0,
+    otherwise at most once per interval which bounds the log data
+    lost on a crash of the host to the interval.
+
+    Job logs without new lines for compress_after seconds are
+    considered finished and compressed.
+
+    Attributes
+
+    * :attr:`cache_size`
+      Max number of open log files
+
+    * :attr:`buffer_size`
+      Number of buffered lines that triggers a flush
+
+    * :attr:`flush_interval`
+      Max seconds a line is buffered before it is written
+
+    * :attr:`fsync_interval`
+      Min seconds between syncs of the written files
+
+    * :attr:`compress_after`
+      Seconds without new lines until a job log is compressed,
+      0 disables compression
+    """
+    def __init__(
+        self,
+        cache_size=128,
+        buffer_size=500,
+        flush_interval=1,
+        fsync_interval=0,
+        compress_after=0,
+        log=None
+    ):
+        self.cache_size = cache_size
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.compress_after = compress_after
+        self.log = log
+
+        self._files = OrderedDict()
+        self._buffer = OrderedDict()
+        self._messages = []
+        self._count = 0
+        self._unsynced = set()
+        self._last_write = {}
+        self._last_sync = time.monotonic()
+        self._stopping = False
+        self._thread = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def _ack(self, messages, multiple=True):
+        """
+        Acknowledge the messages with one ack per channel.
+
+        Without multiple each message is acknowledged on its own so
+        earlier messages which are not written yet are not included.
+        """
+        if not multiple:
+            for message in messages:
+                message.channel.basic.ack(delivery_tag=message.delivery_tag)
+            return
+
+        last_messages = OrderedDict()
+        for message in messages:
+            last_messages[id(message.channel)] = message
+
+        for message in last_messages.values():
+            message.channel.basic.ack(
+                delivery_tag=message.delivery_tag,
+                multiple=True
+            )
+
+    def _close_file(self, log_file):
+        job_log = self._files.pop(log_file)
+
+        try:
+            if log_file in self._unsynced:
+                self._unsynced.discard(log_file)
+                job_log.sync()
+        finally:
+            job_log.close()
+
+    def _get_file(self, log_file):
+        """
+        Return the open log file and mark it as most recently used.
+        """
+        if log_file in self._files:
+            self._files.move_to_end(log_file)
+            return self._files[log_file]
+
+        while len(self._files) >= self.cache_size:
+            self._close_file(next(iter(self._files)))
+
+        self._files[log_file] = JobLog(log_file)
+        return self._files[log_file]
+
+    def _compress_finished(self):
+        """
+        Compress the job logs without new lines for compress_after.
+        """
+        now = time.monotonic()
+
+        for log_file, last_write in list(self._last_write.items()):
+            if now - last_write < self.compress_after:
+                continue
+
+            del self._last_write[log_file]
+
+            try:
+                if log_file in self._files:
+                    self._close_file(log_file)
+
+                compress_job_log(log_file)
+            except Exception as error:
+                if self.log:
+                    self.log.error(
+                        'Could not compress log file: {0}'.format(error)
+                    )
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _sync(self):
+        """
+        Sync the written files to disk based on the fsync interval.
+        """
+        now = time.monotonic()
+
+        if self.fsync_interval and now - self._last_sync < \
+                self.fsync_interval:
+            return
+
+        for log_file in self._unsynced:
+            self._files[log_file].sync()
+
+        self._unsynced.clear()
+        self._last_sync = now
+
+    def _write(self, log_file, entries):
+        """
+        Write the entries to the log file.
+
+        Returns False if the file could not be written.
+        """
+        try:
+            job_log = self._get_file(log_file)
+            job_log.write(entries)
+            self._unsynced.add(log_file)
+
+            if self.compress_after:
+                self._last_write[log_file] = time.monotonic()
+        except Exception as error:
+            if log_file in self._files:
+                self._unsynced.discard(log_file)
+                self._files.pop(log_file).close()
+
+            if self.log:
+                self.log.error(
+                    'Could not write to log file: {0}'.format(error)
+                )
+            return False
+
+        return True
+
+    def _keep(self, failed, messages):
+        """
+        Buffer the lines of the failed files and their messages again
+        ahead of the lines added since the flush started.
+        """
+        with self._lock:
+            for log_file, entries in failed.items():
+                self._buffer[log_file] = entries + \
+                    self._buffer.get(log_file, [])
+                self._buffer.move_to_end(log_file, last=False)
+                self._count += len(entries)
+
+            self._messages = messages + self._messages
+
+    def add(self, lines, message=None):
+        """
+        Buffer the (log_file, line, timestamp, level, service) lines.
+
+        If a message is provided it is acknowledged once the lines
+        have been written.
+        """
+        with self._lock:
+            log_files = set()
+
+            for log_file, *entry in lines:
+                self._buffer.setdefault(log_file, []).append(entry)
+                self._count += 1
+                log_files.add(log_file)
+
+            if message:
+                self._messages.append((message, log_files))
+
+            full = self._count >= self.buffer_size
+
+        if full:
+            self._wakeup.set()
+
+    def close(self):
+        """
+        Sync and close all open log files.
+        """
+        with self._flush_lock:
+            for log_file in list(self._files):
+                self._close_file(log_file)
+
+    def flush(self):
+        """
+        Write the buffered lines and acknowledge their messages.
+
+        The lines of files which could not be written are kept with
+        their messages.
+        """
+        with self._flush_lock:
+            with self._lock:
+                buffer, self._buffer = self._buffer, OrderedDict()
+                messages, self._messages = self._messages, []
+                self._count = 0
+
+            failed = OrderedDict(
+                (log_file, entries)
+                for log_file, entries in buffer.items()
+                if not self._write(log_file, entries)
+            )
+
+            try:
+                self._sync()
+            except Exception as error:
+                if self.log:
+                    self.log.error(
+                        'Could not sync log files: {0}'.format(error)
+                    )
+
+            written = []
+            kept = []
+            for message, log_files in messages:
+                pending = log_files.intersection(failed)
+
+                if pending:
+                    kept.append((message, pending))
+                else:
+                    written.append(message)
+
+            if failed:
+                self._keep(failed, kept)
+
+            if written:
+                try:
+                    self._ack(written, multiple=not kept)
+                except Exception as error:
+                    if self.log:
+                        self.log.error(
+                            'Could not acknowledge log messages: '
+                            '{0}'.format(error)
+                        )
+
+            if self.compress_after:
+                self._compress_finished()
+
+    def start(self):
+        """
+        Start writing buffered lines in the background.
+        """
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background thread, write the buffered lines and
+        close the log files.
+        """
+        self._stopping = True
+        self._wakeup.set()
+
+        if self._thread:
+            self._thread.join()
+
+        self.flush()
+        self.close()
@@ -19,6 +19,7 @@
 import json
 
 from mash.mash_exceptions import MashLoggerException
+from mash.services.logger.job_log_writer import JobLogWriter
 from mash.services.mash_service import MashService
 from mash.utils.mash_utils import setup_logfile
 
@@ -42,6 +43,15 @@ class LoggerService(MashService):
         )
         self.log.addHandler(logfile_handler)
 
+        self.log_writer = JobLogWriter(
+            cache_size=self.config.get_job_log_cache_size(),
+            buffer_size=self.config.get_job_log_buffer_size(),
+            flush_interval=self.config.get_job_log_flush_interval(),
+            fsync_interval=self.config.get_job_log_fsync_interval(),
+            compress_after=self.config.get_job_log_compress_after(),
+            log=self.log
+        )
+
         self.bind_queue(self.service_exchange, 'mash.logger', 'logging')
         self.start()
 
@@ -49,34 +59,38 @@ class LoggerService(MashService):
         """
         Callback for logger queue.
 
-        1. Attempt to de-serialize the log message.
+        1. Attempt to de-serialize the log message, a message
+           contains a single record or a list of records.
         2. Determine log file name based on job_id.
-        3. Write or append to log file.
+        3. Buffer the lines with the timestamp, level and service
+           for the indexed log files, the message is acknowledged
+           once the lines are written.
         """
-        message.ack()
-
         try:
             data = json.loads(message.body)
         except Exception:
+            self.log_writer.add([], message)
             raise MashLoggerException(
                 'Could not de-serialize log message.'
             )
 
-        if 'job_id' in data:
-            file_name = data.get('job_id')
-            log_file = self.config.get_job_log_file(file_name)
+        if isinstance(data, dict):
+            data = [data]
+
+        lines = []
+        for record in data:
+            if 'job_id' in record:
+                lines.append((
+                    self.config.get_job_log_file(record['job_id']),
+                    record['msg'].replace(
+                        'Job[{0}]: '.format(record['job_id']), ''
+                    ),
+                    record.get('created'),
+                    record.get('levelno'),
+                    record.get('name')
+                ))
 
-            try:
-                with open(log_file, 'a') as job_log:
-                    job_log.write(
-                        data['msg'].replace(
-                            'Job[{0}]: '.format(data['job_id']), ''
-                        )
-                    )
-            except Exception as e:
-                raise MashLoggerException(
-                    'Could not write to log file: {0}'.format(e)
-                )
+        self.log_writer.add(lines, message)
 
     def start(self):
         """
@@ -87,6 +101,7 @@ class LoggerService(MashService):
             'logging',
             self.service_exchange
         )
+        self.log_writer.start()
 
         try:
             self.channel.start_consuming()
@@ -95,4 +110,5 @@ class LoggerService(MashService):
         except Exception:
             raise
         finally:
+            self.log_writer.stop()
             self.close_connection()
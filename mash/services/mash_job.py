@@ -35,10 +35,18 @@ class MashJob(object):
         self._credentials = None
         self._log_callback = None
         self._job_file = job_config.get('job_file')
+        self.retry_count = job_config.get('retry_count', 0)
+        self.transfer_priority = job_config.get('transfer_priority')
+        self.traceparent = job_config.get('traceparent')
 
         self.config = config
         self.status_msg = {'status': UNKOWN, 'errors': []}
 
+        # Jobs that read the image while it is downloaded set
+        # stream_image, streaming is set once a stream is started.
+        self.stream_image = False
+        self.streaming = False
+
         try:
             self.id = job_config['id']
             self.last_service = job_config['last_service']
@@ -60,6 +68,44 @@ class MashJob(object):
         """
         return {'job_id': self.id}
 
+    def get_accounts_and_regions(self):
+        """
+        Return the sets of cloud accounts and regions used by the job.
+
+        Accounts and regions are collected from the account and region
+        keys and the region info of the job config. Region info is
+        either a dictionary of region to account info, a dictionary of
+        account to region or a list of account info with target regions.
+        """
+        accounts = set()
+        regions = set()
+
+        if self.job_config.get('account'):
+            accounts.add(self.job_config['account'])
+
+        if self.job_config.get('region'):
+            regions.add(self.job_config['region'])
+
+        for key, value in self.job_config.items():
+            if not key.endswith('_regions'):
+                continue
+
+            if isinstance(value, dict):
+                for name, info in value.items():
+                    if isinstance(info, dict) and info.get('account'):
+                        regions.add(name)
+                        accounts.add(info['account'])
+                    elif isinstance(info, str):
+                        accounts.add(name)
+                        regions.add(info)
+            elif isinstance(value, list):
+                for info in value:
+                    if isinstance(info, dict) and info.get('account'):
+                        accounts.add(info['account'])
+                        regions.update(info.get('target_regions', []))
+
+        return accounts, regions
+
     def request_credentials(self, accounts, cloud=None):
         """
         Request credentials from credential service.
@@ -110,6 +156,17 @@ class MashJob(object):
         }
         self.run_job()
 
+    async def process_job_async(self):
+        """
+        Run job with the run_job_async coroutine on the event loop.
+
+        Only jobs that implement run_job_async can run on the loop.
+        """
+        self.log_callback.extra = {
+            'job_id': self.id
+        }
+        await self.run_job_async()
+
     @property
     def cloud_image_name(self):
         """Cloud image name property."""
@@ -17,13 +17,25 @@
 #
 
 import logging
+import time
+
+from functools import partial
 
 from amqpstorm import Connection
 
 # project
 from mash.log.filter import BaseServiceFilter
 from mash.mash_exceptions import MashRabbitConnectionException
-from mash.utils.mash_utils import setup_rabbitmq_log_handler
+from mash.services.publisher import MashPublisher
+from mash.utils.message_format import MessageFormat
+from mash.utils.mash_utils import get_shard, setup_rabbitmq_log_handler
+from mash.utils.metrics import MetricsRegistry, start_metrics_server
+from mash.utils.tracing import (
+    SENT_AT_HEADER,
+    TRACEPARENT_HEADER,
+    Tracer,
+    get_span_exporter
+)
 
 
 class MashService(object):
@@ -37,10 +49,16 @@ class MashService(object):
 
     * :attr:`service_exchange`
       Name of service exchange
+
+    * :attr:`metrics`
+      Registry of the service metrics, served in the Prometheus text
+      format if a metrics port is configured for the service
     """
     def __init__(self, service_exchange, config, custom_args=None):
         self.channel = None
         self.connection = None
+        self.consumer_channels = []
+        self.metrics_server = None
 
         self.service_exchange = service_exchange
         self.custom_args = custom_args
@@ -51,7 +69,19 @@ class MashService(object):
         self.amqp_user = self.config.get_amqp_user()
         self.amqp_pass = self.config.get_amqp_pass()
 
+        self.message_format = MessageFormat(
+            self.config.get_message_format(),
+            self.config.get_message_compression()
+        )
+
+        self._setup_metrics()
         self._open_connection()
+        self._start_metrics_server()
+        self.publisher = MashPublisher(
+            self.connection,
+            batch_size=self.config.get_publisher_batch_size(),
+            connect=self._reconnect
+        )
 
         logging.basicConfig()
         self.log = logging.getLogger(
@@ -63,9 +93,24 @@ class MashService(object):
         rabbit_handler = setup_rabbitmq_log_handler(
             self.amqp_host,
             self.amqp_user,
-            self.amqp_pass
+            self.amqp_pass,
+            buffer_size=self.config.get_log_buffer_size(),
+            level=self.config.get_log_ship_level(self.service_exchange)
         )
         self.log.addHandler(rabbit_handler)
+        self.metrics.gauge(
+            'mash_log_records_dropped',
+            'Number of log records dropped because the buffer was full.'
+        ).set_function(lambda: rabbit_handler.dropped)
+
+        self.tracer = Tracer(
+            self.service_exchange,
+            get_span_exporter(
+                self.config.get_trace_exporter(),
+                self.config.get_trace_file(self.service_exchange)
+            ),
+            log=self.log
+        )
         self.log.addFilter(BaseServiceFilter())
 
         self.post_init()
@@ -78,6 +123,34 @@ class MashService(object):
         """
         pass
 
+    def _setup_metrics(self):
+        """
+        Create the service metrics.
+        """
+        self.metrics = MetricsRegistry()
+        self.publish_latency = self.metrics.histogram(
+            'mash_publish_latency_seconds',
+            'Time from publish until the broker confirms the message.',
+            ['exchange']
+        )
+        self.amqp_reconnects = self.metrics.counter(
+            'mash_amqp_reconnects_total',
+            'Number of reconnects to the AMQP broker.'
+        )
+
+    def _start_metrics_server(self):
+        """
+        Start the metrics endpoint if a metrics port is configured.
+        """
+        port = self.config.get_metrics_port(self.service_exchange)
+
+        if port:
+            self.metrics_server = start_metrics_server(
+                self.metrics,
+                self.config.get_metrics_host(),
+                port
+            )
+
     def _declare_direct_exchange(self, exchange):
         """
         Declare/create exchange and set as durable.
@@ -102,6 +175,22 @@ class MashService(object):
         """
         return '{0}.{1}'.format(exchange, name)
 
+    def _get_next_service(self):
+        """
+        Return the next service based on the current exchange.
+        """
+        services = self.config.get_service_names()
+
+        try:
+            index = services.index(self.service_exchange) + 1
+        except ValueError:
+            return None
+
+        if index >= len(services):
+            return None
+
+        return services[index]
+
     def _open_connection(self):
         """
         Open connection or channel if currently closed or None.
@@ -111,12 +200,7 @@ class MashService(object):
         """
         if not self.connection or self.connection.is_closed:
             try:
-                self.connection = Connection(
-                    self.amqp_host,
-                    self.amqp_user,
-                    self.amqp_pass,
-                    kwargs={'heartbeat': 600}
-                )
+                self.connection = self._connect()
             except Exception as e:
                 raise MashRabbitConnectionException(
                     'Connection to RabbitMQ server failed: {0}'.format(e)
@@ -126,20 +210,118 @@ class MashService(object):
             self.channel = self.connection.channel()
             self.channel.confirm_deliveries()
 
-    def _publish(self, exchange, routing_key, message):
+    def _connect(self):
+        """
+        Return a new connection to the RabbitMQ server.
+        """
+        return Connection(
+            self.amqp_host,
+            self.amqp_user,
+            self.amqp_pass,
+            kwargs={'heartbeat': 600}
+        )
+
+    def _reconnect(self):
+        """
+        Return a new connection for the publisher after it was closed.
+        """
+        self.amqp_reconnects.inc()
+        return self._connect()
+
+    def _publish(
+        self, exchange, routing_key, message, job_id=None, traceparent=None
+    ):
         """
         Publish message to the provided exchange with the routing key.
+
+        Blocks until the broker confirms the message. Raises the
+        AMQPError if the message was not delivered.
+        """
+        return self._publish_async(
+            exchange,
+            routing_key,
+            message,
+            job_id=job_id,
+            traceparent=traceparent
+        ).result()
+
+    def _publish_async(
+        self, exchange, routing_key, message, job_id=None, traceparent=None
+    ):
+        """
+        Queue message for the publisher and return the delivery future.
+
+        Messages queued from any thread are published on the publisher
+        channel. The message dict is serialized with the configured
+        message format.
+
+        If job_id is set it is sent in the job_id header. If traceparent
+        is set the trace context is sent in the traceparent header with
+        the publish time in the sent_at header.
         """
-        self.channel.basic.publish(
-            body=message,
-            routing_key=routing_key,
-            exchange=exchange,
-            properties={
-                'content_type': 'application/json',
-                'delivery_mode': 2
-            },
+        body = self.message_format.dumps(message)
+        properties = self.message_format.properties
+        properties['delivery_mode'] = 2
+
+        headers = {}
+
+        if job_id:
+            headers['job_id'] = job_id
+
+        if traceparent:
+            headers[TRACEPARENT_HEADER] = traceparent
+            headers[SENT_AT_HEADER] = time.time()
+
+        if headers:
+            properties['headers'] = headers
+
+        future = self.publisher.publish(
+            exchange,
+            routing_key,
+            body,
+            properties=properties,
             mandatory=True
         )
+        future.add_done_callback(
+            partial(self._observe_publish, exchange, time.monotonic())
+        )
+        return future
+
+    def _observe_publish(self, exchange, start, future):
+        """
+        Record the publish latency once the message is confirmed.
+        """
+        self.publish_latency.observe(
+            time.monotonic() - start, exchange=exchange
+        )
+
+    def get_trace_context(self, message):
+        """
+        Return the (traceparent, sent_at) headers of a consumed message.
+        """
+        headers = message.properties.get('headers') or {}
+        traceparent = headers.get(TRACEPARENT_HEADER)
+        sent_at = headers.get(SENT_AT_HEADER)
+
+        if isinstance(traceparent, bytes):
+            traceparent = traceparent.decode('utf-8', errors='replace')
+
+        if not isinstance(traceparent, str):
+            traceparent = None
+
+        if not isinstance(sent_at, (int, float)):
+            sent_at = None
+
+        return traceparent, sent_at
+
+    def decode_message(self, message):
+        """
+        Return the deserialized body of a consumed message.
+
+        The format is taken from the message properties so messages
+        from services with a different message format are supported.
+        """
+        return MessageFormat.loads(message.body, message.properties)
 
     def bind_queue(self, exchange, routing_key, name):
         """
@@ -155,10 +337,44 @@ class MashService(object):
         )
         return queue
 
+    def get_shard_routing_key(self, service, routing_key, job_id):
+        """
+        Return the routing key of the service shard owning the job.
+
+        Jobs of a sharded service are routed to shard
+        crc32(job_id) % shard count with a per shard routing key.
+
+        Example job_document.2
+        """
+        shard_count = self.config.get_shard_count(service)
+
+        if shard_count > 1 and job_id:
+            return '{0}.{1}'.format(
+                routing_key, get_shard(job_id, shard_count)
+            )
+
+        return routing_key
+
     def close_connection(self):
         """
         If channel or connection open, stop consuming and close.
+
+        Any queued messages are published before the connection closes.
         """
+        self.publisher.stop()
+
+        if self.metrics_server:
+            self.metrics_server.shutdown()
+            self.metrics_server.server_close()
+            self.metrics_server = None
+
+        self.tracer.close()
+
+        for channel in self.consumer_channels:
+            if channel.is_open:
+                channel.stop_consuming()
+                channel.close()
+
         if self.channel and self.channel.is_open:
             self.channel.stop_consuming()
             self.channel.close()
@@ -166,16 +382,54 @@ class MashService(object):
         if self.connection and self.connection.is_open:
             self.connection.close()
 
-    def consume_queue(self, callback, queue_name, exchange):
+    def consume_queue(self, callback, queue_name, exchange, channel=None):
         """
         Declare and consume queue.
+
+        If no channel is provided the queue is consumed on the
+        default service channel.
         """
+        channel = channel or self.channel
         queue = self._get_queue_name(exchange, queue_name)
         self._declare_queue(queue)
-        self.channel.basic.consume(
+        channel.basic.consume(
             callback=callback, queue=queue
         )
 
+    def consume_channels(self, channels):
+        """
+        Process inbound messages on all channels until consuming stops.
+
+        Each channel is serviced in turn so a queue with a full prefetch
+        window does not block delivery on the other channels.
+        """
+        while True:
+            active_channels = [
+                channel for channel in channels
+                if channel.is_open and channel.consumer_tags
+            ]
+
+            if not active_channels:
+                break
+
+            for channel in active_channels:
+                channel.process_data_events()
+
+    def open_consumer_channel(self, prefetch_count=None):
+        """
+        Open a dedicated consumer channel on the service connection.
+
+        If prefetch_count is set the broker will not deliver more than
+        prefetch_count unacknowledged messages to the channel.
+        """
+        channel = self.connection.channel()
+
+        if prefetch_count:
+            channel.basic.qos(prefetch_count=prefetch_count)
+
+        self.consumer_channels.append(channel)
+        return channel
+
     def unbind_queue(self, queue, exchange, routing_key):
         """
         Unbind the routing_key from the queue on given exchange.
@@ -26,7 +26,7 @@ from mash.mash_exceptions import MashPublishException
 from mash.services.mash_job import MashJob
 from mash.services.status_levels import SUCCESS
 from mash.utils.ec2 import (
-    get_session
+    get_client
 )
 from mash.utils.mash_utils import format_string_with_date
 
@@ -107,14 +107,15 @@ class EC2MPPublishJob(MashJob):
             )
 
             if self.submit_change_request:
-                session = get_session(
+                mp_client = get_client(
+                    'marketplace-catalog',
                     creds['access_key_id'],
                     creds['secret_access_key'],
                     region
                 )
 
                 response = start_mp_change_set(
-                    session.client('marketplace-catalog'),
+                    mp_client,
                     change_set=[change_doc]
                 )
 
@@ -0,0 +1,207 @@
+# Copyright (c) 2026 SUSE LLC.  All rights reserved.
+#
+# This file is part of mash.
+#
+# mash is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# mash is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with mash.  If not, see <http://www.gnu.org/licenses/>
+#
+
+import queue
+import threading
+import uuid
+
+from concurrent.futures import Future
+from contextlib import suppress
+
+from amqpstorm import AMQPError, AMQPMessageError
+
+
+class MashPublisher(object):
+    """
+    Asynchronous AMQP publisher with delivery confirms.
+
+    Messages are queued in process and published from a single
+    background thread on a dedicated channel in confirm mode. Each
+    publish waits for the broker to ack the message, messages the
+    broker returns as unroutable raise the AMQPMessageError of the
+    return on their own publish.
+
+    Attributes
+
+    * :attr:`connection`
+      The AMQP connection used to open the publisher channel
+
+    * :attr:`batch_size`
+      Max number of queued messages published in one pass
+
+    * :attr:`connect`
+      Optional callable returning a new connection, used to reconnect
+      when the current connection is closed
+    """
+    def __init__(self, connection=None, batch_size=100, connect=None):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.connect = connect
+        self.channel = None
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _get_batch(self):
+        """
+        Block for the next message and drain any others already queued.
+
+        Returns None once the publisher has been stopped.
+        """
+        request = self._queue.get()
+
+        if request is None:
+            return None
+
+        batch = [request]
+        while len(batch) < self.batch_size:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if request is None:
+                # Publish what is queued then stop on the next pass.
+                self._queue.put(None)
+                break
+
+            batch.append(request)
+
+        return batch
+
+    def _open_channel(self):
+        """
+        Open the publisher channel in confirm mode if not open.
+        """
+        if self.connect and \
+                (not self.connection or self.connection.is_closed):
+            self.connection = self.connect()
+            self.channel = None
+
+        if not self.channel or self.channel.is_closed:
+            self.channel = self.connection.channel()
+            self.channel.confirm_deliveries()
+
+    def _publish_batch(self, batch):
+        """
+        Publish all messages in batch and set the result of each future.
+
+        A returned message fails its own future only. The channel is
+        closed after a return to discard the returned content and is
+        reopened for the next message. Any other error fails the
+        message and the rest of the batch.
+        """
+        for index, request in enumerate(batch):
+            try:
+                self._open_channel()
+
+                confirmed = self.channel.basic.publish(
+                    body=request['body'],
+                    routing_key=request['routing_key'],
+                    exchange=request['exchange'],
+                    properties=request['properties'],
+                    mandatory=request['mandatory']
+                )
+            except AMQPMessageError as error:
+                request['future'].set_exception(error)
+                self._close_channel()
+            except AMQPError as error:
+                self.channel = None
+                for request in batch[index:]:
+                    request['future'].set_exception(error)
+                return
+            else:
+                if confirmed:
+                    request['future'].set_result(True)
+                else:
+                    request['future'].set_exception(AMQPMessageError(
+                        'Message not confirmed by the broker'
+                    ))
+
+    def _close_channel(self):
+        """
+        Close the publisher channel if it is open.
+        """
+        if self.channel and self.channel.is_open:
+            with suppress(AMQPError):
+                self.channel.close()
+
+        self.channel = None
+
+    def _run(self):
+        """
+        Publish queued messages in batches until stopped.
+        """
+        while True:
+            batch = self._get_batch()
+
+            if batch is None:
+                break
+
+            self._publish_batch(batch)
+
+        self._close_channel()
+
+    def publish(
+        self, exchange, routing_key, body, properties=None, mandatory=True
+    ):
+        """
+        Queue a message for publishing and return its future.
+
+        The future result is True once the broker has confirmed the
+        message or the future raises the AMQPError that failed it.
+        """
+        future = Future()
+        properties = dict(properties or {})
+        properties.setdefault('message_id', uuid.uuid4().hex)
+
+        with self._lock:
+            if not self._thread:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name='MashPublisher',
+                    daemon=True
+                )
+                self._thread.start()
+
+            self._queue.put({
+                'exchange': exchange,
+                'routing_key': routing_key,
+                'body': body,
+                'properties': properties,
+                'message_id': properties['message_id'],
+                'mandatory': mandatory,
+                'future': future
+            })
+
+        return future
+
+    def stop(self):
+        """
+        Publish all queued messages and stop the publisher thread.
+        """
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+
+            if thread:
+                self._queue.put(None)
+
+        if thread:
+            thread.join()
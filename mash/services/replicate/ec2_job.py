@@ -16,6 +16,7 @@
 # along with mash.  If not, see <http://www.gnu.org/licenses/>
 #
 
+import asyncio
 import time
 
 from botocore.exceptions import ClientError
@@ -30,6 +31,9 @@ from mash.utils.ec2 import get_client, describe_images
 class EC2ReplicateJob(MashJob):
     """
     Class for an EC2 replicate job.
+
+    The job can also run as a coroutine with the asyncio listener
+    engine, so it does not hold a thread while images replicate.
     """
 
     def post_init(self):
@@ -66,6 +70,60 @@ class EC2ReplicateJob(MashJob):
         """
         Replicate image to all target regions in each source region.
         """
+        self._replicate_images()
+
+        if self.source_region_results:
+            # Wait for images to replicate, this will take time.
+            # Only wait if at least one region was replicated.
+            time.sleep(300)
+
+        for target_region, reg_info in self.source_region_results.items():
+            credential = reg_info['account']
+
+            if reg_info['image_id']:
+                try:
+                    self._wait_on_image(
+                        credential['access_key_id'],
+                        credential['secret_access_key'],
+                        reg_info['image_id'],
+                        target_region,
+                        self.test_preparation
+                    )
+                except Exception as error:
+                    self._replicate_failed(target_region, error)
+
+    async def run_job_async(self):
+        """
+        Replicate image like run_job without blocking the event loop.
+
+        EC2 requests run in the default executor of the loop and the
+        waits between them are async sleeps.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._replicate_images)
+
+        if self.source_region_results:
+            await asyncio.sleep(300)
+
+        for target_region, reg_info in self.source_region_results.items():
+            credential = reg_info['account']
+
+            if reg_info['image_id']:
+                try:
+                    await self._wait_on_image_async(
+                        credential['access_key_id'],
+                        credential['secret_access_key'],
+                        reg_info['image_id'],
+                        target_region,
+                        self.test_preparation
+                    )
+                except Exception as error:
+                    self._replicate_failed(target_region, error)
+
+    def _replicate_images(self):
+        """
+        Start the copy of the image to all target regions.
+        """
         self.status = SUCCESS
         self.source_region_results = defaultdict(dict)
         self.cloud_image_name = self.status_msg['cloud_image_name']
@@ -123,31 +181,17 @@ class EC2ReplicateJob(MashJob):
                 self.source_region_results[target_region]['account'] = \
                     credential
 
-        if self.source_region_results:
-            # Wait for images to replicate, this will take time.
-            # Only wait if at least one region was replicated.
-            time.sleep(300)
-
-        for target_region, reg_info in self.source_region_results.items():
-            credential = reg_info['account']
-
-            if reg_info['image_id']:
-                try:
-                    self._wait_on_image(
-                        credential['access_key_id'],
-                        credential['secret_access_key'],
-                        reg_info['image_id'],
-                        target_region,
-                        self.test_preparation
-                    )
-                except Exception as error:
-                    self.status = FAILED
-                    msg = 'Replicate to {0} region failed: {1}'.format(
-                        target_region,
-                        error
-                    )
-                    self.add_error_msg(msg)
-                    self.log_callback.warning(msg)
+    def _replicate_failed(self, target_region, error):
+        """
+        Fail the job for the target region.
+        """
+        self.status = FAILED
+        msg = 'Replicate to {0} region failed: {1}'.format(
+            target_region,
+            error
+        )
+        self.add_error_msg(msg)
+        self.log_callback.warning(msg)
 
     def _replicate_to_region(
         self, credential, image_id, source_region, target_region
@@ -196,38 +240,91 @@ class EC2ReplicateJob(MashJob):
         Wait on image to finish replicating in the given region.
         """
         while True:
-            client = get_client(
-                'ec2',
+            state = EC2ReplicateJob._get_image_state(
                 access_key_id,
                 secret_access_key,
-                region
+                image_id,
+                region,
+                test_preparation
             )
 
-            try:
-                images = describe_images(client, [image_id])
-                state = images[0]['State']
-            except (IndexError, KeyError, ClientError):
-                raise MashReplicateException(
-                    '(test_preparation={0}) The image with ID: {1} was not '
-                    'found.'.format(
-                        test_preparation,
-                        image_id
-                    )
-                )
-
             if state == 'available':
                 break
-            elif state == 'failed':
-                raise MashReplicateException(
-                    '(test_preparation={0}) The image with ID: {1} reached a '
-                    'failed state.'.format(
-                        test_preparation,
-                        image_id
-                    )
-                )
             elif state == 'pending':
                 time.sleep(60)
 
+    @staticmethod
+    async def _wait_on_image_async(
+        access_key_id,
+        secret_access_key,
+        image_id,
+        region,
+        test_preparation=False
+    ):
+        """
+        Wait on image to finish replicating without blocking the loop.
+        """
+        loop = asyncio.get_running_loop()
+
+        while True:
+            state = await loop.run_in_executor(
+                None,
+                EC2ReplicateJob._get_image_state,
+                access_key_id,
+                secret_access_key,
+                image_id,
+                region,
+                test_preparation
+            )
+
+            if state == 'available':
+                break
+            elif state == 'pending':
+                await asyncio.sleep(60)
+
+    @staticmethod
+    def _get_image_state(
+        access_key_id,
+        secret_access_key,
+        image_id,
+        region,
+        test_preparation=False
+    ):
+        """
+        Return the state of the image in the given region.
+
+        Raise if the image is not found or reached a failed state.
+        """
+        client = get_client(
+            'ec2',
+            access_key_id,
+            secret_access_key,
+            region
+        )
+
+        try:
+            images = describe_images(client, [image_id])
+            state = images[0]['State']
+        except (IndexError, KeyError, ClientError):
+            raise MashReplicateException(
+                '(test_preparation={0}) The image with ID: {1} was not '
+                'found.'.format(
+                    test_preparation,
+                    image_id
+                )
+            )
+
+        if state == 'failed':
+            raise MashReplicateException(
+                '(test_preparation={0}) The image with ID: {1} reached a '
+                'failed state.'.format(
+                    test_preparation,
+                    image_id
+                )
+            )
+
+        return state
+
     @staticmethod
     def image_exists(client, cloud_image_name):
         """
@@ -0,0 +1,84 @@
+# Copyright (c) 2026 SUSE LLC.  All rights reserved.
+#
+# This file is part of mash.
+#
+# mash is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# mash is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with mash.  If not, see <http://www.gnu.org/licenses/>
+#
+
+import random
+
+from mash.services.base_defaults import Defaults
+
+
+class RetryPolicy(object):
+    """
+    Retry policy for failed job executions of a listener service.
+
+    Attributes
+
+    * :attr:`max_attempts`
+      Max number of retries for a job, 0 disables retries
+
+    * :attr:`backoff`
+      Delay in seconds before the first retry, doubled for each retry
+
+    * :attr:`max_backoff`
+      Max delay in seconds before a retry
+
+    * :attr:`retryable_exceptions`
+      Names of the exception classes that are retried. An exception
+      is retryable if the name of any class it inherits from, or of
+      an exception it was raised from, is in the list.
+    """
+    def __init__(
+        self,
+        max_attempts=0,
+        backoff=None,
+        max_backoff=None,
+        retryable_exceptions=None
+    ):
+        self.max_attempts = max_attempts
+        self.backoff = backoff or Defaults.get_retry_backoff()
+        self.max_backoff = max_backoff or Defaults.get_retry_max_backoff()
+        self.retryable_exceptions = set(
+            retryable_exceptions or Defaults.get_retryable_exceptions()
+        )
+
+    def get_delay(self, attempt):
+        """
+        Return the delay in seconds before the given retry attempt.
+
+        The delay grows exponentially with random jitter so failed
+        jobs do not retry at the same time.
+        """
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return random.uniform(delay / 2, delay)
+
+    def is_retryable(self, exception):
+        """
+        Return True if the exception or its cause is retryable.
+        """
+        seen = set()
+
+        while isinstance(exception, BaseException) and \
+                id(exception) not in seen:
+            seen.add(id(exception))
+
+            for cls in type(exception).__mro__:
+                if cls.__name__ in self.retryable_exceptions:
+                    return True
+
+            exception = exception.__cause__ or exception.__context__
+
+        return False
@@ -6,3 +6,4 @@ UNKOWN = None
 PENDING = 'pending'
 FINISHED = 'finished'
 RUNNING = 'running'
+STREAMING = 'streaming'
@@ -28,6 +28,8 @@ from mash.utils.mash_utils import (
     timestamp_from_epoch
 )
 from mash.services.status_levels import SUCCESS
+from mash.utils.bandwidth import ThrottledReader, bandwidth_allocator
+from mash.utils.image_stream import ImageStreamReader
 
 
 class OCIUploadJob(MashJob):
@@ -39,6 +41,7 @@ class OCIUploadJob(MashJob):
         self._total_bytes_transferred = 0
         self._next_percent = 0
         self._progress_step = 20
+        self.stream_image = True
 
         try:
             self.account = self.job_config['account']
@@ -96,17 +99,32 @@ class OCIUploadJob(MashJob):
         )
 
         object_name = ''.join([self.cloud_image_name, '.qcow2'])
-        self._image_size = stat(self.status_msg['image_file']).st_size
 
-        with open(self.status_msg['image_file'], 'rb') as image_stream:
+        if self.streaming:
+            # Upload the image while it is downloaded
+            image_stream = ImageStreamReader(self.status_msg['image_file'])
+            self._image_size = image_stream.get_size() or 0
+        else:
+            image_stream = open(self.status_msg['image_file'], 'rb')
+            self._image_size = stat(self.status_msg['image_file']).st_size
+
+        transfer = bandwidth_allocator.register(
+            self.cloud,
+            self.transfer_priority
+        )
+
+        with transfer, ThrottledReader(image_stream, transfer) as reader:
             upload_manager.upload_stream(
                 namespace,
                 self.bucket,
                 object_name,
-                image_stream,
+                reader,
                 progress_callback=self._progress_callback
             )
 
+        if self.streaming:
+            self.status_msg['image_digests'] = image_stream.digests
+
         self.status_msg['cloud_image_name'] = self.cloud_image_name
         self.status_msg['object_name'] = object_name
         self.status_msg['namespace'] = namespace
@@ -120,6 +138,10 @@ class OCIUploadJob(MashJob):
 
     def _progress_callback(self, bytes_uploaded):
         self._total_bytes_transferred += bytes_uploaded
+
+        if not self._image_size:
+            return
+
         percent_transferred = (self._total_bytes_transferred * 100) / self._image_size
 
         if percent_transferred >= self._next_percent:
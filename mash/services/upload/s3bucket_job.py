@@ -18,11 +18,16 @@
 
 from os import stat, path
 
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+
 # project
 from mash.services.mash_job import MashJob
 from mash.mash_exceptions import MashUploadException
 from mash.utils.ec2 import get_client
 from mash.services.status_levels import SUCCESS
+from mash.utils.bandwidth import bandwidth_allocator
+from mash.utils.image_stream import ImageStreamReader
 from mash.utils.mash_utils import (
     format_string_with_date,
     timestamp_from_epoch
@@ -40,6 +45,9 @@ class S3BucketUploadJob(MashJob):
         self._total_bytes_transferred = 0
         self._last_percentage_logged = 0
         self._percentage_log_step = 20
+        self.stream_image = True
+        self._transfer = None
+        self._stream = None
 
         self.use_build_time = self.job_config.get('use_build_time', False)
 
@@ -61,7 +69,20 @@ class S3BucketUploadJob(MashJob):
             )
 
     def _log_progress(self, bytes_transferred):
+        if self._transfer:
+            # Called as the bytes are read for sending
+            self._transfer.throttle(bytes_transferred)
+
         self._total_bytes_transferred += bytes_transferred
+
+        if not self._image_size and self._stream:
+            # The size of a streamed image is known once the download
+            # has the image size or is finished.
+            self._image_size = self._stream.size or 0
+
+        if not self._image_size:
+            return
+
         percent_transferred = (self._total_bytes_transferred * 100) / self._image_size
         if percent_transferred >= \
            (self._last_percentage_logged + self._percentage_log_step):
@@ -72,6 +93,76 @@ class S3BucketUploadJob(MashJob):
                 progress=str(self._last_percentage_logged)
             ))
 
+    def _is_uploaded(self, client, bucket_name, key_name, digests):
+        """
+        Return True if the object has the ETag of the image.
+
+        The ETag is known from the digests of the download service.
+        """
+        try:
+            response = client.head_object(Bucket=bucket_name, Key=key_name)
+        except ClientError:
+            return False
+
+        return response['ETag'].strip('"') == digests['s3_etag'] and \
+            response['ContentLength'] == self._image_size
+
+    def _upload_stream(self, client, bucket_name, key_name):
+        """
+        Upload the image while it is downloaded.
+
+        The digests of the image are known once the download finished.
+        """
+        with ImageStreamReader(self.status_msg['image_file']) as stream:
+            self._stream = stream
+            self._image_size = stream.get_size() or 0
+
+            try:
+                client.upload_fileobj(
+                    stream,
+                    bucket_name,
+                    key_name,
+                    Callback=self._log_progress
+                )
+            finally:
+                self._stream = None
+
+        self.status_msg['image_digests'] = stream.digests
+
+    def _upload_image(self, client, bucket_name, key_name):
+        """
+        Upload the downloaded image unless the object has its ETag.
+        """
+        statinfo = stat(self.status_msg['image_file'])
+        self._image_size = statinfo.st_size
+        digests = self.status_msg.get('image_digests') or {}
+
+        if digests.get('s3_etag') and \
+                self._is_uploaded(client, bucket_name, key_name, digests):
+            self.log_callback.info(
+                'Raw image is already uploaded, skipping upload.'
+            )
+        else:
+            self._upload_file(client, bucket_name, key_name, digests)
+
+    def _upload_file(self, client, bucket_name, key_name, digests):
+        kwargs = {}
+
+        if digests.get('part_size'):
+            # Upload in the parts of the digests so the ETag matches
+            kwargs['Config'] = TransferConfig(
+                multipart_threshold=digests['part_size'],
+                multipart_chunksize=digests['part_size']
+            )
+
+        client.upload_file(
+            self.status_msg['image_file'],
+            bucket_name,
+            key_name,
+            Callback=self._log_progress,
+            **kwargs
+        )
+
     def run_job(self):
         self.status = SUCCESS
         self.log_callback.info('Uploading raw image.')
@@ -122,21 +213,22 @@ class S3BucketUploadJob(MashJob):
             )
 
         try:
-            statinfo = stat(self.status_msg['image_file'])
-            self._image_size = statinfo.st_size
-
             client = get_client(
                 's3', credentials['access_key_id'],
                 credentials['secret_access_key'], None
             )
 
-            client.upload_file(
-                self.status_msg['image_file'],
-                bucket_name,
-                key_name,
-                Callback=self._log_progress
+            self._transfer = bandwidth_allocator.register(
+                self.cloud,
+                self.transfer_priority
             )
 
+            with self._transfer:
+                if self.streaming:
+                    self._upload_stream(client, bucket_name, key_name)
+                else:
+                    self._upload_image(client, bucket_name, key_name)
+
             self.status_msg['key_name'] = key_name
             self.status_msg['bucket_name'] = bucket_name
 
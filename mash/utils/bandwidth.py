@@ -0,0 +1,259 @@
+# Copyright (c) 2026 SUSE LLC.  All rights reserved.
+#
+# This file is part of mash.
+#
+# mash is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# mash is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with mash.  If not, see <http://www.gnu.org/licenses/>
+#
+
+import glob
+import os
+import threading
+import time
+import uuid
+
+from mash.services.base_defaults import Defaults
+from mash.utils.mash_utils import load_json, persist_json, remove_file
+from mash.utils.rate_governor import TokenBucket
+
+
+class BandwidthTransfer(object):
+    """
+    A transfer registered with the node bandwidth budget.
+
+    The transferred bytes are throttled on a token bucket at the share
+    of the transfer. The share is refreshed from the registered
+    transfers of all services on the node and the registration is
+    kept alive on each refresh.
+
+    Attributes
+
+    * :attr:`allocator`
+      The allocator the transfer is registered with
+
+    * :attr:`registration`
+      Path of the registration file, None if bandwidth is unlimited
+
+    * :attr:`weight`
+      Weight of the transfer from its cloud and priority class
+
+    * :attr:`limit`
+      Max bytes per second of all transfers on the node
+    """
+    def __init__(self, allocator, registration=None, weight=1, limit=None):
+        self.allocator = allocator
+        self.registration = registration
+        self.weight = weight
+        self.limit = limit
+        self.share = None
+
+        self._bucket = None
+        self._refreshed = 0
+        self._lock = threading.Lock()
+
+        if registration:
+            self._refresh()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _refresh(self):
+        """
+        Keep the registration alive and update the share.
+        """
+        self._refreshed = time.monotonic()
+
+        try:
+            os.utime(self.registration)
+        except FileNotFoundError:
+            # Removed as stale by another service, register again
+            self.allocator.write_registration(self.registration, self.weight)
+
+        total_weight = self.allocator.get_total_weight()
+        self.share = self.limit * self.weight / max(total_weight, self.weight)
+
+        if self._bucket:
+            self._bucket.set_rate(self.share, self.share)
+        else:
+            self._bucket = TokenBucket(self.share, self.share)
+
+    def throttle(self, size):
+        """
+        Wait until the size bytes can be transferred within the share.
+        """
+        if not self.registration or size <= 0:
+            return
+
+        with self._lock:
+            if time.monotonic() - self._refreshed >= \
+                    self.allocator.refresh_interval:
+                self._refresh()
+
+        self._bucket.acquire(size)
+
+    def close(self):
+        """
+        Remove the transfer from the node bandwidth budget.
+        """
+        if self.registration:
+            remove_file(self.registration)
+
+
+class ThrottledReader(object):
+    """
+    File object wrapper throttling reads on a bandwidth transfer.
+
+    All other attributes are taken from the wrapped stream.
+
+    Attributes
+
+    * :attr:`stream`
+      The wrapped file object
+
+    * :attr:`transfer`
+      The bandwidth transfer the read bytes are throttled on
+    """
+    def __init__(self, stream, transfer):
+        self.stream = stream
+        self.transfer = transfer
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stream.close()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.transfer.throttle(len(data))
+        return data
+
+
+class BandwidthAllocator(object):
+    """
+    Node wide bandwidth budget of the image transfers.
+
+    Downloads and uploads of all services on the node register in a
+    shared directory. Each transfer gets a share of the node limit by
+    the weight of its cloud multiplied by the weight of its priority
+    class. Registrations which are not kept alive, for example of a
+    service that was killed, are removed as stale.
+
+    Attributes
+
+    * :attr:`limit`
+      Max bytes per second of all transfers, None for no limit
+
+    * :attr:`directory`
+      Directory of the transfer registrations
+
+    * :attr:`cloud_weights`
+      Weight of the transfers per cloud, 1 if not set
+
+    * :attr:`priority_weights`
+      Weight of the transfers per priority class
+
+    * :attr:`refresh_interval`
+      Seconds between two updates of the share of a transfer
+    """
+    def __init__(
+        self,
+        limit=None,
+        directory=None,
+        cloud_weights=None,
+        priority_weights=None,
+        refresh_interval=2
+    ):
+        self.configure(
+            limit, directory, cloud_weights, priority_weights, refresh_interval
+        )
+
+    def configure(
+        self,
+        limit=None,
+        directory=None,
+        cloud_weights=None,
+        priority_weights=None,
+        refresh_interval=2
+    ):
+        """
+        Set the bandwidth budget for new transfers.
+        """
+        self.limit = limit
+        self.directory = directory or Defaults.get_bandwidth_directory()
+        self.cloud_weights = cloud_weights or {}
+        self.priority_weights = priority_weights or \
+            Defaults.get_bandwidth_priority_weights()
+        self.refresh_interval = refresh_interval
+
+    def write_registration(self, registration, weight):
+        os.makedirs(self.directory, exist_ok=True)
+        persist_json(registration, {'weight': weight})
+
+    def get_weight(self, cloud, priority=None):
+        """
+        Return the weight of a transfer of the cloud and priority class.
+
+        Unknown priority classes have the weight of the normal class.
+        """
+        priority_weight = self.priority_weights.get(
+            priority or 'normal',
+            self.priority_weights.get('normal', 1)
+        )
+        return self.cloud_weights.get(cloud, 1) * priority_weight
+
+    def get_total_weight(self):
+        """
+        Return the weight of all live transfers on the node.
+        """
+        stale = time.time() - self.refresh_interval * 10
+        total_weight = 0
+
+        for registration in glob.glob(os.path.join(self.directory, '*.json')):
+            try:
+                if os.stat(registration).st_mtime < stale:
+                    remove_file(registration)
+                    continue
+
+                total_weight += load_json(registration)['weight']
+            except (OSError, ValueError, KeyError):
+                # Removed or replaced while reading
+                continue
+
+        return total_weight
+
+    def register(self, cloud, priority=None):
+        """
+        Register a transfer of the cloud in the priority class.
+
+        The returned transfer does not throttle if there is no limit.
+        """
+        if not self.limit:
+            return BandwidthTransfer(self)
+
+        registration = os.path.join(
+            self.directory, '{0}.json'.format(uuid.uuid4().hex)
+        )
+        weight = self.get_weight(cloud, priority)
+        self.write_registration(registration, weight)
+
+        return BandwidthTransfer(self, registration, weight, self.limit)
+
+
+bandwidth_allocator = BandwidthAllocator()
@@ -21,8 +21,17 @@ import re
 
 import boto3
 
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager, suppress
-from mash.utils.mash_utils import generate_name, get_key_from_file
+from mash.utils.mash_utils import (
+    generate_name,
+    get_download_manifest,
+    get_key_from_file,
+    persist_download_manifest,
+    remove_download_manifest
+)
+from mash.utils.image_digest import DigestWriter
+from mash.utils.rate_governor import rate_governor
 from mash.mash_exceptions import MashEc2UtilsException
 
 from ec2imgutils.ec2setup import EC2Setup
@@ -43,14 +52,20 @@ def get_session(access_key_id, secret_access_key, region_name):
 def get_client(service_name, access_key_id, secret_access_key, region_name):
     """
     Return client session given credentials and region_name.
+
+    Requests are rate limited per account and region by the process
+    wide rate governor and retried with the adaptive retry mode.
     """
     session = boto3.session.Session()
-    return session.client(
+    client = session.client(
         service_name=service_name,
         aws_access_key_id=access_key_id,
         aws_secret_access_key=secret_access_key,
         region_name=region_name,
+        config=rate_governor.get_client_config()
     )
+    rate_governor.register(client, access_key_id, region_name)
+    return client
 
 
 def get_vpc_id_from_subnet(ec2_client, subnet_id):
@@ -276,13 +291,130 @@ def download_file_from_s3_bucket(
     boto3_session,
     bucket_name,
     obj_key,
-    download_path
+    download_path,
+    resume=False,
+    part_size=64 * 1024 * 1024,
+    digest=None,
+    bandwidth=None,
+    max_concurrency=10
 ):
-    """Downloads a file from a S3 bucket to the provided directory"""
+    """
+    Downloads a file from a S3 bucket to the provided directory
+
+    With resume the file is fetched in ranged GetObject requests of
+    part_size bytes, up to max_concurrency parts at once. The offset
+    up to which all parts are written is kept in a manifest and a
+    partial download of the same object version, by ETag, is continued
+    from there.
+
+    The digest, an ImageDigest, is updated with the file content. A
+    single download is hashed as it is written. In resume mode each
+    part is hashed from disk once all parts before it are written.
+
+    The download is throttled on the bandwidth transfer if given.
+    """
 
     download_directory, download_file = os.path.split(download_path)
     if not os.path.exists(download_directory):
         os.makedirs(download_directory)
 
     s3_client = boto3_session.client(service_name='s3')
-    s3_client.download_file(bucket_name, obj_key, download_path)
+
+    if not resume:
+        callback = bandwidth.throttle if bandwidth else None
+
+        if digest:
+            with open(download_path, 'wb') as target:
+                s3_client.download_fileobj(
+                    bucket_name,
+                    obj_key,
+                    DigestWriter(target, digest),
+                    Callback=callback
+                )
+        else:
+            s3_client.download_file(
+                bucket_name,
+                obj_key,
+                download_path,
+                Callback=callback
+            )
+        return
+
+    response = s3_client.head_object(Bucket=bucket_name, Key=obj_key)
+    size = response['ContentLength']
+    etag = response['ETag']
+
+    manifest = get_download_manifest(download_path, etag, size)
+    offset = manifest['offset'] if manifest else 0
+
+    if digest and offset:
+        digest.update_file(download_path, offset)
+
+    def download_part(fd, start):
+        end = min(start + part_size, size)
+        response = s3_client.get_object(
+            Bucket=bucket_name,
+            Key=obj_key,
+            Range='bytes={0}-{1}'.format(start, end - 1),
+            IfMatch=etag
+        )
+
+        position = start
+        for chunk in response['Body'].iter_chunks(1024 * 1024):
+            if bandwidth:
+                bandwidth.throttle(len(chunk))
+
+            written = 0
+            while written < len(chunk):
+                written += os.pwrite(
+                    fd, chunk[written:], position + written
+                )
+
+            position += len(chunk)
+
+        if position != end:
+            raise MashEc2UtilsException(
+                'Incomplete part {0}-{1} of {2}'.format(start, end, obj_key)
+            )
+
+    with open(download_path, 'r+b' if manifest else 'wb') as target:
+        target.truncate(size)
+        fd = target.fileno()
+
+        with ThreadPoolExecutor(max_concurrency) as executor:
+            futures = [
+                executor.submit(download_part, fd, start)
+                for start in range(offset, size, part_size)
+            ]
+
+            try:
+                for future in futures:
+                    future.result()
+                    end = min(offset + part_size, size)
+
+                    if digest:
+                        digest.update_file(
+                            download_path, end - offset, offset
+                        )
+
+                    os.fsync(fd)
+                    offset = end
+                    persist_download_manifest(download_path, {
+                        'validator': etag,
+                        'size': size,
+                        'offset': offset
+                    })
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    remove_download_manifest(download_path)
+
+
+def get_s3_object_etag(boto3_session, bucket_name, obj_key):
+    """Returns the ETag of the object in the S3 bucket"""
+
+    s3_client = boto3_session.client(service_name='s3')
+    response = s3_client.head_object(Bucket=bucket_name, Key=obj_key)
+    return response['ETag'].strip('"')
@@ -16,14 +16,22 @@
 # along with mash.  If not, see <http://www.gnu.org/licenses/>
 #
 
+import queue
 import smtplib
+import threading
+import time
 
+from contextlib import suppress
 from email.message import EmailMessage
+from smtplib import SMTPServerDisconnected
 
 
 class EmailNotification(object):
     """
     For sending job notification emails.
+
+    The SMTP session is kept open between messages and reopened if
+    the server closed it.
     """
 
     def __init__(self, host, port, user, password, ssl, log_callback=None):
@@ -33,11 +41,25 @@ class EmailNotification(object):
         self.password = password
         self.log_callback = log_callback
 
+        self._smtp_server = None
+        self._lock = threading.Lock()
+
         if ssl:
             self.smtp_class = smtplib.SMTP_SSL
         else:
             self.smtp_class = smtplib.SMTP
 
+    def _connect(self):
+        """
+        Open and return a new SMTP session.
+        """
+        smtp_server = self.smtp_class(self.host, self.port)
+
+        if self.user and self.password:
+            smtp_server.login(self.user, self.password)
+
+        return smtp_server
+
     def _create_email_message(self, msg, subject, to_email):
         """
         Return notification email message object.
@@ -52,24 +74,47 @@ class EmailNotification(object):
 
         return email_msg
 
+    def _quit(self):
+        """
+        Close the SMTP session if open.
+        """
+        if self._smtp_server:
+            with suppress(Exception):
+                self._smtp_server.quit()
+
+            self._smtp_server = None
+
     def _send_email(self, email_msg):
         """
         Send email message using smtp server.
 
         :param email_msg:  email.message.EmailMessage
         """
-        try:
-            smtp_server = self.smtp_class(self.host, self.port)
+        with self._lock:
+            try:
+                if not self._smtp_server:
+                    self._smtp_server = self._connect()
 
-            if self.user and self.password:
-                smtp_server.login(self.user, self.password)
+                try:
+                    self._smtp_server.send_message(email_msg)
+                except SMTPServerDisconnected:
+                    # The server closed the idle session.
+                    self._smtp_server = self._connect()
+                    self._smtp_server.send_message(email_msg)
+            except Exception as error:
+                self._quit()
 
-            smtp_server.send_message(email_msg)
-        except Exception as error:
-            if self.log_callback:
-                self.log_callback.warning(
-                    'Unable to send notification email: {0}'.format(error)
-                )
+                if self.log_callback:
+                    self.log_callback.warning(
+                        'Unable to send notification email: {0}'.format(error)
+                    )
+
+    def close(self):
+        """
+        Close the SMTP session.
+        """
+        with self._lock:
+            self._quit()
 
     def send_notification(self, content, subject, notification_email):
         """
@@ -77,3 +122,136 @@ class EmailNotification(object):
         """
         email_msg = self._create_email_message(content, subject, notification_email)
         self._send_email(email_msg)
+
+
+class NotificationQueue(object):
+    """
+    Send notification emails from a background worker thread.
+
+    Notifications are queued in a bounded queue so a slow SMTP server
+    does not block the caller. If the queue is full the notification
+    is dropped.
+
+    In digest mode the notifications for a recipient are collected
+    for the digest window and sent as one email. A digest of more
+    than one notification is sent with the digest subject.
+
+    Attributes
+
+    * :attr:`notification`
+      The EmailNotification instance used to send the emails
+
+    * :attr:`queue_size`
+      Max number of queued notifications
+
+    * :attr:`digest_window`
+      Seconds notifications for a recipient are collected, 0 sends
+      each notification on its own
+    """
+    digest_separator = '\n\n{0}\n\n'.format('-' * 40)
+    digest_subject = '[MASH] {0} job updates'
+
+    def __init__(
+        self, notification, queue_size=1000, digest_window=0,
+        log_callback=None
+    ):
+        self.notification = notification
+        self.digest_window = digest_window
+        self.log_callback = log_callback
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._digests = {}
+        self._thread = None
+
+    def _add_digest(self, content, subject, notification_email):
+        digest = self._digests.setdefault(
+            notification_email,
+            {
+                'send_time': time.monotonic() + self.digest_window,
+                'subject': subject,
+                'contents': []
+            }
+        )
+        digest['contents'].append(content)
+
+    def _get_timeout(self):
+        """
+        Return the seconds until the next digest is due.
+        """
+        if not self._digests:
+            return None
+
+        send_time = min(
+            digest['send_time'] for digest in self._digests.values()
+        )
+        return max(0, send_time - time.monotonic())
+
+    def _run(self):
+        while True:
+            try:
+                request = self._queue.get(timeout=self._get_timeout())
+            except queue.Empty:
+                request = ()
+
+            if request is None:
+                break
+
+            if request and self.digest_window:
+                self._add_digest(*request)
+            elif request:
+                self.notification.send_notification(*request)
+
+            self._send_digests()
+
+        self._send_digests(force=True)
+        self.notification.close()
+
+    def _send_digests(self, force=False):
+        """
+        Send the digests that are due, or all digests if force is set.
+        """
+        now = time.monotonic()
+
+        for notification_email, digest in list(self._digests.items()):
+            if force or digest['send_time'] <= now:
+                del self._digests[notification_email]
+                contents = digest['contents']
+                subject = digest['subject']
+
+                if len(contents) > 1:
+                    subject = self.digest_subject.format(len(contents))
+
+                self.notification.send_notification(
+                    self.digest_separator.join(contents),
+                    subject,
+                    notification_email
+                )
+
+    def send_notification(self, content, subject, notification_email):
+        """
+        Queue job notification email.
+        """
+        try:
+            self._queue.put_nowait((content, subject, notification_email))
+        except queue.Full:
+            if self.log_callback:
+                self.log_callback.warning(
+                    'Notification queue is full, dropping notification '
+                    'for {0}.'.format(notification_email)
+                )
+
+    def start(self):
+        """
+        Start sending queued notifications.
+        """
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Send the queued notifications and pending digests and stop.
+        """
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
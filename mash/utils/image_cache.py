@@ -0,0 +1,283 @@
+# Copyright (c) 2026 SUSE LLC.  All rights reserved.
+#
+# This file is part of mash.
+#
+# mash is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# mash is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with mash.  If not, see <http://www.gnu.org/licenses/>
+#
+
+import fcntl
+import hashlib
+import os
+import shutil
+import threading
+
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from mash.utils.mash_utils import load_json, persist_json, remove_file
+
+METADATA_FILE = 'metadata.json'
+
+# ioctl request to share the extents of a file on a CoW file system.
+FICLONE = 0x40049409
+
+# Mode of the cached artifacts.
+READ_ONLY = 0o444
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache_key(*parts):
+    """
+    Return the cache key of the artifact identified by the parts.
+    """
+    key = hashlib.sha256()
+
+    for part in parts:
+        key.update(str(part).encode('utf-8'))
+        key.update(b'\0')
+
+    return key.hexdigest()
+
+
+def _reflink(source, target):
+    with open(source, 'rb') as source_file:
+        with open(target, 'wb') as target_file:
+            fcntl.ioctl(target_file.fileno(), FICLONE, source_file.fileno())
+
+
+def link_file(source, target):
+    """
+    Hard link the source file to the target path.
+
+    If the paths are not on the same file system the file is
+    reflinked, or copied if the file system has no reflink support.
+    The target is replaced atomically.
+    """
+    temp_file = target + '.tmp'
+    remove_file(temp_file)
+
+    try:
+        os.link(source, temp_file)
+    except OSError:
+        try:
+            _reflink(source, temp_file)
+        except OSError:
+            shutil.copyfile(source, temp_file)
+
+    os.replace(temp_file, target)
+
+
+class ImageCache(object):
+    """
+    Content addressed cache of the downloaded images.
+
+    Each artifact is stored once in an entry directory named by its
+    cache key and linked into the job directories. A job holds a
+    reference in the entry until its job directory is purged and
+    only entries without references are evicted.
+
+    The jobs share the hard linked artifact, it is made read only
+    so a job can not modify the cached image in place. A job has to
+    replace its link with a new file instead.
+
+    Concurrent fetches of an artifact are coalesced, the first job
+    downloads it and the other jobs wait for the download.
+
+    Attributes
+
+    * :attr:`cache_directory`
+      Directory of the cache entries
+    """
+    def __init__(self, cache_directory):
+        self.cache_directory = cache_directory
+
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _get_entry(self, key):
+        return os.path.join(self.cache_directory, key)
+
+    def _get_cached_file(self, key):
+        """
+        Return the artifact of the entry or None if it is not cached.
+        """
+        entry = self._get_entry(key)
+
+        for name in sorted(os.listdir(entry)):
+            if name not in ('refs', METADATA_FILE) and \
+                    not name.endswith('.tmp'):
+                return os.path.join(entry, name)
+
+        return None
+
+    @contextmanager
+    def _locked(self):
+        """
+        Hold the cache lock which is shared with the cleanup service.
+        """
+        os.makedirs(self.cache_directory, exist_ok=True)
+        lock_path = os.path.join(self.cache_directory, '.lock')
+
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _cache_artifact(self, key, download, metadata=None):
+        """
+        Return the cached artifact, download it on a cache miss.
+
+        The metadata is stored before the artifact so a cached
+        artifact always has its metadata. The artifact is made read
+        only, including artifacts cached before it was enforced.
+        """
+        cached_file = self._get_cached_file(key)
+
+        if not cached_file:
+            source = download()
+            entry = self._get_entry(key)
+
+            if metadata:
+                persist_json(os.path.join(entry, METADATA_FILE), metadata())
+
+            cached_file = os.path.join(entry, os.path.basename(source))
+            link_file(source, cached_file)
+
+        os.chmod(cached_file, READ_ONLY)
+        return cached_file
+
+    def acquire(self, key, job_id):
+        """
+        Add a reference of the job to the entry.
+        """
+        entry = self._get_entry(key)
+
+        with self._locked():
+            os.makedirs(os.path.join(entry, 'refs'), exist_ok=True)
+            open(os.path.join(entry, 'refs', job_id), 'w').close()
+            os.utime(entry)
+
+    def release(self, key, job_id):
+        """
+        Remove the reference of the job from the entry.
+        """
+        with self._locked():
+            remove_file(os.path.join(self._get_entry(key), 'refs', job_id))
+
+    def get_references(self, key):
+        """
+        Return the ids of the jobs referencing the entry.
+        """
+        try:
+            return sorted(os.listdir(os.path.join(self._get_entry(key), 'refs')))
+        except FileNotFoundError:
+            return []
+
+    def get_metadata(self, key):
+        """
+        Return the metadata stored with the artifact of the entry.
+        """
+        try:
+            return load_json(os.path.join(self._get_entry(key), METADATA_FILE))
+        except FileNotFoundError:
+            return {}
+
+    def fetch(self, key, job_id, target_directory, download, metadata=None):
+        """
+        Link the artifact of the key into the target directory.
+
+        On a cache miss download is called to fetch the artifact, it
+        returns the path of the downloaded file. The dictionary
+        returned by metadata is then stored with the artifact. Returns
+        the path of the artifact in the target directory.
+        """
+        os.makedirs(target_directory, exist_ok=True)
+        self.acquire(key, job_id)
+
+        with self._lock:
+            future = self._pending.get(key)
+            leader = future is None
+
+            if leader:
+                future = Future()
+                self._pending[key] = future
+
+        if leader:
+            try:
+                future.set_result(self._cache_artifact(key, download, metadata))
+            except Exception as error:
+                future.set_exception(error)
+            finally:
+                with self._lock:
+                    del self._pending[key]
+
+        cached_file = future.result()
+        target = os.path.join(target_directory, os.path.basename(cached_file))
+
+        if not (
+            os.path.exists(target) and os.path.samefile(cached_file, target)
+        ):
+            link_file(cached_file, target)
+
+        return target
+
+    def purge(self, download_directory, cutoff):
+        """
+        Evict the entries without references last used before cutoff.
+
+        References of jobs without a job directory in the download
+        directory are released first. Returns the evicted keys.
+        """
+        evicted = []
+
+        if not os.path.isdir(self.cache_directory):
+            return evicted
+
+        with self._locked():
+            for key in sorted(os.listdir(self.cache_directory)):
+                entry = self._get_entry(key)
+
+                if not os.path.isdir(entry):
+                    continue
+
+                for job_id in self.get_references(key):
+                    job_directory = os.path.join(download_directory, job_id)
+
+                    if not os.path.isdir(job_directory):
+                        remove_file(os.path.join(entry, 'refs', job_id))
+
+                if self.get_references(key):
+                    continue
+
+                if os.stat(entry).st_mtime < cutoff:
+                    shutil.rmtree(entry)
+                    evicted.append(key)
+
+        return evicted
+
+
+def get_image_cache(cache_directory):
+    """
+    Return the image cache shared by all jobs for the directory.
+    """
+    with _caches_lock:
+        if cache_directory not in _caches:
+            _caches[cache_directory] = ImageCache(cache_directory)
+
+        return _caches[cache_directory]
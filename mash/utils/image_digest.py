@@ -0,0 +1,174 @@
+# Copyright (c) 2026 SUSE LLC.  All rights reserved.
+#
+# This file is part of mash.
+#
+# mash is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# mash is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with mash.  If not, see <http://www.gnu.org/licenses/>
+#
+
+import hashlib
+
+CHUNK_SIZE = 1024 * 1024
+
+# Size of the parts boto3 uploads a file in by default.
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+
+
+def get_multipart_etag(part_md5s):
+    """
+    Return the ETag S3 assigns to an object uploaded in parts.
+
+    The ETag is the MD5 digest of the binary part digests followed
+    by the number of parts.
+    """
+    digest = hashlib.md5()
+
+    for part_md5 in part_md5s:
+        digest.update(bytes.fromhex(part_md5))
+
+    return '{0}-{1}'.format(digest.hexdigest(), len(part_md5s))
+
+
+class ImageDigest(object):
+    """
+    SHA-256 and MD5 digests of an image computed in a single pass.
+
+    The data has to be added in file order. If a part size is set
+    the MD5 digest of each part is recorded as well so the ETag of
+    a multipart upload with the same part size can be derived.
+
+    Attributes
+
+    * :attr:`part_size`
+      Bytes per part of the part digests, None to skip them
+    """
+    def __init__(self, part_size=None):
+        self.part_size = part_size
+        self.size = 0
+
+        self._sha256 = hashlib.sha256()
+        self._md5 = hashlib.md5()
+        self._part_md5 = None
+        self._part_md5s = []
+        self._part_position = 0
+
+    def _update_parts(self, data):
+        view = memoryview(data)
+
+        while view:
+            if self._part_md5 is None:
+                self._part_md5 = hashlib.md5()
+                self._part_position = 0
+
+            length = min(len(view), self.part_size - self._part_position)
+            self._part_md5.update(view[:length])
+            self._part_position += length
+            view = view[length:]
+
+            if self._part_position == self.part_size:
+                self._part_md5s.append(self._part_md5.hexdigest())
+                self._part_md5 = None
+
+    def update(self, data):
+        """
+        Add the next bytes of the image.
+        """
+        self._sha256.update(data)
+        self._md5.update(data)
+        self.size += len(data)
+
+        if self.part_size:
+            self._update_parts(data)
+
+    def update_file(self, path, size=None, offset=0):
+        """
+        Add size bytes of the file from offset, or the rest of the file.
+        """
+        position = 0
+
+        with open(path, 'rb') as image:
+            image.seek(offset)
+
+            while size is None or position < size:
+                read_size = CHUNK_SIZE
+                if size is not None:
+                    read_size = min(CHUNK_SIZE, size - position)
+
+                data = image.read(read_size)
+                if not data:
+                    break
+
+                self.update(data)
+                position += len(data)
+
+    def hexdigest(self):
+        """
+        Return the SHA-256 hex digest of the data.
+        """
+        return self._sha256.hexdigest()
+
+    def get_digests(self):
+        """
+        Return the digests as a dictionary for the job messages.
+
+        With a part size the dictionary includes the part digests
+        and the ETag of the object if uploaded with that part size,
+        files smaller than a part are uploaded in a single request.
+        """
+        digests = {
+            'sha256': self._sha256.hexdigest(),
+            'md5': self._md5.hexdigest(),
+            'size': self.size
+        }
+
+        if self.part_size:
+            part_md5s = list(self._part_md5s)
+            if self._part_md5 is not None:
+                part_md5s.append(self._part_md5.hexdigest())
+
+            digests['part_size'] = self.part_size
+            digests['part_md5s'] = part_md5s
+
+            if self.size < self.part_size:
+                digests['s3_etag'] = digests['md5']
+            else:
+                digests['s3_etag'] = get_multipart_etag(part_md5s)
+
+        return digests
+
+
+class DigestWriter(object):
+    """
+    Write only file object adding the written data to a digest.
+
+    The writer is not seekable so a transfer writing through it
+    delivers the data in file order.
+
+    Attributes
+
+    * :attr:`target`
+      The file object the data is written to
+
+    * :attr:`digest`
+      The ImageDigest updated with the written data
+    """
+    def __init__(self, target, digest):
+        self.target = target
+        self.digest = digest
+
+    def write(self, data):
+        """
+        Add the data to the digest and write it to the target.
+        """
+        self.digest.update(data)
+        return self.target.write(data)
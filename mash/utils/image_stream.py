@@ -0,0 +1,237 @@
+# Copyright (c) 2026 SUSE LLC.  All rights reserved.
+#
+# This file is part of mash.
+#
+# mash is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# mash is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with mash.  If not, see <http://www.gnu.org/licenses/>
+#
+
+import hashlib
+import time
+
+from mash.mash_exceptions import MashImageStreamException
+from mash.utils.mash_utils import load_json, persist_json
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def get_stream_file(image_file):
+    """
+    Return the path of the stream state of the image file.
+    """
+    return '{0}.stream.json'.format(image_file)
+
+
+class ImageStreamWriter(object):
+    """
+    Publish the progress of an image file while it is downloaded.
+
+    The state file next to the image tells readers how many bytes
+    from the start of the file are written, the digests of the image
+    once it is complete or the error if the download failed.
+
+    Attributes
+
+    * :attr:`image_file`
+      Path of the image file
+
+    * :attr:`interval`
+      Min seconds between two updates of the state file
+    """
+    def __init__(self, image_file, interval=1):
+        self.image_file = image_file
+        self.interval = interval
+
+        self._state = {}
+        self._saved = 0
+
+    def _save(self):
+        self._saved = time.time()
+        persist_json(get_stream_file(self.image_file), self._state)
+
+    def start(self):
+        """
+        Reset the state of the image before the download starts.
+
+        The image file is created so readers can open it right away.
+        """
+        open(self.image_file, 'ab').close()
+        self._state = {
+            'size': None,
+            'available': 0,
+            'done': False,
+            'digests': None,
+            'error': None
+        }
+        self._save()
+
+    def update(self, available, size):
+        """
+        Set the number of bytes written in order and the image size.
+        """
+        resized = self._state['size'] != (size or None)
+        self._state['available'] = available
+        self._state['size'] = size or None
+
+        if resized or time.time() - self._saved >= self.interval:
+            self._save()
+
+    def finish(self, digests):
+        """
+        Mark the image complete with the digests of the download.
+        """
+        self._state['available'] = digests['size']
+        self._state['size'] = digests['size']
+        self._state['digests'] = digests
+        self._state['done'] = True
+        self._save()
+
+    def fail(self, error):
+        self._state['error'] = str(error)
+        self._save()
+
+
+class ImageStreamReader(object):
+    """
+    Read an image file while it is downloaded.
+
+    Reads block until the bytes are written. Once the download is
+    complete the SHA-256 digest of the bytes read is confirmed with
+    the digest of the download.
+
+    Attributes
+
+    * :attr:`image_file`
+      Path of the image file
+
+    * :attr:`poll_interval`
+      Seconds between two reads of the stream state
+
+    * :attr:`stall_timeout`
+      Max seconds to wait for new bytes of the image
+
+    * :attr:`size`
+      Size of the image from the last read of the stream state or
+      None if it is not known yet
+    """
+    def __init__(self, image_file, poll_interval=1, stall_timeout=900):
+        self.image_file = image_file
+        self.poll_interval = poll_interval
+        self.stall_timeout = stall_timeout
+        self.digests = None
+        self.size = None
+
+        self._position = 0
+        self._hash = hashlib.sha256()
+        self._progress_time = time.time()
+        # Unbuffered so no read ahead of unwritten bytes is cached
+        self._file = open(image_file, 'rb', buffering=0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _get_state(self):
+        try:
+            state = load_json(get_stream_file(self.image_file))
+        except (OSError, ValueError):
+            return {}
+
+        self.size = state.get('size') or self.size
+        return state
+
+    def _confirm(self, state):
+        """
+        Confirm the bytes read match the digest of the download.
+        """
+        self.digests = state['digests']
+
+        if self._position != self.digests['size'] or \
+                self._hash.hexdigest() != self.digests['sha256']:
+            raise MashImageStreamException(
+                'Image stream does not match the downloaded image'
+            )
+
+    def _wait(self):
+        """
+        Return the number of bytes available, 0 at the end of the image.
+        """
+        while True:
+            state = self._get_state()
+
+            if state.get('error'):
+                raise MashImageStreamException(
+                    'Image download failed: {0}'.format(state['error'])
+                )
+
+            if state.get('available', 0) > self._position:
+                return state['available'] - self._position
+
+            if state.get('done'):
+                if self.digests is None:
+                    self._confirm(state)
+                return 0
+
+            if time.time() - self._progress_time > self.stall_timeout:
+                raise MashImageStreamException(
+                    'Image stream stalled for {0} seconds'.format(
+                        self.stall_timeout
+                    )
+                )
+
+            time.sleep(self.poll_interval)
+
+    def get_size(self):
+        """
+        Return the size of the image or None if it is not known yet.
+        """
+        return self._get_state().get('size')
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            return b''.join(iter(lambda: self.read(CHUNK_SIZE), b''))
+
+        while size:
+            available = self._wait()
+
+            if not available:
+                return b''
+
+            self._file.seek(self._position)
+            data = self._file.read(min(size, available))
+
+            # The file is rewritten if a download falls back to a
+            # single stream, wait until the bytes are written again.
+            if data:
+                self._position += len(data)
+                self._hash.update(data)
+                self._progress_time = time.time()
+                return data
+
+            time.sleep(self.poll_interval)
+
+        return b''
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        self._file.close()
@@ -17,6 +17,11 @@
 #
 import json
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 
 class JsonFormat(object):
     """
@@ -33,6 +38,20 @@ class JsonFormat(object):
 
     @staticmethod
     def json_message(data_dict):
+        """
+        Return data as a compact json string with sorted keys.
+
+        orjson is used for serialization if it is available.
+        """
+        if orjson:
+            try:
+                return orjson.dumps(
+                    data_dict,
+                    option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+                ).decode('utf-8')
+            except TypeError:
+                pass  # Fall back to json for types orjson rejects
+
         return json.dumps(
-            data_dict, sort_keys=True, indent=4, separators=(',', ': ')
+            data_dict, sort_keys=True, separators=(',', ':')
         )
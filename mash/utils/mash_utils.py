@@ -23,6 +23,7 @@ import os
 import random
 import requests
 import hashlib
+import zlib
 
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives.asymmetric import rsa
@@ -33,7 +34,7 @@ from string import ascii_lowercase
 from tempfile import NamedTemporaryFile
 
 from mash.log.handler import RabbitMQHandler
-from mash.mash_exceptions import MashException, MashLogSetupException
+from mash.mash_exceptions import MashLogSetupException, MashRequestException
 from mash.utils.json_format import JsonFormat
 
 
@@ -68,6 +69,15 @@ def generate_name(length=8):
     return ''.join([random.choice(ascii_lowercase) for i in range(length)])
 
 
+def get_shard(job_id, shard_count):
+    """
+    Return the shard of the job.
+
+    crc32 is stable across processes unlike the salted str hash.
+    """
+    return zlib.crc32(job_id.encode('utf-8')) % shard_count
+
+
 def get_key_from_file(key_file_path):
     """
     Return a key as string from the given file.
@@ -143,9 +153,18 @@ def remove_file(file_path):
 def persist_json(file_path, data):
     """
     Persist the json data to a file on disk.
+
+    The data is written to a temporary file which replaces the file
+    so a crash never leaves a truncated file.
     """
-    with open(file_path, 'w') as json_file:
+    temp_file = '{0}.tmp'.format(file_path)
+
+    with open(temp_file, 'w') as json_file:
         json_file.write(JsonFormat.json_message(data))
+        json_file.flush()
+        os.fsync(json_file.fileno())
+
+    os.replace(temp_file, file_path)
 
 
 def load_json(file_path):
@@ -158,20 +177,43 @@ def load_json(file_path):
     return data
 
 
-def restart_job(job_file, callback):
+def get_download_manifest(download_path, validator, size):
+    """
+    Return the manifest of a partial download of the file.
+
+    None is returned if there is no partial download or it belongs to
+    a different version of the file by validator or size.
+    """
+    manifest_file = '{0}.download.json'.format(download_path)
+
+    if not os.path.isfile(manifest_file) or \
+            not os.path.isfile(download_path):
+        return None
+
+    try:
+        manifest = load_json(manifest_file)
+    except ValueError:
+        return None
+
+    if manifest.get('validator') != validator or \
+            manifest.get('size') != size:
+        return None
+
+    return manifest
+
+
+def persist_download_manifest(download_path, manifest):
     """
-    Restart job from config file using callback.
+    Persist the progress manifest of a partial download.
     """
-    job_config = load_json(job_file)
-    callback(job_config)
+    persist_json('{0}.download.json'.format(download_path), manifest)
 
 
-def restart_jobs(job_dir, callback):
+def remove_download_manifest(download_path):
     """
-    Restart all jobs in job_dir using callback.
+    Remove the progress manifest of a finished download.
     """
-    for job_file in os.listdir(job_dir):
-        restart_job(os.path.join(job_dir, job_file), callback)
+    remove_file('{0}.download.json'.format(download_path))
 
 
 def handle_request(url, endpoint, method, job_data=None):
@@ -195,7 +237,7 @@ def handle_request(url, endpoint, method, job_data=None):
                 reason=response.reason
             )
 
-        raise MashException(msg)
+        raise MashRequestException(msg, response.status_code)
 
     return response
 
@@ -227,12 +269,16 @@ def get_logging_formatter():
     )
 
 
-def setup_rabbitmq_log_handler(host, username, password):
+def setup_rabbitmq_log_handler(
+    host, username, password, buffer_size=10000, level=logging.NOTSET
+):
     rabbit_handler = RabbitMQHandler(
         host=host,
         username=username,
         password=password,
-        routing_key='mash.logger'
+        routing_key='mash.logger',
+        buffer_size=buffer_size,
+        level=level
     )
     rabbit_handler.setFormatter(get_logging_formatter())
 
@@ -0,0 +1,132 @@
+# Copyright (c) 2026 SUSE LLC.  All rights reserved.
+#
+# This file is part of mash.
+#
+# mash is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# mash is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with mash.  If not, see <http://www.gnu.org/licenses/>
+#
+
+import gzip
+import json
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+from mash.mash_exceptions import MashConfigException
+from mash.utils.json_format import JsonFormat
+
+JSON = 'application/json'
+MSGPACK = 'application/msgpack'
+GZIP = 'gzip'
+
+
+class MessageFormat(object):
+    """
+    Wire format for messages published between services.
+
+    The format is signalled with the AMQP content_type and
+    content_encoding message properties so consumers can decode
+    messages from services using any supported format.
+
+    Attributes
+
+    * :attr:`message_format`
+      json (default) or msgpack
+
+    * :attr:`compression`
+      Optional body compression, only gzip is supported
+    """
+    content_types = {
+        'json': JSON,
+        'msgpack': MSGPACK
+    }
+
+    def __init__(self, message_format='json', compression=None):
+        if message_format not in self.content_types:
+            raise MashConfigException(
+                'Unsupported message format: {0}'.format(message_format)
+            )
+
+        if message_format == 'msgpack' and not msgpack:
+            raise MashConfigException(
+                'The msgpack message format requires the msgpack module.'
+            )
+
+        if compression not in (None, GZIP):
+            raise MashConfigException(
+                'Unsupported message compression: {0}'.format(compression)
+            )
+
+        self.content_type = self.content_types[message_format]
+        self.compression = compression
+
+    @property
+    def properties(self):
+        """
+        Return the message properties describing the encoding.
+        """
+        properties = {'content_type': self.content_type}
+
+        if self.compression:
+            properties['content_encoding'] = self.compression
+
+        return properties
+
+    def dumps(self, data):
+        """
+        Serialize data to a message body.
+        """
+        if self.content_type == MSGPACK:
+            body = msgpack.packb(data, use_bin_type=True)
+        else:
+            body = JsonFormat.json_message(data)
+
+        if self.compression:
+            if isinstance(body, str):
+                body = body.encode('utf-8')
+
+            body = gzip.compress(body, compresslevel=1)
+
+        return body
+
+    @staticmethod
+    def loads(body, properties=None):
+        """
+        Deserialize a message body based on the message properties.
+
+        Messages without properties are treated as JSON.
+        """
+        properties = properties or {}
+        content_type = properties.get('content_type')
+        content_encoding = properties.get('content_encoding')
+
+        if content_encoding == GZIP or content_type == MSGPACK:
+            if isinstance(body, str):
+                # Binary body was auto decoded by the AMQP client.
+                body = body.encode('utf-8')
+
+        if content_encoding == GZIP:
+            body = gzip.decompress(body)
+
+        if content_type == MSGPACK:
+            if not msgpack:
+                raise MashConfigException(
+                    'The msgpack message format requires '
+                    'the msgpack module.'
+                )
+
+            return msgpack.unpackb(body, raw=False)
+
+        return json.loads(body)
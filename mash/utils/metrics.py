@@ -0,0 +1,297 @@
+# Copyright (c) 2026 SUSE LLC.  All rights reserved.
+#
+# This file is part of mash.
+#
+# mash is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# mash is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with mash.  If not, see <http://www.gnu.org/licenses/>
+#
+
+import bisect
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60,
+    300, 900, 1800, 3600
+)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+
+    return repr(float(value))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+
+    pairs = []
+    for name, value in labels:
+        value = str(value).replace('\\', r'\\').replace(
+            '\n', r'\n'
+        ).replace('"', r'\"')
+        pairs.append('{0}="{1}"'.format(name, value))
+
+    return '{' + ','.join(pairs) + '}'
+
+
+class Metric(object):
+    """
+    Base class for a metric with a value per set of label values.
+
+    Attributes
+
+    * :attr:`name`
+      Metric name
+
+    * :attr:`documentation`
+      Help text of the metric
+
+    * :attr:`labelnames`
+      Names of the metric labels
+    """
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _get_key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                'Metric {0} requires the labels: {1}'.format(
+                    self.name, ', '.join(self.labelnames)
+                )
+            )
+
+        return tuple(
+            (name, str(labels[name])) for name in self.labelnames
+        )
+
+    def _get_samples(self):
+        """
+        Return a list of (suffix, labels, value) samples.
+        """
+        with self._lock:
+            return [
+                ('', key, value) for key, value in sorted(self._values.items())
+            ]
+
+    def render(self):
+        """
+        Return the metric in the Prometheus text format.
+        """
+        lines = [
+            '# HELP {0} {1}'.format(self.name, self.documentation),
+            '# TYPE {0} {1}'.format(self.name, self.type)
+        ]
+
+        for suffix, labels, value in self._get_samples():
+            lines.append('{0}{1}{2} {3}'.format(
+                self.name,
+                suffix,
+                _format_labels(labels),
+                _format_value(value)
+            ))
+
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """
+    Monotonically increasing counter.
+    """
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._get_key(labels)
+
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    Value that can go up and down.
+
+    A gauge without labels can be set to a function which is called
+    each time the metric is collected.
+    """
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super(Gauge, self).__init__(name, documentation, labelnames)
+        self._function = None
+
+    def inc(self, amount=1, **labels):
+        key = self._get_key(labels)
+
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._get_key(labels)
+
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function):
+        self._function = function
+
+    def _get_samples(self):
+        if self._function:
+            return [('', (), self._function())]
+
+        return super(Gauge, self)._get_samples()
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values in cumulative buckets.
+
+    Attributes
+
+    * :attr:`buckets`
+      Sorted upper bounds of the buckets, +Inf is always added
+    """
+    type = 'histogram'
+
+    def __init__(
+        self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS
+    ):
+        super(Histogram, self).__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._get_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = {
+                    'buckets': [0] * len(self.buckets),
+                    'sum': 0,
+                    'count': 0
+                }
+
+            data = self._values[key]
+            data['buckets'][index] += 1
+            data['sum'] += value
+            data['count'] += 1
+
+    def _get_samples(self):
+        samples = []
+
+        with self._lock:
+            for key, data in sorted(self._values.items()):
+                total = 0
+                for bound, count in zip(self.buckets, data['buckets']):
+                    total += count
+                    samples.append((
+                        '_bucket',
+                        key + (('le', _format_value(bound)),),
+                        total
+                    ))
+
+                samples.append(('_sum', key, data['sum']))
+                samples.append(('_count', key, data['count']))
+
+        return samples
+
+
+class MetricsRegistry(object):
+    """
+    Collection of the metrics exported by a service.
+
+    Metrics are created on first use and shared by name so any part
+    of the service can record to the same metric.
+    """
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_metric(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(
+                    name, documentation, labelnames, **kwargs
+                )
+
+            return self._metrics[name]
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_metric(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_metric(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS
+    ):
+        return self._get_metric(
+            Histogram, name, documentation, labelnames, buckets=buckets
+        )
+
+    def render(self):
+        """
+        Return all metrics in the Prometheus text format.
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+
+        return ''.join(
+            metric.render() + '\n' for name, metric in metrics
+        )
+
+
+def start_metrics_server(registry, host, port):
+    """
+    Serve the registry metrics at /metrics in a daemon thread.
+
+    Returns the HTTP server, shutdown stops serving.
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Scrapes are not logged.
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
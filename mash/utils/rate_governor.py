@@ -0,0 +1,211 @@
+# Copyright (c) 2026 SUSE LLC.  All rights reserved.
+#
+# This file is part of mash.
+#
+# mash is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# mash is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with mash.  If not, see <http://www.gnu.org/licenses/>
+#
+
+import threading
+import time
+
+from functools import partial
+
+from botocore.config import Config
+
+from mash.services.base_defaults import Defaults
+
+THROTTLING_ERROR_CODES = (
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'RequestThrottledException',
+    'TooManyRequestsException',
+    'ProvisionedThroughputExceededException',
+    'TransactionInProgressException',
+    'RequestLimitExceeded',
+    'BandwidthLimitExceeded',
+    'LimitExceededException',
+    'RequestThrottled',
+    'SlowDown',
+    'PriorRequestNotComplete',
+    'EC2ThrottledException'
+)
+
+
+class TokenBucket(object):
+    """
+    Thread safe token bucket with an adaptive refill rate.
+
+    Each request takes one token. Throttling responses halve the
+    rate and successful responses raise it back towards max_rate.
+
+    Attributes
+
+    * :attr:`max_rate`
+      Max tokens added per second
+
+    * :attr:`burst`
+      Max number of tokens in the bucket
+
+    * :attr:`min_rate`
+      Lower bound for the rate after throttling
+    """
+    recovery = 0.02
+
+    def __init__(self, max_rate, burst, min_rate=0.5):
+        self.max_rate = max_rate
+        self.rate = max_rate
+        self.burst = burst
+        self.min_rate = min(min_rate, max_rate)
+        self.tokens = burst
+
+        self._timestamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.burst,
+            self.tokens + (now - self._timestamp) * self.rate
+        )
+        self._timestamp = now
+
+    def acquire(self, tokens=1):
+        """
+        Take the tokens, sleeping until the tokens are available.
+
+        Tokens are reserved in order so waiting requests are
+        released at the bucket rate.
+        """
+        with self._lock:
+            self._refill()
+            self.tokens -= tokens
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if wait:
+            time.sleep(wait)
+
+    def set_rate(self, rate, burst):
+        """
+        Change the max rate and burst of the bucket.
+        """
+        with self._lock:
+            self._refill()
+            self.max_rate = rate
+            self.rate = rate
+            self.min_rate = min(self.min_rate, rate)
+            self.burst = burst
+            self.tokens = min(self.tokens, burst)
+
+    def throttled(self):
+        """
+        Halve the rate and drop any saved up burst.
+        """
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0)
+
+    def succeeded(self):
+        """
+        Increase the rate towards the max rate.
+        """
+        with self._lock:
+            if self.rate < self.max_rate:
+                self._refill()
+                self.rate = min(
+                    self.max_rate,
+                    self.rate + self.max_rate * self.recovery
+                )
+
+
+class RateGovernor(object):
+    """
+    Process wide rate limits for AWS API requests.
+
+    Requests of all clients registered with the governor share a
+    token bucket per account and region. Clients use the botocore
+    adaptive retry mode and throttling responses slow down the
+    bucket of the account and region.
+    """
+    def __init__(self, rate=None, burst=None, max_attempts=None):
+        self.configure(rate, burst, max_attempts)
+
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def configure(self, rate=None, burst=None, max_attempts=None):
+        """
+        Set the bucket rate and retry attempts for new clients.
+        """
+        self.rate = rate or Defaults.get_ec2_api_rate()
+        self.burst = burst or Defaults.get_ec2_api_burst()
+        self.max_attempts = max_attempts or Defaults.get_max_ec2_attempts()
+
+    def get_bucket(self, account, region):
+        """
+        Return the token bucket for the account and region.
+        """
+        with self._lock:
+            key = (account, region)
+
+            if key not in self._buckets:
+                self._buckets[key] = TokenBucket(self.rate, self.burst)
+
+            return self._buckets[key]
+
+    def get_client_config(self):
+        """
+        Return the botocore config with the adaptive retry mode.
+        """
+        return Config(
+            retries={
+                'max_attempts': self.max_attempts,
+                'mode': 'adaptive'
+            }
+        )
+
+    def register(self, client, account, region):
+        """
+        Rate limit all requests of the client on the bucket.
+
+        Every attempt including retries takes a token and each
+        response is fed back to the bucket.
+        """
+        bucket = self.get_bucket(account, region)
+        client.meta.events.register(
+            'before-send', partial(self._before_send, bucket)
+        )
+        client.meta.events.register(
+            'needs-retry', partial(self._needs_retry, bucket)
+        )
+
+    @staticmethod
+    def _before_send(bucket, **kwargs):
+        bucket.acquire()
+
+    @staticmethod
+    def _needs_retry(bucket, response=None, **kwargs):
+        if not response:
+            return
+
+        error_code = response[1].get('Error', {}).get('Code')
+
+        if error_code in THROTTLING_ERROR_CODES:
+            bucket.throttled()
+        else:
+            bucket.succeeded()
+
+
+rate_governor = RateGovernor()
@@ -0,0 +1,255 @@
+# Copyright (c) 2026 SUSE LLC.  All rights reserved.
+#
+# This file is part of mash.
+#
+# mash is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# mash is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with mash.  If not, see <http://www.gnu.org/licenses/>
+#
+
+import json
+import os
+import re
+import threading
+import time
+
+from mash.mash_exceptions import MashTracingException
+
+TRACEPARENT_HEADER = 'traceparent'
+SENT_AT_HEADER = 'sent_at'
+
+TRACEPARENT_PATTERN = re.compile(
+    r'^00-(?P<trace_id>[0-9a-f]{32})-(?P<span_id>[0-9a-f]{16})-[0-9a-f]{2}$'
+)
+
+
+def new_span_id():
+    return os.urandom(8).hex()
+
+
+def new_trace_id():
+    return os.urandom(16).hex()
+
+
+def format_traceparent(trace_id, span_id):
+    """
+    Return the W3C traceparent value for the span.
+    """
+    return '00-{0}-{1}-01'.format(trace_id, span_id)
+
+
+def parse_traceparent(traceparent):
+    """
+    Return the (trace_id, span_id) of a traceparent value.
+
+    Returns (None, None) if the value is not a valid traceparent.
+    """
+    if isinstance(traceparent, bytes):
+        traceparent = traceparent.decode('utf-8', errors='replace')
+
+    if not isinstance(traceparent, str):
+        return None, None
+
+    match = TRACEPARENT_PATTERN.match(traceparent)
+
+    if not match:
+        return None, None
+
+    return match.group('trace_id'), match.group('span_id')
+
+
+class FileSpanExporter(object):
+    """
+    Append finished spans as json lines to a file.
+
+    Attributes
+
+    * :attr:`path`
+      Path of the span file
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def export(self, spans):
+        lines = ''.join(
+            json.dumps(span, sort_keys=True) + '\n' for span in spans
+        )
+
+        with self._lock:
+            if not self._file:
+                self._file = open(self.path, 'a')
+
+            self._file.write(lines)
+            self._file.flush()
+
+
+class NullSpanExporter(object):
+    """
+    Discard finished spans.
+    """
+    def close(self):
+        pass
+
+    def export(self, spans):
+        pass
+
+
+def get_span_exporter(exporter_type, path):
+    """
+    Return the span exporter of the given type.
+    """
+    if exporter_type == 'file':
+        return FileSpanExporter(path)
+    elif exporter_type == 'none':
+        return NullSpanExporter()
+
+    raise MashTracingException(
+        'Unsupported trace exporter: {0}'.format(exporter_type)
+    )
+
+
+class Tracer(object):
+    """
+    Record the spans of a service and pass them to the exporter.
+
+    Trace context is passed between services as W3C traceparent
+    value. A span recorded without a valid parent starts a new trace.
+    Export errors are logged and never raised to the caller.
+
+    Attributes
+
+    * :attr:`service`
+      Name of the service recording the spans
+
+    * :attr:`exporter`
+      Exporter for finished spans
+    """
+    def __init__(self, service, exporter, log=None):
+        self.service = service
+        self.exporter = exporter
+        self.log = log
+
+    def close(self):
+        self.exporter.close()
+
+    def _record(
+        self, name, trace_id, parent_id, span_id, start, end, attributes
+    ):
+        span = {
+            'trace_id': trace_id,
+            'span_id': span_id,
+            'parent_id': parent_id,
+            'name': name,
+            'service': self.service,
+            'start': start,
+            'duration': max(end - start, 0),
+            'attributes': attributes or {}
+        }
+
+        try:
+            self.exporter.export([span])
+        except Exception as error:
+            if self.log:
+                self.log.warning(
+                    'Unable to export trace span: {0}'.format(error)
+                )
+
+    def record_span(self, name, traceparent, start, end, attributes=None):
+        """
+        Export a finished span as child of the traceparent.
+
+        Start and end are epoch timestamps. Returns the traceparent
+        of the recorded span.
+        """
+        trace_id, parent_id = parse_traceparent(traceparent)
+        trace_id = trace_id or new_trace_id()
+        span_id = new_span_id()
+
+        self._record(
+            name, trace_id, parent_id, span_id, start, end, attributes
+        )
+        return format_traceparent(trace_id, span_id)
+
+    def start_span(self, name, traceparent, attributes=None):
+        """
+        Start a span as child of the traceparent.
+
+        The traceparent of the span can be passed on while the span
+        is open, the span is exported when it ends.
+        """
+        trace_id, parent_id = parse_traceparent(traceparent)
+        return Span(
+            self, name, trace_id or new_trace_id(), parent_id, attributes
+        )
+
+
+class Span(object):
+    """
+    Open span of a tracer, exported once ended.
+
+    Attributes
+
+    * :attr:`name`
+      Name of the span
+
+    * :attr:`traceparent`
+      Trace context with the span as parent
+    """
+    def __init__(self, tracer, name, trace_id, parent_id, attributes=None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.parent_id = parent_id
+        self.span_id = new_span_id()
+        self.attributes = dict(attributes or {})
+        self.start = time.time()
+        self.ended = False
+
+    @property
+    def traceparent(self):
+        return format_traceparent(self.trace_id, self.span_id)
+
+    def end(self, **attributes):
+        """
+        Export the span with the additional attributes.
+        """
+        if self.ended:
+            return
+
+        self.ended = True
+        self.attributes.update(attributes)
+        self.tracer._record(
+            self.name,
+            self.trace_id,
+            self.parent_id,
+            self.span_id,
+            self.start,
+            time.time(),
+            self.attributes
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type:
+            self.end(error=str(exc_value))
+        else:
+            self.end()
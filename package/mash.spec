@@ -87,6 +87,9 @@ Requires:       python-azure-img-utils >= 2.6.0
 Requires:       python-aws-mp-utils
 Requires:       %{pythons}-Werkzeug
 Requires:       %{pythons}-jmespath
+Recommends:     %{pythons}-orjson
+Suggests:       %{pythons}-msgpack
+Suggests:       %{pythons}-aio-pika
 Requires:       apache2
 Requires:       apache2-mod_wsgi-%{pythons}
 Requires(pre):  pwdutils
@@ -3,61 +3,90 @@ import logging
 from unittest.mock import Mock, patch
 
 from mash.log.handler import (
+    LogShipper,
     RabbitMQHandler,
-    RabbitMQSocket
+    get_log_shipper
 )
 
 
 class TestRabbitMQHandler(object):
     def setup_method(self):
-        self.connection = Mock()
-        self.channel = Mock()
-        self.channel.exchange.declare.return_value = None
-        self.channel.basic.publish.return_value = None
-        self.connection.channel.return_value = self.channel
-
-        self.handler = RabbitMQHandler()
-
-    @patch('mash.log.handler.Connection')
-    def test_rabbit_handler_messages(self, mock_connection):
-        mock_connection.return_value = self.connection
-
-        log = logging.getLogger('log_handler_test')
-        log.addHandler(self.handler)
-        log.setLevel(logging.DEBUG)
-
-        log.info('Job finished!', extra={'job_id': '4711'})
-        self.channel.basic.publish.assert_called_once_with(
-            exchange='logger',
-            routing_key='mash.logger',
-            body='{"job_id": "4711", "msg": "Job finished!"}',
-            properties={
-                'content_type': 'application/json',
-                'delivery_mode': 2
-            }
+        self.shipper = Mock()
+
+        with patch('mash.log.handler.get_log_shipper') as mock_get_shipper:
+            mock_get_shipper.return_value = self.shipper
+            self.handler = RabbitMQHandler(level=logging.INFO)
+
+        self.log = logging.getLogger('log_handler_test')
+        self.log.handlers = []
+        self.log.addHandler(self.handler)
+        self.log.setLevel(logging.DEBUG)
+
+    def test_rabbit_handler_messages(self):
+        self.handler.handle(logging.makeLogRecord({
+            'msg': 'Job finished!',
+            'levelno': logging.INFO,
+            'levelname': 'INFO',
+            'name': 'log_handler_test',
+            'created': 1.5,
+            'job_id': '4711'
+        }))
+
+        self.shipper.put.assert_called_once_with(
+            'logger',
+            'mash.logger',
+            '{"created": 1.5, "job_id": "4711", "levelno": 20, '
+            '"msg": "Job finished!", "name": "log_handler_test"}'
         )
-        self.channel.basic.publish.reset_mock()
+        self.shipper.put.reset_mock()
 
         try:
             raise Exception('Broken')
         except Exception:
-            log.exception('Test exc_info')
+            self.log.exception('Test exc_info')
+
+        assert self.shipper.put.call_count == 1
+
+    def test_rabbit_handler_level(self):
+        self.log.debug('Not shipped')
+        assert not self.shipper.put.called
+
+    def test_rabbit_handler_error(self):
+        self.shipper.put.side_effect = Exception('Broken')
+
+        with patch.object(self.handler, 'handleError') as mock_handle_error:
+            self.log.info('Job finished!')
+            assert mock_handle_error.call_count == 1
+
+    def test_rabbit_handler_flush(self):
+        self.shipper.dropped = 2
+        self.handler.flush()
+        self.shipper.flush.assert_called_once_with()
+        assert self.handler.dropped == 2
+
+
+class TestLogShipper(object):
+    def setup_method(self):
+        self.connection = Mock()
+        self.connection.is_closed = False
+        self.channel = Mock()
+        self.channel.is_closed = False
+        self.connection.channel.return_value = self.channel
 
-        assert self.channel.basic.publish.call_count == 1
+        self.shipper = LogShipper(
+            'host', 1234, 'user', 'pass', buffer_size=3, batch_size=2
+        )
 
+    @patch.object(LogShipper, '_run')
     @patch('mash.log.handler.Connection')
-    def test_rabbit_socket(self, mock_connection):
+    def test_shipper_flush(self, mock_connection, mock_run):
         mock_connection.return_value = self.connection
-        self.connection.close.return_value = None
 
-        socket = RabbitMQSocket(
-            'host',
-            1234,
-            'user',
-            'pass',
-            'exchange',
-            'mash.logger'
-        )
+        self.shipper.put('logger', 'mash.logger', '{"msg": "1"}')
+        self.shipper.put('logger', 'mash.logger', '{"msg": "2"}')
+        self.shipper.put('other', 'key', '{"msg": "3"}')
+
+        assert self.shipper.flush()
 
         mock_connection.assert_called_once_with(
             'host',
@@ -66,27 +95,53 @@ class TestRabbitMQHandler(object):
             port=1234,
             kwargs={'heartbeat': 600}
         )
-
-        self.connection.channel.assert_called_once_with()
-        self.channel.exchange.declare.assert_called_once_with(
-            exchange='exchange',
+        self.channel.exchange.declare.assert_any_call(
+            exchange='logger',
             exchange_type='direct',
             durable=True
         )
-
-        msg = '{"levelname": "INFO"}'
-        socket.sendall(msg)
-
-        self.channel.basic.publish.assert_called_once_with(
-            exchange='exchange',
+        assert self.channel.exchange.declare.call_count == 2
+        self.channel.basic.publish.assert_any_call(
+            body='[{"msg": "1"}, {"msg": "2"}]',
             routing_key='mash.logger',
-            body=msg,
+            exchange='logger',
+            properties={
+                'content_type': 'application/json',
+                'delivery_mode': 2
+            }
+        )
+        self.channel.basic.publish.assert_called_with(
+            body='[{"msg": "3"}]',
+            routing_key='key',
+            exchange='other',
             properties={
                 'content_type': 'application/json',
                 'delivery_mode': 2
             }
         )
+        assert mock_run.call_count == 1
 
-        socket.close()
+    @patch.object(LogShipper, '_run')
+    @patch('mash.log.handler.Connection')
+    def test_shipper_flush_failed(self, mock_connection, mock_run):
+        mock_connection.return_value = self.connection
+        self.channel.basic.publish.side_effect = Exception('Broken')
+
+        for index in range(4):
+            self.shipper.put('logger', 'mash.logger', str(index))
+
+        assert self.shipper.dropped == 1
+        assert not self.shipper.flush()
+        assert list(self.shipper._buffer) == [
+            ('logger', 'mash.logger', str(index)) for index in range(1, 4)
+        ]
         self.connection.close.assert_called_once_with()
-        self.channel.close.assert_called_once_with()
+
+        self.channel.basic.publish.side_effect = None
+        assert self.shipper.flush()
+        assert not self.shipper._buffer
+
+    def test_get_log_shipper(self):
+        shipper = get_log_shipper('host', 5672, 'user', 'pass')
+        assert get_log_shipper('host', 5672, 'user', 'pass') is shipper
+        assert get_log_shipper('other', 5672, 'user', 'pass') is not shipper
@@ -42,6 +42,45 @@ def test_api_delete_job(
     assert response.data == b'{"msg":"Broken"}\n'
 
 
+@patch('mash.services.api.v1.routes.jobs.get_job_log')
+@patch('mash.services.api.v1.routes.jobs.get_jwt_identity')
+@patch('flask_jwt_extended.view_decorators.verify_jwt_in_request')
+def test_api_get_job_log(
+        mock_jwt_required,
+        mock_jwt_identity,
+        mock_get_job_log,
+        test_client
+):
+    mock_get_job_log.return_value = {'log': 'test 1\n', 'position': 4}
+    mock_jwt_identity.return_value = 'user1'
+
+    result = test_client.get(
+        '/v1/jobs/12345678-1234-1234-1234-123456789012/log'
+        '?start=10.5&service=DownloadService&level=20&position=3'
+    )
+
+    assert result.status_code == 200
+    assert result.json == {'log': 'test 1\n', 'position': 4}
+    mock_get_job_log.assert_called_once_with(
+        '12345678-1234-1234-1234-123456789012',
+        'user1',
+        start=10.5,
+        end=None,
+        service='DownloadService',
+        level=20,
+        position=3
+    )
+
+    # Not found
+    mock_get_job_log.return_value = None
+
+    result = test_client.get(
+        '/v1/jobs/12345678-1234-1234-1234-123456789012/log'
+    )
+    assert result.status_code == 404
+    assert result.data == b'{"msg":"Job not found"}\n'
+
+
 @patch('mash.services.api.v1.utils.jobs.handle_request')
 @patch('mash.services.api.v1.routes.jobs.get_jwt_identity')
 @patch('flask_jwt_extended.view_decorators.verify_jwt_in_request')
@@ -1,31 +1,141 @@
 from unittest.mock import Mock, patch
 
-from mash.services.api.v1.utils.amqp import connect, publish
+from amqpstorm import AMQPChannelError
+from pytest import raises
+
+from mash.mash_exceptions import MashRabbitConnectionException
+from mash.services.api.v1.utils import amqp
+from mash.services.api.v1.utils.amqp import (
+    ChannelPool,
+    get_pool,
+    get_publisher,
+    publish
+)
 
 from werkzeug.local import LocalProxy
 
 
+class TestChannelPool(object):
+    def setup_method(self):
+        self.connection = Mock()
+        self.channel = Mock()
+        self.connection.channel.return_value = self.channel
+        self.pool = ChannelPool('localhost', 'guest', 'guest', size=1)
+
+    @patch('mash.services.api.v1.utils.amqp.Connection')
+    def test_checkout_checkin(self, mock_connection):
+        mock_connection.return_value = self.connection
+
+        connection, channel = self.pool.checkout()
+        assert channel == self.channel
+        channel.confirm_deliveries.assert_called_once_with()
+        mock_connection.assert_called_once_with(
+            'localhost', 'guest', 'guest', kwargs={'heartbeat': 600}
+        )
+
+        self.pool.checkin(connection, channel)
+
+        # Idle healthy channel is reused
+        assert self.pool.checkout() == (self.connection, self.channel)
+        assert mock_connection.call_count == 1
+
+    @patch('mash.services.api.v1.utils.amqp.Connection')
+    def test_checkout_unhealthy(self, mock_connection):
+        closed_connection = Mock()
+        closed_connection.is_open = False
+        closed_channel = Mock()
+        mock_connection.return_value = self.connection
+
+        self.pool._idle.put((closed_connection, closed_channel))
+
+        assert self.pool.checkout() == (self.connection, self.channel)
+        closed_channel.close.assert_called_once_with()
+
+    def test_checkout_timeout(self):
+        self.pool.timeout = 0
+        self.pool._slots.acquire()
+
+        with raises(MashRabbitConnectionException):
+            self.pool.checkout()
+
+    @patch('mash.services.api.v1.utils.amqp.Connection')
+    def test_checkout_connection_failed(self, mock_connection):
+        mock_connection.side_effect = AMQPChannelError('Broken!')
+
+        with raises(AMQPChannelError):
+            self.pool.checkout()
+
+        # Slot was released
+        assert self.pool._slots.acquire(timeout=0)
+
+    @patch('mash.services.api.v1.utils.amqp.Connection')
+    def test_channel_discarded_on_error(self, mock_connection):
+        mock_connection.return_value = self.connection
+
+        with raises(AMQPChannelError):
+            with self.pool.channel():
+                raise AMQPChannelError('Broken!')
+
+        self.channel.close.assert_called_once_with()
+        self.connection.close.assert_called_once_with()
+        assert self.pool._idle.empty()
+
+    @patch('mash.services.api.v1.utils.amqp.Connection')
+    def test_channel_returned_on_error(self, mock_connection):
+        mock_connection.return_value = self.connection
+
+        with raises(ValueError):
+            with self.pool.channel():
+                raise ValueError('Bad message!')
+
+        assert self.pool._idle.qsize() == 1
+
+    def test_close(self):
+        self.pool._idle.put((self.connection, self.channel))
+        self.pool.close()
+
+        self.channel.close.assert_called_once_with()
+        self.connection.close.assert_called_once_with()
+
+
 @patch.object(LocalProxy, '_get_current_object')
-@patch('mash.services.api.v1.utils.amqp.Connection')
-def test_connect(mock_connection, mock_get_current_object):
-    connection = Mock()
-    channel = Mock()
-    connection.channel.return_value = channel
-    mock_connection.return_value = connection
+def test_get_pool(mock_get_current_object):
+    app = Mock()
+    app.config = {
+        'AMQP_HOST': 'localhost',
+        'AMQP_USER': 'guest',
+        'AMQP_PASS': 'guest',
+        'AMQP_POOL_SIZE': 2
+    }
+    mock_get_current_object.return_value = app
 
-    connect()
-    channel.confirm_deliveries.assert_called_once_with()
+    with patch.object(amqp, 'pool', None):
+        pool = get_pool()
+        assert pool.host == 'localhost'
+        assert get_pool() is pool
 
+        with patch.object(amqp, 'publisher', None):
+            publisher = get_publisher()
+            assert publisher.connect == pool.connect
+            assert get_publisher() is publisher
 
-@patch('mash.services.api.v1.utils.amqp.connect')
+
+@patch('mash.services.api.v1.utils.amqp.get_pool')
 @patch.object(LocalProxy, '_get_current_object')
-@patch('mash.services.api.v1.utils.amqp.channel')
-def test_publish(mock_channel, mock_get_current_object, mock_connect):
-    mock_channel.closed = True
+def test_publish(mock_get_current_object, mock_get_pool):
+    app = Mock()
+    app.config = {'AMQP_BATCH_CONFIRMS': False}
+    mock_get_current_object.return_value = app
+
+    channel = Mock()
+    pool = Mock()
+    pool.channel.return_value.__enter__ = Mock(return_value=channel)
+    pool.channel.return_value.__exit__ = Mock(return_value=False)
+    mock_get_pool.return_value = pool
+
     publish('test', 'doc', 'msg')
 
-    mock_connect.assert_called_once_with()
-    mock_channel.basic.publish.assert_called_once_with(
+    channel.basic.publish.assert_called_once_with(
         body='msg',
         routing_key='doc',
         exchange='test',
@@ -35,3 +145,28 @@ def test_publish(mock_channel, mock_get_current_object, mock_connect):
         },
         mandatory=True
     )
+
+
+@patch('mash.services.api.v1.utils.amqp.get_publisher')
+@patch.object(LocalProxy, '_get_current_object')
+def test_publish_batch_confirms(mock_get_current_object, mock_get_publisher):
+    app = Mock()
+    app.config = {'AMQP_BATCH_CONFIRMS': True}
+    mock_get_current_object.return_value = app
+
+    publisher = Mock()
+    mock_get_publisher.return_value = publisher
+
+    publish('test', 'doc', 'msg')
+
+    publisher.publish.assert_called_once_with(
+        'test',
+        'doc',
+        'msg',
+        properties={
+            'content_type': 'application/json',
+            'delivery_mode': 2
+        },
+        mandatory=True
+    )
+    publisher.publish.return_value.result.assert_called_once_with()
@@ -6,6 +6,7 @@ from unittest.mock import Mock, patch
 from mash.services.api.v1.utils.jobs import (
     create_job,
     delete_job,
+    get_job_log,
     validate_last_service,
     validate_create_args,
     validate_deprecate_args,
@@ -130,6 +131,46 @@ def test_delete_jobs(mock_handle_request, mock_publish, mock_get_current_obj):
         delete_job('12345678-1234-1234-1234-123456789012', '1')
 
 
+@patch.object(LocalProxy, '_get_current_object')
+@patch('mash.services.api.v1.utils.jobs.JobLogReader')
+@patch('mash.services.api.v1.utils.jobs.get_job')
+def test_get_job_log(
+    mock_get_job, mock_job_log_reader, mock_get_current_obj
+):
+    reader = Mock()
+    reader.entries.return_value = [
+        (3, 10.0, 'DownloadService', 20, 'test 1\n'),
+        (4, 12.0, 'DownloadService', 20, 'test 2\n')
+    ]
+    mock_job_log_reader.return_value = reader
+
+    app = Mock()
+    app.config = {'JOB_LOG_DIRECTORY': '/var/log/mash/jobs'}
+    mock_get_current_obj.return_value = app
+
+    assert get_job_log(
+        '12345678-1234-1234-1234-123456789012', '1',
+        start=10.0, service='DownloadService', position=3
+    ) == {'log': 'test 1\ntest 2\n', 'position': 5}
+    mock_job_log_reader.assert_called_once_with(
+        '/var/log/mash/jobs/12345678-1234-1234-1234-123456789012.log'
+    )
+    reader.entries.assert_called_once_with(
+        10.0, None, 'DownloadService', None, 3
+    )
+    reader.close.assert_called_once_with()
+
+    # No new lines
+    reader.entries.return_value = []
+    assert get_job_log(
+        '12345678-1234-1234-1234-123456789012', '1', position=5
+    ) == {'log': '', 'position': 5}
+
+    # Job not found
+    mock_get_job.return_value = None
+    assert get_job_log('12345678-1234-1234-1234-123456789012', '1') is None
+
+
 @patch.object(LocalProxy, '_get_current_object')
 def test_validate_last_service(mock_get_current_obj):
     app = Mock()
@@ -0,0 +1,107 @@
+from unittest.mock import call, Mock
+
+from mash.services.admission_controller import AdmissionController
+
+
+def get_job(job_id, cloud='ec2', accounts=None, regions=None):
+    job = Mock()
+    job.id = job_id
+    job.cloud = cloud
+    job.get_accounts_and_regions.return_value = (
+        set(accounts or []), set(regions or [])
+    )
+    return job
+
+
+class TestAdmissionController(object):
+    def setup_method(self):
+        self.admit = Mock()
+        self.controller = AdmissionController(
+            {
+                'ec2': {'cloud': 3, 'account': 1, 'region': 2},
+                'azure': {'cloud': 1}
+            },
+            self.admit
+        )
+
+    def test_submit_no_limits(self):
+        controller = AdmissionController(None, self.admit)
+
+        for index in range(5):
+            assert controller.submit(get_job(str(index), cloud='gce'))
+
+        assert self.admit.call_count == 5
+
+    def test_submit_account_limit(self):
+        assert self.controller.submit(get_job('1', accounts=['acnt1']))
+        assert not self.controller.submit(get_job('2', accounts=['acnt1']))
+
+        # Other accounts are not blocked by the waiting job
+        assert self.controller.submit(get_job('3', accounts=['acnt2']))
+
+        assert '2' in self.controller
+        assert '4' not in self.controller
+        self.admit.assert_has_calls([call('1'), call('3')])
+
+        self.controller.release('1')
+        self.admit.assert_called_with('2')
+
+    def test_submit_park(self):
+        park = Mock()
+        controller = AdmissionController(
+            {'azure': {'cloud': 1}}, self.admit, park
+        )
+        job1 = get_job('1', cloud='azure')
+        job2 = get_job('2', cloud='azure')
+
+        assert controller.submit(job1)
+        assert not controller.submit(job2)
+
+        # Only waiting jobs are parked
+        park.assert_called_once_with(job2)
+
+    def test_submit_multiple_accounts(self):
+        assert self.controller.submit(
+            get_job('1', accounts=['acnt1', 'acnt2'])
+        )
+        assert not self.controller.submit(get_job('2', accounts=['acnt2']))
+
+    def test_submit_region_limit(self):
+        assert self.controller.submit(
+            get_job('1', accounts=['acnt1'], regions=['us-east-1'])
+        )
+        assert self.controller.submit(
+            get_job('2', accounts=['acnt2'], regions=['us-east-1'])
+        )
+        assert not self.controller.submit(
+            get_job('3', accounts=['acnt3'], regions=['us-east-1'])
+        )
+
+    def test_release_round_robin(self):
+        assert self.controller.submit(get_job('e1', accounts=['acnt1']))
+        assert self.controller.submit(get_job('a1', cloud='azure'))
+
+        for job_id in ('e2', 'e3'):
+            self.controller.submit(get_job(job_id, accounts=['acnt1']))
+
+        self.controller.submit(get_job('a2', cloud='azure'))
+        self.admit.reset_mock()
+
+        self.controller.release('e1')
+        self.controller.release('a1')
+
+        assert self.admit.mock_calls == [call('e2'), call('a2')]
+
+    def test_release_waiting_job(self):
+        self.controller.submit(get_job('1', accounts=['acnt1']))
+        self.controller.submit(get_job('2', accounts=['acnt1']))
+        assert self.controller.get_running_count() == 1
+        assert self.controller.get_waiting_count() == 1
+
+        self.controller.release('2')
+        assert '2' not in self.controller
+        assert self.controller.get_waiting_count() == 0
+
+        self.admit.reset_mock()
+        self.controller.release('1')
+        assert not self.admit.called
@@ -72,6 +72,21 @@ class TestBaseConfig(object):
         password = self.empty_config.get_amqp_pass()
         assert password == 'guest'
 
+    def test_get_amqp_pool_size(self):
+        assert self.config.get_amqp_pool_size() == 8
+        assert self.empty_config.get_amqp_pool_size() == 4
+
+    def test_get_amqp_batch_confirms(self):
+        assert self.empty_config.get_amqp_batch_confirms() is False
+
+    def test_get_message_format(self):
+        assert self.config.get_message_format() == 'msgpack'
+        assert self.empty_config.get_message_format() == 'json'
+
+    def test_get_message_compression(self):
+        assert self.config.get_message_compression() == 'gzip'
+        assert self.empty_config.get_message_compression() is None
+
     def test_get_smtp_host(self):
         host = self.empty_config.get_smtp_host()
         assert host == 'localhost'
@@ -105,6 +120,14 @@ class TestBaseConfig(object):
         subject = self.empty_config.get_notification_subject()
         assert subject == '[MASH] Job Status Update'
 
+    def test_get_notification_queue_size(self):
+        assert self.config.get_notification_queue_size() == 500
+        assert self.empty_config.get_notification_queue_size() == 1000
+
+    def test_get_notification_digest_window(self):
+        assert self.config.get_notification_digest_window() == 300
+        assert self.empty_config.get_notification_digest_window() == 0
+
     def test_get_job_dir(self):
         assert self.config.get_job_directory('test') == \
             '/tmp/jobs/test_jobs/'
@@ -115,6 +138,11 @@ class TestBaseConfig(object):
         assert self.config.get_log_directory() == '/tmp/log/'
         assert self.empty_config.get_log_directory() == '/var/log/mash/'
 
+    def test_get_job_log_directory(self):
+        assert self.config.get_job_log_directory() == '/tmp/log/jobs'
+        assert self.empty_config.get_job_log_directory() == \
+            '/var/log/mash/jobs'
+
     @patch.object(BaseConfig, 'get_log_directory')
     def test_get_job_log_file(self, mock_get_log_dir):
         mock_get_log_dir.return_value = '/var/log/mash/'
@@ -137,6 +165,28 @@ class TestBaseConfig(object):
         assert self.config.get_download_directory() == '/images'
         assert self.empty_config.get_download_directory() == '/var/lib/mash/images/'
 
+    def test_get_image_cache_directory(self):
+        assert self.config.get_image_cache_directory() == '/images/.cache'
+        assert self.empty_config.get_image_cache_directory() is None
+
+    def test_get_bandwidth(self):
+        assert self.config.get_bandwidth_limit() == 104857600
+        assert self.empty_config.get_bandwidth_limit() is None
+        assert self.config.get_bandwidth_directory() == \
+            '/var/lib/mash/bandwidth'
+        assert self.empty_config.get_bandwidth_directory() == \
+            '/var/lib/mash/bandwidth/'
+        assert self.config.get_bandwidth_cloud_weights() == {
+            'ec2': 2, 'obs': 1
+        }
+        assert self.empty_config.get_bandwidth_cloud_weights() == {}
+        assert self.config.get_bandwidth_priority_weights() == {
+            'high': 8, 'normal': 2, 'low': 1
+        }
+        assert self.empty_config.get_bandwidth_priority_weights() == {
+            'high': 4, 'normal': 2, 'low': 1
+        }
+
     def test_get_max_oci_attempts(self):
         assert self.config.get_max_oci_attempts() == 500
         assert self.empty_config.get_max_oci_attempts() == 100
@@ -145,6 +195,18 @@ class TestBaseConfig(object):
         assert self.config.get_max_oci_wait_seconds() == 1000
         assert self.empty_config.get_max_oci_wait_seconds() == 2400
 
+    def test_get_max_ec2_attempts(self):
+        assert self.config.get_max_ec2_attempts() == 5
+        assert self.empty_config.get_max_ec2_attempts() == 10
+
+    def test_get_ec2_api_rate(self):
+        assert self.config.get_ec2_api_rate() == 10
+        assert self.empty_config.get_ec2_api_rate() == 20
+
+    def test_get_ec2_api_burst(self):
+        assert self.config.get_ec2_api_burst() == 20
+        assert self.empty_config.get_ec2_api_burst() == 40
+
     def test_get_oci_upload_process_count(self):
         assert self.config.get_oci_upload_process_count() == 2
         assert self.empty_config.get_oci_upload_process_count() == 3
@@ -157,6 +219,100 @@ class TestBaseConfig(object):
         assert self.config.get_publish_thread_pool_count() == 60
         assert self.empty_config.get_publish_thread_pool_count() == 50
 
+    def test_get_service_prefetch_count(self):
+        assert self.config.get_service_prefetch_count() == 5
+        assert self.empty_config.get_service_prefetch_count() == 10
+
+    def test_get_listener_prefetch_count(self):
+        assert self.config.get_listener_prefetch_count() == 15
+        assert self.empty_config.get_listener_prefetch_count() is None
+
+    def test_get_publisher_batch_size(self):
+        assert self.config.get_publisher_batch_size() == 50
+        assert self.empty_config.get_publisher_batch_size() == 100
+
+    def test_get_retry_policy(self):
+        assert self.config.get_retry_policy('replicate') == {
+            'max_attempts': 3,
+            'backoff': 10,
+            'retryable_exceptions': ['ClientError']
+        }
+        assert self.config.get_retry_policy('test') == {}
+        assert self.empty_config.get_retry_policy('replicate') == {}
+
+    def test_get_listener_engine(self):
+        assert self.config.get_listener_engine('replicate') == 'asyncio'
+        assert self.config.get_listener_engine('test') == 'thread'
+        assert self.empty_config.get_listener_engine('replicate') == 'thread'
+
+    def test_get_job_concurrency_limits(self):
+        assert self.config.get_job_concurrency_limits() == {
+            'ec2': {'cloud': 10, 'account': 3, 'region': 5}
+        }
+        assert self.empty_config.get_job_concurrency_limits() == {}
+
+    def test_get_job_store(self):
+        assert self.config.get_job_store() == 'sqlite'
+        assert self.empty_config.get_job_store() == 'file'
+
+    def test_get_database_busy_timeout(self):
+        assert self.config.get_database_busy_timeout() == 10
+        assert self.empty_config.get_database_busy_timeout() == 30
+
+    def test_get_status_batch_size(self):
+        assert self.config.get_status_batch_size() == 50
+        assert self.empty_config.get_status_batch_size() == 100
+
+    def test_get_status_flush_interval(self):
+        assert self.config.get_status_flush_interval() == 5
+        assert self.empty_config.get_status_flush_interval() == 1
+
+    def test_get_metrics_host(self):
+        assert self.config.get_metrics_host() == '127.0.0.1'
+        assert self.empty_config.get_metrics_host() == '0.0.0.0'
+
+    def test_get_metrics_port(self):
+        assert self.config.get_metrics_port('replicate') == 9105
+        assert self.config.get_metrics_port('test') is None
+        assert self.empty_config.get_metrics_port('replicate') is None
+
+    def test_get_job_log_settings(self):
+        assert self.config.get_job_log_cache_size() == 64
+        assert self.empty_config.get_job_log_cache_size() == 128
+        assert self.config.get_job_log_buffer_size() == 200
+        assert self.empty_config.get_job_log_buffer_size() == 500
+        assert self.config.get_job_log_flush_interval() == 2
+        assert self.empty_config.get_job_log_flush_interval() == 1
+        assert self.config.get_job_log_fsync_interval() == 10
+        assert self.empty_config.get_job_log_fsync_interval() == 0
+        assert self.config.get_job_log_compress_after() == 3600
+        assert self.empty_config.get_job_log_compress_after() == 0
+
+    def test_get_trace_exporter(self):
+        assert self.config.get_trace_exporter() == 'none'
+        assert self.empty_config.get_trace_exporter() == 'file'
+
+    def test_get_trace_file(self):
+        assert self.config.get_trace_file('test') == '/tmp/log/test_spans.log'
+
+    def test_get_log_buffer_size(self):
+        assert self.config.get_log_buffer_size() == 5000
+        assert self.empty_config.get_log_buffer_size() == 10000
+
+    def test_get_log_ship_level(self):
+        assert self.config.get_log_ship_level('replicate') == 'INFO'
+        assert self.config.get_log_ship_level('test') == 'DEBUG'
+        assert self.empty_config.get_log_ship_level('replicate') == 'DEBUG'
+
+    def test_get_shard_count(self):
+        assert self.config.get_shard_count('test') == 4
+        assert self.config.get_shard_count('create') == 1
+        assert self.empty_config.get_shard_count('test') == 1
+
+    def test_get_shard_id(self):
+        assert self.config.get_shard_id() == 1
+        assert self.empty_config.get_shard_id() == 0
+
     @patch.object(BaseConfig, 'get_auth_methods', lambda x: ['oauth2'])
     def test_get_oauth2_client_id(self):
         with raises(MashConfigException):
@@ -0,0 +1,107 @@
+import json
+import os
+
+from pytest import raises
+
+from mash.mash_exceptions import MashJobStoreException
+from mash.services.job_store import (
+    FileJobStore,
+    SQLiteJobStore,
+    get_job_store
+)
+
+
+class TestFileJobStore(object):
+    def test_store(self, tmp_path):
+        store = FileJobStore(str(tmp_path))
+
+        job_config = {'id': '1', 'cloud': 'ec2'}
+        store.add(job_config)
+
+        job_file = os.path.join(str(tmp_path), 'job-1.json')
+        assert job_config['job_file'] == job_file
+        assert store.get('1') == job_config
+
+        job_config['retry_count'] = 1
+        store.update('1', job_config)
+        assert store.get('1')['retry_count'] == 1
+
+        # Sharded replica directories and temp files are skipped
+        os.makedirs(os.path.join(str(tmp_path), 'node1'))
+        open(job_file + '.tmp', 'w').close()
+        assert list(store.iter_jobs()) == [job_config]
+
+        store.delete('1')
+        store.delete('1')
+        assert not os.path.exists(job_file)
+        store.close()
+
+
+class TestSQLiteJobStore(object):
+    def setup_method(self):
+        self.store = None
+
+    def teardown_method(self):
+        if self.store:
+            self.store.close()
+
+    def test_store(self, tmp_path):
+        self.store = SQLiteJobStore(str(tmp_path))
+
+        for job_id in ('2', '1'):
+            job_config = {'id': job_id, 'cloud': 'ec2'}
+            self.store.add(job_config)
+            assert job_config['job_file'] == self.store.path
+
+        assert self.store.get('1') == job_config
+        assert [job['id'] for job in self.store.iter_jobs()] == ['2', '1']
+
+        job_config['retry_count'] = 1
+        self.store.update('1', job_config)
+        assert self.store.get('1')['retry_count'] == 1
+
+        self.store.delete('2')
+        assert [job['id'] for job in self.store.iter_jobs()] == ['1']
+
+        with raises(MashJobStoreException):
+            self.store.get('2')
+
+        # Jobs are durable across reopening the store
+        self.store.close()
+        self.store = SQLiteJobStore(str(tmp_path))
+        assert list(self.store.iter_jobs()) == [job_config]
+
+        journal_mode = self.store._connection.execute(
+            'PRAGMA journal_mode'
+        ).fetchone()[0]
+        assert journal_mode == 'wal'
+
+    def test_import_job_files(self, tmp_path):
+        job_file = os.path.join(str(tmp_path), 'job-1.json')
+        with open(job_file, 'w') as json_file:
+            json.dump({'id': '1', 'job_file': job_file}, json_file)
+
+        self.store = SQLiteJobStore(str(tmp_path))
+
+        assert self.store.get('1') == {'id': '1', 'job_file': self.store.path}
+        assert not os.path.exists(job_file)
+
+    def test_write_failed(self, tmp_path):
+        self.store = SQLiteJobStore(str(tmp_path))
+
+        with raises(MashJobStoreException):
+            self.store._write('INSERT INTO missing VALUES (?)', ('1',))
+
+        self.store.add({'id': '1'})
+        assert self.store.get('1')['id'] == '1'
+
+
+def test_get_job_store(tmp_path):
+    assert isinstance(get_job_store('file', str(tmp_path)), FileJobStore)
+
+    store = get_job_store('sqlite', str(tmp_path))
+    assert isinstance(store, SQLiteJobStore)
+    store.close()
+
+    with raises(MashJobStoreException):
+        get_job_store('nosql', str(tmp_path))
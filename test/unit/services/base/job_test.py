@@ -1,5 +1,7 @@
+import asyncio
+
 from pytest import raises
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 from mash.services.mash_job import MashJob
 from mash.mash_exceptions import MashJobException
@@ -102,6 +104,16 @@ class TestMashJob(object):
         job.process_job()
         mock_run_job.assert_called_once_with()
 
+    @patch.object(
+        MashJob, 'run_job_async', new_callable=AsyncMock, create=True
+    )
+    def test_process_job_async(self, mock_run_job_async):
+        job = MashJob(self.job_config, self.config)
+        job._log_callback = Mock()
+        asyncio.run(job.process_job_async())
+        mock_run_job_async.assert_awaited_once_with()
+        assert job.log_callback.extra == {'job_id': '1'}
+
     def test_get_set_status(self):
         job = MashJob(self.job_config, self.config)
         assert job.status is None
@@ -116,3 +128,29 @@ class TestMashJob(object):
 
         assert status_msg['id'] == '1'
         assert status_msg['status'] == 'success'
+
+    def test_get_accounts_and_regions(self):
+        self.job_config['account'] = 'acnt1'
+        self.job_config['region'] = 'us-east-1'
+        job = MashJob(self.job_config, self.config)
+        assert job.get_accounts_and_regions() == (
+            {'acnt1'}, {'us-east-1'}
+        )
+
+        del self.job_config['account']
+        del self.job_config['region']
+        self.job_config['test_regions'] = {
+            'us-east-1': {'account': 'acnt1', 'subnet': 'subnet-1'}
+        }
+        self.job_config['deprecate_regions'] = {'acnt2': 'us-east-2'}
+        self.job_config['publish_regions'] = [{
+            'account': 'acnt3',
+            'target_regions': ['eu-west-1', 'eu-west-2']
+        }]
+        self.job_config['test_fallback_regions'] = ['us-west-1']
+        job = MashJob(self.job_config, self.config)
+
+        assert job.get_accounts_and_regions() == (
+            {'acnt1', 'acnt2', 'acnt3'},
+            {'us-east-1', 'us-east-2', 'eu-west-1', 'eu-west-2'}
+        )
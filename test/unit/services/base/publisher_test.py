@@ -0,0 +1,152 @@
+from concurrent.futures import Future
+from unittest.mock import call, Mock
+
+from amqpstorm import AMQPChannelError, AMQPMessageError
+from pytest import raises
+
+from mash.services.publisher import MashPublisher
+
+
+class TestMashPublisher(object):
+    def setup_method(self):
+        self.channel = Mock()
+        self.channel.is_closed = False
+        self.connection = Mock()
+        self.connection.channel.return_value = self.channel
+
+        self.publisher = MashPublisher(self.connection, batch_size=2)
+
+    def get_request(
+        self, exchange='upload', routing_key='listener_msg', message_id='1'
+    ):
+        return {
+            'exchange': exchange,
+            'routing_key': routing_key,
+            'body': 'message',
+            'properties': {'delivery_mode': 2, 'message_id': message_id},
+            'message_id': message_id,
+            'mandatory': True,
+            'future': Future()
+        }
+
+    def test_get_batch(self):
+        requests = [self.get_request() for index in range(3)]
+        for request in requests:
+            self.publisher._queue.put(request)
+        self.publisher._queue.put(None)
+
+        assert self.publisher._get_batch() == requests[:2]
+        assert self.publisher._get_batch() == requests[2:]
+        assert self.publisher._get_batch() is None
+
+    def test_publish_batch(self):
+        requests = [self.get_request(), self.get_request('create')]
+
+        self.publisher._publish_batch(requests)
+
+        self.channel.confirm_deliveries.assert_called_once_with()
+        self.channel.basic.publish.assert_has_calls([
+            call(
+                body='message',
+                routing_key='listener_msg',
+                exchange='upload',
+                properties={'delivery_mode': 2, 'message_id': '1'},
+                mandatory=True
+            ),
+            call(
+                body='message',
+                routing_key='listener_msg',
+                exchange='create',
+                properties={'delivery_mode': 2, 'message_id': '1'},
+                mandatory=True
+            )
+        ])
+
+        for request in requests:
+            assert request['future'].result() is True
+
+    def test_publish_batch_returned(self):
+        requests = [
+            self.get_request('create', message_id='1'),
+            self.get_request('create', message_id='2')
+        ]
+        self.channel.is_open = True
+        self.channel.basic.publish.side_effect = [
+            AMQPMessageError(
+                "Message not delivered: NO_ROUTE (312) to queue "
+                "'listener_msg' from exchange 'create'"
+            ),
+            True
+        ]
+
+        self.publisher._publish_batch(requests)
+
+        # Only the returned message fails and the channel is reopened
+        with raises(AMQPMessageError):
+            requests[0]['future'].result()
+        assert requests[1]['future'].result() is True
+        self.channel.close.assert_called_once_with()
+        assert self.connection.channel.call_count == 2
+
+    def test_publish_batch_nack(self):
+        requests = [self.get_request(), self.get_request('create')]
+        self.channel.basic.publish.side_effect = [False, True]
+
+        self.publisher._publish_batch(requests)
+
+        with raises(AMQPMessageError):
+            requests[0]['future'].result()
+        assert requests[1]['future'].result() is True
+
+    def test_publish_batch_failed(self):
+        requests = [
+            self.get_request(),
+            self.get_request('create'),
+            self.get_request('test')
+        ]
+        self.channel.basic.publish.side_effect = [
+            True, AMQPChannelError('Closed!')
+        ]
+
+        self.publisher._publish_batch(requests)
+
+        assert requests[0]['future'].result() is True
+        for request in requests[1:]:
+            with raises(AMQPChannelError):
+                request['future'].result()
+        assert self.publisher.channel is None
+
+    def test_publish_and_stop(self):
+        self.channel.is_open = True
+
+        futures = [
+            self.publisher.publish('upload', 'listener_msg', 'message'),
+            self.publisher.publish('create', 'listener_msg', 'message')
+        ]
+        self.publisher.stop()
+
+        for future in futures:
+            assert future.result() is True
+        self.channel.close.assert_called_once_with()
+        assert self.publisher._thread is None
+
+        message_ids = {
+            kwargs['properties']['message_id']
+            for args, kwargs in self.channel.basic.publish.call_args_list
+        }
+        assert len(message_ids) == 2
+
+    def test_stop_not_started(self):
+        self.publisher.stop()
+        assert not self.connection.channel.called
+
+    def test_open_channel_reconnect(self):
+        connect = Mock()
+        connect.return_value = self.connection
+        publisher = MashPublisher(connect=connect)
+
+        publisher._open_channel()
+
+        connect.assert_called_once_with()
+        assert publisher.channel == self.channel
+        self.channel.confirm_deliveries.assert_called_once_with()
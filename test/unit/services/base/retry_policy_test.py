@@ -0,0 +1,50 @@
+from unittest.mock import patch
+
+from mash.services.retry_policy import RetryPolicy
+
+
+class TestRetryPolicy(object):
+    def setup_method(self):
+        self.policy = RetryPolicy(
+            max_attempts=5,
+            backoff=10,
+            max_backoff=60,
+            retryable_exceptions=['ClientError']
+        )
+
+    def test_defaults(self):
+        policy = RetryPolicy()
+        assert policy.max_attempts == 0
+        assert policy.backoff == 30
+        assert policy.max_backoff == 900
+        assert policy.retryable_exceptions == {
+            'ConnectionError', 'TimeoutError'
+        }
+
+    @patch('mash.services.retry_policy.random.uniform')
+    def test_get_delay(self, mock_uniform):
+        mock_uniform.side_effect = lambda low, high: high
+
+        assert self.policy.get_delay(1) == 10
+        assert self.policy.get_delay(3) == 40
+        assert self.policy.get_delay(5) == 60
+        mock_uniform.assert_called_with(30, 60)
+
+    def test_is_retryable(self):
+        class ClientError(Exception):
+            pass
+
+        class ThrottlingError(ClientError):
+            pass
+
+        assert self.policy.is_retryable(ThrottlingError('Throttled!'))
+        assert not self.policy.is_retryable(Exception('Image not found!'))
+        assert not self.policy.is_retryable('Image not found!')
+
+        try:
+            try:
+                raise ThrottlingError('Throttled!')
+            except ThrottlingError as error:
+                raise Exception('Replicate failed!') from error
+        except Exception as error:
+            assert self.policy.is_retryable(error)
@@ -3,6 +3,8 @@ from unittest.mock import Mock
 from pytest import raises
 
 from mash.services.mash_service import MashService
+from mash.utils.mash_utils import get_shard
+from mash.utils.message_format import MessageFormat
 
 from mash.mash_exceptions import MashRabbitConnectionException
 
@@ -27,6 +29,12 @@ class TestBaseService(object):
         mock_connection.return_value = self.connection
 
         config = Mock()
+        config.get_message_format.return_value = 'json'
+        config.get_message_compression.return_value = None
+        config.get_metrics_port.return_value = None
+        config.get_log_buffer_size.return_value = 10000
+        config.get_log_ship_level.return_value = 'DEBUG'
+        config.get_trace_exporter.return_value = 'none'
         config.get_service_names.return_value = [
             'download', 'upload', 'create', 'raw_image_upload', 'test',
             'replicate', 'publish', 'deprecate'
@@ -43,6 +51,87 @@ class TestBaseService(object):
     def test_post_init(self):
         self.service.post_init()
 
+    def test_publish(self):
+        self.service.publisher = Mock()
+        future = Mock()
+        future.result.return_value = True
+        self.service.publisher.publish.return_value = future
+
+        assert self.service._publish('upload', 'listener_msg', {'id': '1'})
+        self.service.publisher.publish.assert_called_once_with(
+            'upload',
+            'listener_msg',
+            self.service.message_format.dumps({'id': '1'}),
+            properties=self.msg_properties,
+            mandatory=True
+        )
+
+        observe = future.add_done_callback.call_args[0][0]
+        observe(future)
+        assert 'mash_publish_latency_seconds_count{exchange="upload"} 1.0' \
+            in self.service.metrics.render()
+
+    def test_publish_dict(self):
+        self.service.publisher = Mock()
+        self.service.message_format = MessageFormat('msgpack', 'gzip')
+
+        self.service._publish_async('upload', 'listener_msg', {'id': '1'})
+
+        args, kwargs = self.service.publisher.publish.call_args
+        assert kwargs['properties'] == {
+            'content_type': 'application/msgpack',
+            'content_encoding': 'gzip',
+            'delivery_mode': 2
+        }
+        assert MessageFormat.loads(args[2], kwargs['properties']) == {
+            'id': '1'
+        }
+
+    def test_publish_job_id(self):
+        self.service.publisher = Mock()
+
+        self.service._publish_async(
+            'upload', 'listener_msg', {'id': '1'}, job_id='1'
+        )
+
+        args, kwargs = self.service.publisher.publish.call_args
+        assert kwargs['properties']['headers'] == {'job_id': '1'}
+
+    @patch('mash.services.mash_service.time.time')
+    def test_publish_traceparent(self, mock_time):
+        mock_time.return_value = 10.0
+        self.service.publisher = Mock()
+
+        self.service._publish_async(
+            'upload', 'listener_msg', {'id': '1'}, job_id='1',
+            traceparent='00-trace-span-01'
+        )
+
+        args, kwargs = self.service.publisher.publish.call_args
+        assert kwargs['properties']['headers'] == {
+            'job_id': '1',
+            'traceparent': '00-trace-span-01',
+            'sent_at': 10.0
+        }
+
+    def test_get_trace_context(self):
+        message = Mock()
+        message.properties = {
+            'headers': {'traceparent': b'00-trace-span-01', 'sent_at': 10.0}
+        }
+        assert self.service.get_trace_context(message) == (
+            '00-trace-span-01', 10.0
+        )
+
+        message.properties = {}
+        assert self.service.get_trace_context(message) == (None, None)
+
+    def test_decode_message(self):
+        message = Mock()
+        message.body = '{"id": "1"}'
+        message.properties = {'content_type': 'application/json'}
+        assert self.service.decode_message(message) == {'id': '1'}
+
     def test_consume_queue(self):
         callback = Mock()
         self.service.consume_queue(callback, 'service', 'download')
@@ -50,12 +139,105 @@ class TestBaseService(object):
             callback=callback, queue='download.service'
         )
 
+    def test_consume_queue_on_channel(self):
+        callback = Mock()
+        channel = Mock()
+        self.service.consume_queue(
+            callback, 'listener', 'upload', channel=channel
+        )
+        channel.basic.consume.assert_called_once_with(
+            callback=callback, queue='upload.listener'
+        )
+        self.channel.queue.declare.assert_called_once_with(
+            queue='upload.listener', durable=True
+        )
+        assert not self.channel.basic.consume.called
+
+    def test_open_consumer_channel(self):
+        channel = Mock()
+        self.connection.channel.return_value = channel
+
+        assert self.service.open_consumer_channel(20) == channel
+        channel.basic.qos.assert_called_once_with(prefetch_count=20)
+        assert self.service.consumer_channels == [channel]
+
+        channel.reset_mock()
+        self.service.open_consumer_channel()
+        assert not channel.basic.qos.called
+
+    def test_consume_channels(self):
+        channel1 = Mock()
+        channel1.is_open = True
+        channel1.consumer_tags = ['tag']
+
+        channel2 = Mock()
+        channel2.is_open = True
+        channel2.consumer_tags = ['tag']
+
+        def stop_consuming():
+            channel1.consumer_tags = []
+            channel2.is_open = False
+
+        channel2.process_data_events.side_effect = stop_consuming
+
+        self.service.consume_channels([channel1, channel2])
+
+        channel1.process_data_events.assert_called_once_with()
+        channel2.process_data_events.assert_called_once_with()
+
     def test_close_connection(self):
+        self.service.publisher = Mock()
+        consumer_channel = Mock()
+        consumer_channel.is_open = True
+        self.service.consumer_channels = [consumer_channel]
         self.connection.close.return_value = None
         self.channel.close.return_value = None
         self.service.close_connection()
         self.connection.close.assert_called_once_with()
         self.channel.close.assert_called_once_with()
+        consumer_channel.stop_consuming.assert_called_once_with()
+        consumer_channel.close.assert_called_once_with()
+        self.service.publisher.stop.assert_called_once_with()
+
+    @patch('mash.services.mash_service.start_metrics_server')
+    def test_setup_metrics(self, mock_start_metrics_server):
+        server = Mock()
+        mock_start_metrics_server.return_value = server
+        self.service.config.get_metrics_port.return_value = 9101
+        self.service.config.get_metrics_host.return_value = '127.0.0.1'
+
+        self.service._start_metrics_server()
+
+        mock_start_metrics_server.assert_called_once_with(
+            self.service.metrics, '127.0.0.1', 9101
+        )
+
+        self.service.publisher = Mock()
+        self.service.close_connection()
+        server.shutdown.assert_called_once_with()
+        server.server_close.assert_called_once_with()
+        assert self.service.metrics_server is None
+
+    @patch('mash.services.mash_service.start_metrics_server')
+    @patch('mash.services.mash_service.Connection')
+    def test_metrics_server_connection_failed(
+        self, mock_connection, mock_start_metrics_server
+    ):
+        self.service.config.get_metrics_port.return_value = 9101
+        mock_connection.side_effect = Exception
+
+        with raises(MashRabbitConnectionException):
+            MashService('download', config=self.service.config)
+
+        assert not mock_start_metrics_server.called
+
+    @patch('mash.services.mash_service.Connection')
+    def test_reconnect(self, mock_connection):
+        mock_connection.return_value = self.connection
+
+        assert self.service.publisher.connect() == self.connection
+        assert 'mash_amqp_reconnects_total 1.0' in \
+            self.service.metrics.render()
 
     def test_unbind_queue(self):
         self.service.unbind_queue(
@@ -64,3 +246,26 @@ class TestBaseService(object):
         self.service.channel.queue.unbind.assert_called_once_with(
             queue='test.service', exchange='test', routing_key='1'
         )
+
+    def test_get_shard_routing_key(self):
+        self.service.config.get_shard_count.return_value = 4
+        assert self.service.get_shard_routing_key(
+            'test', 'job_document', '1'
+        ) == 'job_document.{0}'.format(get_shard('1', 4))
+        assert self.service.get_shard_routing_key(
+            'test', 'job_document', None
+        ) == 'job_document'
+
+        self.service.config.get_shard_count.return_value = 1
+        assert self.service.get_shard_routing_key(
+            'test', 'job_document', '1'
+        ) == 'job_document'
+
+    def test_get_next_service(self):
+        assert self.service._get_next_service() == 'upload'
+
+        self.service.service_exchange = 'deprecate'
+        assert self.service._get_next_service() is None
+
+        self.service.service_exchange = 'jobcreator'
+        assert self.service._get_next_service() is None
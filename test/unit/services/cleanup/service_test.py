@@ -78,6 +78,7 @@ class TestCleanupService(object):
         self.cleanup.config = self.config
         self.config.get_download_directory.return_value = '/images'
         self.config.get_max_image_age.return_value = 42
+        self.config.get_image_cache_directory.return_value = None
 
         self.cleanup._purge_images()
 
@@ -85,3 +86,34 @@ class TestCleanupService(object):
 
         mock_isdir.return_value = False
         self.cleanup._purge_images()
+
+    @patch('mash.services.cleanup.service.get_image_cache')
+    @patch('shutil.rmtree')
+    @patch('os.scandir')
+    @patch('os.path.isdir')
+    def test_cleanup_purge_images_cache(
+        self, mock_isdir, mock_scandir, mock_rmtree, mock_get_image_cache
+    ):
+        entry = Mock()
+        entry.is_dir.return_value = True
+        entry.name = '.cache'
+        entry.path = '/images/.cache'
+        mock_isdir.return_value = True
+        mock_scandir.return_value.__enter__.return_value = [entry]
+        image_cache = Mock()
+        image_cache.purge.return_value = ['key']
+        mock_get_image_cache.return_value = image_cache
+
+        self.cleanup.config = self.config
+        self.config.get_download_directory.return_value = '/images'
+        self.config.get_max_image_age.return_value = 42
+        self.config.get_image_cache_directory.return_value = '/images/.cache/'
+
+        self.cleanup._purge_images()
+
+        assert not mock_rmtree.called
+        mock_get_image_cache.assert_called_once_with('/images/.cache/')
+        assert image_cache.purge.call_args[0][0] == '/images'
+        self.cleanup.log.info.assert_called_once_with(
+            'Evicting cached image key'
+        )
@@ -0,0 +1,31 @@
+import os
+import sqlite3
+
+from unittest.mock import patch
+
+from mash.services.database.app import set_sqlite_pragma
+from mash.services.database.flask_config import Config
+
+
+def test_set_sqlite_pragma(tmp_path):
+    connection = sqlite3.connect(os.path.join(str(tmp_path), 'app.db'))
+
+    set_sqlite_pragma(connection, None)
+
+    assert connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert connection.execute('PRAGMA synchronous').fetchone()[0] == 1
+    connection.close()
+
+
+def test_engine_options():
+    config = Config(config_file='test/data/mash_config.yaml', test=True)
+    assert config.SQLALCHEMY_ENGINE_OPTIONS == {
+        'connect_args': {'timeout': 10}
+    }
+
+    with patch.object(
+        config.config,
+        'get_database_uri',
+        return_value='postgresql://localhost/mash'
+    ):
+        assert config.SQLALCHEMY_ENGINE_OPTIONS == {}
@@ -114,6 +114,52 @@ def test_update_job_status(mock_db, mock_get_job, test_client):
     assert response.data == b'{"msg":"Unable to update job status: Broken"}\n'
 
 
+@patch('mash.services.database.routes.jobs.save_job_statuses')
+def test_update_job_statuses(mock_save_job_statuses, test_client):
+    mock_save_job_statuses.return_value = {'2': 'Job does not exist.'}
+    data = [
+        {'id': '1', 'status': 'success', 'prev_service': 'upload'},
+        {'id': '2', 'status': 'success', 'prev_service': 'upload'}
+    ]
+
+    response = test_client.put(
+        '/jobs/bulk',
+        content_type='application/json',
+        data=json.dumps(data, sort_keys=True)
+    )
+
+    assert response.status_code == 200
+    assert response.json == {
+        'msg': 'Job statuses updated',
+        'errors': {'2': 'Job does not exist.'}
+    }
+    mock_save_job_statuses.assert_called_once_with(data)
+
+    # Mash Exception
+    mock_save_job_statuses.side_effect = Exception('Broken')
+
+    response = test_client.put(
+        '/jobs/bulk',
+        content_type='application/json',
+        data=json.dumps(data, sort_keys=True)
+    )
+    assert response.status_code == 500
+    assert response.data == \
+        b'{"msg":"Unable to update job statuses: Broken"}\n'
+
+    # Malformed request body
+    for body in ('{"id": "1"}', '["1"]', 'not json'):
+        response = test_client.put(
+            '/jobs/bulk',
+            content_type='application/json',
+            data=body
+        )
+        assert response.status_code == 400
+        assert response.json == {
+            'msg': 'Job statuses must be a list of job status documents.'
+        }
+
+
 @patch('mash.services.database.utils.jobs.Job')
 def test_get_job(mock_job, test_client):
     job = Mock()
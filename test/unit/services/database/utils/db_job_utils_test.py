@@ -16,10 +16,12 @@
 # along with mash.  If not, see <http://www.gnu.org/licenses/>
 #
 
+from pytest import raises
 from unittest.mock import patch, Mock
 
 from mash.services.database.utils.jobs import (
-    get_job
+    get_job,
+    save_job_statuses
 )
 
 
@@ -33,3 +35,116 @@ def test_get_job(mock_job):
     result = get_job('12345678-1234-1234-1234-123456789012')
 
     assert result == job
+
+
+@patch('mash.services.database.utils.jobs.db')
+@patch('mash.services.database.utils.jobs.Job')
+def test_save_job_statuses(mock_job, mock_db):
+    job = Mock()
+    job.job_id = '1'
+    job.state = 'running'
+    job.last_service = 'publish'
+    mock_job.query.filter.return_value.all.return_value = [job]
+
+    errors = save_job_statuses([
+        {
+            'id': '1',
+            'status': 'failed',
+            'prev_service': 'upload',
+            'current_service': 'create',
+            'errors': ['Upload failed']
+        },
+        {
+            'id': '2',
+            'status': 'success',
+            'prev_service': 'upload',
+            'current_service': 'create'
+        },
+        {
+            'id': '1',
+            'status': 'success',
+            'prev_service': 'create',
+            'current_service': 'test',
+            'image': 'test-image'
+        },
+        {
+            'id': '1',
+            'status': 'success'
+        }
+    ])
+
+    assert errors == {
+        '2': 'Job does not exist.',
+        '1': 'Job status is missing: prev_service, current_service.'
+    }
+    assert job.state == 'failed'
+    assert job.failed_service == 'upload'
+    assert job.prev_service == 'create'
+    assert job.current_service == 'test'
+    assert job.errors == []
+    assert job.data == {'image': 'test-image'}
+    mock_db.session.commit.assert_called_once_with()
+
+    # Commit failed
+    mock_db.session.commit.side_effect = Exception('Broken')
+
+    with raises(Exception):
+        save_job_statuses([
+            {
+                'id': '1',
+                'status': 'success',
+                'prev_service': 'create',
+                'current_service': 'test'
+            }
+        ])
+
+    mock_db.session.rollback.assert_called_once_with()
+
+
+@patch('mash.services.database.utils.jobs.db')
+@patch('mash.services.database.utils.jobs.Job')
+def test_save_job_statuses_job_failed(mock_job, mock_db):
+    jobs = {}
+    for job_id in ('1', '2'):
+        jobs[job_id] = Mock()
+        jobs[job_id].job_id = job_id
+        jobs[job_id].state = 'running'
+        jobs[job_id].last_service = 'publish'
+
+    def query_jobs(job_ids):
+        query = Mock()
+        query.all.return_value = [jobs[job_id] for job_id in job_ids]
+        return query
+
+    def commit():
+        # Job 2 can not be saved
+        if jobs['2'] in mock_db.session.add_all.call_args[0][0]:
+            raise Exception('Invalid job data')
+
+    mock_job.job_id.in_.side_effect = lambda job_ids: job_ids
+    mock_job.query.filter.side_effect = query_jobs
+    mock_db.session.commit.side_effect = commit
+    job_docs = [
+        {
+            'id': job_id,
+            'status': 'success',
+            'prev_service': 'upload',
+            'current_service': 'create'
+        }
+        for job_id in ('1', '2')
+    ]
+
+    errors = save_job_statuses(job_docs)
+
+    assert errors == {'2': 'Unable to update job status: Invalid job data'}
+    assert jobs['1'].current_service == 'create'
+    assert mock_db.session.rollback.call_count == 2
+
+    # No job can be saved
+    mock_db.session.commit.side_effect = Exception('Database unavailable')
+
+    with raises(Exception):
+        save_job_statuses([
+            dict(job_doc, id=job_id)
+            for job_doc, job_id in zip(job_docs, ('1', '2'))
+        ])
@@ -1,5 +1,5 @@
 from pytest import raises
-from unittest.mock import Mock, patch
+from unittest.mock import call, Mock, patch
 
 from mash.mash_exceptions import MashDeprecateException
 from mash.services.deprecate.ec2_mp_job import EC2MPDeprecateJob
@@ -46,14 +46,14 @@ class TestEC2MPDeprecateJob(object):
             EC2MPDeprecateJob(self.job_config, self.config)
 
     @patch('mash.services.deprecate.ec2_mp_job.get_image_delivery_option_id')
-    @patch('mash.services.deprecate.ec2_mp_job.get_session')
+    @patch('mash.services.deprecate.ec2_mp_job.get_client')
     @patch('mash.services.deprecate.ec2_mp_job.start_mp_change_set')
     @patch('mash.services.deprecate.ec2_mp_job.get_image')
     def test_deprecate(
         self,
         mock_get_image,
         mock_start_change_set,
-        mock_get_session,
+        mock_get_client,
         mock_get_delivery_option_id
     ):
         mock_get_image.return_value = {'ImageId': 'ami-123'}
@@ -61,12 +61,15 @@ class TestEC2MPDeprecateJob(object):
         mock_start_change_set.return_value = {'ChangeSetId': '123'}
 
         client = Mock()
-        session = Mock()
-        session.client.return_value = client
-        mock_get_session.return_value = session
+        mock_get_client.return_value = client
 
         self.job.run_job()
 
+        mock_get_client.assert_has_calls([
+            call('marketplace-catalog', '123456', '654321', 'us-east-2'),
+            call('ec2', '123456', '654321', 'us-east-2')
+        ])
+
         mock_start_change_set.assert_called_once_with(
             client,
             change_set=[
@@ -0,0 +1,219 @@
+import threading
+
+from pytest import raises
+from unittest.mock import Mock, patch
+
+from obs_img_utils.exceptions import OBSImageConditionsException
+
+from mash.services.download.build_watcher import (
+    BuildWatcher,
+    check_build_conditions
+)
+
+KEY = ('http://obs/images', 'image', 'x86_64', None)
+BUILD = {
+    'base_file_name': 'image.x86_64-1.2.3-Build1.1',
+    'image_version': '1.2.3',
+    'image_release': '1.1',
+    'packages': {
+        'kernel-default': Mock(
+            version='5.3.18', release='24.1', license='GPL-2.0'
+        )
+    }
+}
+
+
+class TestBuildWatcher(object):
+    def setup_method(self):
+        self.log = Mock()
+        self.watcher = BuildWatcher(poll_interval=60, log=self.log)
+
+    def get_downloader(self, conditions_met=True):
+        downloader = Mock()
+        downloader.base_file_name = 'image.x86_64-1.2.3-Build1.1'
+        downloader.image_version = '1.2.3'
+        downloader.image_release = '1.1'
+        downloader.packages = {
+            'kernel-default': Mock(
+                version='5.3.18', release='24.1', license='GPL-2.0'
+            )
+        }
+        downloader.filter_licenses = []
+        downloader.filter_packages = []
+        downloader.conditions = [
+            {'package_name': 'kernel-default', 'version': '5.3.18'}
+        ]
+
+        if not conditions_met:
+            downloader.conditions.append({'version': '1.3.0'})
+
+        return downloader
+
+    def test_poll(self):
+        poller = self.get_downloader()
+        waiting = self.get_downloader(conditions_met=False)
+        callbacks = [Mock(), Mock()]
+
+        self.watcher.watch(KEY, '1', poller, callbacks[0], 900)
+        self.watcher.watch(KEY, '2', waiting, callbacks[1], 900)
+        assert self.watcher._get_due_keys()[0] == [KEY]
+
+        self.watcher._poll(KEY)
+
+        poller.reset_base_file_name.assert_called_once_with()
+        assert not waiting.reset_base_file_name.called
+        callbacks[0].assert_called_once_with(
+            None, 'image.x86_64-1.2.3-Build1.1'
+        )
+        assert not callbacks[1].called
+        assert waiting.conditions == [
+            {
+                'package_name': 'kernel-default',
+                'version': '5.3.18',
+                'status': True
+            },
+            {'version': '1.3.0', 'status': False}
+        ]
+        assert self.watcher._get_due_keys()[0] == []
+
+        # Jobs joining the group are checked against the polled build
+        joined = self.get_downloader()
+        joined.packages = {}
+        callback = Mock()
+        self.watcher.watch(KEY, '3', joined, callback, 900)
+        assert joined.conditions[0]['status']
+
+        # and released by the watcher thread
+        assert not callback.called
+        self.watcher._release()
+        callback.assert_called_once_with(
+            None, 'image.x86_64-1.2.3-Build1.1'
+        )
+
+    def test_poll_callback_failed(self):
+        callbacks = [Mock(), Mock()]
+        callbacks[0].side_effect = Exception('Broken!')
+
+        self.watcher.watch(KEY, '1', self.get_downloader(), callbacks[0], 900)
+        self.watcher.watch(KEY, '2', self.get_downloader(), callbacks[1], 900)
+
+        self.watcher._poll(KEY)
+
+        # The failed callback does not stop the release of other jobs
+        callbacks[0].assert_called_once_with(
+            None, 'image.x86_64-1.2.3-Build1.1'
+        )
+        callbacks[1].assert_called_once_with(
+            None, 'image.x86_64-1.2.3-Build1.1'
+        )
+        self.log.error.assert_called_once_with(
+            'Build watcher failed: Broken!'
+        )
+        assert self.watcher._watches == {}
+
+    def test_unwatch_released(self):
+        self.watcher._watches[KEY] = {
+            'jobs': {}, 'next_poll': 0, 'build': BUILD
+        }
+        callback = Mock()
+        self.watcher.watch(KEY, '1', self.get_downloader(), callback, 900)
+        self.watcher.unwatch('1')
+
+        self.watcher._release()
+        assert not callback.called
+
+    @patch('mash.services.download.build_watcher.time')
+    def test_poll_timeout(self, mock_time):
+        mock_time.time.return_value = 100
+        downloader = self.get_downloader(conditions_met=False)
+        callback = Mock()
+        self.watcher.watch(KEY, '1', downloader, callback, 900)
+
+        self.watcher._poll(KEY)
+        assert not callback.called
+
+        mock_time.time.return_value = 1000
+        self.watcher._poll(KEY)
+        assert str(callback.call_args[0][0]) == 'Image conditions not met'
+        assert self.watcher._watches == {}
+
+    @patch('mash.services.download.build_watcher.time')
+    def test_poll_failed(self, mock_time):
+        mock_time.time.return_value = 100
+        downloader = self.get_downloader()
+        downloader.reset_base_file_name.side_effect = Exception('Not found')
+        callback = Mock()
+        self.watcher.watch(KEY, '1', downloader, callback, 0)
+
+        self.watcher._poll(KEY)
+
+        assert str(callback.call_args[0][0]) == 'Not found'
+        self.log.warning.assert_called_once_with(
+            'Polling build of image failed: Not found'
+        )
+
+    def test_unwatch(self):
+        callback = Mock()
+        self.watcher.watch(KEY, '1', self.get_downloader(), callback, 900)
+        self.watcher.unwatch('1')
+
+        assert self.watcher._watches == {}
+        self.watcher._poll(KEY)
+        assert not callback.called
+
+    def test_start_stop(self):
+        released = threading.Event()
+        self.watcher.start()
+        self.watcher.watch(
+            KEY, '1', self.get_downloader(),
+            lambda error, base_file_name: released.set(), 900
+        )
+
+        assert released.wait(5)
+        self.watcher.stop()
+        assert not self.watcher._thread.is_alive()
+
+
+def test_check_build_conditions():
+    downloader = Mock()
+    downloader.filter_licenses = []
+    downloader.filter_packages = []
+    downloader.conditions = [
+        {'version': '1.2.3', 'release': '1.1', 'condition': '=='},
+        {'release': '1.2', 'condition': '<'},
+        {'package_name': 'kernel-default', 'version': '5.3.18'},
+        {
+            'package_name': 'kernel-default',
+            'version': '5.3.18',
+            'release': '24.2',
+            'condition': '<='
+        }
+    ]
+
+    check_build_conditions(BUILD, downloader)
+    assert all(condition['status'] for condition in downloader.conditions)
+
+    downloader.conditions.append({'package_name': 'vim'})
+    with raises(OBSImageConditionsException):
+        check_build_conditions(BUILD, downloader)
+    assert downloader.conditions[-1]['status'] is False
+
+    downloader.conditions = [{'version': '1.2.4', 'condition': '>'}]
+    with raises(OBSImageConditionsException):
+        check_build_conditions(BUILD, downloader)
+
+
+def test_check_build_filters():
+    downloader = Mock()
+    downloader.conditions = []
+    downloader.filter_licenses = ['GPL-2.0']
+    downloader.filter_packages = []
+
+    with raises(OBSImageConditionsException):
+        check_build_conditions(BUILD, downloader)
+
+    downloader.filter_licenses = []
+    downloader.filter_packages = ['kernel-*']
+
+    with raises(OBSImageConditionsException):
+        check_build_conditions(BUILD, downloader)
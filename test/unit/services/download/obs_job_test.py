@@ -1,16 +1,20 @@
+import threading
+import time
+
+from apscheduler.schedulers.background import BackgroundScheduler
 from unittest.mock import (
-    patch, call, MagicMock, Mock
+    patch, call, ANY, MagicMock, Mock
 )
 from pytest import raises
 from pytz import utc
 from datetime import datetime
 import dateutil.parser
 
-from apscheduler.events import EVENT_JOB_SUBMITTED
-
+from mash.services.download.build_watcher import BuildWatcher
 from mash.services.download.obs_job import OBSDownloadJob
 from mash.services.download.config import DownloadConfig
 from mash.mash_exceptions import MashImageDownloadException
+from obs_img_utils.exceptions import OBSImageConditionsException
 
 
 class TestOBSDownloadJob(object):
@@ -39,12 +43,18 @@ class TestOBSDownloadJob(object):
 
         self.download_result = OBSDownloadJob(job_config, config)
         self.download_result.set_log_handler(self.log_callback)
+        self.download_result.image_cache = None
 
     def test_set_result_handler(self):
         function = Mock()
         self.download_result.set_result_handler(function)
         assert self.download_result.result_callback == function
 
+    def test_set_start_handler(self):
+        function = Mock()
+        self.download_result.set_start_handler(function)
+        assert self.download_result.start_callback == function
+
     @patch.object(OBSDownloadJob, '_result_callback')
     def test_call_result_handler(self, mock_result_callback):
         self.download_result.call_result_handler()
@@ -55,6 +65,7 @@ class TestOBSDownloadJob(object):
         self.download_result.job_status = 'success'
         self.downloader.image_source = 'image'
         self.downloader.build_time = '1601061355'
+        self.download_result.image_digests = {'sha256': 'abc'}
         self.download_result._result_callback()
         self.download_result.result_callback.assert_called_once_with(
             '815', {
@@ -65,35 +76,24 @@ class TestOBSDownloadJob(object):
                     'errors': [],
                     'notification_email': 'test@fake.com',
                     'last_service': 'publish',
-                    'build_time': '1601061355'
+                    'build_time': '1601061355',
+                    'image_digests': {'sha256': 'abc'}
                 }
             }
         )
 
-    @patch('mash.services.download.obs_job.BackgroundScheduler')
     @patch.object(OBSDownloadJob, '_update_image_status')
-    @patch.object(OBSDownloadJob, '_job_submit_event')
-    def test_start_watchdog_single_shot(
-        self, mock_job_submit_event, mock_update_image_status,
-        mock_BackgroundScheduler
-    ):
+    def test_start_watchdog_single_shot(self, mock_update_image_status):
         scheduler = Mock()
-        mock_BackgroundScheduler.return_value = scheduler
         time = 'Tue Oct 10 14:40:42 UTC 2017'
         iso_time = dateutil.parser.parse(time).isoformat()
         run_time = datetime.strptime(iso_time[:19], '%Y-%m-%dT%H:%M:%S')
-        self.download_result.start_watchdog(isotime=iso_time)
-        mock_BackgroundScheduler.assert_called_once_with(
-            timezone=utc
-        )
+        self.download_result.start_watchdog(scheduler, isotime=iso_time)
         scheduler.add_job.assert_called_once_with(
             mock_update_image_status, 'date', run_date=run_time,
-            timezone=utc
+            timezone=utc, id='815', replace_existing=True
         )
-        scheduler.add_listener.assert_called_once_with(
-            mock_job_submit_event, EVENT_JOB_SUBMITTED
-        )
-        scheduler.start.assert_called_once_with()
+        assert self.download_result.job == scheduler.add_job.return_value
 
     def test_stop_watchdog_no_exception(self):
         self.download_result.job = Mock()
@@ -113,13 +113,18 @@ class TestOBSDownloadJob(object):
     def test_job_skipped_event(self, mock_result_callback):
         self.download_result._job_skipped_event(Mock())
 
+    @patch.object(OBSDownloadJob, '_get_image')
     @patch.object(OBSDownloadJob, '_result_callback')
     def test_update_image_status(
         self,
-        mock_result_callback
+        mock_result_callback,
+        mock_get_image
     ):
-        self.downloader.get_image.return_value = 'new-image.xz'
+        mock_get_image.return_value = 'new-image.xz'
+        start_callback = Mock()
+        self.download_result.set_start_handler(start_callback)
         self.download_result._update_image_status()
+        start_callback.assert_called_once_with('815')
         mock_result_callback.assert_called_once_with()
         assert self.downloader.download_metadata_file.call_args_list == [
             call(ext='cdx.json'),
@@ -129,15 +134,17 @@ class TestOBSDownloadJob(object):
             call(prefix='ChangeLog.', ext='json')
         ]
 
+    @patch.object(OBSDownloadJob, '_get_image')
     @patch.object(OBSDownloadJob, '_result_callback')
     def test_update_image_status_metadata_exception(
         self,
-        mock_result_callback
+        mock_result_callback,
+        mock_get_image
     ):
         self.downloader.download_metadata_file.side_effect = Exception(
             'request error'
         )
-        self.downloader.get_image.return_value = 'new-image.xz'
+        mock_get_image.return_value = 'new-image.xz'
         self.download_result._update_image_status()
         mock_result_callback.assert_called_once_with()
         assert self.downloader.download_metadata_file.call_args_list == [
@@ -165,12 +172,13 @@ class TestOBSDownloadJob(object):
             call('Job done')
         ]
 
+    @patch.object(OBSDownloadJob, '_get_image')
     @patch.object(OBSDownloadJob, '_result_callback')
     def test_update_image_status_raises(
-        self, mock_result_callback
+        self, mock_result_callback, mock_get_image
     ):
         self.downloader.conditions = [{'version': '1.2.3', 'status': False}]
-        self.downloader.get_image.side_effect = Exception(
+        mock_get_image.side_effect = Exception(
             'request error'
         )
         self.download_result._update_image_status()
@@ -183,6 +191,331 @@ class TestOBSDownloadJob(object):
         ]
         assert len(self.download_result.errors) == 2
 
+    @patch('mash.services.download.obs_job.OBSImageUtil')
+    def test_image_cache(self, mock_obs_img_util):
+        assert OBSDownloadJob(
+            self.download_result.job_config,
+            self.download_result.config
+        ).image_cache.cache_directory == '/images/.cache'
+
+    @patch.object(OBSDownloadJob, '_get_image_checksum')
+    @patch.object(OBSDownloadJob, '_wait_on_image_conditions')
+    @patch('mash.services.download.obs_job.get_cache_key')
+    def test_get_image_cached(
+        self, mock_get_cache_key, mock_wait_on_image_conditions,
+        mock_get_image_checksum
+    ):
+        image_cache = Mock()
+        image_cache.fetch.return_value = '/images/815/image.xz'
+        self.download_result.image_cache = image_cache
+        self.downloader.has_conditions = True
+        self.downloader.base_file_name = 'image'
+        mock_get_image_checksum.return_value = 'abc'
+        mock_get_cache_key.return_value = 'key'
+        image_cache.get_metadata.return_value = {
+            'image_digests': {'sha256': 'abc'}
+        }
+
+        assert self.download_result._get_image() == '/images/815/image.xz'
+
+        mock_wait_on_image_conditions.assert_called_once_with()
+        mock_get_image_checksum.assert_called_once_with()
+        mock_get_cache_key.assert_called_once_with(
+            'obs_project', 'obs_package', 'abc'
+        )
+        key, job_id, directory, download = image_cache.fetch.call_args[0]
+        assert (key, job_id, directory) == ('key', '815', '/images/815')
+        assert download.func == self.download_result._download_image
+        assert download.args == ('abc',)
+        assert self.downloader.image_source == '/images/815/image.xz'
+        assert self.downloader.image_checksum == 'abc'
+
+        metadata = image_cache.fetch.call_args[1]['metadata']
+        assert metadata() == {'image_digests': {'sha256': 'abc'}}
+        image_cache.get_metadata.assert_called_once_with('key')
+
+    @patch.object(OBSDownloadJob, '_get_image_checksum')
+    @patch.object(OBSDownloadJob, '_download_image')
+    def test_get_image(self, mock_download_image, mock_get_image_checksum):
+        mock_download_image.return_value = '/images/815/image.xz'
+        self.downloader.has_conditions = False
+        mock_get_image_checksum.return_value = 'abc'
+
+        assert self.download_result._get_image() == '/images/815/image.xz'
+
+        mock_download_image.assert_called_once_with('abc')
+        assert not self.downloader.get_image.called
+        assert self.downloader.image_source == '/images/815/image.xz'
+
+    @patch.object(OBSDownloadJob, '_get_image_checksum')
+    @patch.object(OBSDownloadJob, '_download_image')
+    def test_get_image_skip_checksum(
+        self, mock_download_image, mock_get_image_checksum
+    ):
+        mock_download_image.return_value = '/images/815/image.xz'
+        self.downloader.has_conditions = False
+        self.download_result.image_cache = Mock()
+        self.download_result.skip_checksum_validation = True
+
+        assert self.download_result._get_image() == '/images/815/image.xz'
+
+        # Images without a checksum are not validated or cached
+        assert not mock_get_image_checksum.called
+        mock_download_image.assert_called_once_with(None)
+        assert not self.download_result.image_cache.fetch.called
+        assert self.downloader.image_checksum is None
+
+    @patch.object(OBSDownloadJob, '_get_image_checksum')
+    @patch.object(OBSDownloadJob, '_wait_on_image_conditions')
+    @patch.object(OBSDownloadJob, '_download_image')
+    def test_get_image_watched_build(
+        self, mock_download_image, mock_wait_on_image_conditions,
+        mock_get_image_checksum
+    ):
+        mock_download_image.return_value = '/images/815/image.xz'
+        self.downloader.has_conditions = True
+        self.downloader.base_file_name = 'image-Build1.1'
+        self.download_result.conditions_build = 'image-Build1.1'
+
+        # The build watcher checked the conditions of the build
+        self.download_result._get_image()
+        assert not mock_wait_on_image_conditions.called
+
+        # A newer build is checked by the job
+        self.downloader.base_file_name = 'image-Build1.2'
+        self.download_result._get_image()
+        mock_wait_on_image_conditions.assert_called_once_with()
+
+    @patch('mash.services.download.obs_job.time')
+    def test_wait_on_image_conditions(self, mock_time):
+        mock_time.time.side_effect = [0, 0, 1000]
+        self.download_result.conditions_wait_time = 900
+        self.downloader.check_all_conditions.side_effect = [
+            OBSImageConditionsException('Image conditions not met'),
+            None
+        ]
+
+        self.download_result._wait_on_image_conditions()
+
+        self.downloader.reset_base_file_name.assert_called_once_with()
+        mock_time.sleep.assert_called_once_with(150)
+
+        # Raised once the wait time has passed
+        mock_time.time.side_effect = [0, 1000]
+        self.downloader.check_all_conditions.side_effect = \
+            OBSImageConditionsException('Image conditions not met')
+
+        with raises(OBSImageConditionsException):
+            self.download_result._wait_on_image_conditions()
+
+    @patch('mash.services.download.obs_job.get_checksum_from_file')
+    def test_get_image_checksum(self, mock_get_checksum_from_file):
+        self.downloader.remote.fetch_to_dir.side_effect = [
+            '/images/815/image.sha256', None
+        ]
+        self.downloader.base_file_name = 'image'
+        mock_get_checksum_from_file.return_value = 'abc'
+
+        assert self.download_result._get_image_checksum() == 'abc'
+        mock_get_checksum_from_file.assert_called_once_with(
+            '/images/815/image.sha256'
+        )
+
+        self.downloader.remote.fetch_to_dir.side_effect = [None, None]
+        with raises(MashImageDownloadException):
+            self.download_result._get_image_checksum()
+
+    @patch('mash.services.download.obs_job.get_metalink_urls')
+    @patch('mash.services.download.obs_job.SegmentedDownload')
+    def test_download_image(self, mock_segmented_download, mock_get_urls):
+        download = Mock()
+        download.fetch.return_value = '/images/815/image.x86_64.raw.xz'
+        download.digests = {'sha256': 'abc', 'md5': 'def'}
+        mock_segmented_download.return_value = download
+        mock_get_urls.return_value = ['http://mirror/image.x86_64.raw.xz']
+        self.download_result.download_url = 'http://obs/images/'
+        self.download_result.download_segments = 4
+        self.downloader.base_file_name = 'image.x86_64.'
+        self.downloader.image_ext = 'raw.xz'
+
+        assert self.download_result._download_image('abc') == \
+            '/images/815/image.x86_64.raw.xz'
+
+        mock_get_urls.assert_called_once_with(
+            'http://obs/images/image.x86_64.raw.xz'
+        )
+        mock_segmented_download.assert_called_once_with(
+            'http://obs/images/image.x86_64.raw.xz',
+            '/images/815/image.x86_64.raw.xz',
+            segments=4,
+            mirrors=['http://mirror/image.x86_64.raw.xz'],
+            checksum='abc',
+            report_callback=self.download_result.progress_callback,
+            part_size=16777216,
+            stream_callback=None,
+            bandwidth=ANY,
+            log_callback=self.log_callback
+        )
+        assert self.download_result.image_digests == {
+            'sha256': 'abc', 'md5': 'def'
+        }
+
+    @patch('mash.services.download.obs_job.ImageStreamWriter')
+    @patch('mash.services.download.obs_job.SegmentedDownload')
+    def test_download_image_stream(
+        self, mock_segmented_download, mock_stream_writer
+    ):
+        download = Mock()
+        download.fetch.return_value = '/images/815/image.raw.xz'
+        download.digests = {'sha256': 'abc', 'size': 10}
+        mock_segmented_download.return_value = download
+        stream_writer = Mock()
+        mock_stream_writer.return_value = stream_writer
+        stream_callback = Mock()
+        self.download_result.set_stream_handler(stream_callback)
+        self.download_result.download_metalink = False
+        self.download_result.download_url = 'http://obs/images'
+        self.downloader.base_file_name = 'image.'
+        self.downloader.image_ext = 'raw.xz'
+        self.downloader.build_time = '1601061355'
+
+        assert self.download_result._download_image('abc') == \
+            '/images/815/image.raw.xz'
+
+        mock_stream_writer.assert_called_once_with('/images/815/image.raw.xz')
+        stream_writer.start.assert_called_once_with()
+        stream_callback.assert_called_once_with(
+            '815', {
+                'download_result': {
+                    'id': '815',
+                    'image_file': '/images/815/image.raw.xz',
+                    'status': 'streaming',
+                    'errors': [],
+                    'notification_email': 'test@fake.com',
+                    'last_service': 'publish',
+                    'build_time': '1601061355'
+                }
+            }
+        )
+        assert mock_segmented_download.call_args[1]['stream_callback'] == \
+            stream_writer.update
+        stream_writer.finish.assert_called_once_with(
+            {'sha256': 'abc', 'size': 10}
+        )
+
+        # Download failed
+        download.fetch.side_effect = MashImageDownloadException('Failed')
+
+        with raises(MashImageDownloadException):
+            self.download_result._download_image('abc')
+
+        stream_writer.fail.assert_called_once_with(
+            download.fetch.side_effect
+        )
+
+    @patch.object(OBSDownloadJob, '_result_callback')
+    def test_update_image_status_watch_conditions(self, mock_result_callback):
+        build_watcher = Mock()
+        start_callback = Mock()
+        self.download_result.set_build_watcher(build_watcher)
+        self.download_result.set_start_handler(start_callback)
+        self.downloader.has_conditions = True
+
+        self.download_result._update_image_status()
+
+        build_watcher.watch.assert_called_once_with(
+            ('obs_project', 'obs_package', 'x86_64', 'Proxy'),
+            '815',
+            self.downloader,
+            self.download_result._conditions_checked,
+            900
+        )
+        assert not self.downloader.get_image.called
+        assert not mock_result_callback.called
+        assert not start_callback.called
+
+        self.download_result.job = Mock()
+        self.download_result.stop_watchdog()
+        build_watcher.unwatch.assert_called_once_with('815')
+
+    def test_conditions_checked(self):
+        scheduler = Mock()
+        self.download_result.scheduler = scheduler
+
+        self.download_result._conditions_checked(None, 'image-Build1.1')
+
+        assert self.download_result.conditions_met
+        assert self.download_result.conditions_build == 'image-Build1.1'
+        scheduler.add_job.assert_called_once_with(
+            self.download_result._update_image_status,
+            id='815',
+            replace_existing=True,
+            max_instances=2
+        )
+        assert self.download_result._watch_conditions() is False
+
+    @patch.object(OBSDownloadJob, '_result_callback')
+    @patch.object(OBSDownloadJob, '_get_image')
+    def test_conditions_met_on_watch(
+        self, mock_get_image, mock_result_callback
+    ):
+        downloaded = threading.Event()
+        mock_get_image.side_effect = lambda: downloaded.set()
+        self.downloader.has_conditions = True
+        self.downloader.conditions = [{'version': '1.0'}]
+        self.downloader.filter_licenses = []
+        self.downloader.filter_packages = []
+
+        # The run which starts watching is still logging when the
+        # conditions are met
+        self.log_callback.info.side_effect = lambda *args: time.sleep(0.05)
+
+        # The last polled build meets the conditions
+        build_watcher = BuildWatcher()
+        build_watcher._watches[
+            ('obs_project', 'obs_package', 'x86_64', 'Proxy')
+        ] = {
+            'jobs': {},
+            'next_poll': time.time() + 900,
+            'build': {
+                'base_file_name': 'image',
+                'image_version': '1.0',
+                'image_release': '1',
+                'packages': {}
+            }
+        }
+        build_watcher.start()
+        self.download_result.set_build_watcher(build_watcher)
+
+        scheduler = BackgroundScheduler(timezone=utc)
+        scheduler.start()
+
+        try:
+            for attempt in range(5):
+                downloaded.clear()
+                self.download_result.job_id = str(attempt)
+                self.download_result.conditions_met = False
+                self.download_result.start_watchdog(scheduler)
+                assert downloaded.wait(5)
+        finally:
+            scheduler.shutdown()
+            build_watcher.stop()
+
+    @patch.object(OBSDownloadJob, '_result_callback')
+    def test_conditions_checked_failed(self, mock_result_callback):
+        self.downloader.conditions = [{'version': '1.2.3', 'status': False}]
+
+        self.download_result._conditions_checked(
+            Exception('Image conditions not met')
+        )
+
+        assert self.download_result.job_status == 'failed'
+        assert self.download_result.errors == [
+            'Exception: Image conditions not met',
+            "Condition failed: {'version': '1.2.3', 'status': False}"
+        ]
+        mock_result_callback.assert_called_once_with()
+
     def test_progress_callback(self):
         self.download_result.progress_callback(0, 0, 0, done=True)
         self.log_callback.info.assert_called_once_with(
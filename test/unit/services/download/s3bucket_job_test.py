@@ -1,15 +1,13 @@
 from unittest.mock import (
-    patch, MagicMock, Mock, call
+    patch, ANY, MagicMock, Mock, call
 )
 from pytest import raises
 from pytz import utc
 from datetime import datetime
 import dateutil.parser
 
-from apscheduler.events import EVENT_JOB_SUBMITTED
-
 from mash.services.download.s3bucket_job import S3BucketDownloadJob
-from mash.services.base_config import BaseConfig
+from mash.services.download.config import DownloadConfig
 from mash.mash_exceptions import (
     MashImageDownloadException,
     MashJobException
@@ -45,16 +43,25 @@ class TestS3BucketDownloadJob(object):
             'download_account': 'download_account',
             'download_type': 'S3'
         }
-        config = BaseConfig('./test/data/mash_config.yaml')
+        config = DownloadConfig('./test/data/mash_config.yaml')
 
         self.download_result = S3BucketDownloadJob(job_config, config)
         self.download_result.set_log_handler(self.log_callback)
 
+        assert self.download_result.image_cache.cache_directory == \
+            '/images/.cache'
+        self.download_result.image_cache = None
+
     def test_set_result_handler(self):
         function = Mock()
         self.download_result.set_result_handler(function)
         assert self.download_result.result_callback == function
 
+    def test_set_start_handler(self):
+        function = Mock()
+        self.download_result.set_start_handler(function)
+        assert self.download_result.start_callback == function
+
     @patch.object(S3BucketDownloadJob, '_result_callback')
     def test_call_result_handler(self, mock_result_callback):
         self.download_result.call_result_handler()
@@ -73,35 +80,24 @@ class TestS3BucketDownloadJob(object):
                     'errors': [],
                     'notification_email': 'test@fake.com',
                     'last_service': 'upload',
-                    'build_time': 'unknown'
+                    'build_time': 'unknown',
+                    'image_digests': {}
                 }
             }
         )
 
-    @patch('mash.services.download.s3bucket_job.BackgroundScheduler')
     @patch.object(S3BucketDownloadJob, '_download_image_file')
-    @patch.object(S3BucketDownloadJob, '_job_submit_event')
-    def test_start_watchdog_single_shot(
-        self, mock_job_submit_event, mock_download_image_file,
-        mock_BackgroundScheduler
-    ):
+    def test_start_watchdog_single_shot(self, mock_download_image_file):
         scheduler = Mock()
-        mock_BackgroundScheduler.return_value = scheduler
         time = 'Tue Oct 10 14:40:42 UTC 2017'
         iso_time = dateutil.parser.parse(time).isoformat()
         run_time = datetime.strptime(iso_time[:19], '%Y-%m-%dT%H:%M:%S')
-        self.download_result.start_watchdog(isotime=iso_time)
-        mock_BackgroundScheduler.assert_called_once_with(
-            timezone=utc
-        )
+        self.download_result.start_watchdog(scheduler, isotime=iso_time)
         scheduler.add_job.assert_called_once_with(
             mock_download_image_file, 'date', run_date=run_time,
-            timezone='utc'
-        )
-        scheduler.add_listener.assert_called_once_with(
-            mock_job_submit_event, EVENT_JOB_SUBMITTED
+            timezone=utc, id='815', replace_existing=True
         )
-        scheduler.start.assert_called_once_with()
+        assert self.download_result.job == scheduler.add_job.return_value
 
     def test_stop_watchdog_no_exception(self):
         self.download_result.job = Mock()
@@ -154,18 +150,20 @@ class TestS3BucketDownloadJob(object):
 
         self.download_result.download_url = previous_download_url
 
-    @patch('mash.services.download.s3bucket_job.os.makedirs')
+    @patch('mash.services.download.s3bucket_job.ImageDigest')
+    @patch('mash.services.download.s3bucket_job.download_file_from_s3_bucket')
     @patch('mash.services.download.s3bucket_job.get_session')
     def test_download_image_file(
         self,
         mock_get_session,
-        mock_os_makedirs,
+        mock_download_file,
+        mock_image_digest
     ):
-        client_mock = MagicMock()
-        client_mock.download_file.return_value = True
         session_mock = MagicMock()
-        session_mock.client.return_value = client_mock
         mock_get_session.return_value = session_mock
+        digest = Mock()
+        digest.get_digests.return_value = {'sha256': 'abc'}
+        mock_image_digest.return_value = digest
         self.log_callback.reset_mock()
 
         result_callback_mock = MagicMock()
@@ -176,8 +174,12 @@ class TestS3BucketDownloadJob(object):
             's3://my_bucket_name/my_dir'
         self.download_result.image_name = 'myfile.tar.gz'
         self.download_result.result_callback = result_callback_mock
+        self.download_result.start_callback = Mock()
 
         self.download_result._download_image_file()
+        self.download_result.start_callback.assert_called_once_with(
+            self.download_result.job_id
+        )
 
         # assertions
         mock_get_session.assert_called_once_with(
@@ -185,17 +187,16 @@ class TestS3BucketDownloadJob(object):
             'my_secret_access_key',
             None
         )
-        session_mock.client.assert_called_once_with(
-            service_name='s3'
-        )
-        client_mock.download_file.assert_called_once_with(
+        mock_download_file.assert_called_once_with(
+            session_mock,
             'my_bucket_name',
             'my_dir/myfile.tar.gz',
-            '/images/815/myfile.tar.gz'
-        )
-        mock_os_makedirs.assert_called_once_with(
-            '/images/815'
+            '/images/815/myfile.tar.gz',
+            resume=False,
+            digest=digest,
+            bandwidth=ANY
         )
+        mock_image_digest.assert_called_once_with(16777216)
         self.log_callback.info.assert_has_calls(
             [
                 call('Job running'),
@@ -214,22 +215,76 @@ class TestS3BucketDownloadJob(object):
                     'errors': [],
                     'notification_email': 'test@fake.com',
                     'last_service': 'upload',
-                    'build_time': 'unknown'
+                    'build_time': 'unknown',
+                    'image_digests': {'sha256': 'abc'}
                 }
             }
         )
 
-    @patch('mash.services.download.s3bucket_job.os.makedirs')
+    @patch('mash.services.download.s3bucket_job.get_cache_key')
+    @patch('mash.services.download.s3bucket_job.get_s3_object_etag')
+    @patch('mash.services.download.s3bucket_job.download_file_from_s3_bucket')
+    @patch('mash.services.download.s3bucket_job.get_session')
+    def test_download_image_file_cached(
+        self,
+        mock_get_session,
+        mock_download_file,
+        mock_get_etag,
+        mock_get_cache_key
+    ):
+        session_mock = MagicMock()
+        mock_get_session.return_value = session_mock
+        mock_get_etag.return_value = 'abc'
+        mock_get_cache_key.return_value = 'key'
+
+        def fetch(key, job_id, target_directory, download, metadata=None):
+            return download()
+
+        image_cache = Mock()
+        image_cache.fetch.side_effect = fetch
+        image_cache.get_metadata.return_value = {
+            'image_digests': {'sha256': 'def'}
+        }
+        self.download_result.image_cache = image_cache
+        self.download_result.download_url = 's3://my_bucket_name'
+        self.download_result.image_name = 'myfile.tar.gz'
+        self.download_result.result_callback = MagicMock()
+
+        self.download_result._download_image_file()
+
+        mock_get_etag.assert_called_once_with(
+            session_mock, 'my_bucket_name', 'myfile.tar.gz'
+        )
+        mock_get_cache_key.assert_called_once_with(
+            's3://my_bucket_name', 'myfile.tar.gz', 'abc'
+        )
+        assert image_cache.fetch.call_args[0][:3] == (
+            'key', '815', '/images/815'
+        )
+        mock_download_file.assert_called_once_with(
+            session_mock,
+            'my_bucket_name',
+            'myfile.tar.gz',
+            '/images/815/myfile.tar.gz',
+            resume=False,
+            digest=ANY,
+            bandwidth=ANY
+        )
+        image_cache.get_metadata.assert_called_once_with('key')
+        assert self.download_result.image_digests == {'sha256': 'def'}
+        assert self.download_result.image_filename == \
+            '/images/815/myfile.tar.gz'
+        assert self.download_result.job_status == 'success'
+
+    @patch('mash.services.download.s3bucket_job.download_file_from_s3_bucket')
     @patch('mash.services.download.s3bucket_job.get_session')
     def test_download_image_file_exception(
         self,
         mock_get_session,
-        mock_os_makedirs
+        mock_download_file
     ):
-        client_mock = MagicMock()
-        client_mock.download_file.side_effect = Exception('my_exception')
+        mock_download_file.side_effect = Exception('my_exception')
         session_mock = MagicMock()
-        session_mock.client.return_value = client_mock
         mock_get_session.return_value = session_mock
         self.log_callback.reset_mock()
 
@@ -250,16 +305,14 @@ class TestS3BucketDownloadJob(object):
             'my_secret_access_key',
             None
         )
-        session_mock.client.assert_called_once_with(
-            service_name='s3'
-        )
-        client_mock.download_file.assert_called_once_with(
+        mock_download_file.assert_called_once_with(
+            session_mock,
             'my_bucket_name',
             'myfile.tar.gz',
-            '/images/815/myfile.tar.gz'
-        )
-        mock_os_makedirs.assert_called_once_with(
-            '/images/815'
+            '/images/815/myfile.tar.gz',
+            resume=False,
+            digest=ANY,
+            bandwidth=ANY
         )
         self.log_callback.info.assert_has_calls(
             [
@@ -278,14 +331,15 @@ class TestS3BucketDownloadJob(object):
                     'errors': ['Exception: my_exception'],
                     'notification_email': 'test@fake.com',
                     'last_service': 'upload',
-                    'build_time': 'unknown'
+                    'build_time': 'unknown',
+                    'image_digests': {}
                 }
             }
         )
         self.download_result.download_url = previous_download_url
 
     def test_required_params(self):
-        config = BaseConfig('./test/data/mash_config.yaml')
+        config = DownloadConfig('./test/data/mash_config.yaml')
         test_params = [
             (
                 {
@@ -403,7 +457,7 @@ class TestS3BucketDownloadJob(object):
             'download_account': 'download_account',
             'download_type': 'S3'
         }
-        config = BaseConfig('./test/data/mash_config.yaml')
+        config = DownloadConfig('./test/data/mash_config.yaml')
         handle_request_response_mock.side_effect = [
             Exception('my_test_exception')
         ]
@@ -0,0 +1,334 @@
+import hashlib
+import json
+import os
+
+from pytest import raises
+from unittest.mock import MagicMock, Mock, patch
+
+from mash.mash_exceptions import MashImageDownloadException
+from mash.services.download.segmented_download import (
+    SegmentedDownload,
+    get_metalink_urls
+)
+
+DATA = bytes(range(256)) * 40
+CHECKSUM = hashlib.sha256(DATA).hexdigest()
+MD5 = hashlib.md5(DATA).hexdigest()
+
+METALINK = b"""<?xml version="1.0" encoding="UTF-8"?>
+<metalink xmlns="urn:ietf:params:xml:ns:metalink">
+  <file name="image.raw.xz">
+    <url priority="2">http://mirror2/image.raw.xz</url>
+    <url priority="1">http://mirror1/image.raw.xz</url>
+  </file>
+</metalink>
+"""
+
+
+def get_response(status_code=200, headers=None, content=b''):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.content = content
+    response.__enter__.return_value = response
+    response.iter_content.side_effect = lambda size: [
+        content[index:index + 1000]
+        for index in range(0, len(content), 1000)
+    ]
+    return response
+
+
+def ranged_get(url, headers=None, stream=False, timeout=None):
+    if headers:
+        start, end = headers['Range'][6:].split('-')
+        return get_response(206, content=DATA[int(start):int(end) + 1])
+
+    return get_response(
+        headers={'Content-Length': str(len(DATA))}, content=DATA
+    )
+
+
+@patch('mash.services.download.segmented_download.requests')
+def test_get_metalink_urls(mock_requests):
+    mock_requests.RequestException = Exception
+    mock_requests.get.return_value = get_response(content=METALINK)
+
+    assert get_metalink_urls('http://obs/image.raw.xz') == [
+        'http://mirror1/image.raw.xz',
+        'http://mirror2/image.raw.xz'
+    ]
+    mock_requests.get.assert_called_once_with(
+        'http://obs/image.raw.xz.meta4', timeout=60
+    )
+
+    mock_requests.get.side_effect = Exception('Not found')
+    assert get_metalink_urls('http://obs/image.raw.xz') == []
+
+
+class TestSegmentedDownload(object):
+    def setup_method(self):
+        self.report_callback = Mock()
+
+    def get_download(self, tmp_path, **kwargs):
+        self.target_file = str(tmp_path / 'image.raw.xz')
+        return SegmentedDownload(
+            'http://obs/image.raw.xz',
+            self.target_file,
+            checksum=CHECKSUM,
+            report_callback=self.report_callback,
+            min_segment_size=1000,
+            retry_delay=0,
+            **kwargs
+        )
+
+    def read_target(self):
+        with open(self.target_file, 'rb') as target:
+            return target.read()
+
+    def test_get_segments(self, tmp_path):
+        download = self.get_download(tmp_path, segments=4)
+
+        assert download._get_segments(10240) == [
+            (0, 2560), (2560, 5120), (5120, 7680), (7680, 10240)
+        ]
+        assert download._get_segments(2500) == [(0, 1250), (1250, 2500)]
+        assert download._get_segments(500) == [(0, 500)]
+
+    @patch('mash.services.download.segmented_download.requests')
+    def test_fetch_segments(self, mock_requests, tmp_path):
+        mock_requests.head.return_value = get_response(headers={
+            'Content-Length': str(len(DATA)),
+            'Accept-Ranges': 'bytes'
+        })
+        mock_requests.get.side_effect = ranged_get
+        stream_callback = Mock()
+        bandwidth = Mock()
+        download = self.get_download(
+            tmp_path,
+            segments=3,
+            mirrors=['http://mirror1/image', 'http://mirror2/image'],
+            part_size=4096,
+            stream_callback=stream_callback,
+            bandwidth=bandwidth
+        )
+
+        assert download.fetch() == self.target_file
+        assert self.read_target() == DATA
+        assert download.digests['sha256'] == CHECKSUM
+        assert download.digests['md5'] == MD5
+        assert download.digests['part_md5s'] == [
+            hashlib.md5(DATA[start:start + 4096]).hexdigest()
+            for start in range(0, len(DATA), 4096)
+        ]
+
+        # Bytes are streamed in file order
+        available = [
+            call_args[0][0] for call_args in stream_callback.call_args_list
+        ]
+        assert available == sorted(available)
+        stream_callback.assert_called_with(len(DATA), len(DATA))
+
+        # All bytes are throttled on the bandwidth transfer
+        assert sum(
+            call_args[0][0] for call_args in bandwidth.throttle.call_args_list
+        ) == len(DATA)
+
+        urls = sorted(
+            call_args[0][0] for call_args in mock_requests.get.call_args_list
+        )
+        assert urls == [
+            'http://mirror1/image', 'http://mirror1/image',
+            'http://mirror2/image'
+        ]
+        self.report_callback.assert_any_call(1, len(DATA), len(DATA))
+        self.report_callback.assert_called_with(0, 0, 0, True)
+
+    @patch('mash.services.download.segmented_download.requests')
+    def test_fetch_mirrors_validator(self, mock_requests, tmp_path):
+        mock_requests.head.return_value = get_response(headers={
+            'Content-Length': str(len(DATA)),
+            'Accept-Ranges': 'bytes',
+            'ETag': '"abc"'
+        })
+
+        def get(url, headers=None, **kwargs):
+            if url != 'http://obs/image.raw.xz' and 'If-Range' in headers:
+                # The mirror ETag does not match the origin ETag
+                return get_response(
+                    headers={'Content-Length': str(len(DATA))}, content=DATA
+                )
+            return ranged_get(url, headers)
+
+        mock_requests.get.side_effect = get
+        download = self.get_download(
+            tmp_path,
+            segments=2,
+            mirrors=['http://obs/image.raw.xz', 'http://mirror/image.raw.xz']
+        )
+
+        assert download.fetch() == self.target_file
+        assert self.read_target() == DATA
+        headers = sorted(
+            (call_args[0][0], call_args[1]['headers'])
+            for call_args in mock_requests.get.call_args_list
+        )
+        assert headers == [
+            ('http://mirror/image.raw.xz', {'Range': 'bytes=5120-10239'}),
+            (
+                'http://obs/image.raw.xz',
+                {'Range': 'bytes=0-5119', 'If-Range': '"abc"'}
+            )
+        ]
+
+    @patch('mash.services.download.segmented_download.requests')
+    def test_fetch_without_ranges(self, mock_requests, tmp_path):
+        mock_requests.head.return_value = get_response(
+            headers={'Content-Length': str(len(DATA))}
+        )
+        mock_requests.get.side_effect = ranged_get
+        download = self.get_download(tmp_path)
+
+        assert download.fetch() == self.target_file
+        assert self.read_target() == DATA
+        assert download.digests == {
+            'sha256': CHECKSUM, 'md5': MD5, 'size': len(DATA)
+        }
+        mock_requests.get.assert_called_once_with(
+            'http://obs/image.raw.xz', stream=True, timeout=60
+        )
+
+    @patch('mash.services.download.segmented_download.requests')
+    def test_fetch_ranges_ignored(self, mock_requests, tmp_path):
+        mock_requests.head.return_value = get_response(headers={
+            'Content-Length': str(len(DATA)),
+            'Accept-Ranges': 'bytes'
+        })
+        mock_requests.get.side_effect = lambda url, **kwargs: get_response(
+            headers={'Content-Length': str(len(DATA))}, content=DATA
+        )
+        download = self.get_download(tmp_path)
+
+        assert download.fetch() == self.target_file
+        assert self.read_target() == DATA
+
+    @patch('mash.services.download.segmented_download.requests')
+    def test_fetch_checksum_mismatch(self, mock_requests, tmp_path):
+        mock_requests.head.return_value = get_response(headers={
+            'Content-Length': str(len(DATA)),
+            'Accept-Ranges': 'bytes'
+        })
+        mock_requests.RequestException = Exception
+        mock_requests.get.side_effect = ranged_get
+        download = self.get_download(tmp_path, attempts=2)
+        download.checksum = 'invalid'
+
+        with raises(MashImageDownloadException):
+            download.fetch()
+
+        # The second attempt downloads the file again
+        assert mock_requests.head.call_count == 2
+        assert not os.path.exists(self.target_file + '.download.json')
+
+    @patch('mash.services.download.segmented_download.requests')
+    def test_fetch_segment_failed(self, mock_requests, tmp_path):
+        mock_requests.head.return_value = get_response(headers={
+            'Content-Length': str(len(DATA)),
+            'Accept-Ranges': 'bytes',
+            'ETag': '"abc"'
+        })
+
+        def get(url, headers=None, **kwargs):
+            if headers['Range'].startswith('bytes=0-'):
+                raise Exception('Connection reset')
+            return ranged_get(url, headers)
+
+        mock_requests.RequestException = Exception
+        mock_requests.get.side_effect = get
+        download = self.get_download(tmp_path)
+
+        with raises(Exception):
+            download.fetch()
+
+        assert len([
+            call_args for call_args in mock_requests.get.call_args_list
+            if call_args[1]['headers']['Range'].startswith('bytes=0-')
+        ]) == 4
+
+        self.report_callback.assert_called_with(0, 0, 0, True)
+
+        # The progress of the other segments is kept for a restart
+        with open(self.target_file + '.download.json') as manifest_file:
+            manifest = json.load(manifest_file)
+
+        assert manifest['validator'] == '"abc"'
+        assert manifest['written'][0] == 0
+        for (start, end), written in zip(
+            manifest['segments'], manifest['written']
+        ):
+            assert start <= written <= end
+
+    @patch('mash.services.download.segmented_download.requests')
+    def test_fetch_retry(self, mock_requests, tmp_path):
+        mock_requests.head.return_value = get_response(headers={
+            'Content-Length': str(len(DATA)),
+            'Accept-Ranges': 'bytes',
+            'ETag': '"abc"'
+        })
+        failures = [Exception('Connection reset')]
+
+        def get(url, headers=None, **kwargs):
+            if headers['Range'].startswith('bytes=0-') and failures:
+                raise failures.pop()
+            return ranged_get(url, headers)
+
+        mock_requests.RequestException = Exception
+        mock_requests.get.side_effect = get
+        log_callback = Mock()
+        download = self.get_download(tmp_path, log_callback=log_callback)
+
+        assert download.fetch() == self.target_file
+        assert self.read_target() == DATA
+        assert download.digests['sha256'] == CHECKSUM
+        log_callback.warning.assert_called_once_with(
+            'Download of http://obs/image.raw.xz failed, retrying in 0 '
+            'seconds: Connection reset'
+        )
+
+        assert len([
+            call_args for call_args in mock_requests.get.call_args_list
+            if call_args[1]['headers']['Range'].startswith('bytes=0-')
+        ]) == 2
+
+    @patch('mash.services.download.segmented_download.requests')
+    def test_fetch_resume(self, mock_requests, tmp_path):
+        mock_requests.head.return_value = get_response(headers={
+            'Content-Length': str(len(DATA)),
+            'Accept-Ranges': 'bytes',
+            'ETag': '"abc"'
+        })
+        mock_requests.get.side_effect = ranged_get
+        download = self.get_download(tmp_path, segments=2)
+
+        with open(self.target_file, 'wb') as target:
+            target.write(DATA[:2000] + bytes(3120) + DATA[5120:])
+
+        with open(self.target_file + '.download.json', 'w') as manifest:
+            json.dump({
+                'url': 'http://obs/image.raw.xz',
+                'validator': '"abc"',
+                'size': len(DATA),
+                'segments': [[0, 5120], [5120, 10240]],
+                'written': [2000, 10240]
+            }, manifest)
+
+        assert download.fetch() == self.target_file
+        assert self.read_target() == DATA
+        assert download.digests['md5'] == MD5
+        assert not os.path.exists(self.target_file + '.download.json')
+        mock_requests.get.assert_called_once_with(
+            'http://obs/image.raw.xz',
+            headers={'Range': 'bytes=2000-5119', 'If-Range': '"abc"'},
+            stream=True,
+            timeout=60
+        )
+        self.report_callback.assert_any_call(1, len(DATA), len(DATA))
@@ -3,34 +3,47 @@ from unittest.mock import patch
 from unittest.mock import call
 from unittest.mock import Mock
 
-from test.unit.test_helper import (
-    patch_open
-)
+from apscheduler.events import EVENT_JOB_SUBMITTED
 
 from mash.services.download.service import DownloadService
 from mash.services.mash_service import MashService
+from mash.utils.tracing import Tracer
+
+TRACEPARENT = '00-0123456789abcdef0123456789abcdef-0123456789abcdef-01'
 
 
 class TestDownloadService(object):
 
+    @patch('mash.services.download.service.BuildWatcher')
+    @patch('mash.services.download.service.BackgroundScheduler')
     @patch('mash.services.download.service.os.makedirs')
     @patch('mash.services.download.service.setup_logfile')
     @patch.object(DownloadService, '_process_message')
     @patch.object(DownloadService, '_send_job_result_for_upload')
-    @patch('mash.services.download.service.restart_jobs')
+    @patch('mash.services.download.service.get_job_store')
     @patch.object(MashService, '__init__')
     @patch('os.listdir')
     @patch('logging.getLogger')
     @patch('atexit.register')
     def setup_method(
         self, method, mock_register, mock_log, mock_listdir, mock_MashService,
-        mock_restart_jobs, mock_send_job_result_for_upload,
+        mock_get_job_store, mock_send_job_result_for_upload,
         mock_process_message,
-        mock_setup_logfile, mock_makedirs
+        mock_setup_logfile, mock_makedirs, mock_scheduler,
+        mock_build_watcher
     ):
         config = Mock()
+        config.get_download_max_workers.return_value = 4
+        config.get_download_poll_interval.return_value = 150
+        config.get_bandwidth_limit.return_value = None
         config.get_log_file.return_value = 'logfile'
         config.get_job_directory.return_value = '/var/lib/mash/download_jobs/'
+        config.get_job_store.return_value = 'file'
+        config.get_shard_count.return_value = 1
+        config.get_service_names.return_value = ['download', 'upload']
+        self.job_store = Mock()
+        self.job_store.iter_jobs.return_value = [{'id': '123'}]
+        mock_get_job_store.return_value = self.job_store
         self.log = Mock()
         mock_listdir.return_value = ['job']
         mock_MashService.return_value = None
@@ -49,7 +62,11 @@ class TestDownloadService(object):
         self.download_result.next_service = 'upload'
         self.download_result.job_document_key = 'job_document'
         self.download_result.listener_msg_key = 'listener_msg'
+        self.span_exporter = Mock()
+        self.download_result.tracer = Tracer('download', self.span_exporter)
 
+        start_job = Mock()
+        self.download_result._start_job = start_job
         self.download_result.post_init()
 
         config.get_job_directory.assert_called_once_with('download')
@@ -58,10 +75,25 @@ class TestDownloadService(object):
         )
 
         mock_setup_logfile.assert_called_once_with('logfile')
-        mock_restart_jobs.assert_called_once_with(
-            '/var/lib/mash/download_jobs/',
-            self.download_result._start_job
+        mock_get_job_store.assert_called_once_with(
+            'file', '/var/lib/mash/download_jobs/'
+        )
+        start_job.assert_called_once_with({'id': '123'})
+        self.job_store.close.assert_called_once_with()
+
+        self.scheduler = mock_scheduler.return_value
+        self.scheduler.add_listener.assert_called_once_with(
+            self.download_result._job_submitted, EVENT_JOB_SUBMITTED
         )
+        self.scheduler.start.assert_called_once_with()
+        self.scheduler.shutdown.assert_called_once_with(wait=False)
+
+        self.build_watcher = mock_build_watcher.return_value
+        mock_build_watcher.assert_called_once_with(
+            poll_interval=150, log=self.log
+        )
+        self.build_watcher.start.assert_called_once_with()
+        self.build_watcher.stop.assert_called_once_with()
 
         self.download_result.consume_queue.assert_called_once_with(
             mock_process_message, 'service', 'download'
@@ -76,6 +108,8 @@ class TestDownloadService(object):
         self.download_result.channel.start_consuming.side_effect = KeyboardInterrupt()
         self.download_result.post_init()
 
+        del self.download_result._start_job
+
     @patch.object(MashService, '_publish')
     @patch.object(DownloadService, '_delete_job')
     def test_send_job_result_for_upload(
@@ -83,10 +117,53 @@ class TestDownloadService(object):
     ):
         self.download_result.jobs['815'] = Mock()
         self.download_result.jobs['815'].job_nonstop = False
-        self.download_result._send_job_result_for_upload('815', {})
+        self.download_result.job_traces['815'] = (None, 10.0)
+        self.download_result._send_job_result_for_upload(
+            '815', {'download_result': {'id': '815'}}
+        )
         mock_delete_job.assert_called_once_with('815')
+
+        run_span, publish_span = [
+            call_args[0][0][0]
+            for call_args in self.span_exporter.export.call_args_list
+        ]
+        assert run_span['name'] == 'run_job'
+        assert run_span['start'] == 10.0
+        assert publish_span['name'] == 'publish'
+
+        traceparent = '00-{trace_id}-{span_id}-01'.format(**publish_span)
         mock_publish.assert_called_once_with(
-            'download', 'listener_msg', '{}'
+            'download',
+            'listener_msg',
+            {'download_result': {'id': '815', 'traceparent': traceparent}},
+            job_id='815',
+            traceparent=traceparent
+        )
+
+    @patch.object(MashService, '_publish')
+    @patch.object(DownloadService, '_delete_job')
+    def test_send_stream_result_for_upload(
+        self, mock_delete_job, mock_publish
+    ):
+        self.download_result.job_traces['815'] = (TRACEPARENT, 10.0)
+        self.download_result._send_stream_result_for_upload(
+            '815', {'download_result': {'id': '815', 'status': 'streaming'}}
+        )
+
+        assert not mock_delete_job.called
+        assert self.download_result.job_traces['815'] == (TRACEPARENT, 10.0)
+        mock_publish.assert_called_once_with(
+            'download',
+            'listener_msg',
+            {
+                'download_result': {
+                    'id': '815',
+                    'status': 'streaming',
+                    'traceparent': TRACEPARENT
+                }
+            },
+            job_id='815',
+            traceparent=TRACEPARENT
         )
 
     def test_send_control_response_local(self):
@@ -165,11 +242,8 @@ class TestDownloadService(object):
             )
         ]
 
-    @patch('mash.services.download.service.persist_json')
     @patch.object(DownloadService, '_start_job')
-    @patch_open
-    def test_add_job(self, mock_open, mock_start_job, mock_persist_json):
-        self.download_result.job_directory = 'tmp/'
+    def test_add_job(self, mock_start_job):
         job_data = {
             "download_job": {
                 "id": "123",
@@ -190,14 +264,12 @@ class TestDownloadService(object):
             }
         }
         self.download_result._add_job(job_data)
-        mock_persist_json.assert_called_once_with(
-            'tmp/job-123.json',
+        self.job_store.add.assert_called_once_with(
             job_data['download_job']
         )
         mock_start_job.assert_called_once_with(job_data['download_job'])
 
-    @patch('os.remove')
-    def test_delete_job(self, mock_os_remove):
+    def test_delete_job(self):
         assert self.download_result._delete_job('815') == {
             'message': 'Job does not exist, can not delete it', 'ok': False
         }
@@ -207,15 +279,24 @@ class TestDownloadService(object):
         assert self.download_result._delete_job('815') == {
             'message': 'Job Deleted', 'ok': True
         }
-        mock_os_remove.assert_called_once_with('job_file')
+        self.job_store.delete.assert_called_once_with('815')
         job_worker.stop_watchdog.assert_called_once_with()
         assert '815' not in self.download_result.jobs
         self.download_result.jobs = {'815': job_worker}
-        mock_os_remove.side_effect = Exception('remove_error')
+        self.job_store.delete.side_effect = Exception('remove_error')
         assert self.download_result._delete_job('815') == {
             'message': 'Job deletion failed: remove_error', 'ok': False
         }
 
+    def test_job_submitted(self):
+        job_worker = Mock()
+        event = Mock(job_id='815')
+        self.download_result._job_submitted(event)
+
+        self.download_result.jobs = {'815': job_worker}
+        self.download_result._job_submitted(event)
+        job_worker._job_submit_event.assert_called_once_with(event)
+
     def test_start_job_with_conditions(self):
         # mocks
         job_worker = Mock()
@@ -254,8 +335,17 @@ class TestDownloadService(object):
         job_worker.set_result_handler.assert_called_once_with(
             self.download_result._send_job_result_for_upload
         )
+        job_worker.set_start_handler.assert_called_once_with(
+            self.download_result._trace_job_start
+        )
+        job_worker.set_build_watcher.assert_called_once_with(
+            self.build_watcher
+        )
+        job_worker.set_stream_handler.assert_called_once_with(
+            self.download_result._send_stream_result_for_upload
+        )
         job_worker.start_watchdog.assert_called_once_with(
-            isotime=None
+            self.scheduler, isotime=None
         )
 
     def test_start_job_without_conditions(self):
@@ -274,9 +364,22 @@ class TestDownloadService(object):
         }
         self.download_result._start_job(data)
         job_worker.start_watchdog.assert_called_once_with(
-            isotime=None
+            self.scheduler, isotime=None
         )
 
+    def test_start_job_s3(self):
+        job_worker = Mock()
+        job_factory_mock = Mock()
+        job_factory_mock.create_job.return_value = job_worker
+        self.download_result.job_factory = job_factory_mock
+        data = {
+            "id": "123",
+            "download_type": "S3",
+            "utctime": "now"
+        }
+        self.download_result._start_job(data)
+        assert not job_worker.set_build_watcher.called
+
     def test_start_job_at_utctime(self):
         job_worker = Mock()
         job_factory_mock = Mock()
@@ -293,5 +396,24 @@ class TestDownloadService(object):
         }
         self.download_result._start_job(data)
         job_worker.start_watchdog.assert_called_once_with(
-            isotime='2017-10-11T17:50:26+00:00'
+            self.scheduler, isotime='2017-10-11T17:50:26+00:00'
         )
+
+    @patch('mash.services.download.service.time.time')
+    def test_trace_job_start(self, mock_time):
+        mock_time.return_value = 10.0
+        job_worker = Mock()
+        self.download_result.job_factory = Mock()
+        self.download_result.job_factory.create_job.return_value = job_worker
+
+        self.download_result._start_job({
+            'id': '123',
+            'download_type': 'S3',
+            'utctime': 'now',
+            'traceparent': TRACEPARENT
+        })
+        assert self.download_result.job_traces['123'] == (TRACEPARENT, None)
+
+        # The start is recorded once the job runs the download
+        self.download_result._trace_job_start('123')
+        assert self.download_result.job_traces['123'] == (TRACEPARENT, 10.0)
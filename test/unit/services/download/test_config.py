@@ -41,7 +41,14 @@ class TestDownloadConfig(unittest.TestCase):
                         'txt',
                         'json'
                     ]
-                }
+                },
+                'segments': 8,
+                'metalink': True,
+                'max_workers': 10,
+                'poll_interval': 60,
+                'digest_part_size': 16777216,
+                'stream': True,
+                's3_resume': False
             }
         )
 
@@ -66,3 +73,23 @@ class TestDownloadConfig(unittest.TestCase):
                 ]
             }
         )
+
+    def test_get_download_segments(self):
+        assert self.config.get_download_segments() == 8
+        assert self.config.get_download_metalink() is True
+        assert self.config.get_download_max_workers() == 10
+        assert self.config.get_download_poll_interval() == 60
+        assert self.config.get_download_digest_part_size() == 16777216
+        assert self.config.get_download_stream() is True
+        assert self.config.get_download_s3_resume() is False
+
+        empty_config = DownloadConfig(
+            config_file='test/data/empty_mash_config.yaml'
+        )
+        assert empty_config.get_download_segments() == 4
+        assert empty_config.get_download_metalink() is False
+        assert empty_config.get_download_max_workers() == 4
+        assert empty_config.get_download_poll_interval() == 150
+        assert empty_config.get_download_digest_part_size() == 8388608
+        assert empty_config.get_download_stream() is False
+        assert empty_config.get_download_s3_resume() is True
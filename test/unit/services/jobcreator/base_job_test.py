@@ -69,3 +69,21 @@ class TestJobCreatorBaseJob(object):
             'target_account_info': {},
             'raw_image_upload_type': 's3bucket'
         })
+
+    def test_base_job_transfer_priority(self):
+        job = BaseJob({
+            'job_id': '123',
+            'cloud': 'aws',
+            'requesting_user': 'test-user',
+            'last_service': 'test',
+            'utctime': 'now',
+            'image': 'test-image',
+            'cloud_image_name': 'test-cloud-image',
+            'image_description': 'image description',
+            'distro': 'sles',
+            'download_url': 'https://download.here',
+            'target_account_info': {},
+            'transfer_priority': 'high'
+        })
+        assert job.base_message['transfer_priority'] == 'high'
+        assert 'transfer_priority' not in self.job.base_message
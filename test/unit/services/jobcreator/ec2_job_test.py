@@ -1,7 +1,6 @@
 from unittest.mock import patch
 
 from mash.services.jobcreator.ec2_job import EC2Job
-from mash.utils.json_format import JsonFormat
 
 
 @patch.object(EC2Job, 'get_test_regions')
@@ -27,12 +26,12 @@ def test_get_test_message_cleanup(mock_get_test_regions):
     })
 
     message = job.get_test_message()
-    assert JsonFormat.json_loads(message)['test_job']['cleanup_images']
+    assert message['test_job']['cleanup_images']
 
     # Explicit False for no cleanup even on failure
     job.cleanup_images = False
     message = job.get_test_message()
-    assert JsonFormat.json_loads(message)['test_job']['cleanup_images'] is False
+    assert message['test_job']['cleanup_images'] is False
 
 
 @patch.object(EC2Job, 'get_test_regions')
@@ -60,7 +59,7 @@ def test_get_mp_publish_message(mock_get_test_regions):
     job.target_account_info = {'us-east-2': {'account': 'acnt1'}}
 
     message = job.get_publish_message()
-    assert JsonFormat.json_loads(message)['publish_job']['entity_id'] == '123'
+    assert message['publish_job']['entity_id'] == '123'
 
 
 @patch.object(EC2Job, 'get_test_regions')
@@ -89,7 +88,7 @@ def test_get_mp_deprecate_message(mock_get_test_regions):
     job.target_account_info = {'us-east-2': {'account': 'acnt1'}}
 
     message = job.get_deprecate_message()
-    assert JsonFormat.json_loads(message)['deprecate_job']['entity_id'] == '123'
+    assert message['deprecate_job']['entity_id'] == '123'
 
 
 @patch.object(EC2Job, 'get_create_regions')
@@ -117,5 +116,5 @@ def test_get_create_message(mock_get_create_regions):
     })
 
     message = job.get_create_message()
-    assert JsonFormat.json_loads(message)['create_job']['imds_version'] == \
+    assert message['create_job']['imds_version'] == \
         'v2.0'
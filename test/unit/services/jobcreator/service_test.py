@@ -6,6 +6,7 @@ from unittest.mock import MagicMock, Mock, patch
 from mash.services.mash_service import MashService
 from mash.services.jobcreator.service import JobCreatorService
 from mash.utils.json_format import JsonFormat
+from mash.utils.tracing import Tracer
 
 
 class TestJobCreatorService(object):
@@ -21,6 +22,7 @@ class TestJobCreatorService(object):
         self.config = Mock()
         self.config.config_data = None
         self.config.get_service_names.return_value = services
+        self.config.get_shard_count.return_value = 1
         self.channel = Mock()
         self.channel.basic_ack.return_value = None
 
@@ -35,11 +37,19 @@ class TestJobCreatorService(object):
         self.jobcreator = JobCreatorService()
 
         self.jobcreator.log = Mock()
+        self.jobcreator.config = self.config
         self.jobcreator.service_exchange = 'jobcreator'
         self.jobcreator.service_queue = 'service'
         self.jobcreator.job_document_key = 'job_document'
         self.jobcreator.services = services
-
+        self.jobcreator.status_writer = Mock()
+        self.jobcreator.notification_class = Mock()
+        self.span_exporter = Mock()
+        self.jobcreator.tracer = Tracer('jobcreator', self.span_exporter)
+
+    @patch('mash.services.jobcreator.service.os.makedirs')
+    @patch('mash.services.jobcreator.service.StatusWriter')
+    @patch('mash.services.jobcreator.service.NotificationQueue')
     @patch('mash.services.jobcreator.service.EmailNotification')
     @patch('mash.services.jobcreator.service.setup_logfile')
     @patch.object(JobCreatorService, 'start')
@@ -47,14 +57,35 @@ class TestJobCreatorService(object):
     def test_jobcreator_post_init(
         self, mock_bind_queue,
         mock_start, mock_setup_logfile,
-        mock_email_notif
+        mock_email_notif, mock_notif_queue, mock_status_writer,
+        mock_makedirs
     ):
         self.jobcreator.config = self.config
         self.config.get_log_file.return_value = \
             '/var/log/mash/job_creator_service.log'
+        self.config.get_database_api_url.return_value = \
+            'http://localhost:5007/'
+        self.config.get_job_directory.return_value = \
+            '/var/lib/mash/jobcreator_jobs/'
+        self.config.get_status_batch_size.return_value = 100
+        self.config.get_status_flush_interval.return_value = 1
+        self.config.get_notification_queue_size.return_value = 1000
+        self.config.get_notification_digest_window.return_value = 300
 
         self.jobcreator.post_init()
 
+        mock_makedirs.assert_called_once_with(
+            '/var/lib/mash/jobcreator_jobs/', exist_ok=True
+        )
+        mock_status_writer.assert_called_once_with(
+            'http://localhost:5007/',
+            '/var/lib/mash/jobcreator_jobs/status_updates.json',
+            batch_size=100,
+            flush_interval=1,
+            log=self.jobcreator.log
+        )
+        mock_status_writer.return_value.start.assert_called_once_with()
+
         self.config.get_log_file.assert_called_once_with('jobcreator')
         mock_setup_logfile.assert_called_once_with(
             '/var/log/mash/job_creator_service.log'
@@ -63,8 +94,15 @@ class TestJobCreatorService(object):
         mock_bind_queue.call_count == 9
         mock_start.assert_called_once_with()
         assert mock_email_notif.call_count == 1
+        mock_notif_queue.assert_called_once_with(
+            mock_email_notif.return_value,
+            queue_size=1000,
+            digest_window=300,
+            log_callback=self.jobcreator.log
+        )
+        mock_notif_queue.return_value.start.assert_called_once_with()
 
-    @patch.object(JobCreatorService, '_publish')
+    @patch.object(JobCreatorService, '_publish_async')
     def test_jobcreator_handle_service_message(self, mock_publish):
         def check_base_attrs(job_data, cloud=True):
             assert job_data['id'] == '12345678-1234-1234-1234-123456789012'
@@ -124,8 +162,15 @@ class TestJobCreatorService(object):
         message.body = JsonFormat.json_message(job)
         self.jobcreator._handle_service_message(message)
 
+        # All job docs are sent with the trace context of send_job
+        span = self.span_exporter.export.call_args[0][0][0]
+        assert span['name'] == 'send_job'
+        assert span['parent_id'] is None
+        assert mock_publish.mock_calls[0][2]['traceparent'] == \
+            '00-{trace_id}-{span_id}-01'.format(**span)
+
         # Download Job Doc
-        data = json.loads(mock_publish.mock_calls[0][1][2])['download_job']
+        data = mock_publish.mock_calls[0][1][2]['download_job']
         check_base_attrs(data, cloud=False)
         assert data['cloud_architecture'] == 'aarch64'
         assert data['download_url'] == \
@@ -143,12 +188,12 @@ class TestJobCreatorService(object):
                 assert condition['version'] == '8.13.21'
 
         # Upload Job Doc
-        data = json.loads(mock_publish.mock_calls[1][1][2])['upload_job']
+        data = mock_publish.mock_calls[1][1][2]['upload_job']
         check_base_attrs(data)
         assert data['cloud_image_name'] == 'new_image_123'
 
         # Create Job Doc
-        data = json.loads(mock_publish.mock_calls[2][1][2])['create_job']
+        data = mock_publish.mock_calls[2][1][2]['create_job']
         check_base_attrs(data)
         assert data['cloud_architecture'] == 'aarch64'
         assert data['cloud_image_name'] == 'new_image_123'
@@ -165,7 +210,7 @@ class TestJobCreatorService(object):
                 assert info['billing_codes'] is None
 
         # Test preparation Job Doc
-        data = json.loads(mock_publish.mock_calls[3][1][2])[
+        data = mock_publish.mock_calls[3][1][2][
             'test_preparation_job'
         ]
         check_base_attrs(data)
@@ -184,7 +229,7 @@ class TestJobCreatorService(object):
                 assert 'eu-central-1' in info['target_regions']
 
         # Test Job Doc
-        data = json.loads(mock_publish.mock_calls[4][1][2])['test_job']
+        data = mock_publish.mock_calls[4][1][2]['test_job']
         check_base_attrs(data)
         assert data['distro'] == 'sles'
         assert data['instance_type'] == 't2.micro'
@@ -212,7 +257,7 @@ class TestJobCreatorService(object):
                 assert False
 
         # Test cleanup Job Doc
-        data = json.loads(mock_publish.mock_calls[5][1][2])['test_cleanup_job']
+        data = mock_publish.mock_calls[5][1][2]['test_cleanup_job']
         check_base_attrs(data)
         for region, info in data['test_cleanup_regions'].items():
             if region == 'ap-northeast-1':
@@ -231,14 +276,14 @@ class TestJobCreatorService(object):
 
         # Raw Image Upload Job Doc
 
-        data = json.loads(mock_publish.mock_calls[6][1][2])['raw_image_upload_job']
+        data = mock_publish.mock_calls[6][1][2]['raw_image_upload_job']
         check_base_attrs(data)
         assert data['raw_image_upload_type'] == 's3bucket'
         assert data['raw_image_upload_account'] == 'account'
         assert data['raw_image_upload_location'] == 'location'
 
         # Replicate Job Doc
-        data = json.loads(mock_publish.mock_calls[7][1][2])['replicate_job']
+        data = mock_publish.mock_calls[7][1][2]['replicate_job']
         check_base_attrs(data)
 
         for region, info in data['replicate_source_regions'].items():
@@ -253,7 +298,7 @@ class TestJobCreatorService(object):
                 assert 'us-gov-west-1' in info['target_regions']
 
         # Publish Job Doc
-        data = json.loads(mock_publish.mock_calls[8][1][2])['publish_job']
+        data = mock_publish.mock_calls[8][1][2]['publish_job']
         check_base_attrs(data)
         assert data['allow_copy'] == 'none'
         assert data['share_with'] == 'all'
@@ -270,7 +315,7 @@ class TestJobCreatorService(object):
                 assert 'ap-northeast-3' in region['target_regions']
 
         # Deprecate Job Doc
-        data = json.loads(mock_publish.mock_calls[9][1][2])['deprecate_job']
+        data = mock_publish.mock_calls[9][1][2]['deprecate_job']
         check_base_attrs(data)
         assert data['old_cloud_image_name'] == 'old_new_image_123'
 
@@ -285,7 +330,7 @@ class TestJobCreatorService(object):
                 assert 'ap-northeast-2' in region['target_regions']
                 assert 'ap-northeast-3' in region['target_regions']
 
-    @patch.object(JobCreatorService, '_publish')
+    @patch.object(JobCreatorService, '_publish_async')
     def test_jobcreator_handle_service_message_azure(self, mock_publish):
         def check_base_attrs(job_data, cloud=True):
             assert job_data['id'] == '12345678-1234-1234-1234-123456789012'
@@ -307,7 +352,7 @@ class TestJobCreatorService(object):
 
         # Download Job Doc
 
-        data = json.loads(mock_publish.mock_calls[0][1][2])['download_job']
+        data = mock_publish.mock_calls[0][1][2]['download_job']
         check_base_attrs(data, cloud=False)
         assert data['cloud_architecture'] == 'x86_64'
         assert data['download_url'] == \
@@ -324,7 +369,7 @@ class TestJobCreatorService(object):
 
         # Upload Job Doc
 
-        data = json.loads(mock_publish.mock_calls[1][1][2])['upload_job']
+        data = mock_publish.mock_calls[1][1][2]['upload_job']
         check_base_attrs(data)
         assert data['cloud_image_name'] == 'new_image_123'
         assert data['account'] == 'test-azure'
@@ -335,7 +380,7 @@ class TestJobCreatorService(object):
 
         # create Job Doc
 
-        data = json.loads(mock_publish.mock_calls[2][1][2])['create_job']
+        data = mock_publish.mock_calls[2][1][2]['create_job']
         check_base_attrs(data, cloud=False)
         assert data['cloud'] == 'azure_sig'
         assert data['account'] == 'test-azure'
@@ -346,7 +391,7 @@ class TestJobCreatorService(object):
         # Test preparation Job Doc
 
         # Test Job Doc
-        data = json.loads(mock_publish.mock_calls[4][1][2])['test_job']
+        data = mock_publish.mock_calls[4][1][2]['test_job']
         check_base_attrs(data, cloud=False)
         assert data['cloud'] == 'azure_sig'
         assert data['distro'] == 'sles'
@@ -362,7 +407,7 @@ class TestJobCreatorService(object):
 
         # Raw Image Upload Job Doc
 
-        data = json.loads(mock_publish.mock_calls[6][1][2])['raw_image_upload_job']
+        data = mock_publish.mock_calls[6][1][2]['raw_image_upload_job']
         check_base_attrs(data)
         assert data['raw_image_upload_type'] == 's3bucket'
         assert data['raw_image_upload_account'] == 'account'
@@ -372,7 +417,7 @@ class TestJobCreatorService(object):
 
         # Publish Job Doc
 
-        data = json.loads(mock_publish.mock_calls[8][1][2])['publish_job']
+        data = mock_publish.mock_calls[8][1][2]['publish_job']
         check_base_attrs(data, cloud=False)
         assert data['cloud'] == 'azure_sig'
         assert data['offer_id'] == 'sles'
@@ -383,10 +428,10 @@ class TestJobCreatorService(object):
 
         # Deprecate Job Doc
 
-        data = json.loads(mock_publish.mock_calls[9][1][2])['deprecate_job']
+        data = mock_publish.mock_calls[9][1][2]['deprecate_job']
         check_base_attrs(data)
 
-    @patch.object(JobCreatorService, '_publish')
+    @patch.object(JobCreatorService, '_publish_async')
     def test_jobcreator_handle_service_message_gce(self, mock_publish):
         def check_base_attrs(job_data, cloud=True):
             assert job_data['id'] == '12345678-1234-1234-1234-123456789012'
@@ -407,7 +452,7 @@ class TestJobCreatorService(object):
 
         # Download Job Doc
 
-        data = json.loads(mock_publish.mock_calls[0][1][2])['download_job']
+        data = mock_publish.mock_calls[0][1][2]['download_job']
         check_base_attrs(data, cloud=False)
         assert data['cloud_architecture'] == 'x86_64'
         assert data['download_url'] == \
@@ -424,7 +469,7 @@ class TestJobCreatorService(object):
 
         # Upload Job Doc
 
-        data = json.loads(mock_publish.mock_calls[1][1][2])['upload_job']
+        data = mock_publish.mock_calls[1][1][2]['upload_job']
         check_base_attrs(data)
         assert data['cloud_image_name'] == 'new_image_123'
         assert data['region'] == 'us-west1'
@@ -433,7 +478,7 @@ class TestJobCreatorService(object):
 
         # create Job Doc
 
-        data = json.loads(mock_publish.mock_calls[2][1][2])['create_job']
+        data = mock_publish.mock_calls[2][1][2]['create_job']
         check_base_attrs(data)
         assert data['region'] == 'us-west1'
         assert data['account'] == 'test-gce'
@@ -446,7 +491,7 @@ class TestJobCreatorService(object):
 
         # Test Job Doc
 
-        data = json.loads(mock_publish.mock_calls[4][1][2])['test_job']
+        data = mock_publish.mock_calls[4][1][2]['test_job']
         check_base_attrs(data)
         assert data['distro'] == 'sles'
         assert data['instance_type'] == 'n1-standard-1'
@@ -459,7 +504,7 @@ class TestJobCreatorService(object):
         # test cleanup Job Doc
 
         # Raw Image Upload Job Doc
-        data = json.loads(mock_publish.mock_calls[6][1][2])['raw_image_upload_job']
+        data = mock_publish.mock_calls[6][1][2]['raw_image_upload_job']
         check_base_attrs(data)
         assert data['raw_image_upload_type'] == 's3bucket'
         assert data['raw_image_upload_account'] == 'account'
@@ -467,22 +512,22 @@ class TestJobCreatorService(object):
 
         # Replicate Job Doc
 
-        data = json.loads(mock_publish.mock_calls[7][1][2])['replicate_job']
+        data = mock_publish.mock_calls[7][1][2]['replicate_job']
         check_base_attrs(data)
 
         # Publish Job Doc
 
-        data = json.loads(mock_publish.mock_calls[8][1][2])['publish_job']
+        data = mock_publish.mock_calls[8][1][2]['publish_job']
         check_base_attrs(data)
 
         # Deprecate Job Doc
 
-        data = json.loads(mock_publish.mock_calls[9][1][2])['deprecate_job']
+        data = mock_publish.mock_calls[9][1][2]['deprecate_job']
         check_base_attrs(data)
         assert data['old_cloud_image_name'] == 'old_new_image_123'
         assert data['account'] == 'test-gce'
 
-    @patch.object(JobCreatorService, '_publish')
+    @patch.object(JobCreatorService, '_publish_async')
     def test_jobcreator_handle_service_message_oci(self, mock_publish):
         def check_base_attrs(job_data, cloud=True):
             assert job_data['id'] == '12345678-1234-1234-1234-123456789012'
@@ -501,7 +546,7 @@ class TestJobCreatorService(object):
 
         # Download Job Doc
 
-        data = json.loads(mock_publish.mock_calls[0][1][2])['download_job']
+        data = mock_publish.mock_calls[0][1][2]['download_job']
         check_base_attrs(data, cloud=False)
         assert data['cloud_architecture'] == 'x86_64'
         assert data['download_url'] == \
@@ -510,7 +555,7 @@ class TestJobCreatorService(object):
 
         # Upload Job Doc
 
-        data = json.loads(mock_publish.mock_calls[1][1][2])['upload_job']
+        data = mock_publish.mock_calls[1][1][2]['upload_job']
         check_base_attrs(data)
         assert data['cloud_image_name'] == 'new_image_123'
         assert data['region'] == 'us-phoenix-1'
@@ -523,7 +568,7 @@ class TestJobCreatorService(object):
 
         # create Job Doc
 
-        data = json.loads(mock_publish.mock_calls[2][1][2])['create_job']
+        data = mock_publish.mock_calls[2][1][2]['create_job']
         check_base_attrs(data)
         assert data['region'] == 'us-phoenix-1'
         assert data['account'] == 'test-oci'
@@ -532,7 +577,7 @@ class TestJobCreatorService(object):
         # Test preparation job doc
 
         # Test Job Doc
-        data = json.loads(mock_publish.mock_calls[4][1][2])['test_job']
+        data = mock_publish.mock_calls[4][1][2]['test_job']
         check_base_attrs(data)
         assert data['distro'] == 'sles'
         assert data['instance_type'] == 'VM.Standard2.1'
@@ -543,23 +588,23 @@ class TestJobCreatorService(object):
         # test cleanup Job doc
 
         # Raw Image Upload Job Doc
-        data = json.loads(mock_publish.mock_calls[6][1][2])['raw_image_upload_job']
+        data = mock_publish.mock_calls[6][1][2]['raw_image_upload_job']
         check_base_attrs(data)
         assert data['raw_image_upload_type'] is None
 
         # Replicate Job Doc
 
-        data = json.loads(mock_publish.mock_calls[7][1][2])['replicate_job']
+        data = mock_publish.mock_calls[7][1][2]['replicate_job']
         check_base_attrs(data)
 
         # Publish Job Doc
 
-        data = json.loads(mock_publish.mock_calls[8][1][2])['publish_job']
+        data = mock_publish.mock_calls[8][1][2]['publish_job']
         check_base_attrs(data)
 
         # Deprecate Job Doc
 
-        data = json.loads(mock_publish.mock_calls[9][1][2])['deprecate_job']
+        data = mock_publish.mock_calls[9][1][2]['deprecate_job']
         check_base_attrs(data)
         assert data['old_cloud_image_name'] == 'old_new_image_123'
         assert data['account'] == 'test-oci'
@@ -580,12 +625,7 @@ class TestJobCreatorService(object):
         )
 
     @patch.object(JobCreatorService, 'send_notification')
-    @patch('mash.services.jobcreator.service.handle_request')
-    def test_jobcreator_handle_status_message(
-        self,
-        mock_handle_request,
-        mock_send_notif
-    ):
+    def test_jobcreator_handle_status_message(self, mock_send_notif):
         data = {
             'publish_status': {
                 'id': '12345678-1234-1234-1234-123456789012',
@@ -602,13 +642,14 @@ class TestJobCreatorService(object):
 
         self.jobcreator._handle_status_message(message)
         assert mock_send_notif.call_count == 1
-
-        # Request failed
-        mock_handle_request.side_effect = Exception('Not found')
-        self.jobcreator._handle_status_message(message)
-        self.jobcreator.log.error.assert_called_once_with(
-            'Job status update failed: Not found'
-        )
+        self.jobcreator.status_writer.add.assert_called_once_with({
+            'id': '12345678-1234-1234-1234-123456789012',
+            'state': 'running',
+            'status': 'success',
+            'errors': [],
+            'current_service': 'deprecate',
+            'prev_service': 'publish'
+        })
 
         # Fake service
         data['fake_status'] = data['publish_status']
@@ -669,6 +710,8 @@ class TestJobCreatorService(object):
 
         self.jobcreator.stop()
         self.channel.stop_consuming.assert_called_once_with()
+        self.jobcreator.status_writer.stop.assert_called_once_with()
+        self.jobcreator.notification_class.stop.assert_called_once_with()
         mock_close_connection.assert_called_once_with()
 
     def test_create_notification_content(self):
@@ -715,7 +758,7 @@ class TestJobCreatorService(object):
         )
         assert notif_class.send_notification.call_count == 1
 
-    @patch.object(JobCreatorService, '_publish')
+    @patch.object(JobCreatorService, '_publish_async')
     def test_jobcreator_handle_service_message_aliyun(self, mock_publish):
         def check_base_attrs(job_data, cloud=True):
             assert job_data['id'] == '12345678-1234-1234-1234-123456789012'
@@ -734,7 +777,7 @@ class TestJobCreatorService(object):
 
         # Download Job Doc
 
-        data = json.loads(mock_publish.mock_calls[0][1][2])['download_job']
+        data = mock_publish.mock_calls[0][1][2]['download_job']
         check_base_attrs(data, cloud=False)
         assert data['cloud_architecture'] == 'x86_64'
         assert data['download_url'] == \
@@ -743,7 +786,7 @@ class TestJobCreatorService(object):
 
         # Upload Job Doc
 
-        data = json.loads(mock_publish.mock_calls[1][1][2])['upload_job']
+        data = mock_publish.mock_calls[1][1][2]['upload_job']
         check_base_attrs(data)
         assert data['cloud_image_name'] == 'new_image_123'
         assert data['region'] == 'cn-beijing'
@@ -752,7 +795,7 @@ class TestJobCreatorService(object):
 
         # create Job Doc
 
-        data = json.loads(mock_publish.mock_calls[2][1][2])['create_job']
+        data = mock_publish.mock_calls[2][1][2]['create_job']
         check_base_attrs(data)
         assert data['region'] == 'cn-beijing'
         assert data['account'] == 'test-aliyun'
@@ -763,7 +806,7 @@ class TestJobCreatorService(object):
 
         # Test Job Doc
 
-        data = json.loads(mock_publish.mock_calls[4][1][2])['test_job']
+        data = mock_publish.mock_calls[4][1][2]['test_job']
         check_base_attrs(data)
         assert data['distro'] == 'sles'
         assert data['instance_type'] == 'ecs.t5-lc1m1.small'
@@ -774,26 +817,26 @@ class TestJobCreatorService(object):
         # Test cleanup Job Doc
 
         # Raw Image Upload Job Doc
-        data = json.loads(mock_publish.mock_calls[6][1][2])['raw_image_upload_job']
+        data = mock_publish.mock_calls[6][1][2]['raw_image_upload_job']
         check_base_attrs(data)
         assert data['raw_image_upload_type'] == 's3bucket'
 
         # Replicate Job Doc
 
-        data = json.loads(mock_publish.mock_calls[7][1][2])['replicate_job']
+        data = mock_publish.mock_calls[7][1][2]['replicate_job']
         check_base_attrs(data)
         assert data['account'] == 'test-aliyun'
 
         # Publish Job Doc
 
-        data = json.loads(mock_publish.mock_calls[8][1][2])['publish_job']
+        data = mock_publish.mock_calls[8][1][2]['publish_job']
         check_base_attrs(data)
         assert data['account'] == 'test-aliyun'
         assert data['launch_permission'] == 'HIDDEN'
 
         # Deprecate Job Doc
 
-        data = json.loads(mock_publish.mock_calls[9][1][2])['deprecate_job']
+        data = mock_publish.mock_calls[9][1][2]['deprecate_job']
         check_base_attrs(data)
         assert data['old_cloud_image_name'] == 'old_new_image_123'
         assert data['account'] == 'test-aliyun'
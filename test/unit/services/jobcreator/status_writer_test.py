@@ -0,0 +1,179 @@
+import json
+import os
+
+from unittest.mock import Mock, patch
+
+from mash.mash_exceptions import MashRequestException
+from mash.services.jobcreator.status_writer import StatusWriter
+
+
+class TestStatusWriter(object):
+    def setup_method(self):
+        self.log = Mock()
+
+    def get_writer(self, tmp_path, batch_size=3):
+        return StatusWriter(
+            'http://localhost:5007/',
+            os.path.join(str(tmp_path), 'status_updates.json'),
+            batch_size=batch_size,
+            flush_interval=0.01,
+            log=self.log
+        )
+
+    @patch('mash.services.jobcreator.status_writer.handle_request')
+    def test_flush_batches(self, mock_handle_request, tmp_path):
+        mock_handle_request.return_value.json.return_value = {'errors': {}}
+        writer = self.get_writer(tmp_path)
+
+        for job_id, status in (
+            ('1', 'running'), ('2', 'running'), ('1', 'failed'),
+            ('3', 'running'), ('4', 'running')
+        ):
+            writer.add({'id': job_id, 'status': status})
+
+        assert writer.flush()
+
+        # Updates of a job are sent together and in order
+        batches = [
+            call[1]['job_data'] for call in mock_handle_request.call_args_list
+        ]
+        assert batches == [
+            [
+                {'id': '1', 'status': 'running'},
+                {'id': '1', 'status': 'failed'},
+                {'id': '2', 'status': 'running'}
+            ],
+            [
+                {'id': '3', 'status': 'running'},
+                {'id': '4', 'status': 'running'}
+            ]
+        ]
+        mock_handle_request.assert_called_with(
+            'http://localhost:5007/', 'jobs/bulk', 'put',
+            job_data=batches[1]
+        )
+
+    @patch('mash.services.jobcreator.status_writer.handle_request')
+    def test_flush_failed(self, mock_handle_request, tmp_path):
+        mock_handle_request.side_effect = Exception('Unavailable')
+        writer = self.get_writer(tmp_path)
+
+        writer.add({'id': '1', 'status': 'running'})
+        assert not writer.flush()
+
+        self.log.warning.assert_called_once_with(
+            'Job status update failed, 1 updates pending: Unavailable'
+        )
+        with open(writer.spill_file) as spill_file:
+            assert json.load(spill_file) == [{'id': '1', 'status': 'running'}]
+
+        # A restarted writer sends the spilled updates
+        writer = self.get_writer(tmp_path)
+        mock_handle_request.side_effect = None
+        mock_handle_request.return_value.json.return_value = {
+            'errors': {'1': 'Job does not exist.'}
+        }
+        writer.add({'id': '1', 'status': 'success'})
+        assert writer.flush()
+
+        mock_handle_request.assert_called_with(
+            'http://localhost:5007/', 'jobs/bulk', 'put',
+            job_data=[
+                {'id': '1', 'status': 'running'},
+                {'id': '1', 'status': 'success'}
+            ]
+        )
+        self.log.warning.assert_called_with(
+            'Job status update failed: Job does not exist.',
+            extra={'job_id': '1'}
+        )
+        assert not os.path.exists(writer.spill_file)
+
+    @patch('mash.services.jobcreator.status_writer.handle_request')
+    def test_flush_rejected(self, mock_handle_request, tmp_path):
+        def handle_request(url, endpoint, method, job_data):
+            if {'id': '2', 'status': 'bad'} in job_data:
+                raise MashRequestException('Invalid job status.', 400)
+
+            response = Mock()
+            response.json.return_value = {'errors': {}}
+            return response
+
+        mock_handle_request.side_effect = handle_request
+        writer = self.get_writer(tmp_path, batch_size=4)
+
+        for job_id, status in (
+            ('1', 'running'), ('2', 'bad'), ('3', 'running'), ('4', 'running')
+        ):
+            writer.add({'id': job_id, 'status': status})
+
+        assert writer.flush()
+
+        # Only the rejected update is dropped
+        sent = [
+            call[1]['job_data'] for call in mock_handle_request.call_args_list
+        ]
+        assert sent[1:] == [
+            [{'id': '1', 'status': 'running'}, {'id': '2', 'status': 'bad'}],
+            [{'id': '1', 'status': 'running'}],
+            [{'id': '2', 'status': 'bad'}],
+            [{'id': '3', 'status': 'running'}, {'id': '4', 'status': 'running'}]
+        ]
+        self.log.error.assert_called_once_with(
+            'Job status update rejected: Invalid job status.',
+            extra={'job_id': '2'}
+        )
+        assert writer._count == 0
+
+    @patch('mash.services.jobcreator.status_writer.handle_request')
+    def test_flush_server_error(self, mock_handle_request, tmp_path):
+        mock_handle_request.side_effect = MashRequestException(
+            'Internal error', 500
+        )
+        writer = self.get_writer(tmp_path)
+        writer.max_attempts = 2
+        writer.add({'id': '1', 'status': 'running'})
+
+        assert not writer.flush()
+        assert writer._count == 1
+        assert writer._get_wait() == 0.02
+
+        # The batch is dropped after max_attempts
+        assert writer.flush()
+        assert writer._count == 0
+        assert writer._get_wait() == 0.01
+        self.log.error.assert_called_once_with(
+            'Job status update rejected: Internal error',
+            extra={'job_id': '1'}
+        )
+
+    @patch('mash.services.jobcreator.status_writer.handle_request')
+    def test_flush_unavailable(self, mock_handle_request, tmp_path):
+        mock_handle_request.side_effect = MashRequestException(
+            'Service unavailable', 503
+        )
+        writer = self.get_writer(tmp_path)
+        writer.max_attempts = 1
+        writer.max_backoff = 0.05
+        writer.add({'id': '1', 'status': 'running'})
+
+        for attempt in range(4):
+            assert not writer.flush()
+
+        # Updates are kept while the API is unavailable
+        assert writer._count == 1
+        assert writer._get_wait() == 0.05
+
+    @patch('mash.services.jobcreator.status_writer.handle_request')
+    def test_start_stop(self, mock_handle_request, tmp_path):
+        mock_handle_request.return_value.json.return_value = {}
+        writer = self.get_writer(tmp_path, batch_size=1)
+        writer.start()
+
+        writer.add({'id': '1', 'status': 'running'})
+        writer.stop()
+
+        mock_handle_request.assert_called_once_with(
+            'http://localhost:5007/', 'jobs/bulk', 'put',
+            job_data=[{'id': '1', 'status': 'running'}]
+        )
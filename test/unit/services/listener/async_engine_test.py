@@ -0,0 +1,234 @@
+import asyncio
+
+from unittest.mock import AsyncMock, Mock, patch
+
+from amqpstorm import AMQPError
+from apscheduler import events
+from pytest import raises
+
+from mash.mash_exceptions import MashListenerServiceException
+from mash.services.async_listener_engine import (
+    AsyncListenerEngine,
+    AsyncMessage,
+    AsyncPublisher
+)
+
+
+class CoroutineJob(object):
+    def __init__(self):
+        self.process_job_async = AsyncMock()
+
+    async def run_job_async(self):
+        pass
+
+
+class TestAsyncListenerEngine(object):
+    def setup_method(self):
+        self.service = Mock()
+        self.service.amqp_host = 'localhost'
+        self.service.amqp_user = 'guest'
+        self.service.amqp_pass = 'guest'
+        self.service.service_prefetch_count = 5
+        self.service.listener_prefetch_count = 100
+        self.service.service_queue = 'service'
+        self.service.listener_queue = 'listener'
+        self.service.service_exchange = 'replicate'
+        self.service.prev_service = 'test'
+        self.service._get_queue_name.side_effect = \
+            lambda exchange, name: '{0}.{1}'.format(exchange, name)
+        self.service.jobs = {}
+
+        self.engine = AsyncListenerEngine(self.service, 2)
+
+    @patch('mash.services.async_listener_engine.aio_pika', None)
+    def test_engine_requires_aio_pika(self):
+        with raises(MashListenerServiceException):
+            AsyncListenerEngine(self.service, 2)
+
+    @patch('mash.services.async_listener_engine.aio_pika')
+    def test_run(self, mock_aio_pika):
+        connection = AsyncMock()
+        channel = AsyncMock()
+        queue = AsyncMock()
+        queue.consume.return_value = 'tag'
+        connection.channel.return_value = channel
+        channel.declare_queue.return_value = queue
+        mock_aio_pika.connect_robust = AsyncMock(return_value=connection)
+
+        # Job admitted and stop requested before the loop started
+        self.engine._start_job = Mock()
+        self.engine.schedule('1')
+        self.engine.stop()
+        self.engine.run()
+
+        self.engine._start_job.assert_called_once_with('1')
+
+        mock_aio_pika.connect_robust.assert_awaited_once_with(
+            host='localhost', login='guest', password='guest'
+        )
+        connection.channel.assert_any_await(
+            publisher_confirms=True, on_return_raises=True
+        )
+        assert self.engine.publisher.channel == channel
+        channel.set_qos.assert_any_await(prefetch_count=5)
+        channel.set_qos.assert_any_await(prefetch_count=100)
+        channel.declare_queue.assert_any_await(
+            'replicate.service', durable=True
+        )
+        channel.declare_queue.assert_any_await(
+            'test.listener', durable=True
+        )
+        assert queue.cancel.await_count == 2
+        connection.close.assert_awaited_once_with()
+
+    def test_consume_callback(self):
+        message = Mock()
+        message.body = b'{"id": "1"}'
+        message.content_type = 'application/json'
+        message.content_encoding = None
+        message.headers = {'job_id': '1'}
+        callback = Mock()
+
+        async def consume():
+            self.engine.loop = asyncio.get_running_loop()
+            self.engine.handler_executor = None
+            channel = AsyncMock()
+            queue = AsyncMock()
+            channel.declare_queue.return_value = queue
+            connection = AsyncMock()
+            connection.channel.return_value = channel
+
+            await self.engine._consume(
+                connection, 5, 'service', 'replicate', callback
+            )
+            on_message = queue.consume.await_args[0][0]
+            await on_message(message)
+
+        asyncio.run(consume())
+
+        wrapped = callback.call_args[0][0]
+        assert wrapped.body == b'{"id": "1"}'
+        assert wrapped.properties['headers'] == {'job_id': '1'}
+
+    def test_run_blocking_job(self):
+        job = Mock()
+        self.service.jobs['1'] = job
+
+        async def run_job():
+            self.engine.loop = asyncio.get_running_loop()
+            self.engine.stopping = asyncio.Event()
+            self.engine._start_job('1')
+            await asyncio.gather(*self.engine.tasks)
+
+        asyncio.run(run_job())
+
+        self.service._start_job.assert_called_once_with('1')
+        event = self.service._process_job_result.call_args[0][0]
+        assert event.code == events.EVENT_JOB_EXECUTED
+        assert event.job_id == '1'
+        assert event.exception is None
+
+    def test_run_coroutine_job(self):
+        job = CoroutineJob()
+        job.process_job_async.side_effect = Exception('Broken!')
+        self.service.jobs['1'] = job
+
+        async def run_job():
+            self.engine.loop = asyncio.get_running_loop()
+            await self.engine._run_job('1')
+
+        asyncio.run(run_job())
+
+        job.process_job_async.assert_awaited_once_with()
+        assert not self.service._start_job.called
+        event = self.service._process_job_result.call_args[0][0]
+        assert event.code == events.EVENT_JOB_ERROR
+        assert str(event.exception) == 'Broken!'
+
+    def test_start_job_stopping(self):
+        async def start_job():
+            self.engine.loop = asyncio.get_running_loop()
+            self.engine.stopping = asyncio.Event()
+            self.engine.stopping.set()
+            self.engine._start_job('1')
+
+        asyncio.run(start_job())
+        assert not self.engine.tasks
+
+    def test_schedule(self):
+        self.engine.schedule('1')
+        assert self.engine.pending_jobs == ['1']
+
+        self.engine.loop = Mock()
+        self.engine.schedule('1')
+        self.engine.loop.call_soon_threadsafe.assert_called_once_with(
+            self.engine._start_job, '1'
+        )
+
+
+class TestAsyncPublisher(object):
+    def setup_method(self):
+        self.engine = Mock()
+        self.publisher = AsyncPublisher(self.engine)
+        self.exchange = AsyncMock()
+        self.publisher.channel = AsyncMock()
+        self.publisher.channel.get_exchange.return_value = self.exchange
+        self.publisher.channel.default_exchange = AsyncMock()
+
+    def publish(self, *args, **kwargs):
+        async def publish():
+            self.engine.loop = asyncio.get_running_loop()
+            future = self.publisher.publish(*args, **kwargs)
+            return await asyncio.wrap_future(future)
+
+        return asyncio.run(publish())
+
+    def test_publish(self):
+        assert self.publish(
+            'replicate',
+            'listener_msg',
+            '{"id": "1"}',
+            properties={
+                'content_type': 'application/json',
+                'delivery_mode': 2,
+                'expiration': '30000',
+                'headers': {'job_id': '1'}
+            }
+        )
+
+        self.publisher.channel.get_exchange.assert_awaited_once_with(
+            'replicate', ensure=False
+        )
+        message = self.exchange.publish.await_args[0][0]
+        assert message.body == b'{"id": "1"}'
+        assert message.content_type == 'application/json'
+        assert message.delivery_mode == 2
+        assert message.expiration == 30
+        assert message.headers == {'job_id': '1'}
+        assert self.exchange.publish.await_args[0][1] == 'listener_msg'
+        assert self.exchange.publish.await_args[1] == {'mandatory': True}
+
+    def test_publish_default_exchange(self):
+        self.publish('', 'test.listener.unknown', b'{}')
+
+        assert not self.publisher.channel.get_exchange.called
+        self.publisher.channel.default_exchange.publish.assert_awaited_once()
+
+    def test_publish_returned(self):
+        self.exchange.publish.side_effect = Exception('Returned!')
+
+        with raises(AMQPError):
+            self.publish('replicate', 'listener_msg', b'{}')
+
+
+def test_async_message_ack():
+    message = Mock()
+    message.ack = AsyncMock()
+
+    async def ack():
+        loop = asyncio.get_running_loop()
+        wrapped = AsyncMessage(message, loop)
+        await loop.run_in_executor(None, wrapped.ack)
+
+    asyncio.run(ack())
+    message.ack.assert_awaited_once_with()
@@ -1,16 +1,24 @@
 import pytest
 
-from unittest.mock import call, MagicMock, Mock, patch
+from unittest.mock import ANY, call, MagicMock, Mock, patch
 
 from amqpstorm import AMQPError
 
 from apscheduler.jobstores.base import ConflictingIdError
 
+from mash.services.admission_controller import AdmissionController
 from mash.services.base_defaults import Defaults
 from mash.services.mash_service import MashService
-from mash.services.listener_service import ListenerService
+from mash.services.listener_service import ListenerService, ParkedMessage
+from mash.services.retry_policy import RetryPolicy
+from mash.utils.metrics import MetricsRegistry
+from mash.utils.tracing import Tracer, parse_traceparent
 from mash.mash_exceptions import MashListenerServiceException
 from mash.utils.json_format import JsonFormat
+from mash.utils.mash_utils import get_shard
+from mash.utils.message_format import MessageFormat
+
+TRACEPARENT = '00-0123456789abcdef0123456789abcdef-0123456789abcdef-01'
 
 
 class TestListenerService(object):
@@ -27,6 +35,16 @@ class TestListenerService(object):
         ]
         self.config.get_job_directory.return_value = '/var/lib/mash/replicate_jobs/'
         self.config.get_base_thread_pool_count.return_value = 10
+        self.config.get_shard_count.return_value = 1
+        self.config.get_job_concurrency_limits.return_value = {}
+        self.config.get_listener_engine.return_value = 'thread'
+        self.config.get_retry_policy.return_value = {}
+        self.config.get_ec2_api_rate.return_value = 20
+        self.config.get_ec2_api_burst.return_value = 40
+        self.config.get_max_ec2_attempts.return_value = 10
+        self.config.get_bandwidth_limit.return_value = None
+        self.config.get_job_store.return_value = 'file'
+        self.job_store = Mock()
 
         self.channel = Mock()
         self.channel.basic_ack.return_value = None
@@ -65,13 +83,23 @@ class TestListenerService(object):
         self.service.jwt_secret = 'a-secret'
         self.service.jwt_algorithm = 'HS256'
         self.service.jobs = {}
+        self.service.job_traces = {}
+        self.service.message_format = MessageFormat()
         self.service.log = Mock()
+        self.span_exporter = Mock()
+        self.service.tracer = Tracer('replicate', self.span_exporter)
 
         self.service.channel = self.channel
         self.service.config = self.config
+        self.service.job_store = self.job_store
 
         scheduler = Mock()
         self.service.scheduler = scheduler
+        self.service.admission = AdmissionController(
+            {}, self.service._admit_job, self.service._park_job
+        )
+        self.service.metrics = MetricsRegistry()
+        self.service._setup_job_metrics(10)
 
         self.service.service_exchange = 'replicate'
         self.service.service_queue = 'service'
@@ -80,17 +108,20 @@ class TestListenerService(object):
         self.service.listener_msg_key = 'listener_msg'
         self.service.prev_service = 'test_cleanup'
         self.service.custom_args = None
+        self.service.sharded = False
+        self.service.async_engine = None
+        self.service.retry_policy = RetryPolicy()
         self.service.listener_msg_args = ['cloud_image_name']
         self.service.status_msg_args = ['cloud_image_name']
 
     @patch('mash.services.listener_service.os.makedirs')
     @patch.object(ListenerService, 'bind_queue')
-    @patch('mash.services.listener_service.restart_jobs')
+    @patch('mash.services.listener_service.get_job_store')
     @patch('mash.services.listener_service.setup_logfile')
     @patch.object(ListenerService, 'start')
     def test_service_post_init(
         self, mock_start,
-        mock_setup_logfile, mock_restart_jobs,
+        mock_setup_logfile, mock_get_job_store,
         mock_bind_queue, mock_makedirs
     ):
         self.service.config = self.config
@@ -107,8 +138,31 @@ class TestListenerService(object):
         }
         self.config.get_job_directory.reset_mock()
         mock_makedirs.reset_mock()
+        mock_get_job_store.reset_mock()
 
-        self.service.post_init()
+        job = Mock()
+        job.id = '1'
+        job.get_job_id.return_value = {'job_id': '1'}
+        self.service.custom_args['job_factory'].create_job.return_value = job
+        job_config = {
+            'id': '1',
+            'job_file': 'job-1.json',
+            'listener_msg': {'body': '', 'properties': {}}
+        }
+        mock_get_job_store.return_value.iter_jobs.return_value = [job_config]
+
+        self.config.get_service_prefetch_count.return_value = 10
+        self.config.get_listener_prefetch_count.return_value = None
+
+        with patch.object(
+            ListenerService, '_restore_parked_job'
+        ) as mock_restore_parked_job:
+            self.service.post_init()
+
+        mock_restore_parked_job.assert_called_once_with(job_config)
+
+        assert self.service.service_prefetch_count == 10
+        assert self.service.listener_prefetch_count == 10
 
         self.config.get_job_directory.assert_called_once_with('replicate')
         mock_makedirs.assert_called_once_with(
@@ -124,21 +178,21 @@ class TestListenerService(object):
             call('replicate', 'job_document', 'service'),
             call('test_cleanup', 'listener_msg', 'listener')
         ])
-        mock_restart_jobs.assert_called_once_with(
-            '/var/lib/mash/replicate_jobs/',
-            self.service._add_job
+        mock_get_job_store.assert_called_once_with(
+            'file', '/var/lib/mash/replicate_jobs/'
         )
+        assert self.service.jobs['1'] == job
         mock_start.assert_called_once_with()
 
     @patch('mash.services.listener_service.os.makedirs')
     @patch.object(Defaults, 'get_job_directory')
     @patch.object(ListenerService, 'bind_queue')
-    @patch('mash.services.listener_service.restart_jobs')
+    @patch('mash.services.listener_service.get_job_store')
     @patch('mash.services.listener_service.setup_logfile')
     @patch.object(ListenerService, 'start')
     def test_service_post_init_custom_args(
         self, mock_start,
-        mock_setup_logfile, mock_restart_jobs,
+        mock_setup_logfile, mock_get_job_store,
         mock_bind_queue, mock_get_job_directory, mock_makedirs
     ):
         mock_makedirs.return_value = True
@@ -153,6 +207,112 @@ class TestListenerService(object):
 
         self.service.post_init()
 
+    @patch('mash.services.listener_service.signal.signal')
+    @patch('mash.services.listener_service.os.makedirs')
+    @patch.object(ListenerService, 'bind_queue')
+    @patch('mash.services.listener_service.get_job_store')
+    @patch('mash.services.listener_service.setup_logfile')
+    @patch.object(ListenerService, 'start')
+    def test_service_post_init_sharded(
+        self, mock_start, mock_setup_logfile, mock_get_job_store,
+        mock_bind_queue, mock_makedirs, mock_signal
+    ):
+        self.config.get_shard_count.return_value = 4
+        self.config.get_shard_id.return_value = 2
+        self.service.custom_args = {'job_factory': Mock()}
+
+        self.service.post_init()
+
+        assert self.service.sharded
+        assert self.service.service_queue == 'service.2'
+        assert self.service.listener_queue == 'listener.2'
+        mock_makedirs.assert_called_once_with(
+            '/var/lib/mash/replicate_jobs/shard.2/', exist_ok=True
+        )
+        mock_bind_queue.assert_has_calls([
+            call('replicate', 'job_document.2', 'service.2'),
+            call('test_cleanup', 'listener_msg.2', 'listener.2')
+        ])
+        self.channel.queue.declare.assert_has_calls([
+            call(
+                queue='test_cleanup.listener.2.unknown',
+                durable=True,
+                arguments={
+                    'x-message-ttl': 60000,
+                    'x-dead-letter-exchange': '',
+                    'x-dead-letter-routing-key': 'test_cleanup.listener.2'
+                }
+            ),
+            call(
+                queue='test_cleanup.listener.2.dead',
+                durable=True,
+                arguments={'x-message-ttl': 604800000}
+            )
+        ])
+        mock_get_job_store.assert_called_once_with(
+            'file', '/var/lib/mash/replicate_jobs/shard.2/'
+        )
+
+        # The shard id must be a shard of the service
+        self.config.get_shard_id.return_value = 4
+        with pytest.raises(MashListenerServiceException):
+            self.service.post_init()
+
+    def test_sharded_routing(self):
+        self.config.get_shard_count.side_effect = \
+            lambda service: 4 if service == 'replicate' else 1
+        self.service.publisher = Mock()
+        self.service.service_exchange = 'test_cleanup'
+        job_ids = [str(job_id) for job_id in range(20)]
+
+        for job_id in job_ids:
+            # Job documents are published on the replicate exchange,
+            # listener messages on the exchange of the previous service.
+            job_document_key = self.service.get_shard_routing_key(
+                'replicate', 'job_document', job_id
+            )
+            self.service.publish_job_result(
+                'test_cleanup', {'id': job_id}, job_id
+            )
+            listener_msg_key = \
+                self.service.publisher.publish.call_args[0][1]
+
+            shard = get_shard(job_id, 4)
+            assert job_document_key == 'job_document.{0}'.format(shard)
+            assert listener_msg_key == 'listener_msg.{0}'.format(shard)
+
+        # The jobs are spread over the shards
+        assert len({get_shard(job_id, 4) for job_id in job_ids}) == 4
+
+    @patch('mash.services.listener_service.AsyncListenerEngine')
+    @patch('mash.services.listener_service.os.makedirs')
+    @patch.object(ListenerService, 'bind_queue')
+    @patch('mash.services.listener_service.get_job_store')
+    @patch('mash.services.listener_service.setup_logfile')
+    @patch.object(ListenerService, 'start')
+    def test_service_post_init_engine(
+        self, mock_start, mock_setup_logfile, mock_get_job_store,
+        mock_bind_queue, mock_makedirs, mock_engine
+    ):
+        engine = Mock()
+        mock_engine.return_value = engine
+        self.config.get_listener_engine.return_value = 'asyncio'
+        self.service.custom_args = {'job_factory': Mock()}
+
+        self.service.post_init()
+
+        assert self.service.async_engine == engine
+        assert self.service.publisher == engine.publisher
+        mock_engine.assert_called_once_with(self.service, 10)
+        self.config.get_listener_engine.assert_called_once_with('replicate')
+
+        self.service.custom_args = {
+            'job_factory': Mock(),
+            'engine': 'fibers'
+        }
+        with pytest.raises(MashListenerServiceException):
+            self.service.post_init()
+
     @patch.object(ListenerService, '_delete_job')
     @patch.object(ListenerService, '_publish_message')
     def test_service_cleanup_job(
@@ -164,6 +324,7 @@ class TestListenerService(object):
         job.utctime = 'now'
         job.get_job_id.return_value = {'job_id': '1'}
         job.get_status_message.return_value = {'id': '1', 'status': 'failed'}
+        job.traceparent = TRACEPARENT
 
         self.service.jobs['1'] = job
         self.service._cleanup_job('1')
@@ -173,11 +334,20 @@ class TestListenerService(object):
             extra={'job_id': '1'}
         )
         mock_delete_job.assert_called_once_with('1')
-        msg = {"replicate_result": {"id": "1", "status": "failed"}}
-        mock_publish_message.assert_called_once_with(
-            JsonFormat.json_message(msg),
-            '1'
-        )
+
+        # Status is published with the trace context of the publish span
+        span = self.span_exporter.export.call_args[0][0][0]
+        assert span['name'] == 'publish'
+        assert (span['trace_id'], span['parent_id']) == \
+            parse_traceparent(TRACEPARENT)
+
+        traceparent = '00-{trace_id}-{span_id}-01'.format(**span)
+        msg = {
+            "replicate_result": {
+                "id": "1", "status": "failed", "traceparent": traceparent
+            }
+        }
+        mock_publish_message.assert_called_once_with(msg, '1', traceparent)
 
     def test_service_add_job_exists(self):
         job = Mock()
@@ -192,8 +362,7 @@ class TestListenerService(object):
             extra={'job_id': job.id}
         )
 
-    @patch('mash.services.listener_service.persist_json')
-    def test_service_add_job(self, mock_persist_json):
+    def test_service_add_job(self):
         job = Mock()
         job.id = '1'
         job.get_job_id.return_value = {'job_id': '1'}
@@ -202,11 +371,16 @@ class TestListenerService(object):
         factory.create_job.return_value = job
 
         self.service.job_factory = factory
-        self.service.job_directory = 'tmp-dir/'
+
+        def add(job_config):
+            job_config['job_file'] = 'tmp-dir/job-1.json'
+
+        self.job_store.add.side_effect = add
 
         job_config = {'id': '1', 'cloud': 'ec2'}
         self.service._add_job(job_config)
 
+        self.job_store.add.assert_called_once_with(job_config)
         assert job.log_callback == self.service.log
         assert job.job_file == 'tmp-dir/job-1.json'
         self.service.log.info.assert_called_once_with(
@@ -214,6 +388,10 @@ class TestListenerService(object):
             extra={'job_id': '1'}
         )
 
+        metrics = self.service.metrics.render()
+        assert 'mash_jobs_received_total 1.0' in metrics
+        assert 'mash_jobs 1.0' in metrics
+
     def test_service_add_job_exception(self):
         job_config = {'id': '1', 'cloud': 'ec2'}
         factory = Mock()
@@ -226,9 +404,8 @@ class TestListenerService(object):
             'Invalid job: Cannot create job.'
         )
 
-    @patch('mash.services.listener_service.remove_file')
     @patch.object(ListenerService, 'unbind_queue')
-    def test_service_delete_job(self, mock_unbind_queue, mock_remove_file):
+    def test_service_delete_job(self, mock_unbind_queue):
         job = Mock()
         job.id = '1'
         job.job_file = 'job-test.json'
@@ -246,7 +423,7 @@ class TestListenerService(object):
         )
 
         assert '1' not in self.service.jobs
-        mock_remove_file.assert_called_once_with('job-test.json')
+        self.job_store.delete.assert_called_once_with('1')
 
     def test_service_delete_invalid_job(self):
         self.service._delete_job('1')
@@ -261,6 +438,7 @@ class TestListenerService(object):
         job = Mock()
         job.id = '1'
         job.utctime = 'now'
+        job.streaming = False
         self.service.jobs['1'] = job
 
         self.message.body = JsonFormat.json_message({
@@ -276,6 +454,66 @@ class TestListenerService(object):
         assert self.service.jobs['1'].listener_msg == self.message
         mock_schedule_job.assert_called_once_with('1')
 
+    @patch('mash.services.listener_service.time.time')
+    @patch.object(ListenerService, '_publish_message')
+    @patch.object(ListenerService, '_delete_job')
+    def test_service_trace_job(
+        self, mock_delete_job, mock_publish_message, mock_time
+    ):
+        job = Mock()
+        job.id = '1'
+        job.cloud = 'ec2'
+        job.status = 'success'
+        job.traceparent = TRACEPARENT
+        job.get_job_id.side_effect = lambda: {'job_id': '1'}
+        job.get_status_message.return_value = {'id': '1'}
+        job.get_accounts_and_regions.return_value = (set(), set())
+        job.streaming = False
+        self.service.jobs['1'] = job
+
+        previous_span = '00-0123456789abcdef0123456789abcdef-' \
+            'fedcba9876543210-01'
+        self.message.properties = {
+            'headers': {'traceparent': previous_span, 'sent_at': 95.0}
+        }
+        self.message.body = JsonFormat.json_message({
+            "test_cleanup_result": {"id": "1", "status": "success"}
+        })
+
+        mock_time.side_effect = [100.0, 101.0, 103.0, 110.0, 111.0, 112.0]
+        self.service._handle_listener_message(self.message)
+        self.service._start_job('1')
+
+        event = Mock()
+        event.job_id = '1'
+        event.exception = None
+        self.service._process_job_result(event)
+
+        spans = [
+            call_args[0][0][0]
+            for call_args in self.span_exporter.export.call_args_list
+        ]
+        trace_id, parent_id = parse_traceparent(TRACEPARENT)
+
+        assert [
+            (span['name'], span['start'], span['duration'])
+            for span in spans[:4]
+        ] == [
+            ('queue_wait', 95.0, 5.0),
+            ('admission_wait', 100.0, 1.0),
+            ('scheduler_wait', 101.0, 2.0),
+            ('run_job', 103.0, 7.0)
+        ]
+        assert spans[0]['attributes']['previous_span'] == previous_span
+        assert spans[3]['attributes']['status'] == 'success'
+        assert spans[4]['name'] == 'publish'
+
+        for span in spans:
+            assert span['trace_id'] == trace_id
+            assert span['parent_id'] == parent_id
+
+        assert '1' not in self.service.job_traces
+
     def test_service_handle_listener_message_no_job(self):
         self.message.body = JsonFormat.json_message({
             "test_cleanup_result": {
@@ -285,9 +523,56 @@ class TestListenerService(object):
                 "errors": []
             }
         })
+        self.message.properties = {
+            'content_type': 'application/json',
+            'headers': None
+        }
+        self.service.publisher = Mock()
+
         self.service._handle_listener_message(self.message)
+
+        # The job document may not be consumed yet
+        self.service.publisher.publish.assert_called_once_with(
+            '',
+            'test_cleanup.listener.unknown',
+            self.message.body,
+            properties={
+                'content_type': 'application/json',
+                'headers': {'unknown_job_attempts': 1},
+                'delivery_mode': 2
+            },
+            mandatory=True
+        )
         self.message.ack.assert_called_once_with()
 
+    def test_service_defer_listener_message_dead(self):
+        self.message.properties = {
+            'headers': {'unknown_job_attempts': 5}
+        }
+        self.service.publisher = Mock()
+
+        self.service._defer_listener_message(self.message, '1')
+
+        assert self.service.publisher.publish.call_args[0][1] == \
+            'test_cleanup.listener.dead'
+        self.service.log.warning.assert_called_once_with(
+            'Job not queued, moving listener message to '
+            'test_cleanup.listener.dead.',
+            extra={'job_id': '1'}
+        )
+        self.message.ack.assert_called_once_with()
+
+    def test_service_defer_listener_message_failed(self):
+        self.message.properties = {}
+        self.service.publisher = Mock()
+        self.service.publisher.publish.return_value.result.side_effect = \
+            AMQPError('No route!')
+
+        self.service._defer_listener_message(self.message, '1')
+
+        self.message.nack.assert_called_once_with(requeue=True)
+        assert not self.message.ack.called
+
     def test_service_handle_listener_msg_invalid(self):
         self.message.body = self.status_message
         self.service._handle_listener_message(self.message)
@@ -299,6 +584,7 @@ class TestListenerService(object):
         job = Mock()
         job.id = '1'
         job.utctime = 'now'
+        job.streaming = False
         self.service.jobs['1'] = job
 
         self.message.body = JsonFormat.json_message({
@@ -312,15 +598,69 @@ class TestListenerService(object):
         self.service._handle_listener_message(self.message)
         mock_cleanup_job.assert_called_once_with('1')
 
+    @patch.object(ListenerService, '_schedule_job')
+    def test_service_handle_listener_message_streaming(
+        self, mock_schedule_job
+    ):
+        job = Mock()
+        job.id = '1'
+        job.stream_image = False
+        job.streaming = False
+        self.service.jobs['1'] = job
+
+        streaming_message = MagicMock()
+        streaming_message.body = JsonFormat.json_message({
+            "test_cleanup_result": {
+                "image_file": "/images/1/image.raw",
+                "id": "1",
+                "status": "streaming",
+                "errors": []
+            }
+        })
+
+        # Job does not support streaming
+        self.service._handle_listener_message(streaming_message)
+        streaming_message.ack.assert_called_once_with()
+        assert not mock_schedule_job.called
+        assert not job.set_status_message.called
+
+        # Job streams the image
+        streaming_message.ack.reset_mock()
+        job.stream_image = True
+        self.service._handle_listener_message(streaming_message)
+
+        assert job.streaming
+        assert job.listener_msg == streaming_message
+        mock_schedule_job.assert_called_once_with('1')
+        assert not streaming_message.ack.called
+
+        # Final result of the streamed image
+        mock_schedule_job.reset_mock()
+        self.message.body = JsonFormat.json_message({
+            "test_cleanup_result": {
+                "image_file": "/images/1/image.raw",
+                "id": "1",
+                "status": "success",
+                "errors": []
+            }
+        })
+        self.service._handle_listener_message(self.message)
+
+        self.message.ack.assert_called_once_with()
+        assert job.listener_msg == streaming_message
+        assert not mock_schedule_job.called
+
     @patch.object(ListenerService, '_add_job')
     def test_service_handle_service_message(self, mock_add_job):
         self.method['routing_key'] = 'job_document'
         self.message.body = '{"replicate_job": {"id": "1", ' \
             '"cloud": "ec2", "utctime": "now"}}'
+        self.message.properties = {'headers': {'traceparent': TRACEPARENT}}
         self.service._handle_service_message(self.message)
 
         mock_add_job.assert_called_once_with({
-            'id': '1', 'cloud': 'ec2', 'utctime': 'now'
+            'id': '1', 'cloud': 'ec2', 'utctime': 'now',
+            'traceparent': TRACEPARENT
         })
         self.message.ack.assert_called_once_with()
 
@@ -366,7 +706,8 @@ class TestListenerService(object):
         )
         mock_publish_message.assert_called_once_with(
             '{"status": "message"}',
-            '1'
+            '1',
+            ANY
         )
         msg.ack.assert_called_once_with()
 
@@ -385,14 +726,22 @@ class TestListenerService(object):
         job.id = '1'
         job.utctime = 'now'
         job.status = 2
+        job.retry_count = 0
+        job.cloud = 'ec2'
         job.status_msg = {'errors': []}
         job.get_job_id.return_value = {'job_id': '1'}
 
         mock_get_status_msg.return_value = '{"status": "message"}'
 
         self.service.jobs['1'] = job
+        self.service.job_start_times['1'] = 0
         self.service._process_job_result(event)
 
+        metrics = self.service.metrics.render()
+        assert 'mash_job_failures_total{cloud="ec2"} 1.0' in metrics
+        assert 'mash_job_duration_seconds_count{cloud="ec2"} 1.0' in metrics
+        assert '1' not in self.service.job_start_times
+
         mock_delete_job.assert_called_once_with('1')
         self.service.log.error.assert_called_once_with(
             'Exception in replicate: Image not found!',
@@ -400,9 +749,79 @@ class TestListenerService(object):
         )
         mock_publish_message.assert_called_once_with(
             '{"status": "message"}',
-            '1'
+            '1',
+            ANY
         )
 
+    @patch.object(ListenerService, '_delete_job')
+    @patch.object(ListenerService, '_publish_message')
+    def test_service_process_job_result_retry(
+        self, mock_publish_message, mock_delete_job
+    ):
+        self.service.retry_policy = RetryPolicy(
+            max_attempts=2, backoff=10,
+            retryable_exceptions=['ClientError']
+        )
+        self.service.publisher = Mock()
+        self.job_store.get.return_value = {'id': '1'}
+
+        class ClientError(Exception):
+            pass
+
+        event = Mock()
+        event.job_id = '1'
+        event.exception = ClientError('Throttled!')
+
+        listener_msg = Mock()
+        listener_msg.body = 'message'
+        listener_msg.properties = {
+            'content_type': 'application/json',
+            'content_encoding': None
+        }
+
+        job = Mock()
+        job.id = '1'
+        job.job_file = 'job-1.json'
+        job.retry_count = 0
+        job.listener_msg = listener_msg
+        job.get_job_id.return_value = {'job_id': '1'}
+        job.get_status_message.return_value = {'id': '1', 'status': 'error'}
+        self.service.jobs['1'] = job
+
+        self.service._process_job_result(event)
+
+        assert job.retry_count == 1
+        self.job_store.update.assert_called_once_with(
+            '1', {'id': '1', 'retry_count': 1}
+        )
+        args, kwargs = self.service.publisher.publish.call_args
+        assert args == ('', 'test_cleanup.listener.retry.1', 'message')
+        assert 5000 <= int(kwargs['properties']['expiration']) <= 10000
+        assert kwargs['properties']['content_type'] == 'application/json'
+        assert 'content_encoding' not in kwargs['properties']
+        listener_msg.ack.assert_called_once_with()
+        assert not mock_delete_job.called
+        assert not mock_publish_message.called
+
+        # Retries exhausted
+        job.retry_count = 2
+        self.service._process_job_result(event)
+
+        mock_delete_job.assert_called_once_with('1')
+        assert mock_publish_message.call_count == 1
+
+        # Publishing the retry failed
+        job.retry_count = 0
+        self.service.publisher.publish.return_value.result.side_effect = \
+            AMQPError('Broken!')
+        self.service._process_job_result(event)
+
+        self.service.log.warning.assert_called_with(
+            'Job retry failed: Broken!',
+            extra={'job_id': '1'}
+        )
+        assert mock_delete_job.call_count == 2
+
     @patch.object(ListenerService, '_delete_job')
     @patch.object(ListenerService, '_publish_message')
     def test_publishing_process_job_result_fail(
@@ -427,11 +846,10 @@ class TestListenerService(object):
             extra={'job_id': '1'}
         )
         mock_delete_job('1')
-        msg = {"replicate_result": {"id": "1", "status": "error"}}
-        mock_publish_message.assert_called_once_with(
-            JsonFormat.json_message(msg),
-            '1'
-        )
+        msg = {
+            "replicate_result": {"id": "1", "status": "error", "traceparent": ANY}
+        }
+        mock_publish_message.assert_called_once_with(msg, '1', ANY)
 
     def test_service_process_job_missed(self):
         event = Mock()
@@ -469,7 +887,9 @@ class TestListenerService(object):
         self.service._publish_message('{"test": "message"}', job.id)
         mock_publish.assert_called_once_with(
             'replicate',
-            '{"test": "message"}'
+            '{"test": "message"}',
+            '1',
+            None
         )
 
     @patch.object(ListenerService, '_get_status_message')
@@ -491,19 +911,161 @@ class TestListenerService(object):
             extra={'job_id': '1'}
         )
 
-    @patch.object(ListenerService, '_start_job')
-    def test_service_schedule_duplicate_job(
-        self, mock_start_job
-    ):
+    def test_service_schedule_job(self):
         job = Mock()
-        job.utctime = 'now'
+        job.id = '1'
+        job.cloud = 'ec2'
+        job.get_job_id.return_value = {'job_id': '1'}
+        job.get_accounts_and_regions.return_value = ({'acnt1'}, set())
         self.service.jobs['1'] = job
+        self.service.admission.limits = {'ec2': {'account': 1}}
 
+        self.service._schedule_job('1')
+        self.service.scheduler.add_job.assert_called_once_with(
+            self.service._start_job,
+            args=('1',),
+            id='1',
+            max_instances=1,
+            misfire_grace_time=None,
+            coalesce=True
+        )
+
+        # Duplicate listener message
+        self.service._schedule_job('1')
+        self.service.log.warning.assert_called_once_with(
+            'Job already running. Received multiple '
+            'listener messages.',
+            extra={'job_id': '1'}
+        )
+
+        # Account limit reached
+        job2 = Mock()
+        job2.id = '2'
+        job2.cloud = 'ec2'
+        job2.get_job_id.return_value = {'job_id': '2'}
+        job2.get_accounts_and_regions.return_value = ({'acnt1'}, set())
+        message = job2.listener_msg
+        message.body = b'{"id": "2"}'
+        message.properties = {'content_type': 'application/json'}
+        self.service.jobs['2'] = job2
+        self.job_store.get.return_value = {'id': '2'}
+
+        self.service._schedule_job('2')
+        self.service.log.info.assert_called_once_with(
+            'Job waiting for concurrency limits.',
+            extra={'job_id': '2'}
+        )
+        assert self.service.scheduler.add_job.call_count == 1
+
+        # The listener message is parked with the waiting job
+        self.job_store.update.assert_called_once_with('2', {
+            'id': '2',
+            'listener_msg': {
+                'body': 'eyJpZCI6ICIyIn0=',
+                'properties': {'content_type': 'application/json'}
+            }
+        })
+        message.ack.assert_called_once_with()
+        assert isinstance(job2.listener_msg, ParkedMessage)
+        assert job2.listener_msg.body == b'{"id": "2"}'
+
+        # Waiting job is admitted once the running job finishes
+        self.service.admission.release('1')
+        assert self.service.scheduler.add_job.call_count == 2
+
+    def test_service_schedule_job_saturated_key(self):
+        self.service.admission.limits = {'ec2': {'account': 1}}
+        self.job_store.get.return_value = {}
+
+        jobs = []
+        for job_id, cloud, account in (
+            ('1', 'ec2', 'acnt1'),
+            ('2', 'ec2', 'acnt1'),
+            ('3', 'ec2', 'acnt1'),
+            ('4', 'azure', 'acnt2')
+        ):
+            job = Mock()
+            job.id = job_id
+            job.cloud = cloud
+            job.get_accounts_and_regions.return_value = ({account}, set())
+            job.listener_msg.body = b'{}'
+            job.listener_msg.properties = {}
+            self.service.jobs[job_id] = job
+            jobs.append((job, job.listener_msg))
+
+        for job, message in jobs:
+            self.service._schedule_job(job.id)
+
+        # Waiting jobs of the saturated account do not hold their
+        # listener messages, so the next cloud is still delivered.
+        assert [message.ack.called for job, message in jobs] == [
+            False, True, True, False
+        ]
+        self.service.scheduler.add_job.assert_has_calls([
+            call(
+                self.service._start_job, args=('1',), id='1',
+                max_instances=1, misfire_grace_time=None, coalesce=True
+            ),
+            call(
+                self.service._start_job, args=('4',), id='4',
+                max_instances=1, misfire_grace_time=None, coalesce=True
+            )
+        ])
+
+    def test_service_drop_parked_message(self):
+        self.service.jobs['1'] = Mock()
+        self.job_store.get.return_value = {
+            'id': '1', 'listener_msg': {'body': '', 'properties': {}}
+        }
+
+        self.service._drop_parked_message('1')
+        self.job_store.update.assert_called_once_with('1', {'id': '1'})
+
+        # Finished jobs are already deleted from the store
+        self.job_store.reset_mock()
+        self.service._drop_parked_message('2')
+        assert not self.job_store.update.called
+
+    @patch.object(ListenerService, '_handle_listener_message')
+    def test_service_restore_parked_job(self, mock_handle_listener_message):
+        self.service.jobs['1'] = Mock()
+
+        self.service._restore_parked_job({
+            'id': '1',
+            'listener_msg': {
+                'body': 'eyJpZCI6ICIxIn0=',
+                'properties': {'content_type': 'application/json'}
+            }
+        })
+
+        message = mock_handle_listener_message.call_args[0][0]
+        assert message.body == b'{"id": "1"}'
+        assert message.properties == {'content_type': 'application/json'}
+
+        # Invalid jobs are not restored
+        mock_handle_listener_message.reset_mock()
+        self.service._restore_parked_job({
+            'id': '2',
+            'listener_msg': {'body': '', 'properties': {}}
+        })
+        assert not mock_handle_listener_message.called
+
+    def test_service_admit_job_async_engine(self):
+        self.service.async_engine = Mock()
+        self.service._admit_job('1')
+
+        self.service.async_engine.schedule.assert_called_once_with('1')
+        assert not self.service.scheduler.add_job.called
+
+    @patch.object(ListenerService, '_start_job')
+    def test_service_admit_duplicate_job(
+        self, mock_start_job
+    ):
         scheduler = Mock()
         scheduler.add_job.side_effect = ConflictingIdError('Conflicting jobs.')
         self.service.scheduler = scheduler
 
-        self.service._schedule_job('1')
+        self.service._admit_job('1')
         self.service.log.warning.assert_called_once_with(
             'Job already running. Received multiple '
             'listener messages.',
@@ -518,31 +1080,56 @@ class TestListenerService(object):
             coalesce=True
         )
 
+    @patch.object(ListenerService, 'consume_channels')
     @patch.object(ListenerService, 'consume_queue')
     def test_service_start(
-        self, mock_consume_queue
+        self, mock_consume_queue, mock_consume_channels
     ):
-        self.service.channel = self.channel
+        service_channel = Mock()
+        listener_channel = Mock()
+        self.connection.channel.side_effect = [
+            service_channel, listener_channel
+        ]
+        self.service.connection = self.connection
+        self.service.consumer_channels = []
+        self.service.service_prefetch_count = 5
+        self.service.listener_prefetch_count = 10
         self.service.start()
 
-        self.channel.start_consuming.assert_called_once_with()
+        service_channel.basic.qos.assert_called_once_with(prefetch_count=5)
+        listener_channel.basic.qos.assert_called_once_with(prefetch_count=10)
+        assert self.service.consumer_channels == [
+            service_channel, listener_channel
+        ]
+        mock_consume_channels.assert_called_once_with(
+            [service_channel, listener_channel]
+        )
         mock_consume_queue.assert_has_calls([
             call(
                 self.service._handle_service_message,
                 'service',
-                'replicate'
+                'replicate',
+                channel=service_channel
             ),
             call(
                 self.service._handle_listener_message,
                 'listener',
-                'test_cleanup'
+                'test_cleanup',
+                channel=listener_channel
             )
         ])
 
+    @patch.object(ListenerService, 'consume_channels')
     @patch.object(ListenerService, 'close_connection')
-    def test_service_start_exception(self, mock_close_connection):
+    def test_service_start_exception(
+        self, mock_close_connection, mock_consume_channels
+    ):
         self.service.channel = self.channel
-        self.channel.start_consuming.side_effect = Exception(
+        self.service.connection = self.connection
+        self.service.consumer_channels = []
+        self.service.service_prefetch_count = 5
+        self.service.listener_prefetch_count = 10
+        mock_consume_channels.side_effect = Exception(
             'Cannot start consuming.'
         )
 
@@ -578,14 +1165,15 @@ class TestListenerService(object):
         prev_service = self.service._get_previous_service()
         assert prev_service is None
 
-    @patch('mash.services.mash_service.Connection')
-    def test_publish_job_result(self, mock_connection):
-        mock_connection.return_value = self.connection
-        self.service.publish_job_result('exchange', 'message')
-        self.channel.basic.publish.assert_called_once_with(
-            body='message', exchange='exchange', mandatory=True,
-            properties=self.msg_properties, routing_key='listener_msg'
+    def test_publish_job_result(self):
+        publisher = Mock()
+        self.service.publisher = publisher
+        self.service.publish_job_result('exchange', {'id': '1'})
+        publisher.publish.assert_called_once_with(
+            'exchange', 'listener_msg', '{"id":"1"}', mandatory=True,
+            properties=self.msg_properties
         )
+        publisher.publish.return_value.result.assert_called_once_with()
 
     def test_service_start_job(self):
         job = Mock()
@@ -595,6 +1183,14 @@ class TestListenerService(object):
         self.service._start_job('1')
         job.process_job.assert_called_once_with()
 
+        job.process_job.side_effect = Exception('Broken!')
+        with pytest.raises(Exception):
+            self.service._start_job('1')
+
+        metrics = self.service.metrics.render()
+        assert 'mash_thread_pool_busy_threads 0.0' in metrics
+        assert 'mash_thread_pool_size 10.0' in metrics
+
     def test_get_status_message(self):
         job = Mock()
         job.id = '1'
@@ -605,7 +1201,13 @@ class TestListenerService(object):
         }
 
         data = self.service._get_status_message(job)
-        assert data == self.status_message
+        assert data == {
+            'replicate_result': {
+                'id': '1',
+                'status': 'success',
+                'cloud_image_name': 'image123'
+            }
+        }
 
     @patch.object(ListenerService, 'close_connection')
     def test_service_stop(self, mock_close_connection):
@@ -615,3 +1217,22 @@ class TestListenerService(object):
             'Got a TERM/INTERRUPT signal, shutting down gracefully.'
         )
         mock_close_connection.assert_called_once_with()
+        self.job_store.close.assert_called_once_with()
+
+    @patch.object(ListenerService, 'close_connection')
+    def test_service_start_async_engine(self, mock_close_connection):
+        self.service.async_engine = Mock()
+        self.service.start()
+
+        self.service.async_engine.run.assert_called_once_with()
+        mock_close_connection.assert_called_once_with()
+        assert not self.service.scheduler.start.called
+
+    @patch.object(ListenerService, 'close_connection')
+    def test_service_stop_async_engine(self, mock_close_connection):
+        self.service.async_engine = Mock()
+        self.service.stop(signum=15, frame=Mock())
+
+        self.service.async_engine.stop.assert_called_once_with()
+        assert not self.service.scheduler.shutdown.called
+        assert not mock_close_connection.called
@@ -0,0 +1,122 @@
+import os
+
+from mash.services.logger.job_log_store import (
+    INDEX_ENTRY,
+    JobLog,
+    JobLogReader,
+    compress_job_log,
+    get_compressed_file,
+    get_frames_file,
+    get_index_file
+)
+
+
+class TestJobLogStore(object):
+    def setup_method(self):
+        self.entries = [
+            ('download 1\n', 10.0, 20, 'DownloadService'),
+            ('upload 1\n', 20.0, 20, 'UploadService'),
+            ('upload error\n', 30.0, 40, 'UploadService'),
+            ('test 1\n', 40.0, 10, 'TestService')
+        ]
+
+    def write_log(self, log_file):
+        job_log = JobLog(log_file)
+        job_log.write(self.entries)
+        job_log.sync()
+        job_log.close()
+
+    def test_job_log_read(self, tmp_path):
+        log_file = str(tmp_path / '1.log')
+        self.write_log(log_file)
+
+        reader = JobLogReader(log_file)
+        assert reader.read() == ''.join(entry[0] for entry in self.entries)
+        assert reader.read(start=20, end=40) == 'upload 1\nupload error\n'
+        assert reader.read(service='UploadService', level=30) == \
+            'upload error\n'
+        assert list(reader.entries(start=35)) == [
+            (3, 40.0, 10, 'TestService', 'test 1\n')
+        ]
+        reader.close()
+
+    def test_job_log_recover(self, tmp_path):
+        log_file = str(tmp_path / '1.log')
+
+        with open(log_file, 'w') as log:
+            log.write('old line\n')
+
+        self.write_log(log_file)
+
+        # Interrupted index write and unindexed line
+        with open(get_index_file(log_file), 'ab') as index:
+            index.write(b'partial')
+
+        with open(log_file, 'a') as log:
+            log.write('lost line\n')
+
+        JobLog(log_file).close()
+
+        assert os.path.getsize(get_index_file(log_file)) == \
+            INDEX_ENTRY.size * 6
+
+        reader = JobLogReader(log_file)
+        lines = [entry[4] for entry in reader.entries()]
+        assert lines[0] == 'old line\n'
+        assert lines[-1] == 'lost line\n'
+
+        # Unindexed lines are not filtered
+        assert reader.read(service='TestService') == \
+            'old line\ntest 1\nlost line\n'
+
+        # and selected by the time of the line before them
+        assert reader.read(start=35) == 'test 1\nlost line\n'
+
+    def test_job_log_out_of_order(self, tmp_path):
+        log_file = str(tmp_path / '1.log')
+        self.entries.insert(2, ('download 2\n', 15.0, 20, 'DownloadService'))
+        self.write_log(log_file)
+
+        # The late line is indexed with the time of the line before it
+        reader = JobLogReader(log_file)
+        assert reader.read(start=20, end=30) == 'upload 1\ndownload 2\n'
+        assert reader.read(start=25) == 'upload error\ntest 1\n'
+
+    def test_job_log_compressed(self, tmp_path):
+        log_file = str(tmp_path / '1.log')
+        self.write_log(log_file)
+
+        compress_job_log(log_file, frame_size=10)
+
+        assert not os.path.exists(log_file)
+        assert os.path.getsize(get_frames_file(log_file)) == 3 * 20
+
+        reader = JobLogReader(log_file)
+        assert reader.read() == ''.join(entry[0] for entry in self.entries)
+        assert reader.read(start=20, end=40) == 'upload 1\nupload error\n'
+
+        # New lines decompress the log
+        job_log = JobLog(log_file)
+        job_log.write([('test 2\n', 50.0, 20, 'TestService')])
+        job_log.close()
+
+        assert not os.path.exists(get_compressed_file(log_file))
+        assert JobLogReader(log_file).read(start=40) == 'test 1\ntest 2\n'
+
+    def test_job_log_follow(self, tmp_path):
+        log_file = str(tmp_path / '1.log')
+        reader = JobLogReader(log_file)
+        polls = []
+
+        def stop():
+            polls.append(True)
+
+            if len(polls) == 2:
+                self.write_log(log_file)
+
+            return len(polls) > 3
+
+        lines = list(reader.follow(
+            service='UploadService', poll_interval=0, stop=stop
+        ))
+        assert lines == ['upload 1\n', 'upload error\n']
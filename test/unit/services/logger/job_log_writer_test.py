@@ -0,0 +1,187 @@
+import os
+
+from unittest.mock import Mock, patch
+
+from mash.services.logger.job_log_writer import JobLogWriter
+
+
+class TestJobLogWriter(object):
+    def setup_method(self):
+        self.log = Mock()
+        self.channel = Mock()
+        self.writer = JobLogWriter(
+            cache_size=2,
+            buffer_size=3,
+            flush_interval=1,
+            log=self.log
+        )
+
+    def get_message(self, delivery_tag):
+        message = Mock()
+        message.channel = self.channel
+        message.delivery_tag = delivery_tag
+        return message
+
+    @patch('mash.services.logger.job_log_store.os.fsync')
+    def test_writer_flush(self, mock_fsync, tmp_path):
+        log_1 = str(tmp_path / '1.log')
+        log_2 = str(tmp_path / '2.log')
+
+        self.writer.add(
+            [(log_1, 'one\n', 1.0, 20, 'test'), (log_2, 'two\n', 2.0, 20, 'test')],
+            self.get_message(1)
+        )
+        self.writer.add(
+            [(log_1, 'three\n', 3.0, 20, 'test')],
+            self.get_message(2)
+        )
+
+        # Nothing is acked before the lines are written
+        assert not self.channel.basic.ack.called
+
+        self.writer.flush()
+
+        with open(log_1) as job_log:
+            assert job_log.read() == 'one\nthree\n'
+
+        with open(log_2) as job_log:
+            assert job_log.read() == 'two\n'
+
+        # Log and index of both files
+        assert mock_fsync.call_count == 4
+        self.channel.basic.ack.assert_called_once_with(
+            delivery_tag=2, multiple=True
+        )
+
+        # Open files are reused
+        job_log = self.writer._files[log_1]
+        self.writer.add([(log_1, 'four\n', 1.0, 20, 'test')])
+        self.writer.flush()
+        assert self.writer._files[log_1] is job_log
+
+        self.writer.close()
+        assert not self.writer._files
+        assert job_log._log.closed
+
+    @patch('mash.services.logger.job_log_store.os.fsync')
+    def test_writer_cache_eviction(self, mock_fsync, tmp_path):
+        log_files = [str(tmp_path / '{0}.log'.format(i)) for i in range(3)]
+
+        for log_file in log_files:
+            self.writer.add([(log_file, 'line\n', 1.0, 20, 'test')])
+            self.writer.flush()
+
+        assert list(self.writer._files) == log_files[1:]
+
+        # Least recently used file is closed
+        self.writer.add([(log_files[1], 'line\n', 1.0, 20, 'test')])
+        self.writer.flush()
+        self.writer.add([(log_files[0], 'line\n', 1.0, 20, 'test')])
+        self.writer.flush()
+
+        assert list(self.writer._files) == [log_files[1], log_files[0]]
+
+        with open(log_files[0]) as job_log:
+            assert job_log.read() == 'line\nline\n'
+
+    @patch('mash.services.logger.job_log_store.os.fsync')
+    def test_writer_fsync_interval(self, mock_fsync, tmp_path):
+        self.writer.fsync_interval = 60
+        self.writer.add([(str(tmp_path / '1.log'), 'line\n', 1.0, 20, 'test')])
+        self.writer.flush()
+
+        assert not mock_fsync.called
+
+        self.writer._last_sync -= 60
+        self.writer.flush()
+
+        assert mock_fsync.call_count == 2
+
+    @patch('mash.services.logger.job_log_store.os.fsync')
+    def test_writer_write_error(self, mock_fsync, tmp_path):
+        log_file = str(tmp_path / 'missing' / '1.log')
+        other_file = str(tmp_path / '2.log')
+
+        self.writer.add(
+            [(log_file, 'one\n', 1.0, 20, 'test')], self.get_message(1)
+        )
+        self.writer.add(
+            [(other_file, 'two\n', 1.0, 20, 'test')], self.get_message(2)
+        )
+        self.writer.flush()
+
+        self.log.error.assert_called_once_with(
+            "Could not write to log file: [Errno 2] No such file or "
+            "directory: '{0}'".format(log_file)
+        )
+        assert list(self.writer._files) == [other_file]
+
+        # Only the message of the written file is acked
+        self.channel.basic.ack.assert_called_once_with(delivery_tag=2)
+        self.channel.basic.ack.reset_mock()
+
+        # The lines of the failed file are written with the next flush
+        self.writer.add(
+            [(log_file, 'three\n', 2.0, 20, 'test')], self.get_message(3)
+        )
+        os.mkdir(str(tmp_path / 'missing'))
+        self.writer.flush()
+
+        with open(log_file) as job_log:
+            assert job_log.read() == 'one\nthree\n'
+
+        self.channel.basic.ack.assert_called_once_with(
+            delivery_tag=3, multiple=True
+        )
+
+    def test_writer_ack_error(self):
+        self.channel.basic.ack.side_effect = Exception('Channel closed')
+
+        self.writer.add([], self.get_message(1))
+        self.writer.flush()
+
+        self.log.error.assert_called_once_with(
+            'Could not acknowledge log messages: Channel closed'
+        )
+
+    def test_writer_buffer_full(self):
+        self.writer.add([('1.log', 'line\n', 1.0, 20, 'test')] * 3)
+        assert self.writer._wakeup.is_set()
+
+    @patch('mash.services.logger.job_log_store.os.fsync')
+    def test_writer_start_stop(self, mock_fsync, tmp_path):
+        log_file = str(tmp_path / '1.log')
+
+        self.writer.start()
+        self.writer.add([(log_file, 'line\n', 1.0, 20, 'test')])
+        self.writer.stop()
+
+        with open(log_file) as job_log:
+            assert job_log.read() == 'line\n'
+
+        assert not self.writer._files
+
+    @patch('mash.services.logger.job_log_writer.compress_job_log')
+    def test_writer_compress_finished(self, mock_compress, tmp_path):
+        log_file = str(tmp_path / '1.log')
+        self.writer.compress_after = 60
+
+        self.writer.add([(log_file, 'line\n', 1.0, 20, 'test')])
+        self.writer.flush()
+
+        assert not mock_compress.called
+
+        self.writer._last_write[log_file] -= 60
+        self.writer.flush()
+
+        mock_compress.assert_called_once_with(log_file)
+        assert not self.writer._files
+
+        # Compression errors are logged
+        self.writer._last_write[log_file] = 0
+        mock_compress.side_effect = Exception('No space left')
+        self.writer.flush()
+
+        self.log.error.assert_called_once_with(
+            'Could not compress log file: No space left'
+        )
@@ -1,6 +1,4 @@
-import io
 import json
-import sys
 
 from unittest.mock import MagicMock, Mock, patch
 from pytest import raises
@@ -9,9 +7,6 @@ from mash.mash_exceptions import MashLoggerException
 from mash.services.mash_service import MashService
 from mash.services.logger.service import LoggerService
 
-open_name = "__builtin__.open" if sys.version_info.major < 3 \
-    else "builtins.open"
-
 
 class TestLoggerService(object):
 
@@ -44,6 +39,8 @@ class TestLoggerService(object):
         self.logger.log = MagicMock()
         self.logger.service_exchange = 'logger'
         self.logger.channel = self.channel
+        self.logger.config = self.config
+        self.logger.log_writer = Mock()
 
     @patch('mash.services.logger.service.setup_logfile')
     @patch.object(LoggerService, 'start')
@@ -67,52 +64,69 @@ class TestLoggerService(object):
             'logger', 'mash.logger', 'logging'
         )
         mock_start.assert_called_once_with()
+        assert self.logger.log_writer.cache_size == \
+            config.get_job_log_cache_size.return_value
 
     def test_logger_process_invalid_log(self):
         self.message.body = ''
         with raises(MashLoggerException):
             self.logger._process_log(self.message)
 
-    @patch('os.path.exists')
-    def test_logger_process_append(
-        self, mock_path_exists
-    ):
-        mock_path_exists.return_value = True
-        self.logger.config = self.config
+        self.logger.log_writer.add.assert_called_once_with([], self.message)
 
-        with patch(open_name, create=True) as mock_open:
-            mock_open.return_value = MagicMock(spec=io.IOBase)
-            self.logger._process_log(self.message)
-            file_handle = mock_open.return_value.__enter__.return_value
-            file_handle.write.assert_called_with(
-                u'INFO 2017-11-01 11:36:36.782072 '
-                'LoggerService \n Test log message! \n'
-            )
+    def test_logger_process_log(self):
+        self.config.get_job_log_file.return_value = '/tmp/4711.log'
 
-    @patch('os.path.exists')
-    def test_logger_process_write_exception(
-        self, mock_path_exists
-    ):
-        mock_path_exists.return_value = True
-        self.logger.config = self.config
+        self.logger._process_log(self.message)
 
-        with patch(open_name, create=True) as mock_open:
-            mock_open.return_value = MagicMock(spec=io.IOBase)
-            file_handle = mock_open.return_value.__enter__.return_value
-            file_handle.write.side_effect = Exception('Error writing file!')
+        self.config.get_job_log_file.assert_called_once_with('4711')
+        self.logger.log_writer.add.assert_called_once_with(
+            [(
+                '/tmp/4711.log',
+                u'INFO 2017-11-01 11:36:36.782072 '
+                'LoggerService \n Test log message! \n',
+                None,
+                None,
+                None
+            )],
+            self.message
+        )
 
-            with raises(MashLoggerException):
-                self.logger._process_log(self.message)
+    def test_logger_process_batch(self):
+        self.config.get_job_log_file.side_effect = ['/tmp/1.log', '/tmp/2.log']
+        self.message.body = json.dumps([
+            {
+                'msg': 'Job[1]: First\n',
+                'job_id': '1',
+                'created': 1.5,
+                'levelno': 20,
+                'name': 'DownloadService'
+            },
+            {'msg': 'No job\n'},
+            {'msg': 'Job[2]: Second\n', 'job_id': '2'}
+        ])
+
+        self.logger._process_log(self.message)
+
+        self.logger.log_writer.add.assert_called_once_with(
+            [
+                ('/tmp/1.log', 'First\n', 1.5, 20, 'DownloadService'),
+                ('/tmp/2.log', 'Second\n', None, None, None)
+            ],
+            self.message
+        )
 
     @patch.object(LoggerService, 'consume_queue')
     @patch.object(LoggerService, 'close_connection')
     def test_logger_start(self, mock_close_connection, mock_consume_queue):
         self.logger.channel = self.channel
         self.logger.start()
+        self.logger.log_writer.start.assert_called_once_with()
         self.channel.start_consuming.assert_called_once_with()
         mock_consume_queue.assert_called_once_with(
             self.logger._process_log, 'logging', 'logger'
         )
+        self.logger.log_writer.stop.assert_called_once_with()
         mock_close_connection.assert_called_once_with()
 
     @patch.object(LoggerService, 'consume_queue')
@@ -48,14 +48,14 @@ class TestEC2MPPublishJob(object):
         with raises(MashPublishException):
             EC2MPPublishJob(self.job_config, self.config)
 
-    @patch('mash.services.publish.ec2_mp_job.get_session')
+    @patch('mash.services.publish.ec2_mp_job.get_client')
     @patch('mash.services.publish.ec2_mp_job.start_mp_change_set')
     @patch('mash.services.publish.ec2_mp_job.EC2PublishImage')
     def test_publish(
         self,
         mock_ec2_publish_image,
         mock_start_change_set,
-        mock_get_session
+        mock_get_client
     ):
         publish = Mock()
         mock_ec2_publish_image.return_value = publish
@@ -77,6 +77,19 @@ class TestEC2MPPublishJob(object):
         assert publish.publish_images.call_count == 1
         assert self.job.status == 'success'
 
+        # Submit the change set
+        client = Mock()
+        mock_get_client.return_value = client
+        self.job.submit_change_request = True
+
+        self.job.run_job()
+
+        mock_get_client.assert_called_once_with(
+            'marketplace-catalog', '123456', '654321', 'us-east-2'
+        )
+        assert mock_start_change_set.call_args[0][0] == client
+        assert self.job.status_msg['change_set_id'] == '123'
+
     @patch('mash.services.publish.ec2_mp_job.start_mp_change_set')
     @patch('mash.services.publish.ec2_mp_job.EC2PublishImage')
     def test_publish_exception(
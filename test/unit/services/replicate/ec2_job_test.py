@@ -1,5 +1,7 @@
+import asyncio
+
 from pytest import raises
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 from mash.mash_exceptions import MashReplicateException
 from mash.services.status_levels import FAILED
@@ -145,6 +147,50 @@ class TestEC2ReplicateJob(object):
 
         assert msg == str(e.value)
 
+    @patch('mash.services.replicate.ec2_job.asyncio.sleep')
+    @patch.object(
+        EC2ReplicateJob, '_wait_on_image_async', new_callable=AsyncMock
+    )
+    @patch.object(EC2ReplicateJob, '_replicate_to_region')
+    def test_replicate_async(
+        self, mock_replicate_to_region,
+        mock_wait_on_image_async, mock_sleep
+    ):
+        mock_replicate_to_region.return_value = 'ami-54321'
+        mock_wait_on_image_async.side_effect = Exception('Broken!')
+
+        asyncio.run(self.job.run_job_async())
+
+        mock_sleep.assert_awaited_once_with(300)
+        mock_wait_on_image_async.assert_awaited_once_with(
+            self.job.credentials['test-aws']['access_key_id'],
+            self.job.credentials['test-aws']['secret_access_key'],
+            'ami-54321',
+            'us-east-2',
+            False
+        )
+        self.job._log_callback.warning.assert_called_once_with(
+            'Replicate to us-east-2 region failed: Broken!'
+        )
+        assert self.job.status == FAILED
+
+    @patch('mash.services.replicate.ec2_job.asyncio.sleep')
+    @patch('mash.services.replicate.ec2_job.get_client')
+    def test_replicate_wait_on_image_async(self, mock_get_client, mock_sleep):
+        client = Mock()
+        client.describe_images.side_effect = [
+            {'Images': [{'State': 'pending'}]},
+            {'Images': [{'State': 'available'}]}
+        ]
+        mock_get_client.return_value = client
+
+        asyncio.run(self.job._wait_on_image_async(
+            '123456', '654321', 'ami-54321', 'us-east-2'
+        ))
+
+        mock_sleep.assert_awaited_once_with(60)
+        assert client.describe_images.call_count == 2
+
     @patch('mash.services.replicate.ec2_job.get_client')
     def test_replicate_wait_on_image(self, mock_get_client):
         client = Mock()
@@ -1,6 +1,6 @@
 from pytest import raises
 from unittest.mock import (
-    MagicMock, Mock, patch
+    ANY, MagicMock, Mock, patch
 )
 
 from mash.services.upload.oci_job import OCIUploadJob
@@ -95,9 +95,50 @@ class TestOCIUploadJob(object):
             'namespace name',
             'images',
             'sles-12-sp4-v20200925.qcow2',
-            open_handle,
+            ANY,
             progress_callback=self.job._progress_callback
         )
+        reader = upload_manager.upload_stream.call_args[0][3]
+        assert reader.stream == open_handle
+        open_handle.close.assert_called_once_with()
+
+    @patch('mash.services.upload.oci_job.ImageStreamReader')
+    @patch('mash.services.upload.oci_job.UploadManager')
+    @patch('mash.services.upload.oci_job.ObjectStorageClient')
+    def test_upload_stream(
+        self, mock_storage_client, mock_upload_manager, mock_stream_reader
+    ):
+        stream = MagicMock()
+        stream.get_size.return_value = 112358
+        stream.digests = {'sha256': 'abc', 'size': 112358}
+        mock_stream_reader.return_value = stream
+
+        namespace = Mock()
+        namespace.data = 'namespace name'
+        storage_driver = Mock()
+        storage_driver.get_namespace.return_value = namespace
+        mock_storage_client.return_value = storage_driver
+
+        upload_manager = Mock()
+        mock_upload_manager.return_value = upload_manager
+        self.job.streaming = True
+
+        self.job.run_job()
+
+        upload_manager.upload_stream.assert_called_once_with(
+            'namespace name',
+            'images',
+            'sles-12-sp4-v20200925.qcow2',
+            ANY,
+            progress_callback=self.job._progress_callback
+        )
+        reader = upload_manager.upload_stream.call_args[0][3]
+        assert reader.stream == stream
+        stream.close.assert_called_once_with()
+        assert self.job._image_size == 112358
+        assert self.job.status_msg['image_digests'] == {
+            'sha256': 'abc', 'size': 112358
+        }
 
     def test_progress_callback(self):
         self.job._image_size = 112358
@@ -1,5 +1,6 @@
 from pytest import raises
-from unittest.mock import Mock, patch
+from botocore.exceptions import ClientError
+from unittest.mock import MagicMock, Mock, patch
 
 from test.unit.test_helper import (
     patch_open
@@ -164,3 +165,112 @@ class TestS3BucketUploadJob(object):
         self.job._log_callback.info.assert_called_once_with(
             'Raw image 100% uploaded.'
         )
+
+    def test_log_progress_stream(self):
+        self.job._stream = Mock()
+        self.job._stream.size = None
+        self.job._log_progress(50)
+        assert not self.job._log_callback.info.called
+
+        # The size is known once the download has it
+        self.job._stream.size = 100
+        self.job._log_progress(10)
+        assert self.job._image_size == 100
+        self.job._log_callback.info.assert_called_once_with(
+            'Raw image 60% uploaded.'
+        )
+
+    def test_log_progress_throttle(self):
+        self.job._transfer = Mock()
+        self.job._log_progress(100)
+        self.job._transfer.throttle.assert_called_once_with(100)
+
+    @patch('mash.services.upload.s3bucket_job.TransferConfig')
+    @patch('mash.services.upload.s3bucket_job.stat')
+    @patch('mash.services.upload.s3bucket_job.get_client')
+    @patch_open
+    def test_upload_image_digests(
+        self, mock_request_credentials, mock_get_client, mock_stat,
+        mock_transfer_config
+    ):
+        mock_client = Mock()
+        mock_client.head_object.return_value = {
+            'ETag': '"abc-2"',
+            'ContentLength': 100
+        }
+        mock_get_client.return_value = mock_client
+
+        stat_info = Mock()
+        stat_info.st_size = 100
+        mock_stat.return_value = stat_info
+
+        self.job.status_msg['image_digests'] = {
+            'sha256': 'def',
+            'md5': 'ghi',
+            'size': 100,
+            'part_size': 64,
+            'part_md5s': ['jkl', 'mno'],
+            's3_etag': 'abc-2'
+        }
+        self.job.run_job()
+
+        mock_client.head_object.assert_called_once_with(
+            Bucket='my-bucket', Key='some-prefix/name.raw.gz'
+        )
+        assert not mock_client.upload_file.called
+        assert self.job.status_msg['key_name'] == 'some-prefix/name.raw.gz'
+
+        # Object differs from the image
+        mock_client.head_object.return_value['ETag'] = '"xyz-2"'
+        self.job.run_job()
+
+        mock_transfer_config.assert_called_once_with(
+            multipart_threshold=64,
+            multipart_chunksize=64
+        )
+        mock_client.upload_file.assert_called_once_with(
+            'file.raw.gz',
+            'my-bucket',
+            'some-prefix/name.raw.gz',
+            Callback=self.job._log_progress,
+            Config=mock_transfer_config.return_value
+        )
+
+        # Object does not exist
+        mock_client.upload_file.reset_mock()
+        mock_client.head_object.side_effect = ClientError(
+            {'Error': {'Code': '404'}}, 'HeadObject'
+        )
+        self.job.run_job()
+        assert mock_client.upload_file.called
+
+    @patch('mash.services.upload.s3bucket_job.ImageStreamReader')
+    @patch('mash.services.upload.s3bucket_job.get_client')
+    @patch_open
+    def test_upload_stream(
+        self, mock_request_credentials, mock_get_client, mock_stream_reader
+    ):
+        mock_client = Mock()
+        mock_get_client.return_value = mock_client
+        stream = MagicMock()
+        stream.__enter__.return_value = stream
+        stream.get_size.return_value = 100
+        stream.digests = {'sha256': 'abc', 'size': 100}
+        mock_stream_reader.return_value = stream
+        self.job.streaming = True
+
+        self.job.run_job()
+
+        mock_stream_reader.assert_called_once_with('file.raw.gz')
+        mock_client.upload_fileobj.assert_called_once_with(
+            stream,
+            'my-bucket',
+            'some-prefix/name.raw.gz',
+            Callback=self.job._log_progress
+        )
+        assert not mock_client.upload_file.called
+        assert self.job._image_size == 100
+        assert self.job.status_msg['image_digests'] == {
+            'sha256': 'abc', 'size': 100
+        }
+        assert self.job.status_msg['key_name'] == 'some-prefix/name.raw.gz'
@@ -0,0 +1,125 @@
+import io
+import os
+import time
+
+from unittest.mock import Mock, patch
+
+from mash.utils.bandwidth import (
+    BandwidthAllocator,
+    BandwidthTransfer,
+    ThrottledReader
+)
+
+
+class TestBandwidthAllocator(object):
+    def setup_method(self, method):
+        self.allocator = BandwidthAllocator(
+            limit=1000,
+            cloud_weights={'ec2': 2},
+            priority_weights={'high': 4, 'normal': 2, 'low': 1}
+        )
+
+    def test_configure_defaults(self):
+        self.allocator.configure()
+        assert self.allocator.limit is None
+        assert self.allocator.directory == '/var/lib/mash/bandwidth/'
+        assert self.allocator.cloud_weights == {}
+        assert self.allocator.priority_weights == {
+            'high': 4, 'normal': 2, 'low': 1
+        }
+
+    def test_get_weight(self):
+        assert self.allocator.get_weight('ec2', 'high') == 8
+        assert self.allocator.get_weight('ec2') == 4
+        assert self.allocator.get_weight('gce', 'low') == 1
+        assert self.allocator.get_weight('gce', 'unknown') == 2
+
+    def test_register_unlimited(self, tmp_path):
+        self.allocator.configure(directory=str(tmp_path))
+
+        with self.allocator.register('ec2') as transfer:
+            assert transfer.registration is None
+            transfer.throttle(1000000)
+
+        assert os.listdir(str(tmp_path)) == []
+
+    @patch('mash.utils.bandwidth.TokenBucket')
+    def test_register(self, mock_bucket, tmp_path):
+        self.allocator.directory = str(tmp_path)
+
+        # Shares are split by weight between the transfers
+        high = self.allocator.register('ec2', 'high')
+        assert high.share == 1000
+        low = self.allocator.register('gce', 'low')
+        assert low.weight == 1
+        assert low.share == 1000 / 9
+        assert len(os.listdir(str(tmp_path))) == 2
+
+        high._refresh()
+        assert high.share == 8000 / 9
+        high._bucket.set_rate.assert_called_once_with(8000 / 9, 8000 / 9)
+
+        low.close()
+        high._refresh()
+        assert high.share == 1000
+
+        # A registration removed as stale is written again
+        high.close()
+        high._refresh()
+        assert os.listdir(str(tmp_path)) == [
+            os.path.basename(high.registration)
+        ]
+        high.close()
+
+    def test_get_total_weight_stale(self, tmp_path):
+        self.allocator.directory = str(tmp_path)
+        live = str(tmp_path / 'live.json')
+        stale = str(tmp_path / 'stale.json')
+        self.allocator.write_registration(live, 4)
+        self.allocator.write_registration(stale, 2)
+
+        mtime = time.time() - 60
+        os.utime(stale, (mtime, mtime))
+
+        assert self.allocator.get_total_weight() == 4
+        assert not os.path.exists(stale)
+
+    @patch('mash.utils.bandwidth.time.monotonic')
+    def test_throttle(self, mock_monotonic, tmp_path):
+        self.allocator.directory = str(tmp_path)
+        mock_monotonic.return_value = 100
+        transfer = self.allocator.register('ec2')
+        transfer._bucket = Mock()
+        transfer._refresh = Mock()
+
+        transfer.throttle(0)
+        transfer.throttle(500)
+        transfer._bucket.acquire.assert_called_once_with(500)
+        assert not transfer._refresh.called
+
+        mock_monotonic.return_value = 102
+        transfer.throttle(500)
+        transfer._refresh.assert_called_once_with()
+        transfer.close()
+
+
+class TestThrottledReader(object):
+    def test_read(self):
+        transfer = Mock()
+        stream = io.BytesIO(b'0123456789')
+
+        with ThrottledReader(stream, transfer) as reader:
+            assert reader.read(4) == b'0123'
+            assert reader.tell() == 4
+            assert reader.read() == b'456789'
+
+        assert [args[0] for args, kwargs in transfer.throttle.call_args_list] \
+            == [4, 6]
+        assert stream.closed
+
+    def test_read_unlimited(self):
+        reader = ThrottledReader(
+            io.BytesIO(b'0123'),
+            BandwidthTransfer(BandwidthAllocator())
+        )
+        assert reader.read() == b'0123'
@@ -15,10 +15,11 @@
 # You should have received a copy of the GNU General Public License
 # along with mash.  If not, see <http://www.gnu.org/licenses/>
 #
+import hashlib
 import os
 
 from pytest import raises
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, call, patch
 from mash.utils.ec2 import (
     get_client,
     get_vpc_id_from_subnet,
@@ -28,9 +29,11 @@ from mash.utils.ec2 import (
     image_exists,
     get_session,
     get_file_list_from_s3_bucket,
-    download_file_from_s3_bucket
+    download_file_from_s3_bucket,
+    get_s3_object_etag
 )
 from mash.mash_exceptions import MashEc2UtilsException
+from mash.utils.image_digest import ImageDigest
 
 
 # Test Cases
@@ -44,12 +47,15 @@ def test_get_session(mock_boto3):
     assert session == result
 
 
+@patch('mash.utils.ec2.rate_governor')
 @patch('mash.utils.ec2.boto3')
-def test_get_client(mock_boto3):
+def test_get_client(mock_boto3, mock_rate_governor):
     client = Mock()
     session = Mock()
     session.client.return_value = client
     mock_boto3.session.Session.return_value = session
+    config = Mock()
+    mock_rate_governor.get_client_config.return_value = config
 
     result = get_client('ec2', '123456', 'abc123', 'us-east-1')
 
@@ -59,6 +65,10 @@ def test_get_client(mock_boto3):
         aws_access_key_id='123456',
         aws_secret_access_key='abc123',
         region_name='us-east-1',
+        config=config
+    )
+    mock_rate_governor.register.assert_called_once_with(
+        client, '123456', 'us-east-1'
     )
 
 
@@ -251,7 +261,8 @@ def test_download_file_from_s3_bucket(os_path_exists_mock):
         s3_client_mock.download_file.assert_called_once_with(
             bucket_name,
             object_key,
-            download_path
+            download_path,
+            Callback=None
         )
 
         directory_name, file_name = os.path.split(download_path)
@@ -295,7 +306,8 @@ def test_download_file_from_s3_bucket_non_existing_directory(
         s3_client_mock.download_file.assert_called_once_with(
             bucket_name,
             obj_key,
-            download_path
+            download_path,
+            Callback=None
         )
         directory_name, file_name = os.path.split(download_path)
         os_path_exists_mock.assert_called_once_with(directory_name)
@@ -303,3 +315,121 @@ def test_download_file_from_s3_bucket_non_existing_directory(
         os_path_exists_mock.reset_mock()
         boto3_session_mock.reset_mock()
         s3_client_mock.reset_mock()
+
+
+def test_get_s3_object_etag():
+    s3_client_mock = Mock()
+    s3_client_mock.head_object.return_value = {'ETag': '"abc123"'}
+    boto3_session_mock = Mock()
+    boto3_session_mock.client.return_value = s3_client_mock
+
+    etag = get_s3_object_etag(boto3_session_mock, 'my_bucket', 'dir/image')
+
+    assert etag == 'abc123'
+    boto3_session_mock.client.assert_called_once_with(service_name='s3')
+    s3_client_mock.head_object.assert_called_once_with(
+        Bucket='my_bucket',
+        Key='dir/image'
+    )
+
+
+def test_download_file_from_s3_bucket_digest(tmp_path):
+    data = b'0123456789'
+    download_path = str(tmp_path / 'image.raw')
+    s3_client_mock = Mock()
+
+    def download_fileobj(bucket_name, obj_key, fileobj, Callback):
+        for start in range(0, len(data), 4):
+            chunk = data[start:start + 4]
+            Callback(len(chunk))
+            fileobj.write(chunk)
+
+    s3_client_mock.download_fileobj.side_effect = download_fileobj
+    boto3_session_mock = Mock()
+    boto3_session_mock.client.return_value = s3_client_mock
+
+    digest = ImageDigest()
+    bandwidth = Mock()
+
+    download_file_from_s3_bucket(
+        boto3_session_mock,
+        'my_bucket',
+        'image.raw',
+        download_path,
+        digest=digest,
+        bandwidth=bandwidth
+    )
+
+    with open(download_path, 'rb') as image_file:
+        assert image_file.read() == data
+
+    assert bandwidth.throttle.mock_calls == [call(4), call(4), call(2)]
+    assert digest.get_digests() == {
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'md5': hashlib.md5(data).hexdigest(),
+        'size': len(data)
+    }
+    assert not s3_client_mock.download_file.called
+
+
+def test_download_file_from_s3_bucket_resume(tmp_path):
+    data = b'0123456789'
+    download_path = str(tmp_path / 'image.raw')
+    s3_client_mock = Mock()
+    s3_client_mock.head_object.return_value = {
+        'ContentLength': len(data),
+        'ETag': '"abc"'
+    }
+
+    def get_object(Bucket, Key, Range, IfMatch):
+        start, end = Range[6:].split('-')
+        body = Mock()
+        body.iter_chunks.return_value = [data[int(start):int(end) + 1]]
+        return {'Body': body}
+
+    s3_client_mock.get_object.side_effect = get_object
+    boto3_session_mock = Mock()
+    boto3_session_mock.client.return_value = s3_client_mock
+
+    with open(download_path, 'wb') as image_file:
+        image_file.write(b'0123xx')
+
+    digest = ImageDigest()
+    bandwidth = Mock()
+
+    with open(download_path + '.download.json', 'w') as manifest:
+        manifest.write('{"validator": "\\"abc\\"", "size": 10, "offset": 4}')
+
+    download_file_from_s3_bucket(
+        boto3_session_mock,
+        'my_bucket',
+        'image.raw',
+        download_path,
+        resume=True,
+        part_size=4,
+        digest=digest,
+        bandwidth=bandwidth
+    )
+
+    with open(download_path, 'rb') as image_file:
+        assert image_file.read() == data
+
+    assert sorted(bandwidth.throttle.mock_calls) == [call(2), call(4)]
+
+    assert digest.get_digests() == {
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'md5': hashlib.md5(data).hexdigest(),
+        'size': len(data)
+    }
+
+    assert not os.path.exists(download_path + '.download.json')
+    assert sorted(
+        call_args[1]['Range']
+        for call_args in s3_client_mock.get_object.call_args_list
+    ) == ['bytes=4-7', 'bytes=8-9']
+    s3_client_mock.get_object.assert_any_call(
+        Bucket='my_bucket',
+        Key='image.raw',
+        Range='bytes=8-9',
+        IfMatch='"abc"'
+    )
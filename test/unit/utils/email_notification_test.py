@@ -1,6 +1,12 @@
-from unittest.mock import patch, MagicMock
+import time
 
-from mash.utils.email_notification import EmailNotification
+from smtplib import SMTPServerDisconnected
+from unittest.mock import call, patch, MagicMock
+
+from mash.utils.email_notification import (
+    EmailNotification,
+    NotificationQueue
+)
 
 
 @patch('mash.utils.email_notification.smtplib')
@@ -50,3 +56,96 @@ def test_send_email_notification(mock_smtp):
     log.warning.assert_called_once_with(
         'Unable to send notification email: Broke!'
     )
+
+
+@patch('mash.utils.email_notification.smtplib')
+def test_send_email_persistent_session(mock_smtp):
+    smtp_server = MagicMock()
+    mock_smtp.SMTP.return_value = smtp_server
+    log = MagicMock()
+
+    notif_class = EmailNotification(
+        'localhost', 25, 'user@fake.com', 'super.secret', False,
+        log_callback=log
+    )
+
+    notif_class.send_notification('Job 1', 'Subject', 'test@fake.com')
+    notif_class.send_notification('Job 2', 'Subject', 'test@fake.com')
+
+    assert mock_smtp.SMTP.call_count == 1
+    smtp_server.login.assert_called_once_with('user@fake.com', 'super.secret')
+    assert smtp_server.send_message.call_count == 2
+
+    # Reconnect if the server closed the session
+    smtp_server.send_message.side_effect = [
+        SMTPServerDisconnected('Closed'), None
+    ]
+    notif_class.send_notification('Job 3', 'Subject', 'test@fake.com')
+
+    assert mock_smtp.SMTP.call_count == 2
+    assert smtp_server.send_message.call_count == 4
+    assert not log.warning.called
+
+    notif_class.close()
+    smtp_server.quit.assert_called_once_with()
+
+
+def test_notification_queue():
+    notification = MagicMock()
+    log = MagicMock()
+    notif_queue = NotificationQueue(
+        notification, queue_size=1, log_callback=log
+    )
+
+    notif_queue.send_notification('Job 1', 'Subject', 'test@fake.com')
+    notif_queue.send_notification('Job 2', 'Subject', 'test@fake.com')
+    log.warning.assert_called_once_with(
+        'Notification queue is full, dropping notification for '
+        'test@fake.com.'
+    )
+
+    notif_queue.start()
+    notif_queue.stop()
+
+    notification.send_notification.assert_called_once_with(
+        'Job 1', 'Subject', 'test@fake.com'
+    )
+    notification.close.assert_called_once_with()
+
+
+def test_notification_queue_digest():
+    notification = MagicMock()
+    notif_queue = NotificationQueue(notification, digest_window=60)
+    notif_queue.start()
+
+    notif_queue.send_notification('Job 1', 'Subject', 'test@fake.com')
+    notif_queue.send_notification('Job 2', 'Other', 'test@fake.com')
+    notif_queue.send_notification('Job 3', 'Subject', 'other@fake.com')
+    notif_queue.stop()
+
+    notification.send_notification.assert_has_calls([
+        call(
+            'Job 1{0}Job 2'.format(NotificationQueue.digest_separator),
+            '[MASH] 2 job updates',
+            'test@fake.com'
+        ),
+        call('Job 3', 'Subject', 'other@fake.com')
+    ])
+
+
+def test_notification_queue_digest_window():
+    notification = MagicMock()
+    notif_queue = NotificationQueue(notification, digest_window=0.01)
+    notif_queue.start()
+
+    notif_queue.send_notification('Job 1', 'Subject', 'test@fake.com')
+
+    for _ in range(100):
+        if notification.send_notification.called:
+            break
+        time.sleep(0.01)
+
+    notification.send_notification.assert_called_once_with(
+        'Job 1', 'Subject', 'test@fake.com'
+    )
+    notif_queue.stop()
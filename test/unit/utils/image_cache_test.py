@@ -0,0 +1,200 @@
+import os
+import stat
+import threading
+import time
+
+from pytest import raises
+from unittest.mock import patch
+
+from mash.utils.image_cache import (
+    READ_ONLY,
+    ImageCache,
+    get_cache_key,
+    get_image_cache,
+    link_file
+)
+
+
+def write_file(path, content):
+    with open(path, 'w') as image_file:
+        image_file.write(content)
+
+
+def read_file(path):
+    with open(path) as image_file:
+        return image_file.read()
+
+
+def test_get_cache_key():
+    key = get_cache_key('url', 'image', 'checksum')
+
+    assert len(key) == 64
+    assert key == get_cache_key('url', 'image', 'checksum')
+    assert key != get_cache_key('url', 'image', 'other')
+    assert get_cache_key('a', 'bc') != get_cache_key('ab', 'c')
+
+
+def test_link_file(tmp_path):
+    source = str(tmp_path / 'source')
+    target = str(tmp_path / 'target')
+    write_file(source, 'image')
+
+    link_file(source, target)
+    assert os.path.samefile(source, target)
+
+    os.remove(target)
+    with patch('mash.utils.image_cache.os.link') as mock_link:
+        mock_link.side_effect = OSError('Invalid cross-device link')
+        link_file(source, target)
+
+    assert read_file(target) == 'image'
+    assert not os.path.exists(target + '.tmp')
+
+
+def test_get_image_cache():
+    image_cache = get_image_cache('/images/.cache')
+
+    assert image_cache.cache_directory == '/images/.cache'
+    assert get_image_cache('/images/.cache') is image_cache
+
+
+class TestImageCache(object):
+    def setup_method(self):
+        self.downloads = []
+
+    def download(self, directory):
+        def download():
+            self.downloads.append(directory)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, 'image.raw')
+            write_file(path, 'image')
+            return path
+
+        return download
+
+    def test_fetch(self, tmp_path):
+        image_cache = ImageCache(str(tmp_path / 'cache'))
+        job_1 = str(tmp_path / '1')
+        job_2 = str(tmp_path / '2')
+
+        image_1 = image_cache.fetch('key', '1', job_1, self.download(job_1))
+        image_2 = image_cache.fetch('key', '2', job_2, self.download(job_2))
+
+        assert self.downloads == [job_1]
+        assert image_1 == os.path.join(job_1, 'image.raw')
+        assert image_2 == os.path.join(job_2, 'image.raw')
+        assert os.path.samefile(image_1, image_2)
+        assert os.path.samefile(
+            image_1, str(tmp_path / 'cache' / 'key' / 'image.raw')
+        )
+        assert image_cache.get_references('key') == ['1', '2']
+
+        # The shared artifact is read only
+        assert stat.S_IMODE(os.stat(image_2).st_mode) == READ_ONLY
+
+        image_cache.release('key', '1')
+        assert image_cache.get_references('key') == ['2']
+        assert image_cache.get_references('missing') == []
+
+    def test_fetch_cached_read_only(self, tmp_path):
+        image_cache = ImageCache(str(tmp_path / 'cache'))
+        job_1 = str(tmp_path / '1')
+        cached_file = str(tmp_path / 'cache' / 'key' / 'image.raw')
+        os.makedirs(os.path.dirname(cached_file))
+        write_file(cached_file, 'image')
+
+        image_1 = image_cache.fetch('key', '1', job_1, self.download(job_1))
+
+        assert self.downloads == []
+        assert os.path.samefile(image_1, cached_file)
+        assert stat.S_IMODE(os.stat(cached_file).st_mode) == READ_ONLY
+
+    def test_fetch_metadata(self, tmp_path):
+        image_cache = ImageCache(str(tmp_path / 'cache'))
+        job_1 = str(tmp_path / '1')
+        job_2 = str(tmp_path / '2')
+
+        image_cache.fetch(
+            'key', '1', job_1, self.download(job_1),
+            metadata=lambda: {'image_digests': {'sha256': 'abc'}}
+        )
+        image_2 = image_cache.fetch(
+            'key', '2', job_2, self.download(job_2),
+            metadata=lambda: {'image_digests': {'sha256': 'def'}}
+        )
+
+        assert self.downloads == [job_1]
+        assert image_2 == os.path.join(job_2, 'image.raw')
+        assert image_cache.get_metadata('key') == {
+            'image_digests': {'sha256': 'abc'}
+        }
+        assert image_cache.get_metadata('missing') == {}
+
+    def test_fetch_coalesced(self, tmp_path):
+        image_cache = ImageCache(str(tmp_path / 'cache'))
+        started = threading.Event()
+        finish = threading.Event()
+        results = {}
+
+        def slow_download():
+            started.set()
+            finish.wait(5)
+            return self.download(str(tmp_path / '1'))()
+
+        def fetch(job_id, download):
+            results[job_id] = image_cache.fetch(
+                'key', job_id, str(tmp_path / job_id), download
+            )
+
+        leader = threading.Thread(target=fetch, args=('1', slow_download))
+        leader.start()
+        started.wait(5)
+
+        waiter = threading.Thread(
+            target=fetch, args=('2', self.download(str(tmp_path / '2')))
+        )
+        waiter.start()
+        finish.set()
+        leader.join()
+        waiter.join()
+
+        assert self.downloads == [str(tmp_path / '1')]
+        assert os.path.samefile(results['1'], results['2'])
+
+    def test_fetch_download_failed(self, tmp_path):
+        image_cache = ImageCache(str(tmp_path / 'cache'))
+
+        def download():
+            raise Exception('Download failed')
+
+        with raises(Exception):
+            image_cache.fetch('key', '1', str(tmp_path / '1'), download)
+
+        job_2 = str(tmp_path / '2')
+        image_cache.fetch('key', '2', job_2, self.download(job_2))
+        assert self.downloads == [job_2]
+
+    def test_purge(self, tmp_path):
+        download_directory = str(tmp_path)
+        image_cache = ImageCache(str(tmp_path / 'cache'))
+        job_1 = str(tmp_path / '1')
+        job_2 = str(tmp_path / '2')
+
+        assert ImageCache(str(tmp_path / 'missing')).purge(
+            download_directory, time.time()
+        ) == []
+
+        image_cache.fetch('used', '1', job_1, self.download(job_1))
+        image_cache.fetch('unused', '2', job_2, self.download(job_2))
+        os.remove(os.path.join(job_2, 'image.raw'))
+        os.rmdir(job_2)
+
+        # Entries are kept until they are older than the cutoff
+        assert image_cache.purge(download_directory, 0) == []
+        assert image_cache.get_references('unused') == []
+
+        assert image_cache.purge(
+            download_directory, time.time() + 1
+        ) == ['unused']
+        assert os.path.isdir(str(tmp_path / 'cache' / 'used'))
+        assert not os.path.exists(str(tmp_path / 'cache' / 'unused'))
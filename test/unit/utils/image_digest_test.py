@@ -0,0 +1,87 @@
+import hashlib
+
+from mash.utils.image_digest import (
+    DigestWriter,
+    ImageDigest,
+    get_multipart_etag
+)
+
+DATA = bytes(range(256)) * 40
+
+
+def test_get_multipart_etag():
+    part_md5s = [
+        hashlib.md5(DATA[:4096]).hexdigest(),
+        hashlib.md5(DATA[4096:]).hexdigest()
+    ]
+    digest = hashlib.md5(
+        hashlib.md5(DATA[:4096]).digest() + hashlib.md5(DATA[4096:]).digest()
+    )
+
+    assert get_multipart_etag(part_md5s) == digest.hexdigest() + '-2'
+
+
+class TestImageDigest(object):
+    def test_get_digests(self):
+        digest = ImageDigest()
+        digest.update(DATA[:1000])
+        digest.update(DATA[1000:])
+
+        assert digest.hexdigest() == hashlib.sha256(DATA).hexdigest()
+        assert digest.get_digests() == {
+            'sha256': hashlib.sha256(DATA).hexdigest(),
+            'md5': hashlib.md5(DATA).hexdigest(),
+            'size': len(DATA)
+        }
+
+    def test_get_digests_parts(self):
+        digest = ImageDigest(part_size=4096)
+
+        for start in range(0, len(DATA), 3000):
+            digest.update(DATA[start:start + 3000])
+
+        part_md5s = [
+            hashlib.md5(DATA[start:start + 4096]).hexdigest()
+            for start in range(0, len(DATA), 4096)
+        ]
+        digests = digest.get_digests()
+
+        assert digests['part_size'] == 4096
+        assert digests['part_md5s'] == part_md5s
+        assert digests['s3_etag'] == get_multipart_etag(part_md5s)
+
+        # Files smaller than a part are uploaded in a single request
+        digest = ImageDigest(part_size=len(DATA) + 1)
+        digest.update(DATA)
+
+        assert digest.get_digests()['s3_etag'] == hashlib.md5(DATA).hexdigest()
+
+    def test_update_file(self, tmp_path):
+        path = str(tmp_path / 'image.raw')
+        with open(path, 'wb') as image_file:
+            image_file.write(DATA)
+
+        digest = ImageDigest()
+        digest.update_file(path, 5000)
+        assert digest.size == 5000
+
+        digest.update(DATA[5000:])
+        assert digest.hexdigest() == hashlib.sha256(DATA).hexdigest()
+
+        digest = ImageDigest()
+        digest.update_file(path)
+        assert digest.get_digests()['md5'] == hashlib.md5(DATA).hexdigest()
+
+
+def test_digest_writer(tmp_path):
+    path = str(tmp_path / 'image.raw')
+    digest = ImageDigest()
+
+    with open(path, 'wb') as image_file:
+        writer = DigestWriter(image_file, digest)
+        writer.write(DATA[:5000])
+        writer.write(DATA[5000:])
+
+    with open(path, 'rb') as image_file:
+        assert image_file.read() == DATA
+    assert digest.hexdigest() == hashlib.sha256(DATA).hexdigest()
@@ -0,0 +1,122 @@
+import hashlib
+import threading
+
+from pytest import raises
+
+from mash.mash_exceptions import MashImageStreamException
+from mash.utils.image_stream import (
+    ImageStreamReader,
+    ImageStreamWriter,
+    get_stream_file
+)
+from mash.utils.mash_utils import load_json
+
+DATA = bytes(range(256)) * 40
+
+
+def get_digests(data):
+    return {'sha256': hashlib.sha256(data).hexdigest(), 'size': len(data)}
+
+
+def test_get_stream_file():
+    assert get_stream_file('/images/1/image.raw') == \
+        '/images/1/image.raw.stream.json'
+
+
+class TestImageStreamWriter(object):
+    def test_update(self, tmp_path):
+        image_file = str(tmp_path / 'image.raw')
+        writer = ImageStreamWriter(image_file, interval=60)
+        writer.start()
+
+        assert load_json(get_stream_file(image_file)) == {
+            'size': None,
+            'available': 0,
+            'done': False,
+            'digests': None,
+            'error': None
+        }
+
+        # The size is saved right away, progress after the interval
+        writer.update(1000, len(DATA))
+        writer.update(2000, len(DATA))
+        state = load_json(get_stream_file(image_file))
+        assert (state['size'], state['available']) == (len(DATA), 1000)
+
+        writer.finish(get_digests(DATA))
+        state = load_json(get_stream_file(image_file))
+        assert state['done']
+        assert state['available'] == len(DATA)
+
+        writer.fail('Download failed')
+        assert load_json(get_stream_file(image_file))['error'] == \
+            'Download failed'
+
+
+class TestImageStreamReader(object):
+    def setup_method(self):
+        self.image_file = None
+
+    def get_writer(self, tmp_path):
+        self.image_file = str(tmp_path / 'image.raw')
+        writer = ImageStreamWriter(self.image_file, interval=0)
+        writer.start()
+        return writer
+
+    def test_read(self, tmp_path):
+        writer = self.get_writer(tmp_path)
+        reader = ImageStreamReader(self.image_file, poll_interval=0.01)
+
+        def write():
+            with open(self.image_file, 'r+b') as image:
+                for start in range(0, len(DATA), 3000):
+                    image.write(DATA[start:start + 3000])
+                    image.flush()
+                    writer.update(image.tell(), len(DATA))
+
+            writer.finish(get_digests(DATA))
+
+        thread = threading.Thread(target=write)
+        thread.start()
+
+        with reader:
+            assert reader.read() == DATA
+            assert reader.read(10) == b''
+            assert reader.size == len(DATA)
+
+        thread.join()
+        assert reader.digests == get_digests(DATA)
+        assert reader.tell() == len(DATA)
+
+    def test_read_checksum_mismatch(self, tmp_path):
+        writer = self.get_writer(tmp_path)
+
+        with open(self.image_file, 'wb') as image:
+            image.write(DATA)
+
+        writer.finish(get_digests(DATA[1:] + b'x'))
+
+        with ImageStreamReader(self.image_file) as reader:
+            assert reader.get_size() == len(DATA)
+            with raises(MashImageStreamException):
+                reader.read()
+
+    def test_read_failed(self, tmp_path):
+        writer = self.get_writer(tmp_path)
+        writer.fail('Connection reset')
+
+        with ImageStreamReader(self.image_file) as reader:
+            with raises(MashImageStreamException) as error:
+                reader.read(10)
+
+        assert 'Connection reset' in str(error.value)
+
+    def test_read_stalled(self, tmp_path):
+        self.get_writer(tmp_path)
+
+        with ImageStreamReader(
+            self.image_file, poll_interval=0.01, stall_timeout=0.05
+        ) as reader:
+            assert not reader.seekable()
+            with raises(MashImageStreamException):
+                reader.read(10)
@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 from mash.utils.json_format import JsonFormat
 
 
@@ -20,3 +22,14 @@ class TestJsonFormat(object):
             JsonFormat.json_message(message)
         )
         assert dump_load == message
+
+    def test_json_message_compact(self):
+        message = {'b': [1, 2], 'a': {'c': None}, 1: True}
+        assert JsonFormat.json_message(message) == \
+            '{"1":true,"a":{"c":null},"b":[1,2]}'
+
+    @patch('mash.utils.json_format.orjson', None)
+    def test_json_message_no_orjson(self):
+        message = {'b': [1, 2], 'a': {'c': None}}
+        assert JsonFormat.json_message(message) == \
+            '{"a":{"c":null},"b":[1,2]}'
@@ -17,6 +17,7 @@
 #
 
 import io
+import os
 
 from pytest import raises
 from unittest.mock import call, MagicMock, patch
@@ -33,8 +34,9 @@ from mash.utils.mash_utils import (
     remove_file,
     persist_json,
     load_json,
-    restart_job,
-    restart_jobs,
+    get_download_manifest,
+    persist_download_manifest,
+    remove_download_manifest,
     handle_request,
     setup_logfile,
     setup_rabbitmq_log_handler,
@@ -127,14 +129,20 @@ def test_remove_file(mock_remove):
     mock_remove.assert_called_once_with('job-test.json')
 
 
-def test_persist_json():
+@patch('mash.utils.mash_utils.os.replace')
+@patch('mash.utils.mash_utils.os.fsync')
+def test_persist_json(mock_fsync, mock_replace):
     with patch('builtins.open', create=True) as mock_open:
         mock_open.return_value = MagicMock(spec=io.IOBase)
 
         persist_json('tmp-dir/job-1.json', {'id': '1'})
 
+        mock_open.assert_called_once_with('tmp-dir/job-1.json.tmp', 'w')
         file_handle = mock_open.return_value.__enter__.return_value
-        file_handle.write.assert_called_with('{\n    "id": "1"\n}')
+        file_handle.write.assert_called_with('{"id":"1"}')
+        mock_replace.assert_called_once_with(
+            'tmp-dir/job-1.json.tmp', 'tmp-dir/job-1.json'
+        )
 
 
 @patch('mash.utils.mash_utils.json.load')
@@ -152,29 +160,27 @@ def test_load_json(mock_load_json):
     assert data['id'] == '123'
 
 
-@patch('mash.utils.mash_utils.load_json')
-def test_restart_job(mock_json_load):
-    mock_json_load.return_value = {'id': '123'}
-    callback = MagicMock()
+def test_download_manifest(tmp_path):
+    download_path = str(tmp_path / 'image.raw')
+    manifest = {'validator': '"abc"', 'size': 10, 'offset': 5}
 
-    restart_job('tmp/job-123.json', callback)
-    mock_json_load.assert_called_once_with(
-        'tmp/job-123.json'
-    )
-    callback.assert_called_once_with({'id': '123'})
+    persist_download_manifest(download_path, manifest)
+    assert get_download_manifest(download_path, '"abc"', 10) is None
 
+    with open(download_path, 'wb') as image_file:
+        image_file.write(b'12345')
 
-@patch('mash.utils.mash_utils.restart_job')
-@patch('mash.utils.mash_utils.os.listdir')
-def test_restart_jobs(mock_os_listdir, mock_restart_job):
-    mock_os_listdir.return_value = ['job-123.json']
-    callback = MagicMock()
+    assert get_download_manifest(download_path, '"abc"', 10) == manifest
+    assert get_download_manifest(download_path, '"def"', 10) is None
+    assert get_download_manifest(download_path, '"abc"', 20) is None
 
-    restart_jobs('tmp/', callback)
-    mock_restart_job.assert_called_once_with(
-        'tmp/job-123.json',
-        callback
-    )
+    with open(download_path + '.download.json', 'w') as manifest_file:
+        manifest_file.write('{')
+
+    assert get_download_manifest(download_path, '"abc"', 10) is None
+
+    remove_download_manifest(download_path)
+    assert not os.path.exists(download_path + '.download.json')
 
 
 @patch('mash.utils.mash_utils.requests')
@@ -195,9 +201,11 @@ def test_handle_request_failed(mock_requests):
     response.json.return_value = {}
     mock_requests.get.return_value = response
 
-    with raises(MashException):
+    with raises(MashException) as error:
         handle_request('localhost', '/jobs', 'get')
 
+    assert error.value.status_code == 400
+
 
 @patch('mash.utils.mash_utils.logging')
 @patch('mash.utils.mash_utils.os')
@@ -230,7 +238,9 @@ def test_setup_rabbitmq_log_handler(mock_rabbit, mock_logging):
         host='localhost',
         username='user1',
         password='pass',
-        routing_key='mash.logger'
+        routing_key='mash.logger',
+        buffer_size=10000,
+        level=0
     )
     handler.setFormatter.assert_called_once_with(formatter)
 
@@ -0,0 +1,79 @@
+import gzip
+import msgpack
+
+from unittest.mock import patch
+from pytest import raises
+
+from mash.mash_exceptions import MashConfigException
+from mash.utils.message_format import MessageFormat
+
+
+class TestMessageFormat(object):
+    def setup_method(self):
+        self.data = {
+            'test_result': {
+                'id': '1',
+                'status': 'success',
+                'test_results': {'tests': [{'name': 'test_sles'}]}
+            }
+        }
+
+    def test_json(self):
+        message_format = MessageFormat()
+
+        body = message_format.dumps(self.data)
+        assert body == (
+            '{"test_result":{"id":"1","status":"success",'
+            '"test_results":{"tests":[{"name":"test_sles"}]}}}'
+        )
+        assert message_format.properties == {
+            'content_type': 'application/json'
+        }
+        assert MessageFormat.loads(body, message_format.properties) == \
+            self.data
+
+    def test_msgpack_gzip(self):
+        message_format = MessageFormat('msgpack', 'gzip')
+
+        body = message_format.dumps(self.data)
+        assert msgpack.unpackb(gzip.decompress(body)) == self.data
+        assert message_format.properties == {
+            'content_type': 'application/msgpack',
+            'content_encoding': 'gzip'
+        }
+        assert MessageFormat.loads(body, message_format.properties) == \
+            self.data
+
+    def test_json_gzip(self):
+        message_format = MessageFormat('json', 'gzip')
+        body = message_format.dumps(self.data)
+        assert MessageFormat.loads(body, message_format.properties) == \
+            self.data
+
+    def test_loads_decoded_body(self):
+        # Client auto decodes binary bodies that are valid utf-8
+        body = msgpack.packb(100).decode('utf-8')
+        assert MessageFormat.loads(
+            body, {'content_type': 'application/msgpack'}
+        ) == 100
+
+    def test_loads_no_properties(self):
+        assert MessageFormat.loads('{"id": "1"}') == {'id': '1'}
+        assert MessageFormat.loads(
+            '{"id": "1"}', {'content_encoding': 'utf-8'}
+        ) == {'id': '1'}
+
+    def test_invalid_format(self):
+        with raises(MashConfigException):
+            MessageFormat('xml')
+
+        with raises(MashConfigException):
+            MessageFormat('json', 'bz2')
+
+    @patch('mash.utils.message_format.msgpack', None)
+    def test_msgpack_not_installed(self):
+        with raises(MashConfigException):
+            MessageFormat('msgpack')
+
+        with raises(MashConfigException):
+            MessageFormat.loads(b'', {'content_type': 'application/msgpack'})
@@ -0,0 +1,91 @@
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+from pytest import raises
+
+from mash.utils.metrics import MetricsRegistry, start_metrics_server
+
+
+class TestMetricsRegistry(object):
+    def setup_method(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter(self):
+        counter = self.registry.counter(
+            'mash_job_failures_total', 'Failed jobs.', ['cloud']
+        )
+        counter.inc(cloud='ec2')
+        counter.inc(2, cloud='ec2')
+        counter.inc(cloud='azure')
+
+        assert self.registry.counter(
+            'mash_job_failures_total', 'Failed jobs.', ['cloud']
+        ) is counter
+        assert self.registry.render() == (
+            '# HELP mash_job_failures_total Failed jobs.\n'
+            '# TYPE mash_job_failures_total counter\n'
+            'mash_job_failures_total{cloud="azure"} 1.0\n'
+            'mash_job_failures_total{cloud="ec2"} 3.0\n'
+        )
+
+        with raises(ValueError):
+            counter.inc(region='us-east-1')
+
+    def test_gauge(self):
+        gauge = self.registry.gauge('mash_busy', 'Busy threads.')
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+        assert 'mash_busy 1.0\n' in self.registry.render()
+
+        gauge.set(5)
+        assert 'mash_busy 5.0\n' in self.registry.render()
+
+        gauge.set_function(lambda: 7)
+        assert 'mash_busy 7.0\n' in self.registry.render()
+
+    def test_histogram(self):
+        histogram = self.registry.histogram(
+            'mash_duration_seconds', 'Duration.', ['cloud'],
+            buckets=[1, 10]
+        )
+        histogram.observe(0.5, cloud='ec2')
+        histogram.observe(5, cloud='ec2')
+        histogram.observe(50, cloud='ec2')
+
+        output = self.registry.render()
+        assert 'mash_duration_seconds_bucket{cloud="ec2",le="1.0"} 1.0' \
+            in output
+        assert 'mash_duration_seconds_bucket{cloud="ec2",le="10.0"} 2.0' \
+            in output
+        assert 'mash_duration_seconds_bucket{cloud="ec2",le="+Inf"} 3.0' \
+            in output
+        assert 'mash_duration_seconds_sum{cloud="ec2"} 55.5' in output
+        assert 'mash_duration_seconds_count{cloud="ec2"} 3.0' in output
+
+    def test_label_escaping(self):
+        counter = self.registry.counter('mash_test', 'Test.', ['name'])
+        counter.inc(name='a"b\\c\nd')
+        assert 'mash_test{name="a\\"b\\\\c\\nd"} 1.0' in \
+            self.registry.render()
+
+
+def test_start_metrics_server():
+    registry = MetricsRegistry()
+    registry.counter('mash_test_total', 'Test.').inc()
+
+    server = start_metrics_server(registry, '127.0.0.1', 0)
+    url = 'http://127.0.0.1:{0}'.format(server.server_address[1])
+
+    try:
+        with urlopen(url + '/metrics') as response:
+            assert response.headers['Content-Type'].startswith(
+                'text/plain; version=0.0.4'
+            )
+            assert b'mash_test_total 1.0' in response.read()
+
+        with raises(HTTPError):
+            urlopen(url + '/other')
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,96 @@
+from unittest.mock import Mock, patch
+
+from mash.utils.rate_governor import RateGovernor, TokenBucket
+
+
+class TestTokenBucket(object):
+    def setup_method(self):
+        self.bucket = TokenBucket(10, 2)
+
+    @patch('mash.utils.rate_governor.time.sleep')
+    def test_acquire(self, mock_sleep):
+        self.bucket.acquire()
+        self.bucket.acquire()
+        assert not mock_sleep.called
+
+        self.bucket.acquire()
+        wait = mock_sleep.call_args[0][0]
+        assert 0 < wait <= 0.1
+
+    @patch('mash.utils.rate_governor.time.sleep')
+    def test_acquire_tokens(self, mock_sleep):
+        self.bucket.acquire(7)
+        wait = mock_sleep.call_args[0][0]
+        assert 0.4 < wait <= 0.5
+
+    def test_set_rate(self):
+        self.bucket.set_rate(100, 1)
+        assert self.bucket.rate == 100
+        assert self.bucket.max_rate == 100
+        assert self.bucket.burst == 1
+        assert self.bucket.tokens <= 1
+
+    def test_throttled_and_succeeded(self):
+        self.bucket.throttled()
+        assert self.bucket.rate == 5
+        assert self.bucket.tokens <= 0
+
+        for index in range(5):
+            self.bucket.throttled()
+        assert self.bucket.rate == 0.5
+
+        for index in range(100):
+            self.bucket.succeeded()
+        assert self.bucket.rate == 10
+
+
+class TestRateGovernor(object):
+    def setup_method(self):
+        self.governor = RateGovernor(rate=10, burst=20, max_attempts=3)
+
+    def test_configure_defaults(self):
+        self.governor.configure()
+        assert self.governor.rate == 20
+        assert self.governor.burst == 40
+        assert self.governor.max_attempts == 10
+
+    def test_get_bucket(self):
+        bucket = self.governor.get_bucket('123456', 'us-east-1')
+
+        assert bucket.max_rate == 10
+        assert bucket.burst == 20
+        assert self.governor.get_bucket('123456', 'us-east-1') is bucket
+        assert self.governor.get_bucket('123456', 'us-east-2') is not bucket
+
+    def test_get_client_config(self):
+        config = self.governor.get_client_config()
+        assert config.retries == {'max_attempts': 3, 'mode': 'adaptive'}
+
+    def test_needs_retry(self):
+        bucket = Mock()
+
+        self.governor._needs_retry(bucket, response=None)
+        assert not bucket.throttled.called
+
+        self.governor._needs_retry(
+            bucket,
+            response=(Mock(), {'Error': {'Code': 'RequestLimitExceeded'}})
+        )
+        bucket.throttled.assert_called_once_with()
+
+        self.governor._needs_retry(bucket, response=(Mock(), {}))
+        bucket.succeeded.assert_called_once_with()
+
+    def test_register(self):
+        client = Mock()
+        self.governor.register(client, '123456', 'us-east-1')
+        bucket = self.governor.get_bucket('123456', 'us-east-1')
+
+        calls = client.meta.events.register.call_args_list
+        assert [args[0] for args, kwargs in calls] == [
+            'before-send', 'needs-retry'
+        ]
+
+        before_send = calls[0][0][1]
+        assert before_send(request=Mock()) is None
+        assert bucket.tokens < 20
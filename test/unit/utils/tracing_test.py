@@ -0,0 +1,128 @@
+import json
+
+from pytest import raises
+from unittest.mock import Mock, patch
+
+from mash.mash_exceptions import MashTracingException
+from mash.utils.tracing import (
+    FileSpanExporter,
+    NullSpanExporter,
+    Tracer,
+    format_traceparent,
+    get_span_exporter,
+    parse_traceparent
+)
+
+TRACE_ID = '0123456789abcdef0123456789abcdef'
+SPAN_ID = '0123456789abcdef'
+
+
+def test_parse_traceparent():
+    traceparent = format_traceparent(TRACE_ID, SPAN_ID)
+
+    assert traceparent == '00-{0}-{1}-01'.format(TRACE_ID, SPAN_ID)
+    assert parse_traceparent(traceparent) == (TRACE_ID, SPAN_ID)
+    assert parse_traceparent(traceparent.encode()) == (TRACE_ID, SPAN_ID)
+    assert parse_traceparent('invalid') == (None, None)
+    assert parse_traceparent(None) == (None, None)
+
+
+def test_file_span_exporter(tmp_path):
+    path = str(tmp_path / 'spans.log')
+    exporter = FileSpanExporter(path)
+
+    exporter.export([{'name': 'one'}])
+    exporter.export([{'name': 'two'}])
+    exporter.close()
+
+    with open(path) as spans:
+        assert [json.loads(line) for line in spans] == [
+            {'name': 'one'}, {'name': 'two'}
+        ]
+
+
+def test_get_span_exporter():
+    assert isinstance(get_span_exporter('file', 'spans.log'), FileSpanExporter)
+    assert isinstance(get_span_exporter('none', 'spans.log'), NullSpanExporter)
+
+    with raises(MashTracingException):
+        get_span_exporter('jaeger', 'spans.log')
+
+
+class TestTracer(object):
+    def setup_method(self):
+        self.exporter = Mock()
+        self.log = Mock()
+        self.tracer = Tracer('test', self.exporter, log=self.log)
+
+    def get_span(self):
+        return self.exporter.export.call_args[0][0][0]
+
+    def test_record_span(self):
+        traceparent = self.tracer.record_span(
+            'queue_wait',
+            format_traceparent(TRACE_ID, SPAN_ID),
+            10.0,
+            12.5,
+            attributes={'job_id': '1'}
+        )
+
+        span = self.get_span()
+        assert span == {
+            'trace_id': TRACE_ID,
+            'span_id': span['span_id'],
+            'parent_id': SPAN_ID,
+            'name': 'queue_wait',
+            'service': 'test',
+            'start': 10.0,
+            'duration': 2.5,
+            'attributes': {'job_id': '1'}
+        }
+        assert traceparent == format_traceparent(TRACE_ID, span['span_id'])
+
+    def test_record_span_new_trace(self):
+        self.tracer.record_span('queue_wait', None, 10.0, 12.0)
+
+        span = self.get_span()
+        assert len(span['trace_id']) == 32
+        assert span['parent_id'] is None
+
+    @patch('mash.utils.tracing.time.time')
+    def test_start_span(self, mock_time):
+        mock_time.side_effect = [10.0, 11.0]
+
+        with self.tracer.start_span(
+            'publish', format_traceparent(TRACE_ID, SPAN_ID)
+        ) as span:
+            assert parse_traceparent(span.traceparent) == (
+                TRACE_ID, span.span_id
+            )
+            assert not self.exporter.export.called
+
+        exported = self.get_span()
+        assert exported['span_id'] == span.span_id
+        assert exported['duration'] == 1.0
+
+        # A span is only exported once
+        span.end()
+        assert self.exporter.export.call_count == 1
+
+    def test_start_span_error(self):
+        with raises(ValueError):
+            with self.tracer.start_span('publish', None):
+                raise ValueError('Broken')
+
+        assert self.get_span()['attributes'] == {'error': 'Broken'}
+
+    def test_export_error(self):
+        self.exporter.export.side_effect = OSError('Disk full')
+
+        self.tracer.record_span('queue_wait', None, 10.0, 12.0)
+
+        self.log.warning.assert_called_once_with(
+            'Unable to export trace span: Disk full'
+        )
+
+    def test_close(self):
+        self.tracer.close()
+        self.exporter.close.assert_called_once_with()